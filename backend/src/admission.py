@@ -0,0 +1,303 @@
+import asyncio
+import concurrent.futures
+import heapq
+import itertools
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+# Request classes, from the X-Request-Class header
+INTERACTIVE = "interactive"
+BATCH = "batch"
+
+
+class Shed(Exception):
+    """A request turned away by admission control, with the HTTP status and Retry-After to send."""
+
+    def __init__(self, status_code: int, retry_after: int, reason: str):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class _Waiter:
+    __slots__ = ("tenant", "klass", "enqueued", "future", "timer")
+
+    def __init__(self, tenant: str, klass: str, future: asyncio.Future):
+        self.tenant = tenant
+        self.klass = klass
+        self.enqueued = time.monotonic()
+        self.future = future
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class _ClassStats:
+    __slots__ = ("admitted", "queued", "shed", "total_wait_ms", "recent_wait_ms")
+
+    def __init__(self):
+        self.admitted = 0
+        self.queued = 0
+        self.shed: Dict[str, int] = {}
+        self.total_wait_ms = 0.0
+        self.recent_wait_ms: deque = deque(maxlen=1000)
+
+    def summary(self) -> Dict[str, Any]:
+        recent = sorted(self.recent_wait_ms)
+
+        def pct(q: float) -> Optional[float]:
+            return round(recent[min(len(recent) - 1, int(q * len(recent)))], 1) if recent else None
+
+        return {
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "shed": dict(self.shed),
+            "mean_wait_ms": round(self.total_wait_ms / self.admitted, 1) if self.admitted else None,
+            "p50_wait_ms": pct(0.5),
+            "p95_wait_ms": pct(0.95),
+        }
+
+
+class AdmissionController:
+    """
+    Admission control for the expensive endpoints (confirm / translate).
+
+    At most max_concurrency requests run at once, and at most
+    tenant_concurrency of them per tenant. Requests over those limits wait
+    in a weighted fair queue: every (tenant, class) pair is a flow, each
+    request gets a virtual finish tag of max(virtual time, the flow's last
+    tag) + 1 / weight of its class, and the lowest tag whose tenant is under
+    its limit runs next. Flows therefore share capacity in proportion to
+    their class weights (interactive ahead of batch) and a tenant with a
+    bulk job can't starve the others.
+
+    Requests are shed rather than queued indefinitely: with 429 when their
+    tenant already has tenant_queue requests waiting, with 503 when the
+    whole queue is full or when they waited longer than their class's
+    max_wait. Retry-After is estimated from the recent service time.
+
+    The controller lives on the event loop; waiting requests hold no thread.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 16,
+        tenant_concurrency: int = 4,
+        max_queue: int = 256,
+        tenant_queue: int = 64,
+        weights: Optional[Dict[str, float]] = None,
+        max_wait: Optional[Dict[str, float]] = None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.tenant_concurrency = tenant_concurrency
+        self.max_queue = max_queue
+        self.tenant_queue = tenant_queue
+        self.weights = weights or {INTERACTIVE: 4.0, BATCH: 1.0}
+        self.max_wait = max_wait or {INTERACTIVE: 10.0, BATCH: 120.0}
+
+        self._running = 0
+        self._running_by_tenant: Dict[str, int] = {}
+        self._queued_by_tenant: Dict[str, int] = {}
+        self._queue: List[Tuple[float, int, _Waiter]] = []
+        self._queued = 0
+        self._seq = itertools.count()
+        self._virtual_time = 0.0
+        self._last_tag: Dict[Tuple[str, str], float] = {}
+        # Exponentially weighted mean time a request holds its slot
+        self._service_s = 1.0
+        self._stats: Dict[str, _ClassStats] = {klass: _ClassStats() for klass in self.weights}
+        self._lock = threading.Lock()
+
+    @property
+    def classes(self) -> Tuple[str, ...]:
+        return tuple(self.weights)
+
+    def retry_after(self) -> int:
+        """Seconds until the current queue has likely drained."""
+        return max(1, math.ceil(self._service_s * (self._queued + 1) / self.max_concurrency))
+
+    def _can_run(self, tenant: str) -> bool:
+        return self._running < self.max_concurrency and self._running_by_tenant.get(tenant, 0) < self.tenant_concurrency
+
+    def _start(self, tenant: str, klass: str, waited_s: float) -> None:
+        self._running += 1
+        self._running_by_tenant[tenant] = self._running_by_tenant.get(tenant, 0) + 1
+        stats = self._stats[klass]
+        stats.admitted += 1
+        stats.total_wait_ms += waited_s * 1000
+        stats.recent_wait_ms.append(waited_s * 1000)
+
+    def _shed(self, klass: str, status_code: int, reason: str) -> Shed:
+        shed = self._stats[klass].shed
+        shed[str(status_code)] = shed.get(str(status_code), 0) + 1
+        return Shed(status_code, self.retry_after(), reason)
+
+    def _dequeue(self, waiter: _Waiter) -> None:
+        self._queued -= 1
+        left = self._queued_by_tenant[waiter.tenant] - 1
+        if left:
+            self._queued_by_tenant[waiter.tenant] = left
+        else:
+            del self._queued_by_tenant[waiter.tenant]
+        if waiter.timer is not None:
+            waiter.timer.cancel()
+
+    def _dispatch(self) -> None:
+        # Lowest finish tag first, skipping tenants at their limit; waiters
+        # that expired or gave up are still in the heap and dropped here
+        skipped = []
+        while self._queue and self._running < self.max_concurrency:
+            tag, seq, waiter = heapq.heappop(self._queue)
+            if waiter.future.done():
+                continue
+            if not self._can_run(waiter.tenant):
+                skipped.append((tag, seq, waiter))
+                continue
+            self._dequeue(waiter)
+            self._virtual_time = max(self._virtual_time, tag)
+            self._start(waiter.tenant, waiter.klass, time.monotonic() - waiter.enqueued)
+            waiter.future.set_result(None)
+        for entry in skipped:
+            heapq.heappush(self._queue, entry)
+
+    def _expire(self, waiter: _Waiter) -> None:
+        with self._lock:
+            if waiter.future.done():
+                return
+            self._dequeue(waiter)
+            waiter.future.set_exception(
+                self._shed(waiter.klass, 503, f"Waited longer than {self.max_wait[waiter.klass]:g}s for capacity")
+            )
+
+    async def acquire(self, tenant: str, klass: str) -> float:
+        """
+        Wait for a slot for tenant in class klass (one of classes); returns
+        the time spent queued in seconds. Raises Shed when the request is
+        turned away. Every successful acquire must be followed by release().
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if not self._queued and self._can_run(tenant):
+                self._start(tenant, klass, 0.0)
+                return 0.0
+            if self._queued_by_tenant.get(tenant, 0) >= self.tenant_queue:
+                raise self._shed(klass, 429, "Too many queued requests for this client")
+            if self._queued >= self.max_queue:
+                raise self._shed(klass, 503, "Admission queue is full")
+
+            waiter = _Waiter(tenant, klass, loop.create_future())
+            flow = (tenant, klass)
+            tag = max(self._virtual_time, self._last_tag.get(flow, 0.0)) + 1.0 / self.weights[klass]
+            self._last_tag[flow] = tag
+            heapq.heappush(self._queue, (tag, next(self._seq), waiter))
+            self._queued += 1
+            self._queued_by_tenant[tenant] = self._queued_by_tenant.get(tenant, 0) + 1
+            self._stats[klass].queued += 1
+            waiter.timer = loop.call_later(self.max_wait[klass], self._expire, waiter)
+            # A slot may be free but held back for another tenant's turn
+            self._dispatch()
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            # Client went away while queued (or just after being admitted)
+            with self._lock:
+                if waiter.future.cancelled():
+                    self._dequeue(waiter)
+                elif waiter.future.exception() is None:
+                    self._release(tenant, None)
+                self._dispatch()
+            raise
+        return time.monotonic() - waiter.enqueued
+
+    def _release(self, tenant: str, service_s: Optional[float]) -> None:
+        self._running -= 1
+        left = self._running_by_tenant[tenant] - 1
+        if left:
+            self._running_by_tenant[tenant] = left
+        else:
+            del self._running_by_tenant[tenant]
+        if service_s is not None:
+            self._service_s = 0.9 * self._service_s + 0.1 * service_s
+        if not self._queued:
+            # Idle: restart virtual time so old tags don't carry over
+            self._virtual_time = 0.0
+            self._last_tag.clear()
+
+    def release(self, tenant: str, service_s: Optional[float] = None) -> None:
+        """Free the slot of a finished request (service_s: how long it ran) and admit the next ones."""
+        with self._lock:
+            self._release(tenant, service_s)
+            self._dispatch()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "running": self._running,
+                "queued": self._queued,
+                "running_by_tenant": dict(self._running_by_tenant),
+                "queued_by_tenant": dict(self._queued_by_tenant),
+                "mean_service_s": round(self._service_s, 3),
+                "classes": {klass: stats.summary() for klass, stats in self._stats.items()},
+            }
+
+
+class AdmissionLease:
+    """
+    The slot of one admitted request. Work the request starts in the
+    background (a speculative translation) can hold the slot past the
+    response with hold_until(); it is given back to the controller once the
+    request and everything holding it are done. release() may be called
+    from any thread.
+    """
+
+    def __init__(self, controller: AdmissionController, tenant: str, loop: asyncio.AbstractEventLoop):
+        self.controller = controller
+        self.tenant = tenant
+        self._loop = loop
+        self._holders = 1
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def hold_until(self, future: "concurrent.futures.Future") -> None:
+        """Keep the slot until future is done (however it ends)."""
+        with self._lock:
+            self._holders += 1
+        future.add_done_callback(lambda _: self.release())
+
+    def release(self) -> None:
+        with self._lock:
+            self._holders -= 1
+            if self._holders:
+                return
+        service_s = time.monotonic() - self._started
+        # The controller's waiters are futures of its event loop
+        try:
+            on_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            self.controller.release(self.tenant, service_s)
+        elif not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self.controller.release, self.tenant, service_s)
+
+
+_admission_controller: Optional[AdmissionController] = None
+
+
+def get_admission_controller() -> AdmissionController:
+    """Process-wide admission controller, configured from settings on first use."""
+    global _admission_controller
+    if _admission_controller is None:
+        from .config import settings
+        _admission_controller = AdmissionController(
+            max_concurrency=settings.ADMISSION_MAX_CONCURRENCY,
+            tenant_concurrency=settings.ADMISSION_TENANT_CONCURRENCY,
+            max_queue=settings.ADMISSION_MAX_QUEUE,
+            tenant_queue=settings.ADMISSION_TENANT_QUEUE,
+            weights=settings.ADMISSION_CLASS_WEIGHTS,
+            max_wait=settings.ADMISSION_MAX_WAIT_SECONDS,
+        )
+    return _admission_controller
@@ -0,0 +1,160 @@
+"""
+Offline command line entry point for the deterministic half of the engine.
+
+    python -m src.cli check ../data/tests --out out/ [--workers N] [--batfish]
+    python -m src.cli export --policy ID [--policy ID ...] [--context-id ID] -o policies.tar.gz
+    python -m src.cli order ir.json --hits hit-counts.csv [--context context.json]
+
+check reads IR JSON/JSONL files (bare IRs, stored translations or
+data/tests suites), runs them through lint -> safety -> compile without
+the web server, and writes per-vendor configs plus warning reports.
+export streams stored policies (configs, IR and reports) into an archive.
+order proposes a rule order from hit counts (or traffic logs) that lowers
+the expected match depth without changing any flow's outcome, and prints
+the PAN-OS move commands.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+from typing import List, Optional
+
+from .engine.batch import BatchChecker, iter_items
+from .engine.batfish.answers import DEFAULT_PROFILE, PROFILES
+
+
+def _check(args: argparse.Namespace) -> int:
+    default_context = None
+    if args.context:
+        with open(args.context, "r") as f:
+            default_context = json.load(f)
+
+    checker = BatchChecker(
+        out_dir=args.out,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        batfish=args.batfish,
+        batfish_profile=args.profile,
+        default_context=default_context,
+    )
+
+    for record in checker.run(iter_items(args.inputs, samples_dir=args.samples_dir)):
+        if record["status"] != "ok":
+            print(f"[{record['status'].upper()}] {record['id']} ({record['source']}): "
+                  f"{record.get('error') or '; '.join(record.get('safety_warnings') or [])}", file=sys.stderr)
+
+    summary = checker.summary
+    rate = summary["items"] / summary["elapsed_s"] if summary["elapsed_s"] else 0.0
+    print(json.dumps({**summary, "items_per_s": round(rate, 1)}))
+
+    failed = summary["invalid"] + summary["unsafe"]
+    if args.strict:
+        failed += summary["lint_warnings"] + summary["batfish_errors"]
+    return 1 if failed else 0
+
+
+def _export(args: argparse.Namespace) -> int:
+    from .config import BACKEND_DIR
+    from .storage.export import FORMATS, export_refs, iter_export
+    from .storage.policies import PolicyStore
+
+    if not args.policy and args.context_id is None:
+        print("export: at least one --policy or a --context-id is required", file=sys.stderr)
+        return 2
+    fmt = args.format
+    if fmt is None:
+        # From the output file name, e.g. out.zip
+        fmt = next((f for f in sorted(FORMATS, key=len, reverse=True) if args.output.endswith(f".{f}")), "tar.gz")
+
+    db = args.db or os.path.join(os.environ.get("STORAGE_DIR", os.path.join(BACKEND_DIR, "var")), "policies.sqlite3")
+    store = PolicyStore(db)
+    refs, unknown = export_refs(store, args.policy, args.context_id)
+    if unknown:
+        print(f"export: policy ID not found: {', '.join(unknown)}", file=sys.stderr)
+        return 1
+    if not refs:
+        print("export: no policies found", file=sys.stderr)
+        return 1
+
+    out = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+    try:
+        size = 0
+        for chunk in iter_export(store, refs, fmt):
+            out.write(chunk)
+            size += len(chunk)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+    print(json.dumps({"versions": len(refs), "format": fmt, "bytes": size}), file=sys.stderr)
+    return 0
+
+
+def _order(args: argparse.Namespace) -> int:
+    from .engine.ordering import optimize_rule_order, parse_hit_counts
+    from .engine.schemas import IRBuilderOutput
+
+    with open(args.ir, "r") as f:
+        data = json.load(f)
+    # A bare IR or a stored translation holding one
+    ir = IRBuilderOutput.model_validate(data.get("ir", data))
+    with open(args.hits, "r", newline="") as f:
+        hits = parse_hit_counts(f.read())
+    context = None
+    if args.context:
+        with open(args.context, "r") as f:
+            context = json.load(f)
+
+    try:
+        plan = optimize_rule_order(ir.rules, hits, context)
+    except ValueError as e:
+        print(f"order: {e}", file=sys.stderr)
+        return 1
+    for command in plan["moves"]:
+        print(command)
+    print(json.dumps({k: v for k, v in plan.items() if k not in ("order", "moves")} | {"moves": len(plan["moves"])}),
+          file=sys.stderr)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m src.cli", description="Offline firewall policy tooling.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    check = subparsers.add_parser("check", help="Lint, safety-check and compile stored IRs.")
+    check.add_argument("inputs", nargs="+", help="IR .json/.jsonl files, directories of them, or - for JSONL on stdin.")
+    check.add_argument("--out", help="Directory for <id>/<vendor>.cfg, <id>/report.json and report.jsonl.")
+    check.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count, 0 = in-process).")
+    check.add_argument("--chunk-size", type=int, default=32, help="IRs per worker task.")
+    check.add_argument("--context", help="Network context JSON for IRs that don't reference one.")
+    check.add_argument("--samples-dir", help="Where test suites' context_file entries live (default: ../samples next to the suite).")
+    check.add_argument("--batfish", action="store_true", help="Validate all compiled configs in one Batfish snapshot.")
+    check.add_argument("--profile", choices=list(PROFILES), default=DEFAULT_PROFILE, help="Batfish question profile.")
+    check.add_argument("--strict", action="store_true", help="Also fail on lint warnings and Batfish errors.")
+    check.set_defaults(func=_check)
+
+    export = subparsers.add_parser("export", help="Export stored policies as a tar/zip archive.")
+    export.add_argument("--policy", action="append", default=[], help="Policy id to export (latest version); repeatable.")
+    export.add_argument("--context-id", help="Also export every policy translated on this registered context.")
+    export.add_argument("--format", choices=["tar", "tar.gz", "zip"], help="Archive format (default: from the output name, else tar.gz).")
+    export.add_argument("-o", "--output", default="-", help="Archive path, or - for stdout.")
+    export.add_argument("--db", help="Policy store database (default: policies.sqlite3 in $STORAGE_DIR or backend/var).")
+    export.set_defaults(func=_export)
+
+    order = subparsers.add_parser("order", help="Reorder rules by hit count and print the PAN-OS move commands.")
+    order.add_argument("ir", help="IR JSON file (bare IR or a stored translation).")
+    order.add_argument("--hits", required=True, help="Hit counts: JSON {rule: hits}, a hit-count CSV export or a traffic log CSV.")
+    order.add_argument("--context", help="Network context JSON, to resolve object names to addresses.")
+    order.set_defaults(func=_order)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(name)s: %(message)s")
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
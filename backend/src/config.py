@@ -1,12 +1,111 @@
+import os
+from functools import lru_cache
 from pydantic_settings import BaseSettings
 
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 
 class Settings(BaseSettings):
     CORS_ALLOWED_ORIGINS: list[str] = []
     OPENAI_API_KEY: str
 
+    # Persistent data (registered contexts, ...)
+    STORAGE_DIR: str = os.path.join(BACKEND_DIR, "var")
+
+    # Send the agents only the context entries referenced by the policy
+    CONTEXT_PRUNING: bool = True
+
+    # "pipeline" (resolver then IR builder) or "combined" (one call for both)
+    AGENT_MODE: str = "pipeline"
+
+    # Start the full translation pipeline at confirm time, while the user reads the summary
+    SPECULATIVE_TRANSLATION: bool = True
+    SPECULATION_WORKERS: int = 8
+
+    # Confirmed sessions are kept in memory until translated: at most
+    # CONFIRM_SESSIONS_MAX, each for CONFIRM_SESSION_TTL_SECONDS after last use
+    CONFIRM_SESSIONS_MAX: int = 10000
+    CONFIRM_SESSION_TTL_SECONDS: float = 3600.0
+
+    # Default Batfish question profile: "fast" (parse issues, undefined
+    # references) or "full" (adds unused structures and rule reachability)
+    BATFISH_PROFILE: str = "fast"
+
+    # Batfish servers ("host" or "host:port"). With "affinity" routing each
+    # context sticks to one healthy server so its snapshots stay cached
+    # there; "least_loaded" picks the server with the fewest calls running.
+    # A call that times out or fails is retried on up to
+    # BATFISH_MAX_ATTEMPTS servers; servers are probed every
+    # BATFISH_HEALTH_INTERVAL seconds (0 = only through failed calls).
+    BATFISH_HOSTS: list[str] = ["localhost:9996"]
+    BATFISH_ROUTING: str = "affinity"
+    BATFISH_MAX_ATTEMPTS: int = 2
+    BATFISH_HEALTH_INTERVAL: float = 30.0
+
+    # Reuse resolver outputs of earlier, differently phrased requests on the
+    # same context once their entity mentions verify exactly
+    RESOLVER_CACHE: bool = True
+    RESOLVER_CACHE_MIN_SIMILARITY: float = 0.5
+    RESOLVER_CACHE_MIN_ENTITY_OVERLAP: float = 1.0
+
+    # Agent models from fastest to strongest. A policy starts on the tier its
+    # complexity score reaches (one threshold per tier above the first) and
+    # moves up a tier when an agent's output looks like a failure.
+    MODEL_TIERING: bool = True
+    MODEL_TIERS: list[str] = ["gpt-4o-mini", "gpt-4o"]
+    MODEL_TIER_THRESHOLDS: list[float] = [8.0]
+
+    # Responses smaller than this (bytes) are sent uncompressed; larger ones
+    # are gzip- or (with the zstandard package installed) zstd-encoded
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+
+    # Warm-up at startup: register the contexts in WARMUP_CONTEXTS_DIR and
+    # precompute their indexes and Batfish headers, open the Batfish session
+    # and optionally init a base snapshot. /health/ready is 503 until done.
+    WARMUP: bool = True
+    WARMUP_CONTEXTS_DIR: str = os.path.join(os.path.dirname(BACKEND_DIR), "data", "prod")
+    WARMUP_BATFISH: bool = True
+    WARMUP_BASE_SNAPSHOT: bool = False
+
+    # Admission control for /policies/confirm and /policies/translate: at
+    # most ADMISSION_MAX_CONCURRENCY running (ADMISSION_TENANT_CONCURRENCY per
+    # X-Tenant-ID), the rest queued fairly by X-Request-Class weight and shed
+    # with 429/503 + Retry-After when queues are full or waits too long
+    ADMISSION_CONTROL: bool = True
+    ADMISSION_MAX_CONCURRENCY: int = 16
+    ADMISSION_TENANT_CONCURRENCY: int = 4
+    ADMISSION_MAX_QUEUE: int = 256
+    ADMISSION_TENANT_QUEUE: int = 64
+    ADMISSION_CLASS_WEIGHTS: dict[str, float] = {"interactive": 4.0, "batch": 1.0}
+    ADMISSION_MAX_WAIT_SECONDS: dict[str, float] = {"interactive": 10.0, "batch": 120.0}
+
+    # Profile single /policies/translate runs (X-Profile: 1, or armed with
+    # POST /profiling/arm): cProfile, sampled stacks and tracemalloc, stored
+    # with the policy id. Requests that don't ask for it aren't affected.
+    # Off by default; with PROFILING_TOKEN set, X-Profile and /profiling
+    # also need an X-Profiling-Token header holding it.
+    PROFILING: bool = False
+    PROFILING_TOKEN: str = ""
+    PROFILING_SAMPLE_INTERVAL_MS: float = 5.0
+
+    # LLM scheduler limits (match these to the account's rate limits)
+    LLM_REQUESTS_PER_MINUTE: int = 500
+    LLM_TOKENS_PER_MINUTE: int = 200000
+    LLM_MAX_CONCURRENCY: int = 16
+    LLM_MAX_RETRIES: int = 5
+
     class Config:
         env_file = ".env"
 
 
-settings = Settings()
\ No newline at end of file
+@lru_cache
+def get_settings() -> Settings:
+    return Settings()
+
+
+def __getattr__(name):
+    # `settings` is built on first access rather than at import, so modules
+    # that import this one stay importable without a .env / API key.
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
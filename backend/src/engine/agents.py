@@ -1,16 +1,45 @@
 
-import os
 import json
-from typing import Any, Dict
+import threading
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
-from openai import OpenAI
+from .prompts import RESOLVER_SYSTEM_PROMPT, IR_BUILDER_SYSTEM_PROMPT, COMBINED_SYSTEM_PROMPT, PATCH_SYSTEM_PROMPT
+from .schemas import ResolverOutput, IRBuilderOutput, CombinedOutput
 
-from .prompts import RESOLVER_SYSTEM_PROMPT, IR_BUILDER_SYSTEM_PROMPT
-from .schemas import ResolverOutput, IRBuilderOutput
-from ..config import settings
+if TYPE_CHECKING:
+    from .scheduler import LLMScheduler
 
 
-client = OpenAI(api_key=settings.OPENAI_API_KEY)
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> "LLMScheduler":
+    """
+    Return the process-wide LLM scheduler, creating it on first use.
+    The OpenAI client and settings are only loaded here, so importing the
+    agents costs nothing until an LLM call is actually made.
+    """
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                from .scheduler import LLMScheduler
+                from ..config import settings
+
+                _scheduler = LLMScheduler(
+                    api_key=settings.OPENAI_API_KEY,
+                    requests_per_minute=settings.LLM_REQUESTS_PER_MINUTE,
+                    tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE,
+                    max_concurrency=settings.LLM_MAX_CONCURRENCY,
+                    max_retries=settings.LLM_MAX_RETRIES,
+                )
+    return _scheduler
+
+
+def current_scheduler() -> Optional["LLMScheduler"]:
+    """The LLM scheduler if one has been created, without creating it."""
+    return _scheduler
 
 
 def summarize_intent(
@@ -45,7 +74,7 @@ Communication Requirements:
         "context": context
     }
 
-    resp = client.chat.completions.create(
+    resp = get_scheduler().chat(
         model=model,
         messages=[
             {"role": "system", "content": system},
@@ -58,7 +87,7 @@ Communication Requirements:
 
 
 def resolve_policy(nl_policy: str, context: dict, model: str = "gpt-4o-mini") -> ResolverOutput:
-    response = client.responses.parse(
+    response = get_scheduler().parse(
         model=model,
         input=[
             {"role": "system", "content": RESOLVER_SYSTEM_PROMPT},
@@ -77,7 +106,7 @@ def resolve_policy(nl_policy: str, context: dict, model: str = "gpt-4o-mini") ->
 
 
 def build_ir(resolver_output: ResolverOutput, context: dict, model: str = "gpt-4o-mini") -> IRBuilderOutput:
-    response = client.responses.parse(
+    response = get_scheduler().parse(
         model=model,
         input=[
             {"role": "system", "content": IR_BUILDER_SYSTEM_PROMPT},
@@ -92,4 +121,62 @@ def build_ir(resolver_output: ResolverOutput, context: dict, model: str = "gpt-4
         text_format=IRBuilderOutput,
     )
 
-    return response.output_parsed 
\ No newline at end of file
+    return response.output_parsed
+
+
+def resolve_and_build_ir(nl_policy: str, context: dict, model: str = "gpt-4o-mini") -> CombinedOutput:
+    """
+    Single structured-output call returning both the resolver output and the IR,
+    saving a round trip and one copy of the context in the prompt.
+    """
+    response = get_scheduler().parse(
+        model=model,
+        input=[
+            {"role": "system", "content": COMBINED_SYSTEM_PROMPT},
+            {
+                "role": "user",
+                "content": json.dumps({
+                    "nl_policy": nl_policy,
+                    "context": context,
+                }),
+            },
+        ],
+        text_format=CombinedOutput,
+    )
+
+    return response.output_parsed
+
+
+def patch_translation(
+    previous_policy: str,
+    nl_policy: str,
+    edits: List[Dict[str, str]],
+    changed_entities: List[str],
+    previous: CombinedOutput,
+    context: dict,
+    model: str = "gpt-4o-mini",
+) -> CombinedOutput:
+    """
+    Update an earlier resolver output and IR for an edited policy, asking the
+    model to change only the fields the edits affect.
+    """
+    response = get_scheduler().parse(
+        model=model,
+        input=[
+            {"role": "system", "content": PATCH_SYSTEM_PROMPT},
+            {
+                "role": "user",
+                "content": json.dumps({
+                    "previous_policy": previous_policy,
+                    "nl_policy": nl_policy,
+                    "edits": edits,
+                    "changed_entities": changed_entities,
+                    "previous": previous.model_dump(),
+                    "context": context,
+                }),
+            },
+        ],
+        text_format=CombinedOutput,
+    )
+
+    return response.output_parsed
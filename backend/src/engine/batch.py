@@ -0,0 +1,286 @@
+import json
+import logging
+import os
+import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .batfish.answers import DEFAULT_PROFILE
+from .pipeline import check_and_compile
+from .rulecache import default_cache
+from .ruletable import RuleTable
+
+logger = logging.getLogger(__name__)
+
+_UNSAFE_ID_RE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+class BatchItem:
+    """One IR to check, with where it came from and the context it refers to."""
+
+    __slots__ = ("item_id", "source", "ir", "context_file", "context")
+
+    def __init__(self, item_id: str, source: str, ir: Any,
+                 context_file: Optional[str] = None, context: Optional[Dict[str, Any]] = None):
+        self.item_id = item_id
+        self.source = source
+        self.ir = ir
+        self.context_file = context_file
+        self.context = context
+
+
+def _item_from_record(record: Any, default_id: str, source: str, samples_dir: Optional[str]) -> BatchItem:
+    """
+    Accepts a bare IR ({"rules": ...}), a test case ({"id", "expected_ir",
+    "context_file", ...}) or a stored translation ({"policy_id", "ir", ...}).
+    """
+    if not isinstance(record, dict):
+        return BatchItem(default_id, source, record)
+
+    if "expected_ir" in record:
+        context_file = record.get("context_file")
+        if context_file and samples_dir:
+            context_file = os.path.join(samples_dir, context_file)
+        return BatchItem(str(record.get("id") or default_id), source, record["expected_ir"], context_file=context_file)
+
+    if "ir" in record:
+        item_id = record.get("policy_id") or record.get("id") or default_id
+        return BatchItem(str(item_id), source, record["ir"], context=record.get("context"))
+
+    return BatchItem(default_id, source, record)
+
+
+def iter_items(paths: Iterable[str], samples_dir: Optional[str] = None) -> Iterator[BatchItem]:
+    """
+    Lazily read IRs from .json/.jsonl files, directories of them, or "-" (JSONL on stdin).
+
+    Test suites (data/tests/*.json) resolve their context_file against
+    samples_dir, defaulting to the suite's sibling samples/ directory.
+    """
+    for path in paths:
+        if path == "-":
+            for n, line in enumerate(sys.stdin, 1):
+                if line.strip():
+                    yield _item_from_record(json.loads(line), f"stdin-{n}", "-", samples_dir)
+            continue
+
+        if os.path.isdir(path):
+            names = sorted(f for f in os.listdir(path) if f.endswith((".json", ".jsonl")))
+            yield from iter_items([os.path.join(path, f) for f in names], samples_dir)
+            continue
+
+        stem = os.path.splitext(os.path.basename(path))[0]
+        suite_samples = samples_dir or os.path.join(os.path.dirname(os.path.abspath(path)), "..", "samples")
+
+        if path.endswith(".jsonl"):
+            with open(path, "r") as f:
+                for n, line in enumerate(f, 1):
+                    if line.strip():
+                        yield _item_from_record(json.loads(line), f"{stem}-{n}", path, suite_samples)
+            continue
+
+        with open(path, "r") as f:
+            data = json.load(f)
+        if isinstance(data, list):
+            for n, record in enumerate(data, 1):
+                yield _item_from_record(record, f"{stem}-{n}", path, suite_samples)
+        else:
+            yield _item_from_record(data, stem, path, suite_samples)
+
+
+def check_item(item_id: str, ir: Any, out_dir: Optional[str] = None, keep_configs: bool = False,
+               context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Lint, safety-check and compile one IR against its context (schedules,
+    object names, ...); write its configs and report to out_dir/<item_id>/
+    when out_dir is given. Runs inside pool workers.
+    """
+    record: Dict[str, Any] = {"id": item_id}
+    try:
+        # Columnar: imported rulebases can have 100k+ rules
+        ir_result = RuleTable.from_dict(ir)
+    except Exception as e:
+        record.update({"status": "invalid", "error": f"{type(e).__name__}: {e}"})
+        return record
+
+    # Each worker process keeps its own cache; suites repeat many rules
+    is_safe, checked = check_and_compile(ir_result, context=context, cache=default_cache())
+    configs = checked["configs"] if is_safe else {}
+    record.update({
+        "status": "ok" if is_safe else "unsafe",
+        "linting_warnings": checked["linting_warnings"],
+        "safety_warnings": checked["safety_warnings"],
+        "vendors": sorted(configs),
+    })
+
+    if out_dir:
+        item_dir = os.path.join(out_dir, item_id)
+        os.makedirs(item_dir, exist_ok=True)
+        for vendor, config in configs.items():
+            with open(os.path.join(item_dir, f"{vendor}.cfg"), "w") as f:
+                f.write(config)
+        with open(os.path.join(item_dir, "report.json"), "w") as f:
+            json.dump(record, f, indent=2)
+
+    if keep_configs:
+        record["configs"] = configs
+    return record
+
+
+def _check_chunk(chunk: List[Tuple[str, Any, Optional[Dict[str, Any]]]], out_dir: Optional[str],
+                 keep_configs: bool) -> List[Dict[str, Any]]:
+    # Items sharing a context share one dict, which pickles once per chunk
+    return [check_item(item_id, ir, out_dir, keep_configs, context) for item_id, ir, context in chunk]
+
+
+def _chunks(items: Iterable[BatchItem], size: int) -> Iterator[List[BatchItem]]:
+    chunk: List[BatchItem] = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class BatchChecker:
+    """
+    Streams IRs through lint -> safety -> compile on a process pool.
+
+    Items are read lazily and submitted in chunks with a bounded number of
+    chunks in flight, so memory stays flat however many IRs are checked.
+    Results come back in input order; each is appended to out_dir/report.jsonl
+    as soon as its chunk finishes. With Batfish enabled, every compiled
+    PAN-OS config is validated afterwards in one shared snapshot.
+    """
+
+    def __init__(
+        self,
+        out_dir: Optional[str] = None,
+        workers: Optional[int] = None,
+        chunk_size: int = 32,
+        batfish: bool = False,
+        batfish_profile: str = DEFAULT_PROFILE,
+        default_context: Optional[Dict[str, Any]] = None,
+    ):
+        self.out_dir = out_dir
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.chunk_size = chunk_size
+        self.batfish = batfish
+        self.batfish_profile = batfish_profile
+        self.default_context = default_context
+
+        self.summary = {"items": 0, "ok": 0, "unsafe": 0, "invalid": 0, "lint_warnings": 0, "batfish_errors": 0}
+        self.batfish_results: Dict[str, List[dict]] = {}
+        self._ids: set = set()
+        self._contexts: Dict[str, Dict[str, Any]] = {}
+        self._pending_batfish: Dict[str, str] = {}
+        self._pending_contexts: Dict[str, Optional[Dict[str, Any]]] = {}
+
+    def _unique_id(self, item_id: str) -> str:
+        base = _UNSAFE_ID_RE.sub("_", item_id).strip("._") or "item"
+        unique, n = base, 1
+        while unique in self._ids:
+            n += 1
+            unique = f"{base}-{n}"
+        self._ids.add(unique)
+        return unique
+
+    def _context_for(self, item: BatchItem) -> Optional[Dict[str, Any]]:
+        if item.context is not None:
+            return item.context
+        if item.context_file:
+            if item.context_file not in self._contexts:
+                with open(item.context_file, "r") as f:
+                    self._contexts[item.context_file] = json.load(f)
+            return self._contexts[item.context_file]
+        return self.default_context
+
+    def _record(self, record: Dict[str, Any], item: BatchItem, report) -> Dict[str, Any]:
+        record["source"] = item.source
+        configs = record.pop("configs", None)
+
+        self.summary["items"] += 1
+        self.summary[record["status"]] += 1
+        self.summary["lint_warnings"] += sum(len(w) for w in (record.get("linting_warnings") or {}).values())
+
+        if configs and "palo_alto" in configs:
+            device = f"{record['id']}_palo_alto"
+            self._pending_batfish[device] = configs["palo_alto"]
+            self._pending_contexts[device] = self._context_for(item)
+
+        if report is not None:
+            report.write(json.dumps(record) + "\n")
+        return record
+
+    def _run_batfish(self) -> Dict[str, List[dict]]:
+        from .batfish.validator import BatfishManager
+
+        started = time.perf_counter()
+        results = BatfishManager().validate_batch(
+            self._pending_batfish, self._pending_contexts, profile=self.batfish_profile
+        )
+        logger.info(f"Batfish validated {len(results)} configs in {time.perf_counter() - started:.1f}s")
+
+        for warnings in results.values():
+            self.summary["batfish_errors"] += sum(1 for w in warnings if w["severity"] == "error")
+
+        if self.out_dir:
+            with open(os.path.join(self.out_dir, "batfish.jsonl"), "w") as f:
+                for device, warnings in results.items():
+                    f.write(json.dumps({"device": device, "batfish_warnings": warnings}) + "\n")
+        return results
+
+    def run(self, items: Iterable[BatchItem]) -> Iterator[Dict[str, Any]]:
+        """Check every item, yielding per-item records in input order."""
+        report = None
+        if self.out_dir:
+            os.makedirs(self.out_dir, exist_ok=True)
+            report = open(os.path.join(self.out_dir, "report.jsonl"), "w")
+
+        started = time.perf_counter()
+        try:
+            chunks = _chunks(items, self.chunk_size)
+            if self.workers <= 0:
+                for chunk in chunks:
+                    for item in chunk:
+                        item.item_id = self._unique_id(item.item_id)
+                        record = check_item(item.item_id, item.ir, self.out_dir, self.batfish, self._context_for(item))
+                        yield self._record(record, item, report)
+            else:
+                yield from self._run_pool(chunks, report)
+        finally:
+            if report is not None:
+                report.close()
+
+        self.summary["elapsed_s"] = round(time.perf_counter() - started, 3)
+
+        if self.batfish and self._pending_batfish:
+            self.batfish_results = self._run_batfish()
+
+    def _run_pool(self, chunks: Iterator[List[BatchItem]], report) -> Iterator[Dict[str, Any]]:
+        max_in_flight = self.workers * 2
+        in_flight: deque = deque()
+
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            for chunk in chunks:
+                payload = []
+                for item in chunk:
+                    item.item_id = self._unique_id(item.item_id)
+                    payload.append((item.item_id, item.ir, self._context_for(item)))
+                    # The IR is only needed by the worker
+                    item.ir = None
+                in_flight.append((chunk, pool.submit(_check_chunk, payload, self.out_dir, self.batfish)))
+
+                if len(in_flight) >= max_in_flight:
+                    done_chunk, future = in_flight.popleft()
+                    for item, record in zip(done_chunk, future.result()):
+                        yield self._record(record, item, report)
+
+            for done_chunk, future in in_flight:
+                for item, record in zip(done_chunk, future.result()):
+                    yield self._record(record, item, report)
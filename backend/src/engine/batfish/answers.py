@@ -0,0 +1,153 @@
+import os
+import re
+from typing import Any, Dict, Iterable, List
+
+# Questions asked per profile. "fast" covers what breaks a config (parse
+# errors, dangling references); "full" adds structure and reachability
+# checks restricted to the candidate rules.
+PROFILES = {
+    "fast": ("init_issues", "undefined_references"),
+    "full": ("init_issues", "undefined_references", "unused_structures", "filter_line_reachability"),
+}
+
+DEFAULT_PROFILE = "fast"
+
+_RULE_NAME_RE = re.compile(r'^set rulebase security rules ("[^"]+"|\S+)', re.MULTILINE)
+
+
+def candidate_rule_names(config_content: str) -> List[str]:
+    """Names of the security rules defined in a compiled candidate config."""
+    names = {m.strip('"') for m in _RULE_NAME_RE.findall(config_content)}
+    return sorted(names)
+
+
+def _col(df, name: str):
+    """String column of df, or a column of empty strings if the answer lacks it."""
+    if name in df.columns:
+        return df[name].fillna("").astype(str)
+
+    import pandas as pd  # already loaded if we have an answer frame
+    return pd.Series("", index=df.index)
+
+
+def _touches_lines_from(series, first_line: int):
+    """Boolean mask: does a FileLines cell reference any line at or after first_line."""
+    return series.map(lambda fl: any(l >= first_line for l in (getattr(fl, "lines", None) or [])))
+
+
+def _records(severity: Any, messages) -> List[dict]:
+    if isinstance(severity, str):
+        return [{"severity": severity, "message": m} for m in messages]
+    return [{"severity": s, "message": m} for s, m in zip(severity, messages)]
+
+
+def init_issue_warnings(df) -> List[dict]:
+    if df.empty:
+        return []
+
+    issue_type = _col(df, "Type").replace("", "Unknown")
+    msg = "Batfish Issue: " + issue_type + " - " + _col(df, "Details")
+
+    line_text = _col(df, "Line_Text")
+    msg = msg.where(line_text == "", msg + " (Line: " + line_text + ")")
+
+    # Treat syntax errors as errors, others as warnings
+    severity = issue_type.str.contains("Error", regex=False).map({True: "error", False: "warning"})
+    return _records(severity, msg)
+
+
+def undefined_reference_warnings(df) -> List[dict]:
+    if df.empty:
+        return []
+
+    msg = "Batfish Undefined Ref: " + _col(df, "Struct_Type") + " '" + _col(df, "Ref_Name") + "'"
+
+    lines = _col(df, "Lines")
+    msg = msg.where(lines == "", msg + " at lines " + lines)
+
+    # Undefined references are usually critical for correct analysis
+    return _records("error", msg)
+
+
+def unused_structure_warnings(df, first_candidate_line: int) -> List[dict]:
+    """
+    Unused structures defined by the candidate config only; everything the
+    generated header defines for the context is expected to be unused.
+    """
+    if df.empty:
+        return []
+
+    if "Source_Lines" in df.columns:
+        df = df[_touches_lines_from(df["Source_Lines"], first_candidate_line)]
+        if df.empty:
+            return []
+
+    msg = "Batfish Unused: " + _col(df, "Structure_Type") + " '" + _col(df, "Structure_Name") + "'"
+    return _records("warning", msg)
+
+
+def unreachable_line_warnings(df, rule_names: Iterable[str]) -> List[dict]:
+    """Candidate rules that can never match because earlier lines shadow them."""
+    names = list(rule_names)
+    if df.empty or not names:
+        return []
+
+    unreachable = _col(df, "Unreachable_Line")
+    # Whole-name matches only, so rule "r1" doesn't pick up "r10"
+    pattern = r"(?<![\w-])(?:" + "|".join(re.escape(n) for n in names) + r")(?![\w-])"
+    df = df[unreachable.str.contains(pattern, regex=True)]
+    if df.empty:
+        return []
+
+    msg = (
+        "Batfish Unreachable: '" + _col(df, "Unreachable_Line")
+        + "' is shadowed by " + _col(df, "Blocking_Lines")
+    )
+    reason = _col(df, "Reason")
+    msg = msg.where(reason == "", msg + " (" + reason + ")")
+    return _records("warning", msg)
+
+
+def profile_warnings(frames: Dict[str, Any], first_candidate_line: int = 1, rule_names: Iterable[str] = ()) -> List[dict]:
+    """Warnings for the answer frames of one config, keyed by question name."""
+    warnings = []
+    if "init_issues" in frames:
+        warnings.extend(init_issue_warnings(frames["init_issues"]))
+    if "undefined_references" in frames:
+        warnings.extend(undefined_reference_warnings(frames["undefined_references"]))
+    if "unused_structures" in frames:
+        warnings.extend(unused_structure_warnings(frames["unused_structures"], first_candidate_line))
+    if "filter_line_reachability" in frames:
+        warnings.extend(unreachable_line_warnings(frames["filter_line_reachability"], rule_names))
+    return warnings
+
+
+def _file_lines_match(cell, filename: str) -> bool:
+    cells = cell if isinstance(cell, (list, tuple)) else [cell]
+    return any(os.path.basename(getattr(fl, "filename", "") or "") == filename for fl in cells)
+
+
+def frames_for_file(frames: Dict[str, Any], filename: str, hostname: str) -> Dict[str, Any]:
+    """
+    Rows of each answer frame that belong to one config of a multi-device
+    snapshot, matched on whichever file/node column the question reports.
+    """
+    hostname = hostname.lower()
+    selected = {}
+    for question, df in frames.items():
+        if df.empty:
+            selected[question] = df
+        elif "File_Name" in df.columns:
+            selected[question] = df[df["File_Name"].astype(str).map(os.path.basename) == filename]
+        elif "Source_Lines" in df.columns:
+            selected[question] = df[df["Source_Lines"].map(lambda c: _file_lines_match(c, filename))]
+        elif "Sources" in df.columns:
+            # filterLineReachability reports "<node>: <filter>" sources
+            selected[question] = df[df["Sources"].map(
+                lambda srcs: any(str(s).split(":", 1)[0].strip().lower() == hostname for s in (srcs or []))
+            )]
+        elif "Nodes" in df.columns:
+            selected[question] = df[df["Nodes"].map(lambda nodes: hostname in [str(n).lower() for n in (nodes or [])])]
+        else:
+            selected[question] = df
+    return selected
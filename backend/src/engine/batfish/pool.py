@@ -0,0 +1,258 @@
+import concurrent.futures
+import hashlib
+import logging
+import socket
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+ROUTING = ("affinity", "least_loaded")
+DEFAULT_PORT = 9996
+
+
+class NoBackendAvailable(Exception):
+    """Raised when no Batfish backend could be connected to."""
+
+
+def parse_backend(spec: str) -> tuple:
+    """"host" or "host:port" -> (host, port)."""
+    host, _, port = spec.strip().rpartition(":") if ":" in spec else (spec.strip(), "", "")
+    return host, int(port) if port else DEFAULT_PORT
+
+
+class BatfishBackend:
+    """One Batfish server: its session, in-flight count and health."""
+
+    def __init__(self, host: str, port: int = DEFAULT_PORT):
+        self.host = host
+        self.port = port
+        self.name = f"{host}:{port}"
+        self.in_flight = 0
+        self.healthy = True
+        self.consecutive_failures = 0
+        self.unhealthy_since: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.calls = 0
+        self.failures = 0
+        self.total_ms = 0.0  # of successful calls
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    def session(self):
+        """The pybatfish session for this backend, created on first use (None if it can't connect)."""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    try:
+                        from pybatfish.client.session import Session
+                        self._session = Session(host=self.host, port=self.port)
+                        logger.info(f"Connected to Batfish at {self.name}")
+                    except Exception as e:
+                        logger.error(f"Failed to connect to Batfish at {self.name}: {e}")
+                        self.last_error = str(e)
+                        return None
+        return self._session
+
+    def probe(self, timeout: float = 2.0) -> Optional[str]:
+        """Cheap liveness check (TCP connect to the service port): None if reachable, else why not."""
+        try:
+            with socket.create_connection((self.host, self.port), timeout=timeout):
+                return None
+        except OSError as e:
+            return str(e)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "healthy": self.healthy,
+            "in_flight": self.in_flight,
+            "calls": self.calls,
+            "failures": self.failures,
+            "mean_ms": round(self.total_ms / (self.calls - self.failures), 1) if self.calls > self.failures else None,
+            "last_error": self.last_error,
+        }
+
+
+class BatfishPool:
+    """
+    A set of Batfish servers that validations are spread over.
+
+    With "affinity" routing a key (the context a config belongs to) always
+    maps to the same healthy backend by rendezvous hashing, so the snapshots
+    and parsed headers Batfish caches for a context stay on one server and
+    adding a backend only moves the keys that now map to it; calls without
+    a key go to the least-loaded backend. "least_loaded" routing ignores
+    keys and picks the backend with the fewest calls in flight.
+
+    A call that times out or fails is retried on the next candidate, up to
+    max_attempts backends. A backend is marked unhealthy after
+    failure_threshold consecutive failures and skipped until a health probe
+    (run every health_interval seconds in the background, or on the next
+    call after cooldown seconds) succeeds again.
+    """
+
+    def __init__(
+        self,
+        backends: Sequence[str],
+        routing: str = "affinity",
+        max_attempts: int = 2,
+        failure_threshold: int = 2,
+        cooldown: float = 30.0,
+        health_interval: float = 0.0,
+    ):
+        if routing not in ROUTING:
+            raise ValueError(f"Unsupported Batfish routing: {routing} (expected one of {', '.join(ROUTING)})")
+        if not backends:
+            raise ValueError("At least one Batfish backend is required")
+        self.backends = [BatfishBackend(*parse_backend(b)) for b in backends]
+        self.routing = routing
+        self.max_attempts = max(1, max_attempts)
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.health_interval = health_interval
+        self._lock = threading.Lock()
+        self._health_thread: Optional[threading.Thread] = None
+
+    # --- routing -----------------------------------------------------------
+
+    @staticmethod
+    def _weight(key: str, backend: BatfishBackend) -> int:
+        return int.from_bytes(hashlib.blake2b(f"{key}|{backend.name}".encode(), digest_size=8).digest(), "big")
+
+    def _usable(self, backend: BatfishBackend, now: float) -> bool:
+        # Unhealthy backends get another chance once their cooldown is over
+        return backend.healthy or now - (backend.unhealthy_since or 0) >= self.cooldown
+
+    def candidates(self, key: Optional[str] = None) -> List[BatfishBackend]:
+        """Backends to try for a call, in order: usable ones first by the routing policy, then the rest."""
+        now = time.monotonic()
+        with self._lock:
+            usable = [b for b in self.backends if self._usable(b, now)]
+            rest = [b for b in self.backends if b not in usable]
+            if self.routing == "affinity" and key is not None:
+                usable.sort(key=lambda b: self._weight(key, b), reverse=True)
+            else:
+                usable.sort(key=lambda b: b.in_flight)
+            rest.sort(key=lambda b: b.in_flight)
+        return usable + rest
+
+    # --- health ------------------------------------------------------------
+
+    def _succeeded(self, backend: BatfishBackend, elapsed_ms: float) -> None:
+        with self._lock:
+            backend.calls += 1
+            backend.total_ms += elapsed_ms
+            backend.consecutive_failures = 0
+            if not backend.healthy:
+                logger.info(f"Batfish backend {backend.name} is healthy again")
+            backend.healthy = True
+            backend.unhealthy_since = None
+
+    def _failed(self, backend: BatfishBackend, error: str) -> None:
+        with self._lock:
+            backend.calls += 1
+            backend.failures += 1
+            backend.consecutive_failures += 1
+            backend.last_error = error
+            if backend.consecutive_failures >= self.failure_threshold or not backend.healthy:
+                if backend.healthy:
+                    logger.warning(f"Batfish backend {backend.name} marked unhealthy: {error}")
+                backend.healthy = False
+                backend.unhealthy_since = time.monotonic()
+
+    def check_health(self) -> Dict[str, Optional[str]]:
+        """Probe every backend now and update its health; returns errors by backend (None = healthy)."""
+        results = {}
+        for backend in self.backends:
+            error = backend.probe()
+            with self._lock:
+                if error is None:
+                    backend.consecutive_failures = 0
+                    backend.healthy = True
+                    backend.unhealthy_since = None
+                else:
+                    backend.last_error = error
+                    if backend.healthy:
+                        logger.warning(f"Batfish backend {backend.name} failed its health check: {error}")
+                    backend.healthy = False
+                    backend.unhealthy_since = time.monotonic()
+            results[backend.name] = error
+        return results
+
+    def start_health_checks(self) -> None:
+        """Run check_health every health_interval seconds in a daemon thread (no-op if the interval is 0)."""
+        if self.health_interval <= 0 or self._health_thread is not None:
+            return
+
+        def loop():
+            while True:
+                time.sleep(self.health_interval)
+                try:
+                    self.check_health()
+                except Exception as e:
+                    logger.error(f"Batfish health check failed: {e}")
+
+        self._health_thread = threading.Thread(target=loop, name="batfish-health", daemon=True)
+        self._health_thread.start()
+
+    # --- calls -------------------------------------------------------------
+
+    def _release(self, backend: BatfishBackend) -> None:
+        with self._lock:
+            backend.in_flight -= 1
+
+    def run(self, fn: Callable[[Any], Any], key: Optional[str] = None, timeout: Optional[float] = None) -> Any:
+        """
+        Call fn(session) on the best backend for key, failing over to the next
+        candidate on a timeout or error. Raises the last error if every
+        attempt failed (concurrent.futures.TimeoutError if the last one timed
+        out), or NoBackendAvailable if no backend had a session.
+        """
+        last_error: Optional[BaseException] = None
+        attempts = 0
+        for backend in self.candidates(key):
+            if attempts >= self.max_attempts:
+                break
+            bf = backend.session()
+            if bf is None:
+                self._failed(backend, backend.last_error or "could not connect")
+                continue
+            attempts += 1
+
+            with self._lock:
+                backend.in_flight += 1
+            started = time.perf_counter()
+            # Not a with-block: leaving one would wait for a timed-out call.
+            # The backend counts as loaded until the call really returns.
+            executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+            future = executor.submit(fn, bf)
+            future.add_done_callback(lambda _, backend=backend: self._release(backend))
+            executor.shutdown(wait=False)
+            try:
+                result = future.result(timeout=timeout)
+            except concurrent.futures.TimeoutError as e:
+                self._failed(backend, f"timed out after {timeout}s")
+                logger.warning(f"Batfish backend {backend.name} timed out after {timeout}s")
+                last_error = e
+                continue
+            except Exception as e:
+                self._failed(backend, str(e))
+                logger.warning(f"Batfish backend {backend.name} failed: {e}")
+                last_error = e
+                continue
+            self._succeeded(backend, (time.perf_counter() - started) * 1000)
+            return result
+
+        if last_error is None:
+            raise NoBackendAvailable("could not connect to any Batfish backend")
+        raise last_error
+
+    def connect_all(self) -> Dict[str, Optional[str]]:
+        """Create every backend's session now; returns errors by backend (None = connected)."""
+        return {b.name: None if b.session() is not None else (b.last_error or "could not connect") for b in self.backends}
+
+    def metrics(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [b.summary() for b in self.backends]
@@ -2,14 +2,23 @@ import os
 import tempfile
 import logging
 import uuid
+import hashlib
 import concurrent.futures
-from typing import List, Optional
+import importlib.util
+from typing import Dict, List, Optional, Sequence
 
-try:
-    from pybatfish.client.session import Session
-    HAS_BATFISH = True
-except ImportError:
-    HAS_BATFISH = False
+from .answers import (
+    DEFAULT_PROFILE,
+    PROFILES,
+    candidate_rule_names,
+    frames_for_file,
+    profile_warnings,
+)
+from .pool import BatfishPool, NoBackendAvailable
+
+# pybatfish pulls in pandas, so only check it is installed here and import
+# it when the first session is created.
+HAS_BATFISH = importlib.util.find_spec("pybatfish") is not None
 
 logger = logging.getLogger(__name__)
 
@@ -18,7 +27,6 @@ BATFISH_TIMEOUT = 15
 
 class BatfishManager:
     _instance = None
-    _session = None
 
     def __new__(cls, host: str = "localhost", port: int = 9996):
         if cls._instance is None:
@@ -26,27 +34,50 @@ class BatfishManager:
             cls._instance.host = host
             cls._instance.port = port
             cls._instance.enabled = HAS_BATFISH
-            cls._instance._session = None
+            cls._instance._pool = None
+            cls._instance._header_cache = {}
         return cls._instance
 
+    def configure(self, backends: Sequence[str], routing: str = "affinity", max_attempts: int = 2,
+                  health_interval: float = 0.0) -> BatfishPool:
+        """
+        Spread validations over a pool of Batfish servers ("host" or
+        "host:port" each) instead of the single host; see BatfishPool for
+        routing and failover. Without this, the pool holds only host:port.
+        """
+        self._pool = BatfishPool(backends, routing=routing, max_attempts=max_attempts, health_interval=health_interval)
+        self._pool.start_health_checks()
+        return self._pool
+
+    @property
+    def pool(self) -> BatfishPool:
+        if self._pool is None:
+            self._pool = BatfishPool([f"{self.host}:{self.port}"])
+        return self._pool
+
     def get_session(self):
         """
-        Get or create a Batfish session.
+        Get or create a Batfish session on the backend calls without a
+        context would go to (None if disabled or it can't connect).
         """
         if not self.enabled:
             return None
+        return self.pool.candidates()[0].session()
 
-        if self._session is None:
-            try:
-                # Session objects are lightweight, but we want to avoid recreating them if possible
-                # to maintain connection state or config if relevant.
-                # However, pybatfish Sessions are mainly client wrappers.
-                self._session = Session(host=self.host)
-                logger.info(f"Connected to Batfish at {self.host}")
-            except Exception as e:
-                logger.error(f"Failed to connect to Batfish: {e}")
-                return None
-        return self._session
+    def connect(self) -> Optional[str]:
+        """Open a session on every backend; None if at least one connected, otherwise why not."""
+        if not self.enabled:
+            return "pybatfish not installed"
+        errors = self.pool.connect_all()
+        if any(e is None for e in errors.values()):
+            return None
+        return "could not connect to Batfish service: " + "; ".join(f"{b}: {e}" for b, e in errors.items())
+
+    def _affinity_key(self, header_lines: List[str], cache_key: Optional[str]) -> str:
+        # Registered contexts by id, ad-hoc ones by the header they produce
+        if cache_key is not None:
+            return cache_key
+        return hashlib.sha256("\n".join(header_lines).encode("utf-8")).hexdigest()
 
     def _fmt(self, x: str) -> str:
         """Quote names containing spaces or special chars."""
@@ -54,51 +85,40 @@ class BatfishManager:
             return f'"{x}"'
         return x
         
-    def _run_validation_logic(self, bf, temp_dir, snapshot_name) -> List[dict]:
+    def _answer_frames(self, bf, temp_dir, snapshot_name, profile: str = DEFAULT_PROFILE) -> dict:
+        """Initialize the snapshot and answer the profile's questions; returns frames by question."""
+        questions = PROFILES[profile]
+        bf.init_snapshot(temp_dir, name=snapshot_name, overwrite=True)
+
+        # The session is shared by every validation on this backend, so each
+        # question names its snapshot instead of using the session's current one
+        frames = {}
+        # 1. Parsing/initialization issues
+        if "init_issues" in questions:
+            frames["init_issues"] = bf.q.initIssues().answer(snapshot=snapshot_name).frame()
+        # 2. Undefined references
+        if "undefined_references" in questions:
+            frames["undefined_references"] = bf.q.undefinedReferences().answer(snapshot=snapshot_name).frame()
+        # 3. Unused structures (filtered to the candidate rules later)
+        if "unused_structures" in questions:
+            frames["unused_structures"] = bf.q.unusedStructures().answer(snapshot=snapshot_name).frame()
+        # 4. Rules shadowed by earlier lines
+        if "filter_line_reachability" in questions:
+            frames["filter_line_reachability"] = bf.q.filterLineReachability().answer(snapshot=snapshot_name).frame()
+        return frames
+
+    def _run_validation_logic(self, bf, temp_dir, snapshot_name, profile: str = DEFAULT_PROFILE,
+                              first_candidate_line: int = 1, rule_names: Optional[List[str]] = None) -> List[dict]:
         """
         Internal logic to run Batfish analysis. 
         This is separated to allow wrapping in a timeout.
+        Answers are processed column-wise (see answers.py) rather than row by row.
         Returns a list of warning dicts: { "severity": "warning"|"error", "message": "..." }
         """
-        warnings = []
-        bf.init_snapshot(temp_dir, name=snapshot_name, overwrite=True)
-        
-        # 1. Check for parsing/initialization issues
-        issues = bf.q.initIssues().answer().frame()
-        if not issues.empty:
-            for _, row in issues.iterrows():
-                # Categorize specific known issues if needed, but default to warning or error based on Type
-                issue_type = row.get('Type', 'Unknown')
-                details = row.get('Details', '')
-                msg = f"Batfish Issue: {issue_type} - {details}"
-                
-                if 'Line_Text' in row and row['Line_Text']:
-                        msg += f" (Line: {row['Line_Text']})"
-                
-                # Treat syntax errors as errors, others as warnings (or redflags)
-                severity = "error" if "Error" in issue_type else "warning"
-                warnings.append({"severity": severity, "message": msg})
-
-        # 2. Check for undefined references
-        undef_refs = bf.q.undefinedReferences().answer().frame()
-        if not undef_refs.empty:
-            for _, row in undef_refs.iterrows():
-                msg = f"Batfish Undefined Ref: {row.get('Struct_Type')} '{row.get('Ref_Name')}'"
-                if 'Lines' in row and row['Lines']:
-                        msg += f" at lines {row['Lines']}"
-                # Undefined references are usually critical for correct analysis
-                warnings.append({"severity": "error", "message": msg})
-        
-        # 3. Check for unused structures
-        unused = bf.q.unusedStructures().answer().frame()
-        if not unused.empty:
-             for _, row in unused.iterrows():
-                msg = f"Batfish Unused: {row.get('Structure_Type')} '{row.get('Structure_Name')}'"
-                warnings.append({"severity": "warning", "message": msg})
-        
-        return warnings
+        frames = self._answer_frames(bf, temp_dir, snapshot_name, profile)
+        return profile_warnings(frames, first_candidate_line, rule_names or [])
 
-    def validate(self, config_content: str, context: Optional[dict] = None, filename: str = "firewall.cfg") -> List[dict]:
+    def validate(self, config_content: str, context: Optional[dict] = None, filename: str = "firewall.cfg", cache_key: Optional[str] = None, profile: str = DEFAULT_PROFILE) -> List[dict]:
         """
         Validate a configuration using Batfish.
         Returns a list of warning dicts.
@@ -108,16 +128,177 @@ class BatfishManager:
             context: Optional dictionary containing network definitions (zones, objects).
                      If provided, header configurations will be generated from this.
             filename: The name of the file to be simulated.
+            cache_key: Optional stable id of the context (e.g. a registered context_id)
+                       used to reuse its generated header across validations.
+            profile: Question profile, "fast" (parse + undefined refs) or "full"
+                     (adds unused structures and rule reachability for the candidate rules).
         """
+        if profile not in PROFILES:
+            raise ValueError(f"Unsupported Batfish profile: {profile}")
+
         if not config_content or not config_content.strip():
              return [{"severity": "warning", "message": "No configuration content provided for validation."}]
 
         if not self.enabled:
             return [{"severity": "error", "message": "Batfish validation skipped: pybatfish not installed."}]
 
-        bf = self.get_session()
-        if not bf:
-            return [{"severity": "error", "message": "Batfish validation skipped: Could not connect to Batfish service."}]
+        header_lines = self.build_header(context, cache_key=cache_key)
+        
+        full_content = "\n".join(header_lines) + "\n\n" + config_content
+        # 1-based line where the candidate config starts (after header + blank line)
+        first_candidate_line = len(header_lines) + 2
+
+        warnings = []
+        
+        # Use backend/tmp directory for snapshots
+        base_tmp_dir = os.path.join(os.getcwd(), "backend", "tmp")
+        os.makedirs(base_tmp_dir, exist_ok=True)
+
+        # Create a unique temporary directory for this snapshot
+        with tempfile.TemporaryDirectory(dir=base_tmp_dir) as temp_dir:
+            configs_dir = os.path.join(temp_dir, "configs")
+            os.makedirs(configs_dir)
+            
+            # Write the config file
+            config_path = os.path.join(configs_dir, filename)
+            with open(config_path, "w") as f:
+                f.write(full_content)
+
+            snapshot_name = f"snap_{uuid.uuid4().hex[:8]}"
+            
+            rule_names = candidate_rule_names(config_content)
+            try:
+                # The pool enforces the timeout and fails over to another backend
+                warnings = self.pool.run(
+                    lambda bf: self._run_validation_logic(bf, temp_dir, snapshot_name, profile, first_candidate_line, rule_names),
+                    key=self._affinity_key(header_lines, cache_key),
+                    timeout=BATFISH_TIMEOUT,
+                )
+            except NoBackendAvailable:
+                return [{"severity": "error", "message": "Batfish validation skipped: Could not connect to Batfish service."}]
+            except concurrent.futures.TimeoutError:
+                logger.error(f"Batfish validation timed out after {BATFISH_TIMEOUT}s")
+                warnings.append({"severity": "error", "message": f"Error: Batfish validation timed out after {BATFISH_TIMEOUT}s. Please check Batfish service connectivity."})
+            except Exception as e:
+                logger.error(f"Batfish validation failed: {e}")
+                warnings.append({"severity": "error", "message": f"Error: Batfish validation failed: {str(e)}"})
+
+        return warnings
+
+    def validate_batch(self, configs: Dict[str, str], contexts: Optional[Dict[str, Optional[dict]]] = None,
+                       profile: str = DEFAULT_PROFILE, timeout: Optional[float] = None) -> Dict[str, List[dict]]:
+        """
+        Validate many configurations in one shared Batfish snapshot.
+
+        Each config becomes its own device (hostname = its key) wrapped in the
+        header for its context, so the snapshot is initialized and every
+        question answered once for the whole batch; answers are then split
+        back per device. Returns warnings keyed like configs.
+
+        Args:
+            configs: Device name -> PAN-OS set-format config.
+            contexts: Optional device name -> network context used for its header.
+            profile: Question profile, see validate().
+            timeout: Overall timeout in seconds (defaults to BATFISH_TIMEOUT per 50 configs).
+        """
+        if profile not in PROFILES:
+            raise ValueError(f"Unsupported Batfish profile: {profile}")
+
+        contexts = contexts or {}
+        if not configs:
+            return {}
+
+        if not self.enabled:
+            return {name: [{"severity": "error", "message": "Batfish validation skipped: pybatfish not installed."}] for name in configs}
+
+        if timeout is None:
+            timeout = BATFISH_TIMEOUT * max(1, len(configs) // 50)
+
+        base_tmp_dir = os.path.join(os.getcwd(), "backend", "tmp")
+        os.makedirs(base_tmp_dir, exist_ok=True)
+
+        results = {}
+        with tempfile.TemporaryDirectory(dir=base_tmp_dir) as temp_dir:
+            configs_dir = os.path.join(temp_dir, "configs")
+            os.makedirs(configs_dir)
+
+            # Headers are shared by every config of the same context object
+            headers = {}
+            devices = {}
+            for name, config_content in configs.items():
+                context = contexts.get(name)
+                if id(context) not in headers:
+                    headers[id(context)] = self.build_header(context)
+                header_lines = [
+                    f"set deviceconfig system hostname {name}" if l.startswith("set deviceconfig system hostname ") else l
+                    for l in headers[id(context)]
+                ]
+
+                filename = f"{name}.cfg"
+                with open(os.path.join(configs_dir, filename), "w") as f:
+                    f.write("\n".join(header_lines) + "\n\n" + config_content)
+                devices[name] = (filename, len(header_lines) + 2, candidate_rule_names(config_content))
+
+            snapshot_name = f"snap_{uuid.uuid4().hex[:8]}"
+            try:
+                # Batches mix contexts, so they go to the least-loaded backend
+                frames = self.pool.run(
+                    lambda bf: self._answer_frames(bf, temp_dir, snapshot_name, profile), timeout=timeout,
+                )
+            except NoBackendAvailable:
+                return {name: [{"severity": "error", "message": "Batfish validation skipped: Could not connect to Batfish service."}] for name in configs}
+            except concurrent.futures.TimeoutError:
+                logger.error(f"Batfish batch validation timed out after {timeout}s")
+                return {name: [{"severity": "error", "message": f"Error: Batfish validation timed out after {timeout}s."}] for name in configs}
+            except Exception as e:
+                logger.error(f"Batfish batch validation failed: {e}")
+                return {name: [{"severity": "error", "message": f"Error: Batfish validation failed: {str(e)}"}] for name in configs}
+
+            for name, (filename, first_candidate_line, rule_names) in devices.items():
+                results[name] = profile_warnings(frames_for_file(frames, filename, name), first_candidate_line, rule_names)
+
+        return results
+
+    def prime_snapshot(self, context: Optional[dict] = None, cache_key: Optional[str] = None,
+                       snapshot_name: str = "warmup_base") -> Optional[str]:
+        """
+        Initialize a snapshot holding only the header for context, so Batfish
+        has parsed a configuration of this shape before the first validation.
+        Returns None on success, otherwise why it couldn't be done.
+        """
+        if not self.enabled:
+            return "pybatfish not installed"
+
+        header_lines = self.build_header(context, cache_key=cache_key)
+        base_tmp_dir = os.path.join(os.getcwd(), "backend", "tmp")
+        os.makedirs(base_tmp_dir, exist_ok=True)
+        with tempfile.TemporaryDirectory(dir=base_tmp_dir) as temp_dir:
+            configs_dir = os.path.join(temp_dir, "configs")
+            os.makedirs(configs_dir)
+            with open(os.path.join(configs_dir, "firewall.cfg"), "w") as f:
+                f.write("\n".join(header_lines) + "\n")
+            try:
+                # Primed on the backend this context's validations are routed to
+                self.pool.run(
+                    lambda bf: bf.init_snapshot(temp_dir, name=snapshot_name, overwrite=True),
+                    key=self._affinity_key(header_lines, cache_key),
+                    timeout=BATFISH_TIMEOUT,
+                )
+            except NoBackendAvailable:
+                return "could not connect to Batfish service"
+            except concurrent.futures.TimeoutError:
+                return f"timed out after {BATFISH_TIMEOUT}s"
+            except Exception as e:
+                return str(e)
+        return None
+
+    def build_header(self, context: Optional[dict] = None, cache_key: Optional[str] = None) -> List[str]:
+        """
+        Generate the mock device header (interfaces, zones, address objects) for a context.
+        Headers for registered contexts are cached by cache_key.
+        """
+        if cache_key is not None and cache_key in self._header_cache:
+            return self._header_cache[cache_key]
 
         # Generate header based on context if available
         header_lines = [
@@ -187,38 +368,6 @@ class BatfishManager:
                     header_lines.append(f"set network virtual-router default interface {if_name}")
                     header_lines.append(f"set zone {safe_zone} network layer3 {if_name}")
 
-        
-        full_content = "\n".join(header_lines) + "\n\n" + config_content
-
-        warnings = []
-        
-        # Use backend/tmp directory for snapshots
-        base_tmp_dir = os.path.join(os.getcwd(), "backend", "tmp")
-        os.makedirs(base_tmp_dir, exist_ok=True)
-
-        # Create a unique temporary directory for this snapshot
-        with tempfile.TemporaryDirectory(dir=base_tmp_dir) as temp_dir:
-            configs_dir = os.path.join(temp_dir, "configs")
-            os.makedirs(configs_dir)
-            
-            # Write the config file
-            config_path = os.path.join(configs_dir, filename)
-            with open(config_path, "w") as f:
-                f.write(full_content)
-
-            snapshot_name = f"snap_{uuid.uuid4().hex[:8]}"
-            
-            try:
-                # Wrap the Batfish execution in a thread pool to enforce timeout
-                with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
-                    future = executor.submit(self._run_validation_logic, bf, temp_dir, snapshot_name)
-                    warnings = future.result(timeout=BATFISH_TIMEOUT)
-                    
-            except concurrent.futures.TimeoutError:
-                logger.error(f"Batfish validation timed out after {BATFISH_TIMEOUT}s")
-                warnings.append({"severity": "error", "message": f"Error: Batfish validation timed out after {BATFISH_TIMEOUT}s. Please check Batfish service connectivity."})
-            except Exception as e:
-                logger.error(f"Batfish validation failed: {e}")
-                warnings.append({"severity": "error", "message": f"Error: Batfish validation failed: {str(e)}"})
-
-        return warnings
+        if cache_key is not None:
+            self._header_cache[cache_key] = header_lines
+        return header_lines
@@ -0,0 +1,255 @@
+from collections import defaultdict, deque
+from typing import Callable, Dict, FrozenSet, Hashable, List, Set, Tuple
+
+from .schemas import FieldDiff, FlowTuple, IRBuilderOutput, IRComparison, IRRule, RuleDiff
+
+# Fields compared between matched rules. Rule ids are deliberately excluded:
+# two IRs that differ only in naming (r1 vs r2) are semantically identical.
+COMPARED_FIELDS = (
+    "action",
+    "src",
+    "dst",
+    "protocol",
+    "dst_ports",
+    "src_zone",
+    "dst_zone",
+    "direction",
+    "schedule",
+    "log",
+    "priority",
+)
+
+SET_FIELDS = {"src", "dst", "dst_ports"}
+
+# Cap on reported flows so a wildly wrong IR doesn't produce a huge diff
+MAX_REPORTED_FLOWS = 100
+
+
+def _field_value(rule: IRRule, field: str) -> Hashable:
+    value = getattr(rule, field)
+    if field in SET_FIELDS:
+        return frozenset(value)
+    if field == "protocol" and value:
+        return value.lower()
+    return value
+
+
+def _key(fields: Tuple[str, ...]) -> Callable[[IRRule], Hashable]:
+    return lambda r: tuple(_field_value(r, f) for f in fields)
+
+
+# Matching passes, from strictest to loosest. Each pass only hashes the rules
+# left unmatched by the previous one, so matching stays linear in rule count.
+MATCH_PASSES: List[Callable[[IRRule], Hashable]] = [
+    _key(COMPARED_FIELDS),
+    _key(("action", "src", "dst", "protocol", "dst_ports")),
+    _key(("action", "src", "dst", "protocol")),
+    _key(("src", "dst")),
+    _key(("src_zone", "dst_zone")),
+    lambda r: None,
+]
+
+
+def _match_rules(
+    expected: List[IRRule], actual: List[IRRule]
+) -> Tuple[List[Tuple[IRRule, IRRule]], List[IRRule], List[IRRule]]:
+    pairs: List[Tuple[IRRule, IRRule]] = []
+    remaining_expected = list(expected)
+    remaining_actual = list(actual)
+
+    for key_fn in MATCH_PASSES:
+        if not remaining_expected or not remaining_actual:
+            break
+
+        buckets: Dict[Hashable, deque] = defaultdict(deque)
+        for r in remaining_actual:
+            buckets[key_fn(r)].append(r)
+
+        unmatched_expected = []
+        for r in remaining_expected:
+            bucket = buckets.get(key_fn(r))
+            if bucket:
+                pairs.append((r, bucket.popleft()))
+            else:
+                unmatched_expected.append(r)
+
+        remaining_expected = unmatched_expected
+        remaining_actual = [r for bucket in buckets.values() for r in bucket]
+
+    return pairs, remaining_expected, remaining_actual
+
+
+def diff_rule(expected: IRRule, actual: IRRule) -> List[FieldDiff]:
+    diffs: List[FieldDiff] = []
+    for f in COMPARED_FIELDS:
+        if _field_value(expected, f) != _field_value(actual, f):
+            diffs.append(FieldDiff(field=f, expected=getattr(expected, f), actual=getattr(actual, f)))
+    return diffs
+
+
+# (action, protocol) -> src -> (key, {dst: ports}); the dst map is shared by
+# every src covered by the same rules, and key is its hashable form
+FlowIndex = Dict[Tuple[str, str], Dict[Hashable, Tuple[FrozenSet, Dict[Hashable, FrozenSet]]]]
+
+
+def _ports_by_dst(rules: List[IRRule], interned: Dict[FrozenSet, FrozenSet]) -> Dict[Hashable, FrozenSet]:
+    """Ports each dst is reached on by rules (None stands for any port)."""
+    covering: Dict[Hashable, List[int]] = defaultdict(list)
+    for i, r in enumerate(rules):
+        for d in r.dst:
+            covering[d].append(i)
+
+    ports_by_rules: Dict[Tuple[int, ...], FrozenSet] = {}
+    out = {}
+    for d, idxs in covering.items():
+        key = tuple(idxs)
+        ports = ports_by_rules.get(key)
+        if ports is None:
+            ports = frozenset(p for i in idxs for p in (rules[i].dst_ports or [None]))
+            ports = ports_by_rules[key] = interned.setdefault(ports, ports)
+        out[d] = ports
+    return out
+
+
+def _flow_index(rules: List[IRRule], interned: Dict[FrozenSet, FrozenSet]) -> FlowIndex:
+    """
+    The (action, src, dst, protocol, port) flows rules cover, without
+    expanding the src x dst x port product: sources covered by the same
+    rules share one dst -> ports map, so the index grows with the rules'
+    field sizes rather than their product. Port sets and map keys are
+    interned, so indexes sharing the table compare equal ones by identity.
+    """
+    groups: Dict[Tuple[str, str], List[IRRule]] = defaultdict(list)
+    for r in rules:
+        groups[(r.action, (r.protocol or "any").lower())].append(r)
+
+    index: FlowIndex = {}
+    for group, group_rules in groups.items():
+        covering: Dict[Hashable, List[int]] = defaultdict(list)
+        for i, r in enumerate(group_rules):
+            for s in r.src:
+                covering[s].append(i)
+
+        forms: Dict[Tuple[int, ...], Tuple[FrozenSet, Dict[Hashable, FrozenSet]]] = {}
+        by_src = {}
+        for s, idxs in covering.items():
+            key = tuple(idxs)
+            form = forms.get(key)
+            if form is None:
+                dsts = _ports_by_dst([group_rules[i] for i in idxs], interned)
+                items = frozenset(dsts.items())
+                form = forms[key] = (interned.setdefault(items, items), dsts)
+            # Rules without destinations cover no flows
+            if form[1]:
+                by_src[s] = form
+        if by_src:
+            index[group] = by_src
+    return index
+
+
+def _canonical(index: FlowIndex) -> Dict[Tuple[str, str], FrozenSet]:
+    """Equal for two indexes exactly when they cover the same flows."""
+    canonical = {}
+    for group, by_src in index.items():
+        srcs: Dict[FrozenSet, Set[Hashable]] = defaultdict(set)
+        for s, (key, _) in by_src.items():
+            srcs[key].add(s)
+        canonical[group] = frozenset((key, frozenset(ss)) for key, ss in srcs.items())
+    return canonical
+
+
+def _dst_difference(protocols: List[str], forms: List[Tuple], port_diffs: Dict[Tuple[int, int], List]) -> List[Tuple]:
+    """(dst, protocol, ports) missing from the right forms of one src, ordered by dst then protocol."""
+    out = []
+    for d in sorted({d for lf, _ in forms for d in lf[1]}, key=str):
+        for proto, (lf, rf) in zip(protocols, forms):
+            ports, other = lf[1].get(d, frozenset()), rf[1].get(d, frozenset())
+            if ports is other:
+                continue
+            # Interned port sets recur across dsts and srcs
+            missing = port_diffs.get((id(ports), id(other)))
+            if missing is None:
+                missing = port_diffs[(id(ports), id(other))] = sorted(ports - other, key=str)
+            if missing:
+                out.append((d, proto, missing))
+    return out
+
+
+def _flow_difference(left: FlowIndex, right: FlowIndex, limit: int = MAX_REPORTED_FLOWS) -> List[FlowTuple]:
+    """
+    The first limit flows in left but not in right, ordered by
+    (action, src, dst, protocol, port). Differences are worked out once per
+    pair of interned forms, so srcs covered alike are never expanded again.
+    """
+    empty: Tuple[FrozenSet, Dict[Hashable, FrozenSet]] = (frozenset(), {})
+    by_forms: Dict[Tuple, List[Tuple]] = {}
+    port_diffs: Dict[Tuple[int, int], List] = {}
+    out: List[FlowTuple] = []
+    for action in sorted({a for a, _ in left}, key=str):
+        protocols = sorted(p for a, p in left if a == action)
+        pairs = [(left[(action, p)], right.get((action, p), {})) for p in protocols]
+        for s in sorted({s for l, _ in pairs for s in l}, key=str):
+            forms = [(l.get(s, empty), r.get(s, empty)) for l, r in pairs]
+            key = tuple((id(lf[0]), id(rf[0])) for lf, rf in forms)
+            found = by_forms.get(key)
+            if found is None:
+                same = all(lf[0] is rf[0] for lf, rf in forms)
+                found = by_forms[key] = [] if same else _dst_difference(protocols, forms, port_diffs)
+            for d, proto, missing in found:
+                for port in missing:
+                    out.append(FlowTuple(action=action, src=s, dst=d, protocol=proto, port=port))
+                    if len(out) >= limit:
+                        return out
+    return out
+
+
+def compare_ir(expected: IRBuilderOutput, actual: IRBuilderOutput) -> IRComparison:
+    """
+    Semantically compare two IRs.
+
+    Rules are matched order-insensitively (hash passes from exact match down to
+    same zone pair) and matched pairs report per-field differences. Flow
+    equivalence is checked independently with set semantics over
+    action/src/dst/protocol/port, so splitting one rule into several that cover
+    the same flows still counts as equivalent.
+    """
+    pairs, missing, extra = _match_rules(expected.rules, actual.rules)
+
+    rule_diffs: List[RuleDiff] = []
+    for e, a in pairs:
+        fields = diff_rule(e, a)
+        if fields:
+            rule_diffs.append(RuleDiff(expected_id=e.id, actual_id=a.id, fields=fields))
+
+    interned: Dict[FrozenSet, FrozenSet] = {}
+    expected_flows = _flow_index(expected.rules, interned)
+    actual_flows = _flow_index(actual.rules, interned)
+    flow_equivalent = _canonical(expected_flows) == _canonical(actual_flows)
+
+    return IRComparison(
+        equivalent=not rule_diffs and not missing and not extra,
+        flow_equivalent=flow_equivalent,
+        matched_rules=len(pairs),
+        rule_diffs=rule_diffs,
+        missing_rules=[r.id for r in missing],
+        extra_rules=[r.id for r in extra],
+        missing_flows=[] if flow_equivalent else _flow_difference(expected_flows, actual_flows),
+        extra_flows=[] if flow_equivalent else _flow_difference(actual_flows, expected_flows),
+    )
+
+
+def field_accuracy(comparison: IRComparison, expected_rule_count: int) -> Dict[str, Tuple[int, int]]:
+    """
+    Per-field (correct, total) counts over the expected rules.
+    Expected rules without a counterpart count as wrong on every field.
+    """
+    wrong = defaultdict(int)
+    for rd in comparison.rule_diffs:
+        for fd in rd.fields:
+            wrong[fd.field] += 1
+
+    missing = len(comparison.missing_rules)
+    return {
+        f: (expected_rule_count - missing - wrong[f], expected_rule_count)
+        for f in COMPARED_FIELDS
+    }
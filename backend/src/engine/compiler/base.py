@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 class VendorCompiler(ABC):
     @abstractmethod
@@ -16,12 +16,13 @@ class VendorCompiler(ABC):
         pass
 
     @abstractmethod
-    def compile_policy(self, ir_policy: Dict[str, Any]) -> str:
+    def compile_policy(self, ir_policy: Dict[str, Any], context: Optional[Dict[str, Any]] = None) -> str:
         """
         Compile an entire intermediate representation (IR) policy into vendor-specific configuration commands.
 
         Args:
             ir_policy (Dict[str, Any]): The intermediate representation of the entire firewall policy.
+            context (Optional[Dict[str, Any]]): The network context, for objects the rules reference (e.g. schedules).
         Returns:
             str: The vendor-specific configuration commands for the entire policy.
         """
@@ -1,5 +1,19 @@
 from .base import VendorCompiler
-from typing import List
+from ..timewindows import DAY_MINUTES, DAY_NAMES, TimeWindow, time_windows
+from typing import Any, Dict, List, Optional
+import datetime
+
+
+def _clock(minute: int) -> str:
+    # PAN-OS spells the end of the day 23:59
+    if minute == DAY_MINUTES:
+        return "23:59"
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+
+def _members(items: List[str]) -> str:
+    return items[0] if len(items) == 1 else f"[ {' '.join(items)} ]"
+
 
 class PaloAltoCompiler(VendorCompiler):
 
@@ -60,7 +74,39 @@ class PaloAltoCompiler(VendorCompiler):
 
         return "\n".join(lines)
 
-    def compile_policy(self, ir_policy) -> str:
-        """Compile entire IR rule list into a single CLI text."""
+    def compile_schedule(self, name: str, window: TimeWindow) -> List[str]:
+        """PAN-OS schedule object for a compiled time window."""
+        base = f"set schedule {self._fmt(name)} schedule-type"
+
+        if not window.recurring:
+            periods = []
+            for start, end in window.periods:
+                if end.time() == datetime.time(0, 0):
+                    end -= datetime.timedelta(minutes=1)
+                periods.append(f"{start:%Y/%m/%d@%H:%M}-{end:%Y/%m/%d@%H:%M}")
+            return [f"{base} non-recurring {_members(periods)}"]
+
+        days = [[f"{_clock(start)}-{_clock(end)}" for start, end in runs] for runs in window.day_ranges()]
+        if all(d == days[0] for d in days):
+            return [f"{base} recurring daily {_members(days[0])}"]
+        return [
+            f"{base} recurring weekly {DAY_NAMES[i]} {_members(ranges)}"
+            for i, ranges in enumerate(days) if ranges
+        ]
+
+    def compile_policy(self, ir_policy, context: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Compile entire IR rule list into a single CLI text. With a context,
+        the schedule objects the rules reference are defined first (schedules
+        that are missing or invalid are left to the linters to report).
+        """
         rule_texts = [self.compile_rule(rule) for rule in ir_policy.rules]
+
+        if context is not None:
+            windows, _ = time_windows(context)
+            schedules = [s for s in dict.fromkeys(r.schedule for r in ir_policy.rules) if s in windows]
+            if schedules:
+                schedule_lines = [line for s in schedules for line in self.compile_schedule(s, windows[s])]
+                rule_texts.insert(0, "\n".join(schedule_lines))
+
         return "\n\n".join(rule_texts)
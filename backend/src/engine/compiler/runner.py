@@ -1,6 +1,6 @@
 from .palo_alto import PaloAltoCompiler
 from ..schemas import IRBuilderOutput
-from typing import Dict
+from typing import Any, Dict, Optional
 
 
 VENDOR_COMPILERS_MAP = {
@@ -8,24 +8,24 @@ VENDOR_COMPILERS_MAP = {
 }
 
 
-def compile_ir(ir: IRBuilderOutput, vendor: str) -> str:
+def compile_ir(ir: IRBuilderOutput, vendor: str, context: Optional[Dict[str, Any]] = None) -> str:
 
     if vendor not in VENDOR_COMPILERS_MAP:
         raise ValueError(f"Unsupported vendor: {vendor}")
     
     compiler_class = VENDOR_COMPILERS_MAP[vendor]
     compiler = compiler_class()
-    compiled_output = compiler.compile_policy(ir)
+    compiled_output = compiler.compile_policy(ir, context=context)
     
     return compiled_output
 
 
-def compile_ir_all(ir: IRBuilderOutput) -> Dict[str, str]:
+def compile_ir_all(ir: IRBuilderOutput, context: Optional[Dict[str, Any]] = None) -> Dict[str, str]:
     compiled_outputs = {}
 
     for vendor, compiler_class in VENDOR_COMPILERS_MAP.items():
         compiler = compiler_class()
-        compiled_output = compiler.compile_policy(ir)
+        compiled_output = compiler.compile_policy(ir, context=context)
         compiled_outputs[vendor] = compiled_output
 
     return compiled_outputs
@@ -0,0 +1,221 @@
+import difflib
+import ipaddress
+import re
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+SECTIONS = ("objects", "zones", "services", "time_windows")
+
+# Words that carry no entity information and would otherwise fuzzy-match names
+STOPWORDS = {
+    "allow", "deny", "block", "permit", "from", "to", "the", "and", "or", "on",
+    "over", "via", "for", "with", "access", "traffic", "all", "any", "only",
+    "reach", "port", "ports", "using", "between", "into", "out", "of", "in",
+    "a", "an", "is", "are", "be", "should", "can", "not", "no", "network",
+}
+
+FUZZY_CUTOFF = 0.85
+
+# A name is considered mentioned when at least this share of its tokens
+# appear (exactly or fuzzily) in the policy text.
+NAME_MATCH_RATIO = 0.5
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_IP_RE = re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}(?:/\d{1,2})?\b")
+_NUMBER_RE = re.compile(r"\b\d{1,5}\b")
+
+
+def network_definition(context: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Return the network definition (objects/zones/services/time_windows) of a context.
+    Accepts both the RequestContext shape ({"description", "details": {...}})
+    and a bare network definition as used by the test samples.
+    """
+    if not context:
+        return {}
+    if any(s in context for s in SECTIONS):
+        return context
+    return context.get("details") or {}
+
+
+def _tokens(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _service_ports(service: Any) -> Set[int]:
+    ports: Set[int] = set()
+    if not isinstance(service, dict):
+        return ports
+    values = service.get("ports", [])
+    if "port" in service:
+        values = list(values) + [service["port"]]
+    for p in values:
+        try:
+            ports.add(int(p))
+        except (TypeError, ValueError):
+            continue
+    return ports
+
+
+def _addresses(value: Any) -> List[str]:
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, list):
+        return [v for v in value if isinstance(v, str)]
+    return []
+
+
+class ContextIndex:
+    """
+    Lookup structures over a network context: name tokens, zone membership,
+    service ports and literal addresses. Built once per context and used to
+    select the slice of the context a policy actually refers to.
+    """
+
+    def __init__(self, context: Optional[Dict[str, Any]]):
+        self.context = context or {}
+        self.network_def = network_definition(self.context)
+
+        self.names: Dict[str, Set[str]] = {
+            s: set(self.network_def.get(s) or {}) for s in SECTIONS
+        }
+
+        # token -> {(section, name)}
+        self._token_index: Dict[str, Set[Tuple[str, str]]] = defaultdict(set)
+        self._name_tokens: Dict[Tuple[str, str], Set[str]] = {}
+        # lowercased name -> (section, name)
+        self._by_lower: Dict[str, Tuple[str, str]] = {}
+
+        for section, names in self.names.items():
+            for name in names:
+                toks = set(_tokens(name)) - STOPWORDS or set(_tokens(name))
+                self._name_tokens[(section, name)] = toks
+                self._by_lower.setdefault(name.lower(), (section, name))
+                for t in toks:
+                    self._token_index[t].add((section, name))
+
+        self._vocabulary = list(self._token_index)
+
+        self.zones_of: Dict[str, Set[str]] = defaultdict(set)
+        for zone, members in (self.network_def.get("zones") or {}).items():
+            for m in members or []:
+                self.zones_of[m].add(zone)
+
+        self._services_by_port: Dict[int, Set[str]] = defaultdict(set)
+        for name, svc in (self.network_def.get("services") or {}).items():
+            for p in _service_ports(svc):
+                self._services_by_port[p].add(name)
+
+        self._objects_by_address: Dict[str, Set[str]] = defaultdict(set)
+        for name, value in (self.network_def.get("objects") or {}).items():
+            for addr in _addresses(value):
+                self._objects_by_address[addr.lower()].add(name)
+
+    @property
+    def size(self) -> int:
+        return sum(len(n) for n in self.names.values())
+
+    def lookup(self, mention: str) -> Optional[Tuple[str, str]]:
+        """Resolve an exact (case-insensitive) entity name to (section, name)."""
+        return self._by_lower.get(mention.lower())
+
+    def _expand_tokens(self, tokens: Iterable[str]) -> Set[str]:
+        expanded: Set[str] = set()
+        for t in tokens:
+            if t in STOPWORDS:
+                continue
+            if t in self._token_index:
+                expanded.add(t)
+                continue
+            if len(t) >= 4:
+                expanded.update(
+                    difflib.get_close_matches(t, self._vocabulary, n=3, cutoff=FUZZY_CUTOFF)
+                )
+        return expanded
+
+    def match(self, text: str) -> Dict[str, Set[str]]:
+        """
+        Return the entities referenced by text, exactly or fuzzily, per section.
+        Also picks up objects by literal address and services by port number.
+        """
+        selected: Dict[str, Set[str]] = {s: set() for s in SECTIONS}
+        raw_tokens = _tokens(text)
+        text_tokens = self._expand_tokens(raw_tokens)
+        # Names made only of stopwords (e.g. an object called "Any") still
+        # match on their exact token.
+        text_tokens.update(t for t in raw_tokens if t in STOPWORDS and t in self._token_index)
+
+        candidates: Set[Tuple[str, str]] = set()
+        for t in text_tokens:
+            candidates.update(self._token_index[t])
+
+        for key in candidates:
+            name_tokens = self._name_tokens[key]
+            if not name_tokens:
+                continue
+            hits = len(name_tokens & text_tokens)
+            if hits / len(name_tokens) >= NAME_MATCH_RATIO:
+                selected[key[0]].add(key[1])
+
+        for ip in _IP_RE.findall(text):
+            for candidate in (ip, f"{ip}/32"):
+                selected["objects"].update(self._objects_by_address.get(candidate, ()))
+            try:
+                net = ipaddress.ip_network(ip, strict=False)
+            except ValueError:
+                continue
+            selected["objects"].update(self._objects_by_address.get(str(net), ()))
+
+        for num in _NUMBER_RE.findall(text):
+            selected["services"].update(self._services_by_port.get(int(num), ()))
+
+        return selected
+
+    def resolve_mentions(self, mentions: Iterable[str]) -> Dict[str, Set[str]]:
+        """Map entity mentions (e.g. resolver sources/destinations) onto context names."""
+        selected: Dict[str, Set[str]] = {s: set() for s in SECTIONS}
+        for mention in mentions:
+            hit = self.lookup(mention)
+            if hit:
+                selected[hit[0]].add(hit[1])
+                continue
+            for section, names in self.match(mention).items():
+                selected[section].update(names)
+        return selected
+
+    def with_zone_parents(self, selected: Dict[str, Set[str]]) -> Dict[str, Set[str]]:
+        """
+        Close a selection over zone membership: selected objects pull in their
+        zones, and explicitly selected zones pull in their member objects.
+        """
+        zones = self.network_def.get("zones") or {}
+        objects = self.names["objects"]
+
+        result = {s: set(names) for s, names in selected.items()}
+        for zone in selected.get("zones", ()):
+            result["objects"].update(m for m in zones.get(zone) or [] if m in objects)
+        for obj in selected.get("objects", ()):
+            result["zones"].update(self.zones_of.get(obj, ()))
+        return result
+
+    def slice(self, selected: Dict[str, Set[str]], context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Build a context of the same shape as context (defaults to the indexed
+        one) containing only the selected entries. Non-section keys (e.g.
+        description) are kept as is.
+        """
+        context = self.context if context is None else context
+
+        network_slice = {
+            k: v for k, v in self.network_def.items() if k not in SECTIONS
+        }
+        for section in SECTIONS:
+            if section not in self.network_def:
+                continue
+            source = self.network_def[section] or {}
+            keep = selected.get(section, set())
+            network_slice[section] = {k: v for k, v in source.items() if k in keep}
+
+        if network_definition(context) is context:
+            return network_slice
+        return {**context, "details": network_slice}
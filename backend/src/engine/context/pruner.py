@@ -0,0 +1,103 @@
+import re
+from typing import Any, Dict, Optional, Set
+
+from ..schemas import ResolverOutput
+from .index import ContextIndex, SECTIONS
+
+# Ambiguity phrasing that signals the resolver could not map an entity onto
+# the (pruned) context, as opposed to routine notes like "no schedule given".
+ENTITY_AMBIGUITY_RE = re.compile(
+    r"not (?:found|defined|present|listed|in (?:the )?context)|unknown|"
+    r"does not exist|doesn't exist|unclear which|could not (?:map|resolve|find)|"
+    r"no (?:matching|such) (?:object|zone|service|entity)",
+    re.IGNORECASE,
+)
+
+
+class PrunedContext:
+    """A context slice selected for one policy, plus the selection that produced it."""
+
+    def __init__(
+        self,
+        index: ContextIndex,
+        selected: Dict[str, Set[str]],
+        full: bool = False,
+        source: Optional[Dict[str, Any]] = None,
+    ):
+        self.index = index
+        self.selected = selected
+        self.full = full
+        # The context the slice was taken from (the request's own context when
+        # the index is a shared, precomputed one)
+        self.source = index.context if source is None else source
+        self.context = self.source if full else index.slice(selected, self.source)
+
+    def contains(self, section: str, name: str) -> bool:
+        return self.full or name in self.selected.get(section, ())
+
+
+def prune_context(
+    nl_policy: str,
+    context: Optional[Dict[str, Any]],
+    index: Optional[ContextIndex] = None,
+) -> PrunedContext:
+    """
+    Select the entries of context referenced or fuzzy-matched by nl_policy,
+    closed over zone membership.
+    """
+    index = index or ContextIndex(context)
+    selected = index.with_zone_parents(index.match(nl_policy))
+    return PrunedContext(index, selected, source=context)
+
+
+def extend_for_resolver(pruned: PrunedContext, resolved: ResolverOutput) -> PrunedContext:
+    """
+    Widen a slice with everything the resolver referenced, so the IR builder
+    sees every entity it needs to map zones and services.
+    """
+    if pruned.full:
+        return pruned
+
+    mentions = resolved.sources + resolved.destinations + resolved.service_names
+    if resolved.schedule:
+        mentions.append(resolved.schedule)
+
+    found = pruned.index.resolve_mentions(mentions)
+    for p in resolved.ports:
+        found["services"].update(pruned.index.match(str(p))["services"])
+
+    selected = {
+        s: pruned.selected.get(s, set()) | found.get(s, set()) for s in SECTIONS
+    }
+    return PrunedContext(pruned.index, pruned.index.with_zone_parents(selected), source=pruned.source)
+
+
+def needs_full_context(pruned: PrunedContext, resolved: ResolverOutput) -> bool:
+    """
+    Decide whether the resolver should be re-run against the full context:
+    either it referenced an entity that exists in the context but was pruned
+    away, or it reported an entity-level ambiguity.
+    """
+    if pruned.full:
+        return False
+
+    mentions = resolved.sources + resolved.destinations
+    if resolved.schedule:
+        mentions.append(resolved.schedule)
+
+    for section, names in pruned.index.resolve_mentions(mentions).items():
+        if any(not pruned.contains(section, n) for n in names):
+            return True
+
+    for note in resolved.ambiguities:
+        if ENTITY_AMBIGUITY_RE.search(note):
+            return True
+        for section, names in pruned.index.match(note).items():
+            if any(not pruned.contains(section, n) for n in names):
+                return True
+
+    return False
+
+
+def full_context(pruned: PrunedContext) -> PrunedContext:
+    return PrunedContext(pruned.index, pruned.selected, full=True, source=pruned.source)
@@ -0,0 +1,132 @@
+import statistics
+from typing import Any, Dict, List
+
+from ..comparator import COMPARED_FIELDS as IR_FIELDS, compare_ir, field_accuracy
+from ..schemas import IRBuilderOutput
+
+
+def score_record(record: Dict[str, Any], case: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Score a stored evaluation record against its test case.
+    Scoring is done from the stored IR/CLI, so changing expectations never
+    requires re-running the agents.
+    """
+    if record["status"] != "ok":
+        return {"status": "error", "error": record.get("error")}
+
+    expected_ir = IRBuilderOutput.model_validate(case["expected_ir"])
+    actual_ir = IRBuilderOutput.model_validate(record["ir"])
+    comparison = compare_ir(expected_ir, actual_ir)
+
+    return {
+        "status": "ok",
+        "ir_equivalent": comparison.equivalent,
+        "flow_equivalent": comparison.flow_equivalent,
+        "rule_count_match": len(actual_ir.rules) == len(expected_ir.rules),
+        "cli_match": case["expected_cli"].strip() == record["cli"].strip(),
+        "comparison": comparison,
+        "fields": field_accuracy(comparison, len(expected_ir.rules)),
+    }
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def build_report(
+    records: List[Dict[str, Any]],
+    cases_by_id: Dict[str, Dict[str, Any]],
+) -> Dict[str, Dict[str, Any]]:
+    """Aggregate IR field-level accuracy and latency per model."""
+    per_model: Dict[str, Dict[str, Any]] = {}
+
+    for record in records:
+        case = cases_by_id.get(record["case_id"])
+        if case is None:
+            continue
+
+        stats = per_model.setdefault(record["model"], {
+            "total": 0,
+            "errors": 0,
+            "cli_pass": 0,
+            "ir_equivalent": 0,
+            "flow_equivalent": 0,
+            "rule_count_match": 0,
+            "fields": {f: [0, 0] for f in IR_FIELDS},
+            "latencies": [],
+            "failed": [],
+        })
+        stats["total"] += 1
+
+        score = score_record(record, case)
+        if score["status"] != "ok":
+            stats["errors"] += 1
+            stats["failed"].append(record["case_id"])
+            continue
+
+        stats["cli_pass"] += score["cli_match"]
+        stats["ir_equivalent"] += score["ir_equivalent"]
+        stats["flow_equivalent"] += score["flow_equivalent"]
+        stats["rule_count_match"] += score["rule_count_match"]
+        for f, (correct, total) in score["fields"].items():
+            stats["fields"][f][0] += correct
+            stats["fields"][f][1] += total
+        stats["latencies"].append(record["latency_ms"]["total"])
+
+        if not score["cli_match"]:
+            stats["failed"].append(record["case_id"])
+
+    report = {}
+    for model, stats in per_model.items():
+        latencies = stats.pop("latencies")
+        stats["field_accuracy"] = {
+            f: (correct / total * 100 if total else 0.0)
+            for f, (correct, total) in stats.pop("fields").items()
+        }
+        stats["latency_ms"] = {
+            "mean": statistics.fmean(latencies) if latencies else 0.0,
+            "p50": _percentile(latencies, 50),
+            "p95": _percentile(latencies, 95),
+            "max": max(latencies) if latencies else 0.0,
+        }
+        report[model] = stats
+
+    return report
+
+
+def format_report(report: Dict[str, Dict[str, Any]]) -> str:
+    lines: List[str] = []
+
+    for model, stats in sorted(report.items()):
+        total = stats["total"] or 1
+        lines.append("=" * 50)
+        lines.append(f"MODEL: {model}")
+        lines.append("=" * 50)
+        lines.append(f"Total:            {stats['total']}")
+        lines.append(f"Errors:           {stats['errors']}")
+        lines.append(f"CLI exact match:  {stats['cli_pass']} ({stats['cli_pass'] / total * 100:.1f}%)")
+        lines.append(f"IR equivalent:    {stats['ir_equivalent']} ({stats['ir_equivalent'] / total * 100:.1f}%)")
+        lines.append(f"Flow equivalent:  {stats['flow_equivalent']} ({stats['flow_equivalent'] / total * 100:.1f}%)")
+        lines.append(f"Rule count match: {stats['rule_count_match']} ({stats['rule_count_match'] / total * 100:.1f}%)")
+        lines.append("")
+        lines.append("Field accuracy:")
+        for f, acc in stats["field_accuracy"].items():
+            lines.append(f"  {f:<10} {acc:6.1f}%")
+        lines.append("")
+        lat = stats["latency_ms"]
+        lines.append(
+            f"Latency (ms): mean {lat['mean']:.0f}, p50 {lat['p50']:.0f}, "
+            f"p95 {lat['p95']:.0f}, max {lat['max']:.0f}"
+        )
+        if stats["failed"]:
+            lines.append("")
+            lines.append("Failed cases:")
+            for case_id in stats["failed"]:
+                lines.append(f"- {case_id}")
+        lines.append("")
+
+    return "\n".join(lines)
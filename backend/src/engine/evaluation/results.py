@@ -0,0 +1,73 @@
+import hashlib
+import json
+import os
+from typing import Any, Dict, Iterable, Optional
+
+from ..prompts import RESOLVER_SYSTEM_PROMPT, IR_BUILDER_SYSTEM_PROMPT, COMBINED_SYSTEM_PROMPT
+
+
+def prompt_hash(nl_query: str, context: Dict[str, Any], *variant: str) -> str:
+    """
+    Hash everything that influences the agents' output for a case:
+    the system prompts, the NL query, the network context and any pipeline
+    variant flags (e.g. whether context pruning is on).
+    """
+    h = hashlib.sha256()
+    for part in (
+        RESOLVER_SYSTEM_PROMPT,
+        IR_BUILDER_SYSTEM_PROMPT,
+        COMBINED_SYSTEM_PROMPT,
+        nl_query,
+        json.dumps(context, sort_keys=True),
+        *variant,
+    ):
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()[:16]
+
+
+def result_key(case_id: str, model: str, p_hash: str) -> str:
+    return f"{case_id}:{model}:{p_hash}"
+
+
+class ResultStore:
+    """
+    Append-only JSONL store of live evaluation results.
+    The last record written for a key wins, so reruns only need to append.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._records: Dict[str, Dict[str, Any]] = {}
+        # Set when the file ends mid-line, so the next record starts on its own line
+        self._partial = False
+
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                for line in f:
+                    self._partial = not line.endswith("\n")
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A run killed mid-write leaves a truncated last line
+                        continue
+                    self._records[record["key"]] = record
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self._records.get(key)
+
+    def put(self, record: Dict[str, Any]) -> None:
+        self._records[record["key"]] = record
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a") as f:
+            if self._partial:
+                f.write("\n")
+                self._partial = False
+            f.write(json.dumps(record) + "\n")
+
+    def records(self) -> Iterable[Dict[str, Any]]:
+        return self._records.values()
@@ -0,0 +1,124 @@
+import asyncio
+import datetime
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from ..compiler.palo_alto import PaloAltoCompiler
+from ..pipeline import resolve_and_build
+from .results import ResultStore, prompt_hash, result_key
+
+
+class LiveEvaluator:
+    """
+    Runs the live resolver -> IR -> compile pipeline over test cases concurrently.
+
+    Agent calls are blocking, so each case runs in a worker thread while an
+    asyncio semaphore bounds how many cases are in flight at once. Results are
+    persisted to a ResultStore as soon as they complete, and cases whose key
+    (case id / model / prompt hash) is already stored are not re-run. Rate
+    limits and transient API errors are retried by the LLM scheduler every
+    agent call goes through; a case that still fails is stored as an error
+    and re-run by the next evaluation.
+    """
+
+    def __init__(
+        self,
+        store: ResultStore,
+        models: List[str],
+        concurrency: int = 8,
+        prune: bool = True,
+        mode: str = "pipeline",
+    ):
+        self.store = store
+        self.models = models
+        self.concurrency = concurrency
+        self.prune = prune
+        self.mode = mode
+        self.compiler = PaloAltoCompiler()
+
+    async def _evaluate_case(
+        self,
+        case: Dict[str, Any],
+        context: Dict[str, Any],
+        model: str,
+        semaphore: asyncio.Semaphore,
+    ) -> Dict[str, Any]:
+        p_hash = prompt_hash(case["nl_query"], context, "pruned" if self.prune else "full", self.mode)
+        key = result_key(case["id"], model, p_hash)
+
+        cached = self.store.get(key)
+        if cached is not None and cached["status"] == "ok":
+            return cached
+
+        record: Dict[str, Any] = {
+            "key": key,
+            "case_id": case["id"],
+            "model": model,
+            "prompt_hash": p_hash,
+        }
+
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                resolver_out, ir_out, pruned = await asyncio.to_thread(
+                    resolve_and_build, case["nl_query"], context,
+                    prune=self.prune, mode=self.mode, model=model,
+                )
+                finished = time.perf_counter()
+            except Exception as e:
+                record.update({"status": "error", "error": f"{type(e).__name__}: {e}"})
+                self.store.put(record)
+                return record
+
+        record.update({
+            "status": "ok",
+            "resolver": resolver_out.model_dump(),
+            "ir": ir_out.model_dump(),
+            "cli": self.compiler.compile_policy(ir_out),
+            "full_context": pruned.full,
+            "latency_ms": {
+                "total": round((finished - started) * 1000, 1),
+            },
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        })
+        self.store.put(record)
+        return record
+
+    async def run(
+        self,
+        cases: List[Dict[str, Any]],
+        load_context: Callable[[str], Dict[str, Any]],
+    ) -> List[Dict[str, Any]]:
+        semaphore = asyncio.Semaphore(self.concurrency)
+        contexts: Dict[str, Dict[str, Any]] = {}
+
+        tasks = []
+        for case in cases:
+            if case["context_file"] not in contexts:
+                contexts[case["context_file"]] = load_context(case["context_file"])
+            context = contexts[case["context_file"]]
+
+            for model in self.models:
+                tasks.append(self._evaluate_case(case, context, model, semaphore))
+
+        return await asyncio.gather(*tasks)
+
+
+def run_live_evaluation(
+    cases: List[Dict[str, Any]],
+    load_context: Callable[[str], Dict[str, Any]],
+    store_path: str,
+    models: List[str],
+    concurrency: int = 8,
+    prune: bool = True,
+    mode: str = "pipeline",
+    store: Optional[ResultStore] = None,
+) -> List[Dict[str, Any]]:
+    evaluator = LiveEvaluator(
+        store=store or ResultStore(store_path),
+        models=models,
+        concurrency=concurrency,
+        prune=prune,
+        mode=mode,
+    )
+    return asyncio.run(evaluator.run(cases, load_context))
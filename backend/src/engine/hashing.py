@@ -0,0 +1,26 @@
+import hashlib
+import json
+from typing import Any
+
+from pydantic import BaseModel
+
+
+def _plain(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    return obj
+
+
+def canonical_json(obj: Any) -> str:
+    """Key-order independent JSON encoding of obj (pydantic models are dumped first)."""
+    return json.dumps(_plain(obj), sort_keys=True, separators=(",", ":"), default=_plain)
+
+
+def content_hash(obj: Any) -> str:
+    """sha256 of the canonical JSON encoding of obj."""
+    return hashlib.sha256(canonical_json(obj).encode("utf-8")).hexdigest()
+
+
+def rule_hash(rule: Any) -> str:
+    """Content hash of a single IRRule (or its dict form)."""
+    return content_hash(rule)
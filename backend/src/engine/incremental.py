@@ -0,0 +1,162 @@
+import difflib
+import logging
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from . import agents
+from .batfish.answers import DEFAULT_PROFILE
+from .batfish.validator import BatfishManager
+from .context.index import SECTIONS, ContextIndex, network_definition
+from .context.pruner import extend_for_resolver, full_context, prune_context
+from .pipeline import _check_cancelled, _combined_failure, check_and_compile, translate, validate_configs
+from .rulecache import default_cache, rule_fingerprints
+from .schemas import CombinedOutput
+from .tiering import ModelRouter, complexity
+
+logger = logging.getLogger(__name__)
+
+
+def text_edits(old: str, new: str) -> List[Dict[str, str]]:
+    """Word-level edits from old to new, as {"removed", "added"} passages (whitespace changes ignored)."""
+    a, b = old.split(), new.split()
+    edits = []
+    for op, i1, i2, j1, j2 in difflib.SequenceMatcher(None, a, b, autojunk=False).get_opcodes():
+        if op != "equal":
+            edits.append({"removed": " ".join(a[i1:i2]), "added": " ".join(b[j1:j2])})
+    return edits
+
+
+def changed_entities(old_context: Optional[Dict[str, Any]], new_context: Optional[Dict[str, Any]]) -> Set[Tuple[str, str]]:
+    """(section, name) of every context entry added, removed or redefined between two contexts."""
+    old_def, new_def = network_definition(old_context), network_definition(new_context)
+    changed = set()
+    for section in SECTIONS:
+        old_entries, new_entries = old_def.get(section) or {}, new_def.get(section) or {}
+        for name in set(old_entries) | set(new_entries):
+            if old_entries.get(name) != new_entries.get(name):
+                changed.add((section, name))
+    return changed
+
+
+def _description(context: Optional[Dict[str, Any]]) -> str:
+    if not context or any(s in context for s in SECTIONS):
+        return ""
+    return context.get("description") or ""
+
+
+def retranslate(
+    previous: Dict[str, Any],
+    nl_policy: str,
+    context: Dict[str, Any],
+    prune: bool = True,
+    mode: str = "pipeline",
+    model: str = "gpt-4o-mini",
+    cancel_event: Optional[threading.Event] = None,
+    index: Optional[ContextIndex] = None,
+    batfish_profile: str = DEFAULT_PROFILE,
+    router: Optional[ModelRouter] = None,
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Translate an edited policy by updating an earlier translation in the same
+    session instead of starting over.
+
+    previous holds the earlier inputs and output: {"nl_policy", "context",
+    "profile", "result"} (result as returned by translate); without a
+    resolver output and IR to start from it falls back to translate (in
+    mode). The new text and context are diffed against them:
+
+    - nothing changed: the earlier result is returned as is;
+    - only context entries the earlier translation didn't depend on changed
+      (entities outside its slice): the resolver output and IR are reused;
+    - otherwise one patch call gets the earlier outputs, the text edits and
+      the changed entities, and returns updated outputs.
+
+    Lint and safety results are memoized per rule (default_cache), so only
+    rules whose hash changed are re-checked; Batfish re-runs only for vendors
+    whose config or device header changed. Returns (result, stats) where
+    stats says which path was taken and how much was redone.
+    """
+    old_result = previous["result"]
+    old_context = previous.get("context")
+    old_profile = previous.get("profile", DEFAULT_PROFILE)
+    if "resolver_output" not in old_result or "ir" not in old_result:
+        return translate(
+            nl_policy, context, prune=prune, mode=mode, cancel_event=cancel_event, index=index,
+            batfish_profile=batfish_profile, router=router,
+        ), {"mode": "full"}
+
+    edits = text_edits(previous["nl_policy"], nl_policy)
+    if _description(old_context) != _description(context):
+        edits.append({"removed": f"[context description] {_description(old_context)}",
+                      "added": f"[context description] {_description(context)}"})
+    changed = changed_entities(old_context, context)
+
+    # Entities the earlier translation depended on: its pruned slice plus
+    # everything its resolver output referenced, closed over zone membership
+    old_slice = extend_for_resolver(prune_context(previous["nl_policy"], old_context), old_result["resolver_output"])
+    depended = {(s, n) for s in SECTIONS for n in old_slice.selected.get(s, ())}
+
+    stats: Dict[str, Any] = {
+        "edits": len(edits),
+        "changed_entities": sorted(f"{s}:{n}" for s, n in changed),
+    }
+    _check_cancelled(cancel_event)
+
+    if not edits and not changed and batfish_profile == old_profile:
+        stats.update(mode="reused", changed_rules=0, revalidated=[])
+        return old_result, stats
+
+    if not edits and not (changed & depended):
+        resolved, ir_result = old_result["resolver_output"], old_result["ir"]
+        stats["mode"] = "recompiled"
+    else:
+        pruned = prune_context(nl_policy, context, index=index)
+        if not prune:
+            pruned = full_context(pruned)
+        pruned = extend_for_resolver(pruned, old_result["resolver_output"])
+        if router is None:
+            router = ModelRouter.from_models([model])
+        tier = router.initial_tier(complexity(nl_policy, pruned))
+
+        earlier = CombinedOutput.model_construct(resolver=old_result["resolver_output"], ir=old_result["ir"])
+        entity_names = sorted(f"{s}:{n}" for s, n in changed)
+
+        def patch(m):
+            out = agents.patch_translation(previous["nl_policy"], nl_policy, edits, entity_names, earlier, pruned.context, model=m)
+            return out.resolver, out.ir, pruned
+
+        (resolved, ir_result, _), _ = router.run(tier, "patch", patch, _combined_failure)
+        stats["mode"] = "patched"
+
+    _check_cancelled(cancel_event)
+    old_rules = Counter(rule_fingerprints(old_result["ir"].rules))
+    stats["changed_rules"] = sum((Counter(rule_fingerprints(ir_result.rules)) - old_rules).values())
+
+    result = {"resolver_output": resolved, "ir": ir_result}
+    is_safe, checked = check_and_compile(ir_result, context=context, cache=default_cache())
+    result.update(checked)
+    if not is_safe:
+        result["batfish_warnings"] = {"error": [{"severity": "error", "message": "Batfish validation skipped due to safety violations."}]}
+        stats["revalidated"] = []
+        return result, stats
+
+    # Batfish validates whole devices, so a vendor's earlier warnings are
+    # reused only when both its config and the header it is wrapped in are unchanged
+    manager = BatfishManager()
+    same_header = not changed or manager.build_header(old_context) == manager.build_header(context)
+    old_configs = old_result.get("configs") or {}
+    old_warnings = old_result.get("batfish_warnings") or {}
+    stale = {
+        vendor: config for vendor, config in result["configs"].items()
+        if not (same_header and batfish_profile == old_profile
+                and old_configs.get(vendor) == config and vendor in old_warnings)
+    }
+    revalidated = validate_configs(stale, context, profile=batfish_profile, cancel_event=cancel_event) if stale else {}
+    result["batfish_warnings"] = {
+        vendor: revalidated[vendor] if vendor in revalidated else old_warnings[vendor] for vendor in result["configs"]
+    }
+    stats["revalidated"] = sorted(revalidated)
+
+    logger.info(f"Incremental translation: {stats}")
+    return result, stats
@@ -1,10 +1,56 @@
 from abc import ABC, abstractmethod
-from typing import List, Tuple
-from ..schemas import IRBuilderOutput
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from ..rulecache import RuleMemo, slice_key
+from ..schemas import IRBuilderOutput, IRRule
 
 class IRLinter(ABC):
 
+    # Bump when a linter's checks change so memoized results are not reused
+    version = "1"
+
     @abstractmethod
-    def lint(self, ir: IRBuilderOutput) -> Tuple[bool, List[str]]:
-        """Return (is_valid, warnings)."""
+    def lint_rule(self, rule: IRRule, context: Optional[Dict[str, Any]] = None) -> List[str]:
+        """Warnings for a single rule, independent of the other rules."""
         pass
+
+    def cross_rule_warnings(self, rules: Sequence[IRRule], memo: Optional[RuleMemo] = None) -> Dict[int, List[str]]:
+        """Warnings that depend on several rules, keyed by the position of the rule they concern."""
+        return {}
+
+    def context_slice(self, rule: IRRule, context: Optional[Dict[str, Any]]) -> Any:
+        """The part of the context lint_rule reads for this rule (part of the memo key)."""
+        return None
+
+    def lint(
+        self,
+        ir: IRBuilderOutput,
+        context: Optional[Dict[str, Any]] = None,
+        memo: Optional[RuleMemo] = None,
+    ) -> Tuple[bool, List[str]]:
+        """
+        Return (is_valid, warnings).
+
+        With a memo (see RuleCheckCache.memo), per-rule results are reused for
+        rules this linter version has already checked against the same context
+        slice, so only changed rules are re-checked. Cross-rule warnings come
+        first for the rule they concern.
+        """
+        rules = ir.rules
+
+        if memo is None:
+            per_rule = [self.lint_rule(r, context) for r in rules]
+        elif type(self).context_slice is IRLinter.context_slice:
+            per_rule = memo.results((type(self).__name__, self.version), lambda r: self.lint_rule(r, context))
+        else:
+            prefix = (type(self).__name__, self.version)
+            keys = [prefix + (slice_key(self.context_slice(r, context)),) for r in rules]
+            per_rule = memo.results_by_key(keys, lambda r: self.lint_rule(r, context))
+
+        cross = self.cross_rule_warnings(rules, memo=memo)
+
+        warnings: List[str] = []
+        for i, rule_warnings in enumerate(per_rule):
+            if i in cross:
+                warnings.extend(cross[i])
+            warnings.extend(rule_warnings)
+        return (len(warnings) == 0), warnings
@@ -1,44 +1,249 @@
-from typing import List, Tuple
+from collections import defaultdict
+from heapq import merge
+from typing import Any, Dict, List, Optional, Sequence
 from .base import IRLinter
-from ..schemas import IRBuilderOutput
+from ..context.index import network_definition
+from ..rulecache import RuleMemo
+from ..schemas import IRRule
+from ..timewindows import time_window_error
+
+
+def _cover_key(rule: IRRule) -> tuple:
+    """
+    What an earlier rule needs to compare against to decide shadowing:
+    (protocol, schedule, sources, destinations, ports), None meaning any.
+    """
+    return (
+        rule.protocol.lower(),
+        rule.schedule,
+        None if "any" in rule.src else frozenset(rule.src),
+        None if "any" in rule.dst else frozenset(rule.dst),
+        frozenset(rule.dst_ports) if rule.dst_ports else None,
+    )
+
+
+def _covers(earlier: tuple, later: tuple) -> bool:
+    """True if every flow matched by later is already matched by earlier (same zone pair assumed)."""
+    if earlier[0] != "any" and earlier[0] != later[0]:
+        return False
+    if earlier[1] and earlier[1] != later[1]:
+        return False
+    for e, l in zip(earlier[2:], later[2:]):
+        if e is not None and (l is None or not l <= e):
+            return False
+    return True
+
+
+class _CoverIndex:
+    """
+    Earlier rules of a zone pair indexed by source object and by port, so a
+    rule is only compared with the earlier rules that could cover its first
+    source or first port rather than with every earlier rule.
+    """
+
+    def __init__(self, keys: List[tuple]):
+        self.keys = keys
+        self.size = 0
+        self.by_src: Dict[str, List[int]] = defaultdict(list)
+        self.by_port: Dict[int, List[int]] = defaultdict(list)
+        self.any_src: List[int] = []
+        self.any_port: List[int] = []
+
+    def extend_to(self, end: int) -> None:
+        """Index keys[size:end]."""
+        for j in range(self.size, end):
+            _, _, src, _, ports = self.keys[j]
+            if src is None:
+                self.any_src.append(j)
+            else:
+                for s in src:
+                    self.by_src[s].append(j)
+            if ports is None:
+                self.any_port.append(j)
+            else:
+                for p in ports:
+                    self.by_port[p].append(j)
+        self.size = max(self.size, end)
+
+    def first_cover(self, j: int) -> Optional[int]:
+        """Position of the first rule before j that covers rule j, if any."""
+        self.extend_to(j)
+        later = self.keys[j]
+        _, _, src, _, ports = later
+
+        src_lists = (self.any_src,) if src is None else (self.any_src, self.by_src.get(min(src), []))
+        port_lists = (self.any_port,) if ports is None else (self.any_port, self.by_port.get(min(ports), []))
+
+        # Walk the shorter candidate list in position order; the first hit is the answer
+        lists = min(src_lists, port_lists, key=lambda ls: sum(len(l) for l in ls))
+        keys = self.keys
+        for i in merge(*lists):
+            if i >= j:
+                break
+            if _covers(keys[i], later):
+                return i
+        return None
+
+
+def _shadowed_in_bucket(keys: List[tuple]) -> Dict[int, int]:
+    """Later -> first covering earlier bucket position, for every shadowed rule."""
+    index = _CoverIndex(keys)
+    shadowed = {}
+    for j in range(1, len(keys)):
+        i = index.first_cover(j)
+        if i is not None:
+            shadowed[j] = i
+    return shadowed
+
+
+def _update_shadowed(keys: List[tuple], fps: tuple, old_fps: tuple, old_shadowed: Dict[int, int]) -> Dict[int, int]:
+    """
+    Shadowing for a zone pair's rules, given the result for a previous version
+    of the same rules. Only the changed span is checked from scratch; rules
+    after it are re-checked against the changed span alone, unless the rule
+    that used to shadow them was removed.
+    """
+    n_old, n_new = len(old_fps), len(fps)
+    limit = min(n_old, n_new)
+
+    # Unchanged prefix and suffix around the edited span
+    p = 0
+    while p < limit and fps[p] == old_fps[p]:
+        p += 1
+    q = 0
+    while q < limit - p and fps[n_new - 1 - q] == old_fps[n_old - 1 - q]:
+        q += 1
+
+    delta = n_new - n_old
+    old_suffix, new_suffix = n_old - q, n_new - q
+
+    # Shadowing only depends on earlier rules, so the prefix is unaffected
+    shadowed = {j: i for j, i in old_shadowed.items() if j < p}
+
+    index = _CoverIndex(keys)
+    for j in range(max(p, 1), new_suffix):
+        i = index.first_cover(j)
+        if i is not None:
+            shadowed[j] = i
+
+    changed = range(p, new_suffix)
+    for j in range(new_suffix, n_new):
+        old_i = old_shadowed.get(j - delta)
+
+        if old_i is not None and old_i < p:
+            shadowed[j] = old_i
+            continue
+
+        if old_i is not None and old_i < old_suffix:
+            # The rule that shadowed it was edited or removed
+            i = index.first_cover(j)
+            if i is not None:
+                shadowed[j] = i
+            continue
+
+        # Unchanged rules didn't cover it any earlier than old_i before, so
+        # only the edited span can introduce an earlier shadower
+        later = keys[j]
+        candidate = old_i + delta if old_i is not None else None
+        for i in changed:
+            if _covers(keys[i], later):
+                candidate = i
+                break
+        if candidate is not None:
+            shadowed[j] = candidate
+
+    return shadowed
 
 
 class GeneralIRLinter(IRLinter):
 
-    def lint(self, ir: IRBuilderOutput) -> Tuple[bool, List[str]]:
+    version = "3"
+
+    def context_slice(self, rule: IRRule, context: Optional[Dict[str, Any]]) -> Any:
+        if context is None or not rule.schedule:
+            return None
+        return (rule.schedule, (network_definition(context).get("time_windows") or {}).get(rule.schedule))
+
+    def lint_rule(self, r: IRRule, context: Optional[Dict[str, Any]] = None) -> List[str]:
         warnings: List[str] = []
-        rule_ids = set()
 
-        for r in ir.rules:
-            if r.id in rule_ids:
-                warnings.append(f"Duplicate rule ID: {r.id}")
-            rule_ids.add(r.id)
+        if not r.src:
+            warnings.append(f"Rule {r.id}: source list is empty.")
 
+        if not r.dst:
+            warnings.append(f"Rule {r.id}: destination list is empty.")
 
-            if not r.src:
-                warnings.append(f"Rule {r.id}: source list is empty.")
+        for p in r.dst_ports:
+            if not (1 <= p <= 65535):
+                warnings.append(f"Rule {r.id}: invalid port {p}.")
 
-            if not r.dst:
-                warnings.append(f"Rule {r.id}: destination list is empty.")
+        if r.protocol in ["icmp", "any"] and r.dst_ports:
+            warnings.append(
+                f"Rule {r.id}: protocol '{r.protocol}' should not have ports."
+            )
 
-            for p in r.dst_ports:
-                if not (1 <= p <= 65535):
-                    warnings.append(f"Rule {r.id}: invalid port {p}.")
+        if r.action not in ["allow", "deny"]:
+            warnings.append(f"Rule {r.id}: unknown action '{r.action}'.")
 
-            if r.protocol in ["icmp", "any"] and r.dst_ports:
-                warnings.append(
-                    f"Rule {r.id}: protocol '{r.protocol}' should not have ports."
-                )
+        if r.direction not in [None, "inbound", "outbound", "any"]:
+            warnings.append(f"Rule {r.id}: invalid direction '{r.direction}'.")
+
+        if r.priority not in [10, 100]:
+            warnings.append(
+                f"Rule {r.id}: invalid priority '{r.priority}' (should be 10 or 100)."
+            )
+
+        # Schedules can only be checked against a context's time windows
+        if context is not None and r.schedule:
+            spec = (network_definition(context).get("time_windows") or {}).get(r.schedule)
+            error = None if spec is None else time_window_error(spec)
+            if spec is None:
+                warnings.append(f"Rule {r.id}: schedule '{r.schedule}' is not a time window of the context.")
+            elif error is not None:
+                warnings.append(f"Rule {r.id}: time window '{r.schedule}' is invalid: {error}.")
+
+        return warnings
+
+    def cross_rule_warnings(self, rules: Sequence[IRRule], memo: Optional[RuleMemo] = None) -> Dict[int, List[str]]:
+        cross: Dict[int, List[str]] = defaultdict(list)
+
+        rule_ids = set()
+        for i, r in enumerate(rules):
+            if r.id in rule_ids:
+                cross[i].append(f"Duplicate rule ID: {r.id}")
+            rule_ids.add(r.id)
+
+        # Shadowing is only checked between rules of the same zone pair. With
+        # a memo, each pair keeps its last result and is updated from the
+        # edited span only, so a one-rule change doesn't re-check the pair.
+        buckets: Dict[tuple, List[int]] = defaultdict(list)
+        for i, r in enumerate(rules):
+            buckets[(r.src_zone.lower(), r.dst_zone.lower())].append(i)
 
-            if r.action not in ["allow", "deny"]:
-                warnings.append(f"Rule {r.id}: unknown action '{r.action}'.")
+        for zone_pair, positions in buckets.items():
+            if len(positions) < 2:
+                continue
 
-            if r.direction not in [None, "inbound", "outbound", "any"]:
-                warnings.append(f"Rule {r.id}: invalid direction '{r.direction}'.")
+            if memo is None:
+                shadowed = _shadowed_in_bucket([_cover_key(rules[i]) for i in positions])
+            else:
+                keys = memo.results_at(positions, ("cover_key",), _cover_key)
+                state_key = ("shadowing", self.version, zone_pair)
+                fps = tuple(memo.fingerprints[i] for i in positions)
+                previous = memo.cache.get_state(state_key)
+                if previous is None:
+                    shadowed = _shadowed_in_bucket(keys)
+                elif previous[0] == fps:
+                    shadowed = previous[1]
+                else:
+                    shadowed = _update_shadowed(keys, fps, previous[0], previous[1])
+                memo.cache.set_state(state_key, (fps, shadowed))
 
-            if r.priority not in [10, 100]:
-                warnings.append(
-                    f"Rule {r.id}: invalid priority '{r.priority}' (should be 10 or 100)."
+            for j, i in shadowed.items():
+                later, earlier = rules[positions[j]], rules[positions[i]]
+                note = " with a different action" if later.action != earlier.action else ""
+                cross[positions[j]].append(
+                    f"Rule {later.id}: shadowed by earlier rule {earlier.id}{note}; it will never match."
                 )
 
-        return (len(warnings) == 0), warnings
\ No newline at end of file
+        return cross
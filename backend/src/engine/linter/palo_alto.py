@@ -1,6 +1,7 @@
-from typing import List, Tuple
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
 from .base import IRLinter
-from ..schemas import IRBuilderOutput
+from ..schemas import IRRule
 import ipaddress
 
 
@@ -17,6 +18,8 @@ VALID_PROTOCOLS = {"tcp", "udp", "icmp", "any"}
 INVALID_NAME_CHARS = set(" /\\;")
 
 
+# The same object names recur across thousands of rules
+@lru_cache(maxsize=65536)
 def _is_ip_or_cidr(value: str) -> bool:
     try:
         ipaddress.ip_network(value, strict=False)
@@ -27,85 +30,84 @@ def _is_ip_or_cidr(value: str) -> bool:
 
 class PaloAltoLinter(IRLinter):
 
-    def lint(self, ir: IRBuilderOutput) -> Tuple[bool, List[str]]:
+    def lint_rule(self, r: IRRule, context: Optional[Dict[str, Any]] = None) -> List[str]:
         warnings: List[str] = []
 
-        for r in ir.rules:
-            proto = r.protocol.lower()
+        proto = r.protocol.lower()
 
-            if proto not in VALID_PROTOCOLS:
-                warnings.append(f"Rule {r.id}: invalid protocol '{r.protocol}'.")
+        if proto not in VALID_PROTOCOLS:
+            warnings.append(f"Rule {r.id}: invalid protocol '{r.protocol}'.")
 
-            if not r.src_zone:
-                warnings.append(f"Rule {r.id}: src_zone missing.")
+        if not r.src_zone:
+            warnings.append(f"Rule {r.id}: src_zone missing.")
 
-            if not r.dst_zone:
-                warnings.append(f"Rule {r.id}: dst_zone missing.")
+        if not r.dst_zone:
+            warnings.append(f"Rule {r.id}: dst_zone missing.")
 
-            if r.schedule:
-                if any(c in INVALID_NAME_CHARS for c in r.schedule):
-                    warnings.append(
-                        f"Rule {r.id}: schedule name '{r.schedule}' contains invalid PAN-OS characters."
-                    )
-
-                if r.action == "deny":
-                    warnings.append(
-                        f"Rule {r.id}: schedule on DENY rule is unusual in PAN-OS."
-                    )
-
-            if proto == "icmp" and r.dst_ports:
+        if r.schedule:
+            if any(c in INVALID_NAME_CHARS for c in r.schedule):
                 warnings.append(
-                    f"Rule {r.id}: ICMP rules cannot specify destination ports."
+                    f"Rule {r.id}: schedule name '{r.schedule}' contains invalid PAN-OS characters."
                 )
 
-            if proto == "any" and r.dst_ports:
+            if r.action == "deny":
                 warnings.append(
-                    f"Rule {r.id}: protocol 'any' should not specify ports."
+                    f"Rule {r.id}: schedule on DENY rule is unusual in PAN-OS."
                 )
 
-            if proto in ["tcp", "udp"]:
-                for p in r.dst_ports:
-                    if not (1 <= p <= 65535):
-                        warnings.append(f"Rule {r.id}: invalid port number {p}.")
+        if proto == "icmp" and r.dst_ports:
+            warnings.append(
+                f"Rule {r.id}: ICMP rules cannot specify destination ports."
+            )
 
-            needs_custom_service = False
-
-            if proto in ["tcp", "udp"]:
-                if len(r.dst_ports) == 1:
-                    port = r.dst_ports[0]
-                    if (proto, port) not in WELL_KNOWN_DEFAULT_SERVICES:
-                        needs_custom_service = True
-                else:
-                    needs_custom_service = True
-
-            if needs_custom_service:
-                warnings.append(
-                    f"Rule {r.id}: No built-in PAN-OS application covers {proto}/{r.dst_ports}. "
-                    f"A custom service-object will likely be required."
-                )
+        if proto == "any" and r.dst_ports:
+            warnings.append(
+                f"Rule {r.id}: protocol 'any' should not specify ports."
+            )
 
-            if r.direction == "inbound" and r.src_zone.lower() in ["internal", "trust"]:
-                warnings.append(
-                    f"Rule {r.id}: inbound rule has internal src_zone '{r.src_zone}'."
-                )
+        if proto in ["tcp", "udp"]:
+            for p in r.dst_ports:
+                if not (1 <= p <= 65535):
+                    warnings.append(f"Rule {r.id}: invalid port number {p}.")
 
-            if r.direction == "outbound" and r.dst_zone.lower() in ["internal", "trust"]:
-                warnings.append(
-                    f"Rule {r.id}: outbound rule has internal dst_zone '{r.dst_zone}'."
-                )
+        needs_custom_service = False
 
-            if set(r.src) & set(r.dst):
+        if proto in ["tcp", "udp"]:
+            if len(r.dst_ports) == 1:
+                port = r.dst_ports[0]
+                if (proto, port) not in WELL_KNOWN_DEFAULT_SERVICES:
+                    needs_custom_service = True
+            else:
+                needs_custom_service = True
+
+        if needs_custom_service:
+            warnings.append(
+                f"Rule {r.id}: No built-in PAN-OS application covers {proto}/{r.dst_ports}. "
+                f"A custom service-object will likely be required."
+            )
+
+        if r.direction == "inbound" and r.src_zone.lower() in ["internal", "trust"]:
+            warnings.append(
+                f"Rule {r.id}: inbound rule has internal src_zone '{r.src_zone}'."
+            )
+
+        if r.direction == "outbound" and r.dst_zone.lower() in ["internal", "trust"]:
+            warnings.append(
+                f"Rule {r.id}: outbound rule has internal dst_zone '{r.dst_zone}'."
+            )
+
+        if set(r.src) & set(r.dst):
+            warnings.append(
+                f"Rule {r.id}: same object(s) appear in both source and destination."
+            )
+
+        for obj in r.src + r.dst:
+            if _is_ip_or_cidr(obj):
+                continue
+
+            if any(c in INVALID_NAME_CHARS for c in obj):
                 warnings.append(
-                    f"Rule {r.id}: same object(s) appear in both source and destination."
+                    f"Rule {r.id}: object name '{obj}' contains invalid characters for PAN-OS."
                 )
 
-            for obj in r.src + r.dst:
-                if _is_ip_or_cidr(obj):
-                    continue
-
-                if any(c in INVALID_NAME_CHARS for c in obj):
-                    warnings.append(
-                        f"Rule {r.id}: object name '{obj}' contains invalid characters for PAN-OS."
-                    )
-
-        return (len(warnings) == 0), warnings
\ No newline at end of file
+        return warnings
@@ -5,24 +5,30 @@ LINTERS = {
     "palo_alto": [GeneralIRLinter(), PaloAltoLinter()],
 }
 
-def lint_ir(ir, vendor: str):
+def lint_ir(ir, vendor: str, context=None, cache=None, memo=None):
     all_warnings = []
 
+    if cache is not None and memo is None:
+        memo = cache.memo(ir.rules)
+
     for l in LINTERS[vendor]:
-        _, warnings = l.lint(ir)
+        _, warnings = l.lint(ir, context=context, memo=memo)
         all_warnings.extend(warnings)
     return (len(all_warnings) == 0), all_warnings
 
 
-def lint_ir_all(ir):
+def lint_ir_all(ir, context=None, cache=None, memo=None):
     all_warnings = {}
 
+    if cache is not None and memo is None:
+        memo = cache.memo(ir.rules)
+
     all_valid = True
     for vendor in LINTERS.keys():
-        is_valid, vendor_warnings = lint_ir(ir, vendor)
+        is_valid, vendor_warnings = lint_ir(ir, vendor, context=context, memo=memo)
         all_warnings[vendor] = vendor_warnings
 
         if not is_valid:
             all_valid = False
 
-    return all_valid, all_warnings
\ No newline at end of file
+    return all_valid, all_warnings
@@ -0,0 +1,329 @@
+import csv
+import io
+import ipaddress
+import json
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from itertools import chain
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .compiler.palo_alto import PaloAltoCompiler
+from .context.index import network_definition
+from .schemas import IRRule
+
+# (ip version, first address, last address)
+Interval = Tuple[int, int, int]
+
+# Largest rulebase optimize_rule_order takes: finding the order-sensitive
+# pairs is quadratic in the number of rules
+MAX_RULES = 20000
+
+# Column names accepted in hit count / traffic log CSV exports
+NAME_COLUMNS = ("rule", "rule name", "rule_name", "name")
+COUNT_COLUMNS = ("hit count", "hit_count", "hits", "rule hit count", "count")
+
+
+def parse_hit_counts(text: str) -> Dict[str, int]:
+    """
+    Hit counts per rule name from a JSON object ({"rule": hits}) or a CSV
+    export: a rule hit-count export (a name and a hit count column) adds up
+    the counts, a traffic log (a rule column, one row per session) counts
+    rows.
+    """
+    stripped = text.lstrip()
+    if stripped.startswith("{"):
+        return {str(k): int(v) for k, v in json.loads(stripped).items()}
+
+    reader = csv.DictReader(io.StringIO(stripped))
+    columns = {c.strip().lower(): c for c in reader.fieldnames or ()}
+    name_col = next((columns[c] for c in NAME_COLUMNS if c in columns), None)
+    if name_col is None:
+        raise ValueError(f"No rule name column (one of {', '.join(NAME_COLUMNS)})")
+    count_col = next((columns[c] for c in COUNT_COLUMNS if c in columns), None)
+
+    hits: Dict[str, int] = defaultdict(int)
+    for row in reader:
+        name = (row.get(name_col) or "").strip()
+        if not name:
+            continue
+        if count_col is None:
+            hits[name] += 1
+        else:
+            value = (row.get(count_col) or "0").strip().replace(",", "")
+            hits[name] += int(value or 0)
+    return dict(hits)
+
+
+def _interval(address: str) -> Optional[Interval]:
+    """Address range of an IP, CIDR or "a-b" range; None for anything else (FQDNs)."""
+    try:
+        if "-" in address:
+            first, last = (ipaddress.ip_address(a.strip()) for a in address.split("-", 1))
+        else:
+            net = ipaddress.ip_network(address.strip(), strict=False)
+            first, last = net.network_address, net.broadcast_address
+    except ValueError:
+        return None
+    if first.version != last.version:
+        return None
+    return first.version, int(first), int(last)
+
+
+def _intervals(names: Sequence[str], objects: Dict[str, Any]) -> Optional[List[Interval]]:
+    """
+    Address ranges a rule's sources or destinations can match, None when
+    they can match anything: "any", or a name that doesn't resolve to IPs
+    (FQDN objects, unknown names) and so can't be ruled out.
+    """
+    out = []
+    for name in names:
+        if name.lower() == "any":
+            return None
+        value = objects.get(name, name)
+        addresses = [value] if isinstance(value, str) else value if isinstance(value, list) else []
+        if not addresses or not all(isinstance(a, str) for a in addresses):
+            return None
+        for address in addresses:
+            interval = _interval(address)
+            if interval is None:
+                return None
+            out.append(interval)
+    return out
+
+
+def _ranges_overlap(a: Optional[List[Interval]], b: Optional[List[Interval]]) -> bool:
+    if a is None or b is None:
+        return True
+    return any(va == vb and lo <= hi_b and lo_b <= hi for va, lo, hi in a for vb, lo_b, hi_b in b)
+
+
+class _Match:
+    """What a rule matches as PAN-OS evaluates the compiled rule, for overlap tests."""
+
+    __slots__ = ("src_zone", "dst_zone", "src", "dst", "service", "effect")
+
+    def __init__(self, rule: IRRule, objects: Dict[str, Any], compiler: PaloAltoCompiler):
+        self.src_zone = rule.src_zone.lower()
+        self.dst_zone = rule.dst_zone.lower()
+        self.src = _intervals(rule.src, objects)
+        self.dst = _intervals(rule.dst, objects)
+        # As compiled: application-default matches any service, otherwise
+        # only the first port of the rule is used
+        service = compiler._service_name(rule)
+        self.service = None if service == "application-default" else (rule.protocol.lower(), rule.dst_ports[0])
+        # What the firewall does with a flow this rule matches first
+        self.effect = (rule.action.lower(), rule.log)
+
+    def overlaps(self, other: "_Match") -> bool:
+        """True unless no flow can match both rules (schedules are assumed to overlap)."""
+        for a, b in ((self.src_zone, other.src_zone), (self.dst_zone, other.dst_zone)):
+            if a != b and "any" not in (a, b):
+                return False
+        if self.service is not None and other.service is not None and self.service != other.service:
+            return False
+        return _ranges_overlap(self.src, other.src) and _ranges_overlap(self.dst, other.dst)
+
+
+def dependencies(rules: Sequence[IRRule], context: Optional[Dict[str, Any]] = None) -> List[List[int]]:
+    """
+    The order-sensitive pairs of a first-match rulebase: preds[j] lists every
+    earlier rule i that can match a flow j also matches and treats it
+    differently (action or logging). Keeping each such i before j keeps the
+    outcome of every flow: the first rule a flow hits may change, but only
+    to one with the same effect. Overlap is decided on zones, services as
+    compiled and addresses resolved through the context's objects; anything
+    that can't be resolved is assumed to overlap.
+    """
+    objects = network_definition(context).get("objects") or {}
+    compiler = PaloAltoCompiler()
+    matches = [_Match(r, objects, compiler) for r in rules]
+
+    # Only rules of the same zone pair (or with an "any" zone) can overlap
+    buckets: Dict[tuple, List[int]] = defaultdict(list)
+    any_zone: List[int] = []
+    preds: List[List[int]] = [[] for _ in rules]
+    for j, m in enumerate(matches):
+        if "any" in (m.src_zone, m.dst_zone):
+            earlier = [range(j)]
+        else:
+            earlier = [buckets[(m.src_zone, m.dst_zone)], any_zone]
+        for i in chain.from_iterable(earlier):
+            if matches[i].effect != m.effect and matches[i].overlaps(m):
+                preds[j].append(i)
+        if "any" in (m.src_zone, m.dst_zone):
+            any_zone.append(j)
+        else:
+            buckets[(m.src_zone, m.dst_zone)].append(j)
+    return preds
+
+
+def _bits(mask: int) -> List[int]:
+    out = []
+    while mask:
+        low = mask & -mask
+        out.append(low.bit_length() - 1)
+        mask ^= low
+    return out
+
+
+def greedy_order(hits: Sequence[int], preds: Sequence[Sequence[int]]) -> List[int]:
+    """
+    An order of rules 0..n-1 that keeps every preds[j] before j and puts
+    heavily hit rules early, to lower the expected match depth
+    sum(hits[i] * position[i]) / sum(hits).
+
+    Minimizing that under precedence constraints is NP-hard, so this is
+    greedy: repeatedly take the unplaced hit rule whose set of still
+    unplaced ancestors (itself included) has the most hits per rule, and
+    place that set in original order. Rules without hits keep their
+    original order after those.
+
+    The hits and size of every hit rule's unplaced set are kept up to date
+    as rules are placed (one bit matrix column per placed rule), so each
+    pick is a single vectorized scan: O(n * hit rules) overall.
+    """
+    import numpy as np
+
+    n = len(hits)
+    ancestors = [0] * n
+    for j in range(n):
+        mask = 0
+        for i in preds[j]:
+            mask |= ancestors[i] | (1 << i)
+        ancestors[j] = mask
+
+    rows = [j for j in range(n) if hits[j] > 0]
+    if not rows:
+        return list(range(n))
+    row_of = {j: r for r, j in enumerate(rows)}
+    closures = [ancestors[j] | (1 << j) for j in rows]
+
+    # Row r, bit k: rule k is rules[r] or one of its ancestors
+    nbytes = (n + 7) // 8
+    matrix = np.frombuffer(b"".join(c.to_bytes(nbytes, "little") for c in closures), dtype=np.uint8)
+    matrix = matrix.reshape(len(rows), nbytes)
+
+    def column(k):
+        return ((matrix[:, k >> 3] >> (k & 7)) & 1).astype(np.int64)
+
+    weights = np.asarray(hits, dtype=np.int64)
+    count = np.array([c.bit_count() for c in closures], dtype=np.int64)
+    total = np.zeros(len(rows), dtype=np.int64)
+    for k in np.flatnonzero(weights):
+        total += column(k) * weights[k]
+
+    pending = np.ones(len(rows), dtype=bool)
+    density = np.empty(len(rows), dtype=np.float64)
+    placed = 0
+    order: List[int] = []
+    while pending.any():
+        density.fill(-np.inf)
+        np.divide(total, count, out=density, where=pending)
+        # Ties go to the most hits, then the earliest rule
+        best = np.flatnonzero(density == density.max())
+        best = best[total[best] == total[best].max()][0]
+
+        members = _bits(closures[best] & ~placed)
+        order.extend(members)
+        for k in members:
+            placed |= 1 << k
+            hit = column(k)
+            total -= hit * weights[k]
+            count -= hit
+            if k in row_of:
+                pending[row_of[k]] = False
+
+    order.extend(j for j in range(n) if not placed >> j & 1)
+    return order
+
+
+def expected_depth(hits: Sequence[int], order: Sequence[int]) -> float:
+    """Mean 1-based position of the first matching rule over all hits."""
+    total = sum(hits)
+    if not total:
+        return 0.0
+    return sum(hits[i] * (position + 1) for position, i in enumerate(order)) / total
+
+
+def _kept(order: Sequence[int]) -> set:
+    """The rules of order that are already in relative order: a longest increasing subsequence."""
+    tails: List[int] = []
+    tail_at: List[int] = []
+    parent = [-1] * len(order)
+    for k, i in enumerate(order):
+        p = bisect_left(tails, i)
+        if p == len(tails):
+            tails.append(i)
+            tail_at.append(k)
+        else:
+            tails[p] = i
+            tail_at[p] = k
+        parent[k] = tail_at[p - 1] if p else -1
+    kept = set()
+    k = tail_at[-1] if tail_at else -1
+    while k >= 0:
+        kept.add(order[k])
+        k = parent[k]
+    return kept
+
+
+def move_commands(rule_ids: Sequence[str], order: Sequence[int]) -> List[str]:
+    """
+    PAN-OS commands that turn the rulebase rule_ids into order: every rule
+    outside the longest run already in relative order is moved, in the new
+    order, to the top or after the rule preceding it.
+    """
+    fmt = PaloAltoCompiler()._fmt
+    kept = _kept(order)
+    commands = []
+    for position, i in enumerate(order):
+        if i in kept:
+            continue
+        base = f"move rulebase security rules {fmt(rule_ids[i])}"
+        commands.append(f"{base} top" if position == 0 else f"{base} after {fmt(rule_ids[order[position - 1]])}")
+    return commands
+
+
+def optimize_rule_order(
+    rules: Sequence[IRRule],
+    hit_counts: Dict[str, int],
+    context: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Reorder a compiled rulebase so frequently hit rules are matched earlier,
+    without changing what happens to any flow (see dependencies). hit_counts
+    maps rule ids to hits (see parse_hit_counts); ids that aren't rules are
+    reported and ignored. Returns the new order of rule ids, the PAN-OS
+    move commands to get there and the expected match depth before and
+    after; the rulebase is left as is when reordering doesn't lower it.
+    Raises ValueError for duplicate rule ids or more than MAX_RULES rules.
+    """
+    if len(rules) > MAX_RULES:
+        raise ValueError(f"Too many rules to reorder: {len(rules)} (at most {MAX_RULES})")
+    ids = [r.id for r in rules]
+    duplicates = sorted(rule_id for rule_id, n in Counter(ids).items() if n > 1)
+    if duplicates:
+        raise ValueError(f"Duplicate rule IDs: {', '.join(duplicates)}")
+
+    position = {rule_id: i for i, rule_id in enumerate(ids)}
+    hits = [0] * len(rules)
+    for rule_id, count in hit_counts.items():
+        if rule_id in position:
+            hits[position[rule_id]] += max(0, int(count))
+
+    preds = dependencies(rules, context)
+    original = list(range(len(rules)))
+    order = greedy_order(hits, preds)
+    before, after = expected_depth(hits, original), expected_depth(hits, order)
+    if after >= before:
+        order, after = original, before
+
+    commands = move_commands(ids, order)
+    return {
+        "order": [ids[i] for i in order],
+        "moves": commands,
+        "expected_depth_before": round(before, 3),
+        "expected_depth_after": round(after, 3),
+        "constraints": sum(len(p) for p in preds),
+        "unknown_rules": sorted(set(hit_counts) - set(position)),
+    }
@@ -0,0 +1,239 @@
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from . import agents
+from .batfish.answers import DEFAULT_PROFILE
+from .batfish.validator import BatfishManager
+from .compiler.runner import compile_ir_all
+from .context.index import ContextIndex
+from .context.pruner import (
+    PrunedContext,
+    extend_for_resolver,
+    full_context,
+    needs_full_context,
+    prune_context,
+)
+from .linter.runner import lint_ir_all
+from .resolver_cache import ResolverCache
+from .rulecache import RuleCheckCache, default_cache
+from .safety.runner import verify_safety
+from .tiering import ModelRouter, complexity, ir_failure, resolver_failure
+from .schemas import IRBuilderOutput, ResolverOutput
+
+logger = logging.getLogger(__name__)
+
+
+AGENT_MODES = ("pipeline", "combined")
+
+
+def _resolve(nl_policy: str, pruned: PrunedContext, model: str) -> Tuple[ResolverOutput, PrunedContext]:
+    resolved = agents.resolve_policy(nl_policy=nl_policy, context=pruned.context, model=model)
+
+    if needs_full_context(pruned, resolved):
+        pruned = full_context(pruned)
+        resolved = agents.resolve_policy(nl_policy=nl_policy, context=pruned.context, model=model)
+
+    return resolved, pruned
+
+
+def _resolve_and_build_combined(
+    nl_policy: str,
+    pruned: PrunedContext,
+    model: str,
+) -> Tuple[ResolverOutput, IRBuilderOutput, PrunedContext]:
+    combined = agents.resolve_and_build_ir(nl_policy=nl_policy, context=pruned.context, model=model)
+
+    if needs_full_context(pruned, combined.resolver):
+        pruned = full_context(pruned)
+        combined = agents.resolve_and_build_ir(nl_policy=nl_policy, context=pruned.context, model=model)
+
+    return combined.resolver, combined.ir, pruned
+
+
+def _combined_failure(result: Tuple[ResolverOutput, IRBuilderOutput, PrunedContext]) -> Optional[str]:
+    return resolver_failure(result[0]) or ir_failure(result[1])
+
+
+def resolve_and_build(
+    nl_policy: str,
+    context: Dict[str, Any],
+    prune: bool = True,
+    mode: str = "pipeline",
+    model: str = "gpt-4o-mini",
+    index: Optional[ContextIndex] = None,
+    resolver_cache: Optional[ResolverCache] = None,
+    router: Optional[ModelRouter] = None,
+) -> Tuple[ResolverOutput, IRBuilderOutput, PrunedContext]:
+    """
+    Run the resolver and IR builder agents on the slice of context the policy refers to.
+
+    The resolver is re-run against the full context if it referenced a pruned
+    entity or reported an entity-level ambiguity. The IR builder then gets the
+    slice widened with every entity the resolver output references.
+
+    In "combined" mode both outputs come from a single structured-output call.
+    A precomputed index (e.g. of a registered context) can be passed to skip
+    re-indexing the context.
+
+    With a router, the model is chosen per policy from its complexity and
+    each agent call is retried on a stronger tier if its output looks like a
+    failure; otherwise every call uses model.
+
+    With a resolver_cache, a verified resolver output of an earlier request
+    phrased differently (see ResolverCache) replaces the resolver call, in
+    either mode; only the IR builder runs.
+    """
+    if mode not in AGENT_MODES:
+        raise ValueError(f"Unsupported agent mode: {mode}")
+
+    pruned = prune_context(nl_policy, context, index=index)
+    if not prune:
+        pruned = full_context(pruned)
+
+    if router is None:
+        router = ModelRouter.from_models([model])
+    tier = router.initial_tier(complexity(nl_policy, pruned))
+    # Cached outputs are shared by the policies that start on the same tier
+    cache_model = router.model(tier)
+
+    cached = None
+    if resolver_cache is not None:
+        cached = resolver_cache.lookup(nl_policy, context, index=pruned.index, model=cache_model)
+
+    if cached is not None:
+        resolved = cached
+    elif mode == "combined":
+        (resolved, ir_result, pruned), _ = router.run(
+            tier, "combined", lambda m: _resolve_and_build_combined(nl_policy, pruned, m), _combined_failure
+        )
+        if resolver_cache is not None:
+            resolver_cache.add(nl_policy, context, resolved, index=pruned.index, model=cache_model)
+        return resolved, ir_result, pruned
+    else:
+        (resolved, pruned), tier = router.run(
+            tier, "resolver", lambda m: _resolve(nl_policy, pruned, m), lambda r: resolver_failure(r[0])
+        )
+        if resolver_cache is not None:
+            resolver_cache.add(nl_policy, context, resolved, index=pruned.index, model=cache_model)
+
+    pruned = extend_for_resolver(pruned, resolved)
+
+    ir_result, _ = router.run(
+        tier, "ir_builder",
+        lambda m: agents.build_ir(resolver_output=resolved, context=pruned.context, model=m),
+        ir_failure,
+    )
+
+    return resolved, ir_result, pruned
+
+
+class TranslationCancelled(Exception):
+    """Raised between pipeline stages once a translation has been cancelled."""
+
+
+def _check_cancelled(cancel_event: Optional[threading.Event]) -> None:
+    if cancel_event is not None and cancel_event.is_set():
+        raise TranslationCancelled()
+
+
+def translate(
+    nl_policy: str,
+    context: Dict[str, Any],
+    prune: bool = True,
+    mode: str = "pipeline",
+    cancel_event: Optional[threading.Event] = None,
+    index: Optional[ContextIndex] = None,
+    batfish_profile: str = DEFAULT_PROFILE,
+    resolver_cache: Optional[ResolverCache] = None,
+    router: Optional[ModelRouter] = None,
+) -> Dict[str, Any]:
+    """
+    Full translation pipeline: resolve -> IR -> lint -> safety -> compile -> Batfish.
+
+    Returns the fields of a translate response (everything but the policy id).
+    If cancel_event gets set, TranslationCancelled is raised at the next stage
+    boundary so speculative runs stop spending LLM and Batfish time.
+    """
+    _check_cancelled(cancel_event)
+    resolved, ir_result, _ = resolve_and_build(
+        nl_policy, context, prune=prune, mode=mode, index=index,
+        resolver_cache=resolver_cache, router=router,
+    )
+    logger.info(f"Resolved Policy: {resolved}")
+    logger.info(f"Intermediate Representation: {ir_result}")
+
+    _check_cancelled(cancel_event)
+
+    result = {
+        "resolver_output": resolved,
+        "ir": ir_result,
+    }
+    is_safe, checked = check_and_compile(ir_result, context=context, cache=default_cache())
+    result.update(checked)
+    if not is_safe:
+        result["batfish_warnings"] = {"error": [{"severity": "error", "message": "Batfish validation skipped due to safety violations."}]}
+        return result
+
+    # Batfish Validation
+    result["batfish_warnings"] = validate_configs(
+        result["configs"], context, profile=batfish_profile, cancel_event=cancel_event
+    )
+    return result
+
+
+def check_and_compile(
+    ir_result: IRBuilderOutput,
+    context: Optional[Dict[str, Any]] = None,
+    cache: Optional[RuleCheckCache] = None,
+) -> Tuple[bool, Dict[str, Any]]:
+    """
+    Deterministic half of the pipeline: lint -> safety -> compile.
+
+    Returns (is_safe, fields) where fields holds linting_warnings,
+    safety_warnings and configs (an "error" entry when safety blocks compilation).
+    With a cache, lint and safety results are memoized per rule, so only
+    changed rules are re-checked. ir_result can also be a RuleTable.
+    """
+    memo = cache.memo(ir_result.rules) if cache is not None else None
+
+    # Linting
+    all_valid, linting_warnings = lint_ir_all(ir_result, context=context, memo=memo)
+    if not all_valid:
+        logger.info(f"Linting Warnings: {linting_warnings}")
+
+    result = {"linting_warnings": linting_warnings if not all_valid else {}}
+
+    # Safety Verification
+    is_safe, safety_warnings = verify_safety(ir_result, memo=memo)
+    result["safety_warnings"] = safety_warnings
+    if not is_safe:
+        logger.info(f"Safety Errors: {safety_warnings}")
+        result["configs"] = {"error": "Compilation skipped due to safety violations."}
+        return False, result
+
+    # Compilation
+    result["configs"] = compile_ir_all(ir_result, context=context)
+    return True, result
+
+
+def validate_configs(
+    configs: Dict[str, str],
+    context: Dict[str, Any],
+    profile: str = DEFAULT_PROFILE,
+    cancel_event: Optional[threading.Event] = None,
+) -> Dict[str, Any]:
+    """Run Batfish validation for every vendor config with the given question profile."""
+    bf_warnings_all = {}
+    for vendor, config in configs.items():
+        _check_cancelled(cancel_event)
+
+        batfish_manager = BatfishManager()
+        bf_warnings_all[vendor] = batfish_manager.validate(
+            config,
+            context=context,
+            cache_key=(context or {}).get("context_id"),
+            profile=profile
+        )
+
+    return bf_warnings_all
@@ -0,0 +1,312 @@
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from .context.index import SECTIONS, ContextIndex
+from .hashing import content_hash
+from .schemas import ResolverOutput
+
+# Width of the hashed character n-gram vectors
+VECTOR_DIM = 4096
+NGRAM = 3
+
+# Words that only change how a request is phrased, never what it asks for.
+# Anything else (numbers, protocols, "any", "only", negations, unmatched
+# names, ...) has to appear identically for a cached output to be reused.
+PHRASING = {
+    "the", "and", "on", "over", "via", "for", "with", "traffic", "using",
+    "of", "a", "an", "is", "are", "be", "should", "can", "please", "let",
+    "lets", "connect", "connection", "connections", "connecting", "requests",
+    "go", "going", "flow", "flows", "talk", "communicate", "it", "that",
+    "this", "them", "we", "want", "need", "i", "must", "will", "permitted",
+    "allowed", "service", "services",
+}
+
+# Synonyms of the two actions, mapped onto the canonical one
+ACTIONS = {
+    "allow": "allow", "permit": "allow", "accept": "allow", "enable": "allow", "grant": "allow",
+    "deny": "deny", "block": "deny", "drop": "deny", "reject": "deny", "prevent": "deny",
+    "forbid": "deny", "disallow": "deny",
+}
+
+# Words that make the next entity a source or a destination
+SOURCE_MARKERS = {"from"}
+DESTINATION_MARKERS = {"to", "reach", "reaching", "access", "accessing", "toward", "towards", "into"}
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+# Roles an entity can play in a request, by section
+_SECTION_ROLES = {"services": "service", "time_windows": "schedule"}
+
+
+def _words(text: str) -> List[str]:
+    return _WORD_RE.findall(text.lower())
+
+
+class _Signature:
+    """
+    What a request says, independent of phrasing: the context entities it
+    names exactly (with the role each plays), its action words and every
+    word that isn't known to be phrasing. An ambiguous signature (roles
+    that can't be assigned) matches nothing.
+    """
+
+    __slots__ = ("entities", "roles", "actions", "residual", "ambiguous")
+
+    def __init__(
+        self,
+        roles: Tuple[Tuple[str, str, str], ...],
+        actions: Tuple[str, ...],
+        residual: Tuple[str, ...],
+        ambiguous: bool = False,
+    ):
+        self.roles = roles
+        self.entities = frozenset((section, name) for section, name, _ in roles)
+        self.actions = actions
+        self.residual = residual
+        self.ambiguous = ambiguous
+
+    def matches(self, other: "_Signature") -> bool:
+        if self.ambiguous or other.ambiguous:
+            return False
+        return self.roles == other.roles and self.actions == other.actions and self.residual == other.residual
+
+
+def entity_overlap(a: frozenset, b: frozenset) -> float:
+    """Jaccard overlap of two entity sets (1.0 when both are empty)."""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class _Shard:
+    """Cached resolver outputs for one context and model, with their vectors in one matrix."""
+
+    def __init__(self, index: ContextIndex, capacity: int):
+        import numpy as np
+
+        self.capacity = capacity
+        self.vectors = np.zeros((0, VECTOR_DIM), dtype=np.float32)
+        self.entries: List[Tuple[_Signature, ResolverOutput]] = []
+        self.next_slot = 0
+        self.lock = threading.Lock()
+
+        names = {}
+        for section in SECTIONS:
+            for name in index.names[section]:
+                names.setdefault(name.lower(), (section, name))
+        self.names = names
+        # Longest names first, so "HR_laptops_EU" wins over "HR_laptops"
+        alternation = "|".join(re.escape(n) for n in sorted(names, key=len, reverse=True))
+        self.mention_re = re.compile(rf"(?<![\w.-])(?:{alternation})(?![\w.-])", re.IGNORECASE) if names else None
+
+    def signature(self, text: str) -> _Signature:
+        """
+        A source or destination marker applies to every entity up to the next
+        marker, so "from A and B to C" makes A and B sources. Entities before
+        the first marker take the other role ("A and B to reach C"); when
+        that marker governs no entity ("A and B to connect"), or several
+        entities have no marker at all, their roles can't be told apart and
+        the signature is ambiguous.
+        """
+        roles = []
+        residual = []
+        actions = set()
+        leading = []
+        current = None
+        first_marker = None
+        first_governs = None
+        position = 0
+
+        def scan(words) -> bool:
+            nonlocal current
+            marked = False
+            for w in words:
+                if w in ACTIONS:
+                    actions.add(ACTIONS[w])
+                elif w in SOURCE_MARKERS or w in DESTINATION_MARKERS:
+                    current = "src" if w in SOURCE_MARKERS else "dst"
+                    marked = True
+                elif w not in PHRASING:
+                    residual.append(w)
+            return marked
+
+        mentions = self.mention_re.finditer(text) if self.mention_re is not None else ()
+        for m in mentions:
+            if scan(_words(text[position:m.start()])):
+                if first_marker is None:
+                    first_marker = current
+                elif first_governs is None:
+                    first_governs = False
+            position = m.end()
+            section, name = self.names[m.group(0).lower()]
+            role = _SECTION_ROLES.get(section)
+            if role is None:
+                if current is None:
+                    leading.append((section, name))
+                    continue
+                if first_governs is None:
+                    first_governs = True
+                role = current
+            roles.append((section, name, role))
+        scan(_words(text[position:]))
+
+        ambiguous = False
+        if leading:
+            if first_governs:
+                role = "dst" if first_marker == "src" else "src"
+            elif first_marker is None and len(leading) == 1:
+                role = "src"
+            else:
+                role, ambiguous = "unknown", True
+            roles.extend((section, name, role) for section, name in leading)
+
+        return _Signature(tuple(sorted(set(roles))), tuple(sorted(actions)), tuple(sorted(residual)), ambiguous)
+
+    def add(self, vector, signature: _Signature, resolved: ResolverOutput) -> None:
+        import numpy as np
+
+        with self.lock:
+            if len(self.entries) < self.capacity:
+                if len(self.entries) == len(self.vectors):
+                    grown = np.zeros((min(self.capacity, max(16, 2 * len(self.vectors))), VECTOR_DIM), dtype=np.float32)
+                    grown[:len(self.vectors)] = self.vectors
+                    self.vectors = grown
+                slot = len(self.entries)
+                self.entries.append((signature, resolved))
+            else:
+                # Full: overwrite the oldest entry
+                slot = self.next_slot
+                self.next_slot = (slot + 1) % self.capacity
+                self.entries[slot] = (signature, resolved)
+            self.vectors[slot] = vector
+
+    def candidates(self, vector, threshold: float, limit: int) -> List[Tuple[float, _Signature, ResolverOutput]]:
+        import numpy as np
+
+        with self.lock:
+            n = len(self.entries)
+            if n == 0:
+                return []
+            scores = self.vectors[:n] @ vector
+            order = np.argsort(-scores)[:limit]
+            return [(float(scores[i]), *self.entries[i]) for i in order if scores[i] >= threshold]
+
+
+class ResolverCache:
+    """
+    Reuse of resolver outputs across differently phrased requests.
+
+    Every resolved policy is stored per context (by content hash) and model,
+    as an L2-normalised vector of hashed character n-grams of its words.
+    A new request is compared with all stored ones of its context in one
+    matrix product; the best candidates above min_similarity whose exact
+    entity mentions overlap by at least min_entity_overlap are then verified:
+    both texts must name the same context entities in the same roles
+    (source, destination, service, schedule), use the same action and
+    contain the same words once known phrasing is removed. Only then is the
+    cached output returned, with raw_policy set to the new text.
+    """
+
+    def __init__(
+        self,
+        min_similarity: float = 0.5,
+        min_entity_overlap: float = 1.0,
+        max_entries_per_context: int = 4096,
+        max_contexts: int = 256,
+        candidates: int = 8,
+    ):
+        self.min_similarity = min_similarity
+        self.min_entity_overlap = min_entity_overlap
+        self.max_entries_per_context = max_entries_per_context
+        self.max_contexts = max_contexts
+        self.candidates = candidates
+        self.hits = 0
+        self.misses = 0
+        self._shards: "OrderedDict[Tuple[str, str], _Shard]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _shard(self, context: Dict[str, Any], index: Optional[ContextIndex], model: str) -> _Shard:
+        key = (content_hash(context or {}), model)
+        with self._lock:
+            shard = self._shards.get(key)
+            if shard is not None:
+                self._shards.move_to_end(key)
+                return shard
+
+        shard = _Shard(index if index is not None else ContextIndex(context), self.max_entries_per_context)
+        with self._lock:
+            shard = self._shards.setdefault(key, shard)
+            while len(self._shards) > self.max_contexts:
+                self._shards.popitem(last=False)
+        return shard
+
+    @staticmethod
+    def vectorize(text: str):
+        """Hashed, L2-normalised bag of character n-grams of the words of text."""
+        import numpy as np
+
+        buckets = []
+        for word in _words(text):
+            padded = f" {word} "
+            buckets.extend(
+                zlib.crc32(padded[i:i + NGRAM].encode("utf-8")) % VECTOR_DIM
+                for i in range(max(1, len(padded) - NGRAM + 1))
+            )
+        vector = np.bincount(np.asarray(buckets, dtype=np.int64), minlength=VECTOR_DIM).astype(np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(
+        self,
+        nl_policy: str,
+        context: Dict[str, Any],
+        index: Optional[ContextIndex] = None,
+        model: str = "",
+    ) -> Optional[ResolverOutput]:
+        """Return a verified cached resolver output for nl_policy, or None."""
+        shard = self._shard(context, index, model)
+        signature = shard.signature(nl_policy)
+        if signature.ambiguous:
+            self.misses += 1
+            return None
+
+        for _, cached_signature, resolved in shard.candidates(self.vectorize(nl_policy), self.min_similarity, self.candidates):
+            if entity_overlap(signature.entities, cached_signature.entities) < self.min_entity_overlap:
+                continue
+            if signature.matches(cached_signature):
+                self.hits += 1
+                return resolved.model_copy(update={"raw_policy": nl_policy}, deep=True)
+
+        self.misses += 1
+        return None
+
+    def add(
+        self,
+        nl_policy: str,
+        context: Dict[str, Any],
+        resolved: ResolverOutput,
+        index: Optional[ContextIndex] = None,
+        model: str = "",
+    ) -> None:
+        shard = self._shard(context, index, model)
+        signature = shard.signature(nl_policy)
+        if not signature.ambiguous:
+            shard.add(self.vectorize(nl_policy), signature, resolved)
+
+
+_resolver_cache: Optional[ResolverCache] = None
+
+
+def get_resolver_cache() -> ResolverCache:
+    """Process-wide resolver cache, configured from settings on first use."""
+    global _resolver_cache
+    if _resolver_cache is None:
+        from ..config import settings
+        _resolver_cache = ResolverCache(
+            min_similarity=settings.RESOLVER_CACHE_MIN_SIMILARITY,
+            min_entity_overlap=settings.RESOLVER_CACHE_MIN_ENTITY_OVERLAP,
+        )
+    return _resolver_cache
@@ -0,0 +1,146 @@
+import threading
+from itertools import islice
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence
+
+from .hashing import canonical_json
+from .schemas import IRRule
+
+
+def rule_fingerprint(rule: IRRule) -> tuple:
+    """
+    Canonical, hashable form of an IRRule used as a memo key.
+
+    Cheaper than rule_hash() (no JSON encoding), which matters when a large
+    rulebase is re-checked after a small change: fingerprinting every rule is
+    the only per-rule cost left once results are memoized.
+    """
+    d = rule.__dict__
+    return (
+        d["id"], d["action"], tuple(d["src"]), tuple(d["dst"]), d["protocol"],
+        tuple(d["dst_ports"]), d["src_zone"], d["dst_zone"], d["direction"],
+        d["schedule"], d["log"], d["priority"],
+    )
+
+
+def rule_fingerprints(rules: Sequence[IRRule]) -> List[tuple]:
+    # RuleTable rows compute theirs from the columns
+    columnar = getattr(rules, "fingerprints", None)
+    if columnar is not None:
+        return columnar()
+    return [rule_fingerprint(r) for r in rules]
+
+
+def slice_key(context_slice: Any) -> Optional[str]:
+    """Memo key component for the part of the context a check depends on."""
+    return None if context_slice is None else canonical_json(context_slice)
+
+
+def _evict(entries: Dict[Hashable, Any], max_entries: int) -> None:
+    overflow = len(entries) - max_entries
+    if overflow > 0:
+        for key in list(islice(entries, overflow)):
+            del entries[key]
+
+
+class RuleMemo:
+    """
+    Memo entries for one rulebase, looked up from a RuleCheckCache in a single
+    pass and shared by every linter and safety gate that checks it.
+    """
+
+    __slots__ = ("cache", "rules", "fingerprints", "entries")
+
+    def __init__(self, cache: "RuleCheckCache", rules: Sequence[IRRule], fingerprints: List[tuple], entries: List[dict]):
+        self.cache = cache
+        self.rules = rules
+        self.fingerprints = fingerprints
+        self.entries = entries
+
+    def results(self, key: Hashable, compute: Callable[[IRRule], Any]) -> List[Any]:
+        """compute(rule) for every rule, reusing results memoized under key."""
+        # Rules are only fetched on a miss (RuleTable rows are built on access)
+        out = []
+        for i, entry in enumerate(self.entries):
+            value = entry.get(key)
+            if value is None:
+                value = entry[key] = compute(self.rules[i])
+            out.append(value)
+        return out
+
+    def results_at(self, positions: Sequence[int], key: Hashable, compute: Callable[[IRRule], Any]) -> List[Any]:
+        """Like results(), for the rules at the given positions only."""
+        out = []
+        for i in positions:
+            entry = self.entries[i]
+            value = entry.get(key)
+            if value is None:
+                value = entry[key] = compute(self.rules[i])
+            out.append(value)
+        return out
+
+    def results_by_key(self, keys: Sequence[Hashable], compute: Callable[[IRRule], Any]) -> List[Any]:
+        """Like results(), with a separate key per rule (e.g. one that includes a context slice)."""
+        out = []
+        for i, (entry, key) in enumerate(zip(self.entries, keys)):
+            value = entry.get(key)
+            if value is None:
+                value = entry[key] = compute(self.rules[i])
+            out.append(value)
+        return out
+
+
+class RuleCheckCache:
+    """
+    Bounded memo of check results for individual rules.
+
+    Each distinct rule (by fingerprint) gets one entry holding the results of
+    every checker that has seen it, keyed by checker class, version and the
+    context slice the checker reads, so results are reused only while none of
+    those change. Cross-rule checks keep their incremental state under
+    separate keys (see get_state). The oldest entries are evicted first.
+    """
+
+    def __init__(self, max_entries: int = 500_000):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[tuple, dict] = {}
+        self._state: Dict[Hashable, Any] = {}
+        self._lock = threading.Lock()
+
+    def memo(self, rules: Sequence[IRRule], fingerprints: Optional[List[tuple]] = None) -> RuleMemo:
+        if fingerprints is None:
+            fingerprints = rule_fingerprints(rules)
+
+        with self._lock:
+            setdefault = self._entries.setdefault
+            before = len(self._entries)
+            entries = [setdefault(fp, {}) for fp in fingerprints]
+            added = len(self._entries) - before
+            _evict(self._entries, self.max_entries)
+
+        self.misses += added
+        self.hits += len(fingerprints) - added
+        return RuleMemo(self, rules, fingerprints, entries)
+
+    def get_state(self, key: Hashable) -> Any:
+        return self._state.get(key)
+
+    def set_state(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._state[key] = value
+            _evict(self._state, self.max_entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_default_cache: Optional[RuleCheckCache] = None
+
+
+def default_cache() -> RuleCheckCache:
+    """Process-wide cache shared by translations and batch checks."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = RuleCheckCache()
+    return _default_cache
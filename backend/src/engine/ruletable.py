@@ -0,0 +1,276 @@
+from array import array
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Union
+
+from .schemas import IRBuilderOutput, IRMetadata, IRRule
+
+# Scalar string fields, stored as ids into the table's string pool (-1 = None)
+STRING_FIELDS = ("id", "action", "protocol", "src_zone", "dst_zone", "direction", "schedule")
+OPTIONAL_FIELDS = {"direction", "schedule"}
+# List fields, stored as one flat values array plus per-rule offsets
+LIST_FIELDS = ("src", "dst", "dst_ports")
+RULE_FIELDS = set(STRING_FIELDS) | set(LIST_FIELDS) | {"log", "priority"}
+
+
+def _int(value: Any, where: str) -> int:
+    if isinstance(value, str) and value.strip().lstrip("-").isdigit():
+        value = int(value)
+    # Columns are 64-bit
+    if isinstance(value, bool) or not isinstance(value, int) or not -2 ** 63 <= value < 2 ** 63:
+        raise ValueError(f"{where}: expected an integer, got {value!r}")
+    return value
+
+
+class RuleRow:
+    """
+    One rule of a RuleTable with the attributes of an IRRule, read from the
+    columns when the row is created (see RuleTable.row / iter_rows). Rows are
+    transient: iterating a table creates them one at a time, so only the
+    columns stay in memory.
+    """
+
+    __slots__ = (
+        "id", "action", "src", "dst", "protocol", "dst_ports", "src_zone",
+        "dst_zone", "direction", "schedule", "log", "priority",
+    )
+
+    def model_dump(self) -> Dict[str, Any]:
+        return {
+            "id": self.id, "action": self.action, "src": list(self.src), "dst": list(self.dst),
+            "protocol": self.protocol, "dst_ports": list(self.dst_ports), "src_zone": self.src_zone,
+            "dst_zone": self.dst_zone, "direction": self.direction, "schedule": self.schedule,
+            "log": self.log, "priority": self.priority,
+        }
+
+    def __repr__(self) -> str:
+        return f"RuleRow({self.model_dump()!r})"
+
+
+class RuleRows(Sequence):
+    """The rules of a RuleTable as a sequence of RuleRow records."""
+
+    __slots__ = ("_table",)
+
+    def __init__(self, table: "RuleTable"):
+        self._table = table
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            start, stop, step = i.indices(len(self))
+            if step == 1:
+                return list(self._table.iter_rows(start, stop))
+            return [self[j] for j in range(start, stop, step)]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self._table.row(i)
+
+    def __iter__(self) -> Iterator[RuleRow]:
+        return self._table.iter_rows()
+
+    @property
+    def table(self) -> "RuleTable":
+        return self._table
+
+    def fingerprints(self) -> List[tuple]:
+        """rule_fingerprint() of every rule, computed from the columns."""
+        return self._table.fingerprints()
+
+
+class RuleTable:
+    """
+    Columnar storage for large rulebases inside the engine.
+
+    Every string (rule ids, object and zone names, protocols, ...) is interned
+    once in a pool and rules hold integer ids into it; scalar fields are one
+    typed array per field and list fields (src, dst, dst_ports) are a flat
+    values array with per-rule offsets. A rule costs a few dozen bytes
+    instead of a pydantic model with its own lists.
+
+    A table has the same shape as an IRBuilderOutput (.rules, .metadata,
+    model_dump()), so the linters, safety gates, compilers and rule cache
+    accept either; .rules yields __slots__ RuleRow records built on the fly.
+    Checks that only need ids can read .columns / members() directly, as
+    the rule cache (fingerprints) and FirewallSafetyGate do.
+    """
+
+    def __init__(self, metadata: Union[IRMetadata, Dict[str, Any], None] = None):
+        if metadata is None:
+            metadata = {"raw_policy": "", "warnings": [], "context_used": False}
+        self.metadata = metadata if isinstance(metadata, IRMetadata) else IRMetadata.model_validate(metadata)
+        self.strings: List[str] = []
+        self._string_ids: Dict[str, int] = {}
+        self.columns: Dict[str, array] = {f: array("i") for f in STRING_FIELDS}
+        self.columns["log"] = array("b")
+        self.columns["priority"] = array("q")
+        self.values: Dict[str, array] = {"src": array("i"), "dst": array("i"), "dst_ports": array("q")}
+        self.offsets: Dict[str, array] = {f: array("q", [0]) for f in LIST_FIELDS}
+
+    # --- building ----------------------------------------------------------
+
+    def string_id(self, s: str) -> Optional[int]:
+        """Id of an interned string, None if no rule uses it (so no column can equal it)."""
+        return self._string_ids.get(s)
+
+    def intern(self, s: str) -> int:
+        k = self._string_ids.get(s)
+        if k is None:
+            k = self._string_ids[s] = len(self.strings)
+            self.strings.append(s)
+        return k
+
+    def append(self, rule: Union[IRRule, Dict[str, Any]]) -> None:
+        """Add a rule (an IRRule or its dict form, validated like IRRule)."""
+        d = rule.__dict__ if isinstance(rule, IRRule) else rule
+        where = f"rules[{len(self)}]"
+        if not isinstance(d, dict):
+            raise ValueError(f"{where}: expected an object")
+        unknown = set(d) - RULE_FIELDS
+        if unknown:
+            raise ValueError(f"{where}: unexpected fields {sorted(unknown)}")
+
+        # Validate everything before touching the columns
+        strings = []
+        for field in STRING_FIELDS:
+            value = d.get(field)
+            if value is None and (field in OPTIONAL_FIELDS):
+                strings.append(None)
+            elif isinstance(value, str):
+                strings.append(value)
+            else:
+                raise ValueError(f"{where}.{field}: expected a string, got {value!r}")
+        lists = []
+        for field in LIST_FIELDS:
+            value = d.get(field)
+            if not isinstance(value, list):
+                raise ValueError(f"{where}.{field}: expected a list, got {value!r}")
+            if field == "dst_ports":
+                lists.append([_int(v, f"{where}.{field}") for v in value])
+            elif all(isinstance(v, str) for v in value):
+                lists.append(value)
+            else:
+                raise ValueError(f"{where}.{field}: expected a list of strings")
+        log = d.get("log")
+        if not isinstance(log, bool):
+            raise ValueError(f"{where}.log: expected a boolean, got {log!r}")
+        priority = _int(d.get("priority"), f"{where}.priority")
+
+        intern = self.intern
+        for field, value in zip(STRING_FIELDS, strings):
+            self.columns[field].append(-1 if value is None else intern(value))
+        for field, value in zip(LIST_FIELDS, lists):
+            values = self.values[field]
+            values.extend(value if field == "dst_ports" else [intern(v) for v in value])
+            self.offsets[field].append(len(values))
+        self.columns["log"].append(log)
+        self.columns["priority"].append(priority)
+
+    @classmethod
+    def from_ir(cls, ir: IRBuilderOutput) -> "RuleTable":
+        table = cls(ir.metadata)
+        for rule in ir.rules:
+            table.append(rule)
+        return table
+
+    @classmethod
+    def from_dict(cls, ir: Dict[str, Any]) -> "RuleTable":
+        """Build a table from the JSON form of an IRBuilderOutput without creating any models."""
+        if not isinstance(ir, dict) or not isinstance(ir.get("rules"), list) or "metadata" not in ir:
+            raise ValueError("expected an object with 'rules' and 'metadata'")
+        unknown = set(ir) - {"rules", "metadata"}
+        if unknown:
+            raise ValueError(f"unexpected fields {sorted(unknown)}")
+        table = cls(ir["metadata"])
+        for rule in ir["rules"]:
+            table.append(rule)
+        return table
+
+    # --- reading -----------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self.columns["id"])
+
+    @property
+    def rules(self) -> RuleRows:
+        return RuleRows(self)
+
+    def members(self, field: str, i: int) -> array:
+        """Values of list field for rule i (string ids for src/dst, ports for dst_ports)."""
+        offsets = self.offsets[field]
+        return self.values[field][offsets[i]:offsets[i + 1]]
+
+    def _row_builder(self) -> Callable[[int], RuleRow]:
+        strings = self.strings
+        cols = self.columns
+        ids, actions, protocols = cols["id"], cols["action"], cols["protocol"]
+        src_zones, dst_zones, directions, schedules = cols["src_zone"], cols["dst_zone"], cols["direction"], cols["schedule"]
+        logs, priorities = cols["log"], cols["priority"]
+        src_v, dst_v, port_v = self.values["src"], self.values["dst"], self.values["dst_ports"]
+        src_o, dst_o, port_o = self.offsets["src"], self.offsets["dst"], self.offsets["dst_ports"]
+        new = RuleRow.__new__
+
+        def build(i: int) -> RuleRow:
+            row = new(RuleRow)
+            row.id = strings[ids[i]]
+            row.action = strings[actions[i]]
+            row.protocol = strings[protocols[i]]
+            row.src_zone = strings[src_zones[i]]
+            row.dst_zone = strings[dst_zones[i]]
+            k = directions[i]
+            row.direction = None if k < 0 else strings[k]
+            k = schedules[i]
+            row.schedule = None if k < 0 else strings[k]
+            row.src = [strings[k] for k in src_v[src_o[i]:src_o[i + 1]]]
+            row.dst = [strings[k] for k in dst_v[dst_o[i]:dst_o[i + 1]]]
+            row.dst_ports = port_v[port_o[i]:port_o[i + 1]].tolist()
+            row.log = bool(logs[i])
+            row.priority = priorities[i]
+            return row
+
+        return build
+
+    def row(self, i: int) -> RuleRow:
+        return self._row_builder()(i)
+
+    def iter_rows(self, start: int = 0, stop: Optional[int] = None) -> Iterator[RuleRow]:
+        """RuleRow records for rules start..stop, read column by column."""
+        return map(self._row_builder(), range(start, len(self) if stop is None else stop))
+
+    def names(self, ids: Sequence[int]) -> List[str]:
+        strings = self.strings
+        return [strings[k] for k in ids]
+
+    def fingerprints(self) -> List[tuple]:
+        strings = self.strings
+        cols = self.columns
+        ids, actions, protocols = cols["id"], cols["action"], cols["protocol"]
+        src_zones, dst_zones, directions, schedules = cols["src_zone"], cols["dst_zone"], cols["direction"], cols["schedule"]
+        logs, priorities = cols["log"], cols["priority"]
+        src_v, dst_v, port_v = self.values["src"], self.values["dst"], self.values["dst_ports"]
+        src_o, dst_o, port_o = self.offsets["src"], self.offsets["dst"], self.offsets["dst_ports"]
+
+        def opt(k: int) -> Optional[str]:
+            return None if k < 0 else strings[k]
+
+        return [
+            (
+                strings[ids[i]], strings[actions[i]],
+                tuple(strings[k] for k in src_v[src_o[i]:src_o[i + 1]]),
+                tuple(strings[k] for k in dst_v[dst_o[i]:dst_o[i + 1]]),
+                strings[protocols[i]], tuple(port_v[port_o[i]:port_o[i + 1]]),
+                strings[src_zones[i]], strings[dst_zones[i]], opt(directions[i]), opt(schedules[i]),
+                bool(logs[i]), priorities[i],
+            )
+            for i in range(len(self))
+        ]
+
+    def to_ir(self) -> IRBuilderOutput:
+        """Materialize as an IRBuilderOutput (values were validated on append, so no re-validation)."""
+        rules = [IRRule.model_construct(**row.model_dump()) for row in self.rules]
+        return IRBuilderOutput.model_construct(rules=rules, metadata=self.metadata)
+
+    def model_dump(self) -> Dict[str, Any]:
+        return {"rules": [row.model_dump() for row in self.rules], "metadata": self.metadata.model_dump()}
@@ -1,10 +1,35 @@
 from abc import ABC, abstractmethod
-from typing import Tuple, List
-from ..schemas import IRBuilderOutput
+from typing import Tuple, List, Optional
+from ..rulecache import RuleMemo
+from ..schemas import IRBuilderOutput, IRRule
 
 
 class SafetyGate(ABC):
 
+    # Bump when a gate's checks change so memoized results are not reused
+    version = "1"
+
     @abstractmethod
-    def enforce(self, ir: IRBuilderOutput) -> Tuple[bool, List[str]]:
-        pass
\ No newline at end of file
+    def check_rule(self, rule: IRRule) -> List[str]:
+        """Errors for a single rule."""
+        pass
+
+    def check_policy(self, ir: IRBuilderOutput) -> List[str]:
+        """Errors about the policy as a whole; checked before any rule."""
+        return []
+
+    def enforce(self, ir: IRBuilderOutput, memo: Optional[RuleMemo] = None) -> Tuple[bool, List[str]]:
+        errors = self.check_policy(ir)
+        if errors:
+            return False, errors
+
+        if memo is None:
+            per_rule = [self.check_rule(r) for r in ir.rules]
+        else:
+            per_rule = memo.results((type(self).__name__, self.version), self.check_rule)
+
+        for rule_errors in per_rule:
+            errors.extend(rule_errors)
+
+        is_safe = len(errors) == 0
+        return is_safe, errors
@@ -1,15 +1,23 @@
 from .gate import FirewallSafetyGate
+from ..rulecache import RuleCheckCache, RuleMemo
 from ..schemas import IRBuilderOutput
-from typing import Tuple, List
+from typing import Tuple, List, Optional
 
 gates = [FirewallSafetyGate()] # one gate for now, can add more later
 
 
-def verify_safety(ir: IRBuilderOutput) -> Tuple[bool, List[str]]:
+def verify_safety(
+    ir: IRBuilderOutput,
+    cache: Optional[RuleCheckCache] = None,
+    memo: Optional[RuleMemo] = None,
+) -> Tuple[bool, List[str]]:
     all_errors = []
-    
+
+    if cache is not None and memo is None:
+        memo = cache.memo(ir.rules)
+
     for gate in gates:
-        is_safe, errors = gate.enforce(ir)
+        is_safe, errors = gate.enforce(ir, memo=memo)
         all_errors.extend(errors)
     
     return (len(all_errors) == 0), all_errors
@@ -0,0 +1,265 @@
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import httpx
+from openai import (
+    APIConnectionError,
+    APITimeoutError,
+    AsyncOpenAI,
+    InternalServerError,
+    RateLimitError,
+)
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_ERRORS = (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError)
+
+# Rough chars-per-token ratio used to estimate prompt size before sending
+CHARS_PER_TOKEN = 4
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at rate_per_minute, holding at most capacity.
+    Only used from the scheduler's event loop, so no thread locking is needed.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        # A single request larger than the bucket would otherwise wait forever
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+    def refund(self, amount: float) -> None:
+        """Give back (or, if negative, charge) the difference between estimated and actual usage."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+def _request_key(kind: str, kwargs: Dict[str, Any]) -> str:
+    payload = dict(kwargs)
+    text_format = payload.pop("text_format", None)
+    if text_format is not None:
+        payload["text_format"] = f"{text_format.__module__}.{text_format.__qualname__}"
+    raw = json.dumps({"kind": kind, **payload}, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _estimate_tokens(kwargs: Dict[str, Any], max_output_tokens: int) -> int:
+    messages = kwargs.get("input") or kwargs.get("messages") or []
+    chars = sum(len(str(m.get("content", ""))) for m in messages)
+    return chars // CHARS_PER_TOKEN + max_output_tokens
+
+
+def _usage_tokens(response: Any) -> Optional[int]:
+    usage = getattr(response, "usage", None)
+    return getattr(usage, "total_tokens", None) if usage is not None else None
+
+
+def _usage_split(response: Any) -> Tuple[int, int]:
+    """(input, output) tokens of a Responses or Chat Completions response."""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return 0, 0
+    input_tokens = getattr(usage, "input_tokens", None) or getattr(usage, "prompt_tokens", None) or 0
+    output_tokens = getattr(usage, "output_tokens", None) or getattr(usage, "completion_tokens", None) or 0
+    return input_tokens, output_tokens
+
+
+class LLMScheduler:
+    """
+    Process-wide gateway for LLM calls.
+
+    Owns one pooled AsyncOpenAI client on a dedicated event loop thread and,
+    for every call: coalesces identical in-flight requests (single-flight),
+    enforces requests- and tokens-per-minute budgets with token buckets, caps
+    concurrency, and retries rate-limit/transient errors with jittered
+    exponential backoff (honouring Retry-After when the API sends it).
+
+    Blocking callers (the agents, which run in FastAPI's threadpool) use
+    parse()/chat(); code already on an event loop can await aparse()/achat().
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        requests_per_minute: int = 500,
+        tokens_per_minute: int = 200_000,
+        max_concurrency: int = 16,
+        max_retries: int = 5,
+        base_delay: float = 0.5,
+        max_delay: float = 20.0,
+        max_output_tokens: int = 1000,
+        timeout: float = 60.0,
+    ):
+        self.api_key = api_key
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_output_tokens = max_output_tokens
+        self.timeout = timeout
+
+        self.stats = {"calls": 0, "coalesced": 0, "retries": 0, "upstream": 0}
+        # Per model: upstream calls and tokens used
+        self.usage: Dict[str, Dict[str, int]] = {}
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="llm-scheduler", daemon=True)
+        self._thread.start()
+
+        # Loop-bound primitives must be created on the loop itself
+        asyncio.run_coroutine_threadsafe(self._setup(), self._loop).result()
+
+    async def _setup(self) -> None:
+        self._client = AsyncOpenAI(
+            api_key=self.api_key,
+            # Retries are handled here, with the rate limiter in the loop
+            max_retries=0,
+            timeout=self.timeout,
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+                timeout=self.timeout,
+            ),
+        )
+        self._requests = TokenBucket(self.requests_per_minute)
+        self._tokens = TokenBucket(self.tokens_per_minute)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                return min(self.max_delay, float(retry_after)) + random.uniform(0, self.base_delay)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    async def _send(self, call: Callable[..., Awaitable[Any]], kwargs: Dict[str, Any]) -> Any:
+        estimate = _estimate_tokens(kwargs, self.max_output_tokens)
+        attempt = 0
+        while True:
+            await self._requests.acquire(1)
+            await self._tokens.acquire(estimate)
+            try:
+                async with self._semaphore:
+                    self.stats["upstream"] += 1
+                    response = await call(**kwargs)
+            except RETRYABLE_ERRORS as e:
+                # The next attempt charges the estimate again
+                self._tokens.refund(estimate)
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+                self.stats["retries"] += 1
+                delay = self._backoff(attempt, e)
+                logger.warning(f"LLM call failed with {type(e).__name__} (attempt {attempt}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+
+            actual = _usage_tokens(response)
+            if actual is not None:
+                self._tokens.refund(estimate - actual)
+            self._record_usage(kwargs.get("model"), response)
+            return response
+
+    def _record_usage(self, model: Optional[str], response: Any) -> None:
+        usage = self.usage.setdefault(str(model), {"calls": 0, "input_tokens": 0, "output_tokens": 0})
+        input_tokens, output_tokens = _usage_split(response)
+        usage["calls"] += 1
+        usage["input_tokens"] += input_tokens
+        usage["output_tokens"] += output_tokens
+
+    async def _single_flight(self, kind: str, call: Callable[..., Awaitable[Any]], kwargs: Dict[str, Any]) -> Any:
+        self.stats["calls"] += 1
+        key = _request_key(kind, kwargs)
+
+        while True:
+            existing = self._inflight.get(key)
+            if existing is None:
+                break
+            self.stats["coalesced"] += 1
+            try:
+                return await asyncio.shield(existing)
+            except asyncio.CancelledError:
+                # The caller we joined was cancelled, not us: send it ourselves
+                # (or join whoever already did)
+                if existing.cancelled() and not asyncio.current_task().cancelling():
+                    continue
+                raise
+
+        future = self._loop.create_future()
+        self._inflight[key] = future
+        try:
+            result = await self._send(call, kwargs)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an exception nobody else awaited isn't logged
+            future.exception()
+            raise
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def _submit(self, coro: Awaitable[Any]):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def _run(self, coro: Awaitable[Any]) -> Any:
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("Blocking LLM call made from the scheduler's own event loop")
+        return self._submit(coro).result()
+
+    # --- public API -------------------------------------------------------
+
+    def parse(self, **kwargs) -> Any:
+        """Blocking client.responses.parse(**kwargs)."""
+        return self._run(self._single_flight("responses.parse", self._client.responses.parse, kwargs))
+
+    def chat(self, **kwargs) -> Any:
+        """Blocking client.chat.completions.create(**kwargs)."""
+        return self._run(self._single_flight("chat.completions", self._client.chat.completions.create, kwargs))
+
+    async def aparse(self, **kwargs) -> Any:
+        return await asyncio.wrap_future(
+            self._submit(self._single_flight("responses.parse", self._client.responses.parse, kwargs))
+        )
+
+    async def achat(self, **kwargs) -> Any:
+        return await asyncio.wrap_future(
+            self._submit(self._single_flight("chat.completions", self._client.chat.completions.create, kwargs))
+        )
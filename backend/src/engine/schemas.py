@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Any, List, Optional
 from pydantic import BaseModel, Field
 
 
@@ -107,3 +107,50 @@ class IRBuilderOutput(BaseModel):
 
     class Config:
         extra = "forbid"
+
+
+class FieldDiff(BaseModel):
+    field: str
+    expected: Any
+    actual: Any
+
+
+class RuleDiff(BaseModel):
+    expected_id: str
+    actual_id: str
+    fields: List[FieldDiff]
+
+
+class FlowTuple(BaseModel):
+    action: str
+    src: str
+    dst: str
+    protocol: str
+    port: Optional[int] = Field(None, description="null means any port")
+
+
+class IRComparison(BaseModel):
+    equivalent: bool = Field(
+        ..., description="True if every rule matched with no field differences"
+    )
+    flow_equivalent: bool = Field(
+        ..., description="True if both IRs allow/deny exactly the same set of flows"
+    )
+    matched_rules: int
+    rule_diffs: List[RuleDiff] = Field(default_factory=list)
+    missing_rules: List[str] = Field(
+        default_factory=list, description="Expected rule ids with no counterpart"
+    )
+    extra_rules: List[str] = Field(
+        default_factory=list, description="Actual rule ids with no counterpart"
+    )
+    missing_flows: List[FlowTuple] = Field(default_factory=list)
+    extra_flows: List[FlowTuple] = Field(default_factory=list)
+
+
+class CombinedOutput(BaseModel):
+    resolver: ResolverOutput
+    ir: IRBuilderOutput
+
+    class Config:
+        extra = "forbid"
@@ -0,0 +1,246 @@
+import logging
+import math
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .context.pruner import ENTITY_AMBIGUITY_RE, PrunedContext
+from .schemas import IRBuilderOutput, ResolverOutput
+
+logger = logging.getLogger(__name__)
+
+# USD per million input / output tokens, for cost metrics
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-nano": (0.10, 0.40),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+}
+
+# Notes that mean an agent failed at its task, as opposed to routine ones
+# like "no schedule specified" (entity-level failures: ENTITY_AMBIGUITY_RE)
+FAILURE_RE = re.compile(
+    r"conflict|contradict|ambiguous|unclear|vague|cannot be determined|could not determine|"
+    r"unable to|not possible to determine",
+    re.IGNORECASE,
+)
+
+_CLAUSE_RE = re.compile(r"[,;]|\b(?:and|or|but|then|also|while)\b", re.IGNORECASE)
+_EXCEPTION_RE = re.compile(r"\b(?:except|unless|excluding|other than|but not|not|only|instead)\b", re.IGNORECASE)
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+){0,3}(?:/\d{1,2})?\b")
+
+
+class Complexity:
+    """Complexity score of a policy and the features it was computed from."""
+
+    __slots__ = ("score", "features")
+
+    # Weight of each feature in the score
+    WEIGHTS = {
+        "entities": 0.5,
+        "services": 0.5,
+        "literals": 0.5,
+        "clauses": 1.0,
+        "exceptions": 2.0,
+        "context_size": 0.25,
+        "words": 0.04,
+    }
+
+    def __init__(self, features: Dict[str, float]):
+        self.features = features
+        self.score = sum(self.WEIGHTS[k] * v for k, v in features.items())
+
+
+def complexity(nl_policy: str, pruned: PrunedContext) -> Complexity:
+    """
+    Score a policy before any LLM call: how many entities and services it
+    touches, literal addresses and ports, how many clauses and exceptions it
+    has, its length, and (log-scaled) the size of the context.
+    """
+    return Complexity({
+        "entities": sum(len(pruned.selected.get(s, ())) for s in ("objects", "zones")),
+        "services": len(pruned.selected.get("services", ())),
+        "literals": len(_NUMBER_RE.findall(nl_policy)),
+        "clauses": len(_CLAUSE_RE.findall(nl_policy)),
+        "exceptions": len(_EXCEPTION_RE.findall(nl_policy)),
+        "context_size": math.log2(1 + pruned.index.size),
+        "words": len(nl_policy.split()),
+    })
+
+
+def resolver_failure(resolved: ResolverOutput) -> Optional[str]:
+    """Why a resolver output looks like the model failed, or None."""
+    if not resolved.action:
+        return "no action"
+    if not resolved.sources or not resolved.destinations:
+        return "no sources or destinations"
+    for note in resolved.ambiguities:
+        if ENTITY_AMBIGUITY_RE.search(note) or FAILURE_RE.search(note):
+            return f"ambiguity: {note}"
+    return None
+
+
+def ir_failure(ir: IRBuilderOutput) -> Optional[str]:
+    """Why an IR looks like the model failed, or None."""
+    if not ir.rules:
+        return "no rules"
+    for r in ir.rules:
+        if not r.src_zone or not r.dst_zone:
+            return f"rule {r.id} has no zones"
+    for note in ir.metadata.warnings:
+        if ENTITY_AMBIGUITY_RE.search(note) or FAILURE_RE.search(note):
+            return f"warning: {note}"
+    return None
+
+
+class ModelTier:
+    __slots__ = ("name", "model")
+
+    def __init__(self, name: str, model: str):
+        self.name = name
+        self.model = model
+
+
+class _StageStats:
+    __slots__ = ("calls", "errors", "escalations", "total_ms", "recent_ms")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.escalations = 0
+        self.total_ms = 0.0
+        self.recent_ms: deque = deque(maxlen=1000)
+
+    def summary(self) -> Dict[str, Any]:
+        recent = sorted(self.recent_ms)
+
+        def pct(q: float) -> Optional[float]:
+            return round(recent[min(len(recent) - 1, int(q * len(recent)))], 1) if recent else None
+
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "escalations": self.escalations,
+            "mean_ms": round(self.total_ms / self.calls, 1) if self.calls else None,
+            "p50_ms": pct(0.5),
+            "p95_ms": pct(0.95),
+        }
+
+
+class ModelRouter:
+    """
+    Chooses the model tier for each policy and escalates on failure.
+
+    Tiers are ordered from fastest/cheapest to strongest. A policy starts at
+    the tier its complexity score reaches (thresholds[i] is the minimum score
+    for tier i + 1), so simple policies go to the first tier. After every
+    agent call the output is checked (resolver_failure / ir_failure) and, if
+    it looks like a failure, the call is repeated on the next tier up.
+    Latency, errors and escalations are recorded per tier and stage.
+    """
+
+    def __init__(self, tiers: Sequence[ModelTier], thresholds: Sequence[float] = ()):
+        if not tiers:
+            raise ValueError("At least one model tier is required")
+        self.tiers = list(tiers)
+        self.thresholds = sorted(thresholds)[:len(self.tiers) - 1]
+        self._stats: Dict[Tuple[int, str], _StageStats] = {}
+        self._starts = [0] * len(self.tiers)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_models(cls, models: Sequence[str], thresholds: Sequence[float] = ()) -> "ModelRouter":
+        return cls([ModelTier(f"tier{i}", m) for i, m in enumerate(models)], thresholds)
+
+    def initial_tier(self, score: Complexity) -> int:
+        tier = sum(1 for t in self.thresholds if score.score >= t)
+        with self._lock:
+            self._starts[tier] += 1
+        return tier
+
+    def model(self, tier: int) -> str:
+        return self.tiers[tier].model
+
+    def _stage(self, tier: int, stage: str) -> _StageStats:
+        stats = self._stats.get((tier, stage))
+        if stats is None:
+            stats = self._stats.setdefault((tier, stage), _StageStats())
+        return stats
+
+    def run(
+        self,
+        tier: int,
+        stage: str,
+        call: Callable[[str], Any],
+        failure: Callable[[Any], Optional[str]],
+    ) -> Tuple[Any, int]:
+        """
+        call(model) at tier, moving up a tier while failure(result) gives a
+        reason and a stronger tier exists. Returns (result, final tier).
+        """
+        while True:
+            stats = self._stage(tier, stage)
+            started = time.perf_counter()
+            try:
+                result = call(self.model(tier))
+            except Exception:
+                with self._lock:
+                    stats.errors += 1
+                raise
+            elapsed = (time.perf_counter() - started) * 1000
+            with self._lock:
+                stats.calls += 1
+                stats.total_ms += elapsed
+                stats.recent_ms.append(elapsed)
+
+            reason = failure(result)
+            if reason is None or tier + 1 >= len(self.tiers):
+                return result, tier
+
+            with self._lock:
+                stats.escalations += 1
+            logger.info(f"Escalating {stage} from {self.model(tier)} to {self.model(tier + 1)}: {reason}")
+            tier += 1
+
+    def metrics(self, usage: Optional[Dict[str, Dict[str, int]]] = None) -> List[Dict[str, Any]]:
+        """
+        Per-tier metrics. usage (per model input/output token counts, see
+        LLMScheduler.usage) adds token counts and an estimated cost.
+        """
+        out = []
+        with self._lock:
+            for i, tier in enumerate(self.tiers):
+                entry: Dict[str, Any] = {
+                    "tier": tier.name,
+                    "model": tier.model,
+                    "started": self._starts[i],
+                    "stages": {
+                        stage: stats.summary() for (t, stage), stats in sorted(self._stats.items()) if t == i
+                    },
+                }
+                model_usage = (usage or {}).get(tier.model)
+                if model_usage is not None:
+                    entry["input_tokens"] = model_usage["input_tokens"]
+                    entry["output_tokens"] = model_usage["output_tokens"]
+                    prices = MODEL_PRICES.get(tier.model)
+                    if prices is not None:
+                        entry["cost_usd"] = round(
+                            (model_usage["input_tokens"] * prices[0] + model_usage["output_tokens"] * prices[1]) / 1e6, 4
+                        )
+                out.append(entry)
+        return out
+
+
+_model_router: Optional[ModelRouter] = None
+
+
+def get_model_router() -> ModelRouter:
+    """Process-wide router over the tiers configured in settings."""
+    global _model_router
+    if _model_router is None:
+        from ..config import settings
+        _model_router = ModelRouter.from_models(settings.MODEL_TIERS, settings.MODEL_TIER_THRESHOLDS)
+    return _model_router
@@ -0,0 +1,285 @@
+import datetime
+import re
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .context.index import network_definition
+from .schemas import IRRule
+
+DAY_MINUTES = 24 * 60
+WEEK_MINUTES = 7 * DAY_MINUTES
+
+DAY_NAMES = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+DAY_GROUPS = {
+    "daily": tuple(range(7)),
+    "everyday": tuple(range(7)),
+    "weekdays": tuple(range(5)),
+    "weekends": (5, 6),
+}
+
+_TIME = r"\d{1,2}:\d{2}"
+_DATE = r"\d{4}[-/]\d{2}[-/]\d{2}(?:@\d{1,2}:\d{2})?"
+_RECURRING_RE = re.compile(
+    rf"^(?P<days>[a-z]+(?:\s*[-,]\s*[a-z]+)*)\s+(?P<ranges>{_TIME}\s*-\s*{_TIME}(?:\s*,\s*{_TIME}\s*-\s*{_TIME})*)$"
+)
+_ABSOLUTE_RE = re.compile(rf"^(?P<start>{_DATE})\s*-\s*(?P<end>{_DATE})$")
+_RANGE_RE = re.compile(rf"({_TIME})\s*-\s*({_TIME})")
+
+
+class TimeWindowError(ValueError):
+    """Raised for a time window definition that can't be parsed."""
+
+
+def _minutes(hhmm: str, end: bool = False) -> int:
+    hours, minutes = (int(x) for x in hhmm.split(":"))
+    if minutes > 59 or hours > 24 or (hours == 24 and (minutes or not end)):
+        raise TimeWindowError(f"invalid time '{hhmm}'")
+    value = hours * 60 + minutes
+    # "23:59" as an end time means the end of the day, as on PAN-OS
+    if end and value == DAY_MINUTES - 1:
+        return DAY_MINUTES
+    return value
+
+
+def _day(token: str) -> int:
+    # "mon", "tues", "thursday", ...
+    for i, name in enumerate(DAY_NAMES):
+        if len(token) >= 3 and name.startswith(token):
+            return i
+    raise TimeWindowError(f"unknown day '{token}'")
+
+
+def _days(spec: str) -> List[int]:
+    days: List[int] = []
+    for group in re.split(r"\s*,\s*", spec):
+        if group in DAY_GROUPS:
+            days.extend(DAY_GROUPS[group])
+            continue
+        bounds = re.split(r"\s*-\s*", group)
+        if len(bounds) == 1:
+            days.append(_day(bounds[0]))
+        elif len(bounds) == 2:
+            first, last = _day(bounds[0]), _day(bounds[1])
+            # Ranges may wrap around the week, e.g. Fri-Mon
+            days.extend((first + i) % 7 for i in range((last - first) % 7 + 1))
+        else:
+            raise TimeWindowError(f"invalid day range '{group}'")
+    return days
+
+
+def _datetime(value: str, end: bool = False) -> datetime.datetime:
+    date, _, time = value.partition("@")
+    try:
+        day = datetime.datetime.strptime(date.replace("/", "-"), "%Y-%m-%d")
+    except ValueError:
+        raise TimeWindowError(f"invalid date '{date}'") from None
+    if not time:
+        # A bare end date includes that whole day
+        return day + datetime.timedelta(days=1) if end else day
+    return day + datetime.timedelta(minutes=_minutes(time, end=end))
+
+
+class TimeWindow:
+    """
+    A compiled time window.
+
+    Recurring windows ("Mon-Fri 08:00-18:00", "Daily 22:00-06:00") are a
+    bitmap with one bit per minute of the week (Monday 00:00 first, 1260
+    bytes); ranges that end before they start run past midnight into the next
+    day. Date ranges ("2023-12-20-2024-01-05", optionally with @HH:MM) are a
+    sorted list of [start, end) periods. Times are the firewall's wall-clock
+    time: aware datetimes are evaluated by their own local fields.
+    """
+
+    __slots__ = ("spec", "bitmap", "periods", "_starts", "_minute_mask", "_day_ranges")
+
+    def __init__(self, spec: str, bitmap: Optional[bytes], periods: List[Tuple[datetime.datetime, datetime.datetime]]):
+        self.spec = spec
+        self.bitmap = bitmap
+        self.periods = periods
+        self._starts = [start for start, _ in periods]
+        self._minute_mask = None
+        self._day_ranges = None
+
+    @property
+    def recurring(self) -> bool:
+        return self.bitmap is not None
+
+    def is_active(self, t: datetime.datetime) -> bool:
+        if self.bitmap is not None:
+            m = minute_of_week(t)
+            return bool(self.bitmap[m >> 3] >> (m & 7) & 1)
+        t = t.replace(tzinfo=None)
+        i = bisect_right(self._starts, t) - 1
+        return i >= 0 and t < self.periods[i][1]
+
+    def active_mask(self, timestamps: Any):
+        """
+        Vectorized is_active over timestamps (datetimes, numpy datetime64 or a
+        pandas datetime column), as a numpy bool array. NaT is never active.
+        Timezone-aware timestamps are read in their own timezone, like
+        is_active does, not converted to UTC.
+        """
+        import numpy as np
+
+        ts = np.asarray(_wall_clock(timestamps), dtype="datetime64[m]")
+        valid = ~np.isnat(ts)
+        if self.bitmap is not None:
+            if self._minute_mask is None:
+                self._minute_mask = np.unpackbits(
+                    np.frombuffer(self.bitmap, dtype=np.uint8), bitorder="little"
+                ).astype(bool)
+            minutes = ts.astype(np.int64)
+            # 1970-01-01 was a Thursday (day 3 counting from Monday)
+            week_minutes = ((minutes // DAY_MINUTES + 3) % 7) * DAY_MINUTES + minutes % DAY_MINUTES
+            return self._minute_mask[np.where(valid, week_minutes, 0)] & valid
+
+        starts = np.array(self._starts, dtype="datetime64[m]")
+        ends = np.array([end for _, end in self.periods], dtype="datetime64[m]")
+        i = np.searchsorted(starts, ts, side="right") - 1
+        return (i >= 0) & (ts < ends[np.maximum(i, 0)]) & valid
+
+    def day_ranges(self) -> List[List[Tuple[int, int]]]:
+        """Per weekday (Monday first), the [start, end) minute runs of a recurring window."""
+        if self._day_ranges is not None:
+            return self._day_ranges
+        days: List[List[Tuple[int, int]]] = []
+        for day in range(7):
+            runs: List[Tuple[int, int]] = []
+            start = None
+            for minute in range(DAY_MINUTES + 1):
+                m = day * DAY_MINUTES + minute
+                on = minute < DAY_MINUTES and bool(self.bitmap[m >> 3] >> (m & 7) & 1)
+                if on and start is None:
+                    start = minute
+                elif not on and start is not None:
+                    runs.append((start, minute))
+                    start = None
+            days.append(runs)
+        self._day_ranges = days
+        return days
+
+
+def _wall_clock(timestamps: Any) -> Any:
+    """timestamps with any timezone dropped, keeping their local date and time."""
+    accessor = getattr(timestamps, "dt", None)
+    if getattr(accessor, "tz", None) is not None:
+        # pandas Series
+        return accessor.tz_localize(None)
+    if getattr(timestamps, "tz", None) is not None and hasattr(timestamps, "tz_localize"):
+        # pandas DatetimeIndex
+        return timestamps.tz_localize(None)
+    if isinstance(timestamps, (list, tuple)):
+        return [t.replace(tzinfo=None) if getattr(t, "tzinfo", None) is not None else t for t in timestamps]
+    return timestamps
+
+
+def minute_of_week(t: datetime.datetime) -> int:
+    return t.weekday() * DAY_MINUTES + t.hour * 60 + t.minute
+
+
+@lru_cache(maxsize=4096)
+def parse_time_window(spec: str) -> TimeWindow:
+    """
+    Compile a time window definition. Several segments can be joined with
+    ";" (e.g. "Mon-Fri 08:00-18:00; Sat 09:00-12:00"), but a window is
+    either recurring or a set of date ranges, not both.
+    """
+    bitmap = bytearray(WEEK_MINUTES // 8)
+    periods: List[Tuple[datetime.datetime, datetime.datetime]] = []
+    recurring = False
+
+    segments = [s.strip().lower() for s in str(spec).split(";")]
+    if not any(segments):
+        raise TimeWindowError("empty time window")
+
+    for segment in segments:
+        absolute = _ABSOLUTE_RE.match(segment)
+        if absolute:
+            start, end = _datetime(absolute["start"]), _datetime(absolute["end"], end=True)
+            if end <= start:
+                raise TimeWindowError(f"date range '{segment}' ends before it starts")
+            periods.append((start, end))
+            continue
+
+        match = _RECURRING_RE.match(segment)
+        if not match:
+            raise TimeWindowError(f"unrecognised time window '{segment}'")
+        recurring = True
+        for day in _days(match["days"]):
+            for first, last in _RANGE_RE.findall(match["ranges"]):
+                start, end = _minutes(first), _minutes(last, end=True)
+                if start == end:
+                    raise TimeWindowError(f"time range '{first}-{last}' is empty")
+                if end < start:
+                    end += DAY_MINUTES
+                base = day * DAY_MINUTES
+                for minute in range(base + start, base + end):
+                    m = minute % WEEK_MINUTES
+                    bitmap[m >> 3] |= 1 << (m & 7)
+
+    if recurring and periods:
+        raise TimeWindowError("a time window can't mix weekly times and date ranges")
+    if recurring:
+        return TimeWindow(spec, bytes(bitmap), [])
+
+    merged: List[Tuple[datetime.datetime, datetime.datetime]] = []
+    for start, end in sorted(periods):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(end, merged[-1][1]))
+        else:
+            merged.append((start, end))
+    return TimeWindow(spec, None, merged)
+
+
+def time_window_error(spec: Any) -> Optional[str]:
+    """Why spec is not a valid time window, or None if it is."""
+    if not isinstance(spec, str):
+        return "expected a string such as 'Mon-Fri 08:00-18:00'"
+    try:
+        parse_time_window(spec)
+    except TimeWindowError as e:
+        return str(e)
+    return None
+
+
+def time_windows(context: Optional[Dict[str, Any]]) -> Tuple[Dict[str, TimeWindow], Dict[str, str]]:
+    """Compile the time windows of a context: (windows by name, errors by name)."""
+    windows: Dict[str, TimeWindow] = {}
+    errors: Dict[str, str] = {}
+    for name, spec in (network_definition(context).get("time_windows") or {}).items():
+        error = time_window_error(spec)
+        if error is None:
+            windows[name] = parse_time_window(spec)
+        else:
+            errors[name] = error
+    return windows, errors
+
+
+def rule_active(rule: IRRule, t: datetime.datetime, windows: Dict[str, TimeWindow]) -> bool:
+    """Whether a rule applies at time t. Rules without a schedule always do; unknown schedules never do."""
+    if not rule.schedule:
+        return True
+    window = windows.get(rule.schedule)
+    return window is not None and window.is_active(t)
+
+
+def rules_active_mask(rules: Sequence[IRRule], timestamps: Any, windows: Dict[str, TimeWindow]):
+    """rule_active for every rule and timestamp at once: a (rules x timestamps) numpy bool array."""
+    import numpy as np
+
+    n = len(np.asarray(timestamps, dtype="datetime64[m]"))
+    masks: Dict[Optional[str], Any] = {}
+    rows = []
+    for rule in rules:
+        if rule.schedule not in masks:
+            window = windows.get(rule.schedule) if rule.schedule else None
+            if not rule.schedule:
+                masks[rule.schedule] = np.ones(n, dtype=bool)
+            elif window is None:
+                masks[rule.schedule] = np.zeros(n, dtype=bool)
+            else:
+                masks[rule.schedule] = window.active_mask(timestamps)
+        rows.append(masks[rule.schedule])
+    return np.vstack(rows) if rows else np.zeros((0, n), dtype=bool)
@@ -1,12 +1,59 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .routers import policies
+from .routers import policies, contexts, metrics, health, profiling
 from .config import settings
+from .admission import get_admission_controller
+from .engine.batfish.validator import BatfishManager
+from .middleware import AdmissionMiddleware, CompressionMiddleware
+from .storage.contexts import get_context_store
+from .warmup import warm_up, warmup_state
 import os
+import threading
 
-app = FastAPI(title="NL Firewall Configuration Interface", version="1.0.0")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    BatfishManager().configure(
+        settings.BATFISH_HOSTS,
+        routing=settings.BATFISH_ROUTING,
+        max_attempts=settings.BATFISH_MAX_ATTEMPTS,
+        health_interval=settings.BATFISH_HEALTH_INTERVAL,
+    )
+    # Warm up in the background: the server answers (and /health/ready
+    # reports progress) while contexts, headers and the Batfish session load
+    if settings.WARMUP:
+        threading.Thread(
+            target=warm_up,
+            kwargs={
+                "state": warmup_state,
+                "store": get_context_store(),
+                "contexts_dir": settings.WARMUP_CONTEXTS_DIR,
+                "batfish": settings.WARMUP_BATFISH,
+                "base_snapshot": settings.WARMUP_BASE_SNAPSHOT,
+            },
+            name="warmup",
+            daemon=True,
+        ).start()
+    else:
+        warmup_state.status = "ready"
+    yield
 
+
+app = FastAPI(title="NL Firewall Configuration Interface", version="1.0.0", lifespan=lifespan)
+
+
+app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MINIMUM_SIZE)
+
+# Fair-share admission for the endpoints that run agents and Batfish
+if settings.ADMISSION_CONTROL:
+    app.add_middleware(
+        AdmissionMiddleware,
+        controller=get_admission_controller(),
+        paths=["/policies/confirm", "/policies/translate"],
+    )
+
+# Added last so it is outermost: shed and compressed responses get CORS headers too
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.CORS_ALLOWED_ORIGINS,         
@@ -21,4 +68,8 @@ def root():
     return {"message": "Firewall Configuration Interface is running..."}
 
 
-app.include_router(policies.router)
\ No newline at end of file
+app.include_router(policies.router)
+app.include_router(contexts.router)
+app.include_router(metrics.router)
+app.include_router(health.router)
+app.include_router(profiling.router)
@@ -0,0 +1,170 @@
+import asyncio
+import importlib.util
+import zlib
+from typing import Collection, Dict, Optional, Sequence
+
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipResponder, IdentityResponder
+from starlette.responses import PlainTextResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .admission import INTERACTIVE, AdmissionController, AdmissionLease, Shed
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """Accept-Encoding as {coding: q-value}; codings with a malformed q count as q=0."""
+    prefs: Dict[str, float] = {}
+    for part in header.split(","):
+        coding, *params = (p.strip() for p in part.split(";"))
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        prefs[coding.lower()] = q
+    return prefs
+
+
+def negotiate_encoding(header: str, available: Sequence[str]) -> Optional[str]:
+    """
+    The coding of available (in server preference order) the client accepts
+    with the highest q-value, or None for identity. "*" covers codings the
+    header doesn't name.
+    """
+    prefs = parse_accept_encoding(header)
+    best, best_q = None, 0.0
+    for coding in available:
+        q = prefs.get(coding, prefs.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class ZstdResponder(IdentityResponder):
+    content_encoding = "zstd"
+
+    def __init__(self, app: ASGIApp, minimum_size: int, level: int = 3) -> None:
+        super().__init__(app, minimum_size)
+        import zstandard
+
+        self._flush_block = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        self.compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        out = self.compressor.compress(body)
+        # Flush every streamed chunk so the client can decode it as it arrives
+        return out + (self.compressor.flush(self._flush_block) if more_body else self.compressor.flush())
+
+
+# Bodies that are already compressed are sent as is
+COMPRESSED_TYPES = ("application/gzip", "application/zip", "application/zstd")
+
+
+class _SkipCompressed:
+    async def send_with_compression(self, message: Message) -> None:
+        await super().send_with_compression(message)
+        if message["type"] == "http.response.start":
+            content_type = Headers(raw=message["headers"]).get("content-type", "")
+            self.content_type_is_excluded = self.content_type_is_excluded or content_type.startswith(COMPRESSED_TYPES)
+
+
+class _GZipResponder(_SkipCompressed, GZipResponder):
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        if more_body:
+            # Like zstd, flush every streamed chunk instead of holding it in the compressor
+            self.gzip_file.write(body)
+            self.gzip_file.flush(zlib.Z_SYNC_FLUSH)
+            body = self.gzip_buffer.getvalue()
+            self.gzip_buffer.seek(0)
+            self.gzip_buffer.truncate()
+            return body
+        return super().apply_compression(body, more_body=more_body)
+
+
+class _ZstdResponder(_SkipCompressed, ZstdResponder):
+    pass
+
+
+class CompressionMiddleware:
+    """
+    Response compression negotiated from Accept-Encoding: zstd when the
+    optional zstandard package is installed and the client prefers it at
+    least as much as gzip, otherwise gzip. Responses below minimum_size,
+    ones that already set Content-Encoding and archives (COMPRESSED_TYPES)
+    are sent as is; streamed responses are compressed chunk by chunk.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, zstd_level: int = 3) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.zstd_level = zstd_level
+        self.encodings = ("zstd", "gzip") if importlib.util.find_spec("zstandard") is not None else ("gzip",)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        coding = negotiate_encoding(Headers(scope=scope).get("Accept-Encoding", ""), self.encodings)
+        if coding == "zstd":
+            responder: ASGIApp = _ZstdResponder(self.app, self.minimum_size, level=self.zstd_level)
+        elif coding == "gzip":
+            responder = _GZipResponder(self.app, self.minimum_size, compresslevel=self.gzip_level)
+        else:
+            responder = IdentityResponder(self.app, self.minimum_size)
+        await responder(scope, receive, send)
+
+
+class AdmissionMiddleware:
+    """
+    Runs requests to paths through an AdmissionController before they reach
+    the router. The tenant is the X-Tenant-ID header (the client address
+    without one) and the class the X-Request-Class header ("interactive" by
+    default, "batch" for bulk jobs). Shed requests get the controller's
+    status code with a Retry-After header. Admitted requests find their
+    AdmissionLease in request.state.admission, to keep the slot for
+    background work they start.
+    """
+
+    def __init__(self, app: ASGIApp, controller: AdmissionController, paths: Collection[str]) -> None:
+        self.app = app
+        self.controller = controller
+        self.paths = set(paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].rstrip("/") not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        client = scope.get("client")
+        tenant = headers.get("X-Tenant-ID") or (client[0] if client else "unknown")
+        klass = headers.get("X-Request-Class", INTERACTIVE).lower()
+        if klass not in self.controller.classes:
+            response = PlainTextResponse(
+                f"Unknown request class: {klass} (expected one of {', '.join(self.controller.classes)})", status_code=422
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.controller.acquire(tenant, klass)
+        except Shed as shed:
+            response = PlainTextResponse(
+                shed.reason, status_code=shed.status_code, headers={"Retry-After": str(shed.retry_after)}
+            )
+            await response(scope, receive, send)
+            return
+
+        lease = AdmissionLease(self.controller, tenant, asyncio.get_running_loop())
+        scope.setdefault("state", {})["admission"] = lease
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            lease.release()
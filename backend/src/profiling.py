@@ -0,0 +1,222 @@
+import cProfile
+import hmac
+import io
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+# Where time goes, by the source file of the innermost frame that matches:
+# a translation thread waiting on the LLM scheduler or a Batfish call
+# shows up as llm / batfish rather than as threading internals
+CATEGORIES = (
+    ("llm", ("/openai/", "/httpx/", "/engine/scheduler.py", "/engine/agents.py")),
+    ("batfish", ("/pybatfish/", "/engine/batfish/")),
+    ("validation", ("/pydantic/", "/pydantic_core/")),
+    ("compile", ("/engine/compiler/",)),
+    ("checks", ("/engine/linter/", "/engine/safety/", "/engine/rulecache.py")),
+    ("storage", ("/src/storage/",)),
+)
+
+TOP_FUNCTIONS = 40
+TOP_ALLOCATIONS = 25
+
+
+def _category(filename: str) -> Optional[str]:
+    filename = filename.replace(os.sep, "/")
+    for name, markers in CATEGORIES:
+        if any(m in filename for m in markers):
+            return name
+    return None
+
+
+def _label(code) -> str:
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    return f"{module}:{code.co_qualname}"
+
+
+class StackSampler(threading.Thread):
+    """Samples one thread's Python stack every interval seconds, counting identical stacks."""
+
+    def __init__(self, ident: int, interval: float = 0.005):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.target = ident
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.target)
+            stack = []
+            while frame is not None:
+                stack.append(frame.f_code)
+                frame = frame.f_back
+            if stack:
+                self.samples[tuple(reversed(stack))] += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+    def collapsed(self) -> str:
+        """Samples in collapsed-stack format ("a;b;c count" per line), as read by flamegraph.pl and speedscope."""
+        lines = Counter()
+        for stack, count in self.samples.items():
+            lines[";".join(_label(code) for code in stack)] += count
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(lines.items()))
+
+    def categories(self) -> Dict[str, float]:
+        """Share of samples per category (see CATEGORIES), by the innermost matching frame."""
+        total = sum(self.samples.values())
+        counts = Counter()
+        for stack, count in self.samples.items():
+            category = next((c for c in map(lambda code: _category(code.co_filename), reversed(stack)) if c), "other")
+            counts[category] += count
+        return {c: round(n / total, 3) for c, n in counts.most_common()} if total else {}
+
+
+class RequestProfiler:
+    """
+    Profiles the work done on the calling thread between start() and stop():
+    cProfile for per-function call counts and times, a stack sampler for a
+    flamegraph and a tracemalloc snapshot for the allocations still alive at
+    the end plus the peak. Only one profiler runs at a time (tracemalloc is
+    process-wide, and so is cProfile from Python 3.12); start() returns
+    False when another one is running.
+
+    LLM and Batfish calls run on other threads, so here they appear as the
+    time the profiled thread spends waiting for them.
+    """
+
+    _active = threading.Lock()
+
+    def __init__(self, interval: float = 0.005, memory: bool = True):
+        self.interval = interval
+        self.memory = memory
+        self._profile: Optional[cProfile.Profile] = None
+        self._sampler: Optional[StackSampler] = None
+        self._started_tracing = False
+        self._started = 0.0
+        self.elapsed_ms = 0.0
+        self.peak_memory: Optional[int] = None
+        self.allocations: List[Dict[str, Any]] = []
+
+    def start(self) -> bool:
+        if not self._active.acquire(blocking=False):
+            return False
+        if self.memory:
+            self._started_tracing = not tracemalloc.is_tracing()
+            if self._started_tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+        self._sampler = StackSampler(threading.get_ident(), self.interval)
+        self._sampler.start()
+        self._started = time.perf_counter()
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+        return True
+
+    def stop(self) -> None:
+        try:
+            self._profile.disable()
+            self.elapsed_ms = round((time.perf_counter() - self._started) * 1000, 1)
+            self._sampler.stop()
+            if self.memory:
+                snapshot = tracemalloc.take_snapshot().filter_traces(
+                    [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+                )
+                self.peak_memory = tracemalloc.get_traced_memory()[1]
+                if self._started_tracing:
+                    tracemalloc.stop()
+                self.allocations = [
+                    {"location": f"{s.traceback[0].filename}:{s.traceback[0].lineno}", "size": s.size, "count": s.count}
+                    for s in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]
+                ]
+        finally:
+            self._active.release()
+
+    def functions(self) -> List[Dict[str, Any]]:
+        """The TOP_FUNCTIONS functions with the most cumulative time."""
+        stats = pstats.Stats(self._profile, stream=io.StringIO()).stats
+        rows = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:TOP_FUNCTIONS]
+        return [
+            {
+                "function": f"{os.path.basename(filename)}:{lineno}({name})",
+                "calls": nc,
+                "total_ms": round(tt * 1000, 2),
+                "cumulative_ms": round(ct * 1000, 2),
+            }
+            for (filename, lineno, name), (cc, nc, tt, ct, callers) in rows
+        ]
+
+    def pstats_dump(self) -> bytes:
+        """The cProfile stats in the format pstats.Stats / snakeviz load from a file."""
+        return marshal.dumps(pstats.Stats(self._profile, stream=io.StringIO()).stats)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "elapsed_ms": self.elapsed_ms,
+            "samples": sum(self._sampler.samples.values()),
+            "sample_interval_ms": self.interval * 1000,
+            "categories": self._sampler.categories(),
+            "functions": self.functions(),
+            "peak_memory": self.peak_memory,
+            "allocations": self.allocations,
+        }
+
+    def collapsed(self) -> str:
+        return self._sampler.collapsed()
+
+
+class ProfilingSwitch:
+    """Profiling armed from the admin endpoint: the next count translations (optionally of one session)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._armed: Counter = Counter()
+
+    def arm(self, count: int = 1, session_id: Optional[str] = None) -> None:
+        with self._lock:
+            self._armed[session_id] += count
+
+    def disarm(self) -> None:
+        with self._lock:
+            self._armed.clear()
+
+    def take(self, session_id: str) -> bool:
+        """Whether to profile a translation of session_id, using up one armed run if so."""
+        # Unlocked fast path: nothing armed is the common case
+        if not self._armed:
+            return False
+        with self._lock:
+            for key in (session_id, None):
+                if self._armed.get(key, 0) > 0:
+                    self._armed[key] -= 1
+                    if not self._armed[key]:
+                        del self._armed[key]
+                    return True
+        return False
+
+    def armed(self) -> Dict[str, int]:
+        with self._lock:
+            return {key or "*": n for key, n in self._armed.items()}
+
+
+profiling_switch = ProfilingSwitch()
+
+
+def authorized(token: Optional[str]) -> bool:
+    """Whether a request may use profiling: PROFILING is on and token matches PROFILING_TOKEN, if one is set."""
+    from .config import settings
+
+    if not settings.PROFILING:
+        return False
+    if not settings.PROFILING_TOKEN:
+        return True
+    return token is not None and hmac.compare_digest(token.encode(), settings.PROFILING_TOKEN.encode())
@@ -0,0 +1,46 @@
+from typing import List, Optional
+from fastapi import APIRouter, Response
+from .. import schemas
+from ..engine.batfish.validator import BatfishManager
+from ..storage.contexts import check_references, get_context_store
+
+router = APIRouter(
+    prefix="/contexts",
+    tags=["contexts"])
+
+
+@router.post("", response_model = schemas.ContextInfo)
+def register_context(request: schemas.ContextRegisterRequest):
+
+    details = request.details.model_dump()
+    warnings = check_references(details)
+
+    store = get_context_store()
+    meta = store.register(request.name, details, description=request.description or "")
+    context_id = meta["context_id"]
+
+    # Precompute per-context structures so the first translation doesn't pay for them
+    store.index(context_id)
+    BatfishManager().build_header(store.request_context(context_id), cache_key=context_id)
+
+    return schemas.ContextInfo(**meta, warnings=warnings)
+
+
+@router.get("", response_model = List[schemas.ContextInfo])
+def list_contexts(name: Optional[str] = None):
+
+    store = get_context_store()
+    if name is not None:
+        return store.versions(name)
+    return store.list()
+
+
+@router.get("/{context_id}", response_model = schemas.ContextDetail)
+def get_context(context_id: str):
+
+    store = get_context_store()
+    meta = store.metadata(context_id)
+    if meta is None:
+        return Response(status_code=404, content="Context ID not found")
+
+    return schemas.ContextDetail(**meta, details=store.get(context_id))
@@ -0,0 +1,18 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from ..warmup import warmup_state
+
+router = APIRouter(
+    prefix="/health",
+    tags=["health"])
+
+
+@router.get("/live")
+def liveness():
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+def readiness():
+    """200 once the startup warm-up has finished, 503 before; the body has the progress of every step."""
+    return JSONResponse(warmup_state.summary(), status_code=200 if warmup_state.ready else 503)
@@ -0,0 +1,32 @@
+from fastapi import APIRouter
+from ..admission import get_admission_controller
+from ..engine.agents import current_scheduler
+from ..engine.batfish.validator import BatfishManager
+from ..engine.tiering import get_model_router
+
+router = APIRouter(
+    prefix="/metrics",
+    tags=["metrics"])
+
+
+@router.get("/models")
+def model_metrics():
+    """Per model tier: policies started, latency/errors/escalations per agent stage, tokens and cost."""
+    scheduler = current_scheduler()
+    return {
+        "tiers": get_model_router().metrics(usage=scheduler.usage if scheduler is not None else None),
+        "scheduler": dict(scheduler.stats) if scheduler is not None else None,
+    }
+
+
+@router.get("/admission")
+def admission_metrics():
+    """Running and queued requests per tenant, and per request class: admitted, shed and queue wait times."""
+    return get_admission_controller().metrics()
+
+
+@router.get("/batfish")
+def batfish_metrics():
+    """Per Batfish backend: health, calls in flight, calls, failures and mean latency."""
+    pool = BatfishManager().pool
+    return {"routing": pool.routing, "backends": pool.metrics()}
@@ -1,115 +1,543 @@
-from ..engine.safety.runner import verify_safety
-from fastapi import APIRouter, Response
+from fastapi import APIRouter, Header, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from .. import schemas
-from ..engine.agents import summarize_intent, resolve_policy, build_ir
-from ..engine.linter.runner import lint_ir_all
-from ..engine.batfish.validator import BatfishManager
-from ..engine.compiler.runner import compile_ir_all
+from ..engine.agents import summarize_intent
+from ..engine.pipeline import TranslationCancelled, translate, validate_configs
+from ..engine.incremental import retranslate
+from ..engine.batfish.answers import PROFILES
+from ..engine.comparator import compare_ir
+from ..engine.ordering import optimize_rule_order
+from ..engine.resolver_cache import get_resolver_cache
+from ..engine.tiering import get_model_router
+from ..engine.schemas import IRBuilderOutput, IRComparison
+from ..config import settings
+from ..storage.contexts import get_context_store, index_for
+from ..storage.policies import WARNING_KINDS, get_policy_store
+from ..storage.export import FORMATS, export_refs, iter_export
+from ..responses import ORJSONResponse
+from ..profiling import RequestProfiler, authorized, profiling_switch
+from ..sessions import SessionCache, cancel_speculative
+from typing import List, Optional
+import base64
+import binascii
+import json
+import logging
+import threading
 import uuid
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(
     prefix="/policies",
     tags=["policies"])
 
-# temporary in-memory confirm cache (will be replaced with proper DB later)
-CONFIRM_CACHE = {}
-POLICIES_CACHE = {}
+# In-memory confirm cache, bounded in size and age (will be replaced with proper DB later)
+CONFIRM_CACHE = SessionCache(
+    max_sessions=settings.CONFIRM_SESSIONS_MAX,
+    ttl=settings.CONFIRM_SESSION_TTL_SECONDS
+)
+
+# Translations started speculatively at confirm time
+SPECULATION_EXECUTOR = ThreadPoolExecutor(
+    max_workers=settings.SPECULATION_WORKERS,
+    thread_name_prefix="speculative-translate"
+)
+
+
+def _translate(message, context, profile, cancel_event=None):
+    return translate(
+        nl_policy=message,
+        context=context,
+        prune=settings.CONTEXT_PRUNING,
+        mode=settings.AGENT_MODE,
+        cancel_event=cancel_event,
+        index=index_for(context),
+        batfish_profile=profile,
+        resolver_cache=get_resolver_cache() if settings.RESOLVER_CACHE else None,
+        router=get_model_router() if settings.MODEL_TIERING else None
+    )
+
+
+# Largest page of rules / warnings a client can ask for
+MAX_PAGE_SIZE = 5000
+
+
+def _snapshot(cached):
+    """
+    What an edit of a session builds on: the inputs and result of its last
+    translation (or of its finished speculative run), or None. Flat, so
+    sessions don't keep a chain of their earlier versions alive.
+    """
+    result = cached.get("result")
+    speculative = cached.get("speculative")
+    if result is None and speculative is not None and speculative.done() and not speculative.cancelled():
+        if speculative.exception() is None:
+            result = speculative.result()
+    if result is None:
+        return None
+    return {"nl_policy": cached["message"], "context": cached["context"], "profile": cached["profile"], "result": result}
+
+
+def _retranslate(previous, message, context, profile, cancel_event=None):
+    # Edits within a session only redo what they affect
+    if previous is None:
+        return _translate(message, context, profile, cancel_event)
+    result, _ = retranslate(
+        previous,
+        nl_policy=message,
+        context=context,
+        prune=settings.CONTEXT_PRUNING,
+        mode=settings.AGENT_MODE,
+        cancel_event=cancel_event,
+        index=index_for(context),
+        batfish_profile=profile,
+        router=get_model_router() if settings.MODEL_TIERING else None
+    )
+    return result
+
+
+def _encode_cursor(version, offset):
+    # Opaque to clients; pins the version so later appends don't shift pages
+    raw = json.dumps({"v": version, "o": offset}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor):
+    """(version, offset) of a cursor, or None if it is malformed."""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        version, offset = data["v"], data["o"]
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        return None
+    if not isinstance(version, int) or not isinstance(offset, int) or offset < 0:
+        return None
+    return version, offset
+
+
+def _page_start(version, cursor):
+    """(version, offset) to read from, or an error response."""
+    if cursor is None:
+        return version, 0
+    decoded = _decode_cursor(cursor)
+    if decoded is None:
+        return Response(status_code=400, content="Invalid cursor")
+    return decoded
+
+
+def _bad_limit(limit):
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        return Response(status_code=422, content=f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    return None
+
+
+def _unknown_profile(profile):
+    return Response(status_code=422, content=f"Unknown Batfish profile: {profile} (expected one of {', '.join(PROFILES)})")
+
 
 @router.post("/confirm", response_model = schemas.PolicySummaryResponse)
-def confirm_policy(request: schemas.PolicySummaryRequest):
+def confirm_policy(request: schemas.PolicySummaryRequest, http_request: Request):
 
     message = request.message
     context = request.context.model_dump()
+    profile = request.batfish_profile or settings.BATFISH_PROFILE
+    if profile not in PROFILES:
+        return _unknown_profile(profile)
 
-    summary = summarize_intent(
-        nl_policy=message,
-        context=context
-    )
+    # Registered contexts are referenced by id instead of being resent
+    if request.context.context_id:
+        context = get_context_store().request_context(
+            request.context.context_id,
+            description=request.context.description or None
+        )
+        if context is None:
+            return Response(status_code=404, content="Context ID not found")
+
+    # Re-confirming an edited policy in the same session builds on its last translation
+    session = None
+    previous = None
+    if request.session_id is not None:
+        session = CONFIRM_CACHE.get(request.session_id)
+        if session is None:
+            return Response(status_code=404, content="Session ID not found")
+        previous = _snapshot(session)
+    unchanged = session is not None and session["message"] == message and session["context"] == context
+
+    # Kick off the whole pipeline before summarizing, so it runs while the
+    # summary is generated and while the user reads it. A run still going
+    # for the same inputs is kept; one for superseded inputs is stopped.
+    speculative = None
+    cancel_event = threading.Event()
+    running = session is not None and session.get("speculative") is not None and not session["speculative"].done()
+    if running and unchanged and session["profile"] == profile:
+        speculative, cancel_event = session["speculative"], session["cancel_event"]
+    else:
+        if running:
+            cancel_speculative(session)
+        if settings.SPECULATIVE_TRANSLATION:
+            speculative = SPECULATION_EXECUTOR.submit(_retranslate, previous, message, context, profile, cancel_event)
+            # Under admission control the run keeps this request's slot until it ends
+            lease = getattr(http_request.state, "admission", None)
+            if lease is not None:
+                lease.hold_until(speculative)
+
+    if unchanged:
+        summary = session["summary"]
+    else:
+        summary = summarize_intent(
+            nl_policy=message,
+            context=context
+        )
 
-    session_id = str(uuid.uuid4())
+    session_id = request.session_id or str(uuid.uuid4())
     CONFIRM_CACHE[session_id] = {
         "message": message,
-        "context": context
+        "context": context,
+        "profile": profile,
+        "summary": summary,
+        "previous": previous,
+        "speculative": speculative,
+        "cancel_event": cancel_event
     }
 
     return schemas.PolicySummaryResponse(session_id=session_id, summary=summary)
 
 
 @router.post("/translate", response_model = schemas.PolicyTranslateResponse)
-def translate_policy(payload: schemas.PolicyTranslateRequest):
+def translate_policy(
+    payload: schemas.PolicyTranslateRequest,
+    x_profile: Optional[str] = Header(default=None),
+    x_profiling_token: Optional[str] = Header(default=None)
+):
 
     session_id = payload.session_id
-    confirm = payload.confirm  # will be ignored for now 
 
-    if session_id not in CONFIRM_CACHE:
-        return Response(status_code=404, content="Session ID not found")
-    
     # Retrieve cached data
-    cached = CONFIRM_CACHE[session_id]
+    cached = CONFIRM_CACHE.get(session_id)
+    if cached is None:
+        return Response(status_code=404, content="Session ID not found")
+
+    speculative = cached.get("speculative")
+
+    profile = payload.batfish_profile or cached["profile"]
+    if profile not in PROFILES:
+        return _unknown_profile(profile)
+
+    if not payload.confirm:
+        # User rejected the summary: stop any speculative work and drop the session
+        cancel_speculative(cached)
+        CONFIRM_CACHE.pop(session_id, None)
+        return Response(status_code=204)
+
+    # Profiled on request (X-Profile: 1, with the profiling token if one is
+    # set) or when armed from /profiling; the run happens inline so the
+    # profile covers the whole pipeline
+    profiler = None
+    requested = x_profile in ("1", "true")
+    if settings.PROFILING and ((requested and authorized(x_profiling_token)) or profiling_switch.take(session_id)):
+        profiler = RequestProfiler(interval=settings.PROFILING_SAMPLE_INTERVAL_MS / 1000)
+        if not profiler.start():
+            profiler = None
+        elif speculative is not None:
+            cancel_speculative(cached)
+            speculative = None
+
+    try:
+        result, meta = _run_translation(cached, session_id, speculative, profile)
+    except TranslationCancelled:
+        # Re-confirmed with an edit, or dropped from the cache, while we waited
+        return Response(status_code=409, content="Session was superseded; confirm the policy again")
+    finally:
+        if profiler is not None:
+            profiler.stop()
+
+    policy_id = meta["policy_id"]
+    headers = {}
+    if profiler is not None:
+        get_policy_store().put_profile(
+            policy_id, meta["version"], profiler.summary(), profiler.collapsed(), profiler.pstats_dump()
+        )
+        headers["X-Profile"] = f"/policies/{policy_id}/profile"
+    elif requested:
+        if not settings.PROFILING:
+            headers["X-Profile"] = "disabled"
+        else:
+            headers["X-Profile"] = "busy" if authorized(x_profiling_token) else "forbidden"
+
+    # Results can hold 100k-rule IRs and configs: encode them directly
+    # rather than re-validating them against the response model
+    return ORJSONResponse({"policy_id": policy_id, **result}, headers=headers)
+
+
+def _run_translation(cached, session_id, speculative, profile):
+    """Translate a confirmed session and store the result; returns (result, stored version metadata)."""
+    # Reuse the speculative run started at confirm time if there is one;
+    # it is usually finished (or close) by the time the user confirms.
+    # If it failed, translate inline instead of failing the session for good;
+    # if it was cancelled, the session it belongs to is gone.
+    result = None
+    if speculative is not None:
+        try:
+            result = speculative.result()
+        except (TranslationCancelled, CancelledError):
+            raise TranslationCancelled()
+        except Exception as e:
+            logger.warning(f"Speculative translation of session {session_id} failed, translating inline: {e}")
+            cached["speculative"] = None
+
+    if result is not None:
+        # A different profile only changes the Batfish questions, so re-run
+        # validation on the speculative configs rather than the whole pipeline
+        # (configs only hold an "error" entry when safety checks blocked compilation)
+        if profile != cached["profile"] and "error" not in result["configs"]:
+            result = dict(result)
+            result["batfish_warnings"] = validate_configs(result["configs"], cached["context"], profile=profile)
+    elif cached.get("previous") is not None:
+        result = _retranslate(cached["previous"], cached["message"], cached["context"], profile)
+    else:
+        result = _translate(cached["message"], cached["context"], profile)
+
+    # Kept as the base for the next edit in this session
+    cached.update(result=result, profile=profile, previous=None)
+
+    policy_id = str(uuid.uuid4())
+
+    # Every translation is kept (IR, configs and warnings) in the policy history
+    meta = get_policy_store().append(
+        policy_id,
+        result,
+        session_id=session_id,
+        context_id=(cached["context"] or {}).get("context_id")
+    )
+    return result, meta
 
-    # Resolve Policy
-    resolved = resolve_policy(
-        nl_policy=cached["message"],
-        context=cached["context"]
+
+@router.get("", response_model = List[schemas.PolicyVersionInfo])
+def list_policies(session_id: Optional[str] = None, context_id: Optional[str] = None, rule_hash: Optional[str] = None):
+
+    store = get_policy_store()
+    if session_id is not None:
+        return store.by_session(session_id)
+    if context_id is not None:
+        return store.by_context(context_id)
+    if rule_hash is not None:
+        return store.by_rule(rule_hash)
+    return Response(status_code=400, content="One of session_id, context_id or rule_hash is required")
+
+
+@router.post("/compare", response_model = IRComparison)
+def compare_policies(payload: schemas.PolicyCompareRequest):
+
+    store = get_policy_store()
+    base = store.get(payload.base_policy_id, payload.base_version)
+    target = store.get(payload.target_policy_id, payload.target_version)
+
+    for policy_id, record in ((payload.base_policy_id, base), (payload.target_policy_id, target)):
+        if record is None:
+            return Response(status_code=404, content=f"Policy ID not found: {policy_id}")
+
+    return compare_ir(
+        IRBuilderOutput.model_validate(base["ir"]),
+        IRBuilderOutput.model_validate(target["ir"])
     )
 
-    print("Resolved Policy:", resolved)
 
-    # Build Intermediate Representation
-    ir_result = build_ir(
-        resolver_output=resolved,
-        context=cached["context"]
+@router.get("/export")
+def export_policies(policy_id: List[str] = Query(default=[]), context_id: Optional[str] = None, format: str = "tar.gz"):
+
+    # Declared before /{policy_id} so "export" isn't taken for a policy id
+    if format not in FORMATS:
+        return Response(status_code=422, content=f"Unknown archive format: {format} (expected one of {', '.join(FORMATS)})")
+    if not policy_id and context_id is None:
+        return Response(status_code=400, content="At least one policy_id or a context_id is required")
+
+    store = get_policy_store()
+    refs, unknown = export_refs(store, policy_id, context_id)
+    if unknown:
+        return Response(status_code=404, content=f"Policy ID not found: {', '.join(unknown)}")
+    if not refs:
+        return Response(status_code=404, content="No policies found for this context")
+
+    # Generated while it is sent: configs and rules are read from the store chunk by chunk
+    return StreamingResponse(
+        iter_export(store, refs, format),
+        media_type=FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="policies.{format}"'},
     )
 
-    print("Intermediate Representation:", ir_result)
 
+@router.get("/{policy_id}", response_model = schemas.PolicyVersion)
+def get_policy(policy_id: str, version: Optional[int] = None):
 
-    policy_id = str(uuid.uuid4())
-    
+    record = get_policy_store().get(policy_id, version)
+    if record is None:
+        return Response(status_code=404, content="Policy version not found")
+
+    return ORJSONResponse(record)
+
+
+@router.get("/{policy_id}/rules", response_model = schemas.PolicyRulesPage)
+def get_policy_rules(policy_id: str, version: Optional[int] = None, cursor: Optional[str] = None, limit: int = 500):
+
+    start = _page_start(version, cursor)
+    if isinstance(start, Response):
+        return start
+    error = _bad_limit(limit)
+    if error is not None:
+        return error
+
+    version, offset = start
+    page = get_policy_store().rules_page(policy_id, version, offset, limit)
+    if page is None:
+        return Response(status_code=404, content="Policy version not found")
+
+    end = offset + len(page["items"])
+    return ORJSONResponse({
+        "policy_id": policy_id,
+        "version": page["version"],
+        "total": page["total"],
+        "items": page["items"],
+        "next_cursor": _encode_cursor(page["version"], end) if end < page["total"] else None,
+    })
+
+
+@router.get("/{policy_id}/warnings/{kind}", response_model = schemas.PolicyWarningsPage)
+def get_policy_warnings(policy_id: str, kind: str, version: Optional[int] = None, cursor: Optional[str] = None, limit: int = 500):
+
+    if kind not in WARNING_KINDS:
+        return Response(status_code=404, content=f"Unknown warning kind: {kind} (expected one of {', '.join(WARNING_KINDS)})")
+    start = _page_start(version, cursor)
+    if isinstance(start, Response):
+        return start
+    error = _bad_limit(limit)
+    if error is not None:
+        return error
+
+    version, offset = start
+    found = get_policy_store().warnings(policy_id, version, kind)
+    if found is None:
+        return Response(status_code=404, content="Policy version not found")
+
+    # Linting and Batfish warnings are per vendor: flatten them, tagging each with its vendor
+    warnings = found["warnings"] or ([] if kind == "safety" else {})
+    if kind == "safety":
+        items = [{"message": w} for w in warnings]
+    elif kind == "linting":
+        items = [{"vendor": vendor, "message": w} for vendor, ws in warnings.items() for w in ws]
+    else:
+        items = [{"vendor": vendor, **w} for vendor, ws in warnings.items() for w in ws]
+
+    end = min(offset + limit, len(items))
+    return ORJSONResponse({
+        "policy_id": policy_id,
+        "version": found["version"],
+        "kind": kind,
+        "total": len(items),
+        "items": items[offset:end],
+        "next_cursor": _encode_cursor(found["version"], end) if end < len(items) else None,
+    })
 
-    POLICIES_CACHE[policy_id] = {
-        "session_id": session_id,
-        "ir": ir_result
-    }
-    
-    # Linting
-    all_valid, linting_warnings = lint_ir_all(ir_result)
-    if not all_valid:
-        print("Linting Warnings:", linting_warnings)
-
-    # Safety Verification
-    is_safe, safety_warnings = verify_safety(ir_result)
-    if not is_safe:
-        print("Safety Errors:", safety_warnings)
-        return schemas.PolicyTranslateResponse(
-            policy_id = policy_id,
-            resolver_output = resolved,
-            ir = ir_result,
-            linting_warnings = linting_warnings if not all_valid else {},
-            safety_warnings = safety_warnings,
-            configs = {"error": "Compilation skipped due to safety violations."},
-            batfish_warnings = {"error": [{"severity": "error", "message": "Batfish validation skipped due to safety violations."}]}
-        )
 
-    # Compilation
-    compiled_outputs = compile_ir_all(ir_result)
-    
-    # Batfish Validation
-    bf_warnings_all = {}
-    for vendor, config in compiled_outputs.items():
+@router.get("/{policy_id}/configs/{vendor}", response_model = schemas.PolicyConfigPage)
+def get_policy_config(policy_id: str, vendor: str, version: Optional[int] = None, cursor: Optional[str] = None):
 
-        batfish_manager = BatfishManager()
-        bf_warnings = batfish_manager.validate(config, context=cached["context"])
+    # One stored chunk (CONFIG_CHUNK_LINES lines) per page
+    start = _page_start(version, cursor)
+    if isinstance(start, Response):
+        return start
 
-        bf_warnings_all[vendor] = bf_warnings
+    version, chunk = start
+    page = get_policy_store().config_chunk(policy_id, version, vendor, chunk)
+    if page is None:
+        return Response(status_code=404, content="Policy config not found")
 
+    last = page["chunk"] + 1 >= page["chunks"]
+    return ORJSONResponse({
+        "policy_id": policy_id,
+        "vendor": vendor,
+        **page,
+        "next_cursor": None if last else _encode_cursor(page["version"], page["chunk"] + 1),
+    })
 
-    return schemas.PolicyTranslateResponse(
-        policy_id = policy_id,
-        resolver_output = resolved,
-        ir = ir_result,
-        linting_warnings = linting_warnings if not all_valid else {},
-        safety_warnings = safety_warnings,
-        configs = compiled_outputs,
-        batfish_warnings = bf_warnings_all
+
+@router.get("/{policy_id}/configs/{vendor}/raw")
+def download_policy_config(policy_id: str, vendor: str, version: Optional[int] = None):
+
+    # Streamed from the database chunk by chunk, so the whole config is never in memory
+    chunks = get_policy_store().iter_config(policy_id, version, vendor)
+    if chunks is None:
+        return Response(status_code=404, content="Policy config not found")
+
+    return StreamingResponse(chunks, media_type="text/plain; charset=utf-8")
+
+
+@router.get("/{policy_id}/profile")
+def get_policy_profile(policy_id: str, version: Optional[int] = None):
+    """Profile of a profiled translation: time per category, top functions by cumulative time, memory."""
+    summary = get_policy_store().profile(policy_id, version)
+    if summary is None:
+        return Response(status_code=404, content="Policy profile not found")
+
+    return ORJSONResponse(summary)
+
+
+@router.get("/{policy_id}/profile/flamegraph")
+def get_policy_flamegraph(policy_id: str, version: Optional[int] = None):
+    """Sampled stacks in collapsed format, for flamegraph.pl, speedscope or inferno."""
+    collapsed = get_policy_store().profile(policy_id, version, part="collapsed")
+    if collapsed is None:
+        return Response(status_code=404, content="Policy profile not found")
+
+    return Response(content=collapsed, media_type="text/plain; charset=utf-8")
+
+
+@router.get("/{policy_id}/profile/pstats")
+def get_policy_pstats(policy_id: str, version: Optional[int] = None):
+    """The cProfile stats as a file for pstats or snakeviz."""
+    data = get_policy_store().profile(policy_id, version, part="pstats")
+    if data is None:
+        return Response(status_code=404, content="Policy profile not found")
+
+    return Response(
+        content=data,
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="{policy_id}.pstats"'},
     )
+
+
+@router.post("/{policy_id}/ordering", response_model = schemas.RuleOrderingResponse)
+def order_policy_rules(policy_id: str, payload: schemas.RuleOrderingRequest):
+
+    record = get_policy_store().get(policy_id, payload.version)
+    if record is None:
+        return Response(status_code=404, content="Policy version not found")
+
+    # Objects of the policy's registered context resolve names to addresses
+    context = get_context_store().request_context(record["context_id"]) if record["context_id"] else None
+    try:
+        plan = optimize_rule_order(IRBuilderOutput.model_validate(record["ir"]).rules, payload.hit_counts, context)
+    except ValueError as e:
+        return Response(status_code=422, content=str(e))
+
+    return {"policy_id": policy_id, "version": record["version"], **plan}
+
+
+@router.get("/{policy_id}/versions", response_model = List[schemas.PolicyVersionInfo])
+def list_policy_versions(policy_id: str):
+
+    versions = get_policy_store().versions(policy_id)
+    if not versions:
+        return Response(status_code=404, content="Policy ID not found")
+
+    return versions
+
+
+@router.post("/{policy_id}/rollback", response_model = schemas.PolicyVersionInfo)
+def rollback_policy(policy_id: str, version: int):
+
+    # Append-only: rolling back re-appends the old version as the newest one
+    meta = get_policy_store().rollback(policy_id, version)
+    if meta is None:
+        return Response(status_code=404, content="Policy version not found")
+
+    return meta
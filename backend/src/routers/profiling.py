@@ -0,0 +1,52 @@
+from typing import Optional
+from fastapi import APIRouter, Header, Response
+from ..config import settings
+from ..profiling import authorized, profiling_switch
+from ..storage.policies import get_policy_store
+
+router = APIRouter(
+    prefix="/profiling",
+    tags=["profiling"])
+
+
+def _forbidden(token):
+    """An error response unless profiling is enabled and token is accepted."""
+    if not settings.PROFILING:
+        return Response(status_code=409, content="Profiling is disabled (PROFILING)")
+    if not authorized(token):
+        return Response(status_code=403, content="Missing or invalid X-Profiling-Token")
+    return None
+
+
+@router.get("")
+def profiling_status(limit: int = 100, x_profiling_token: Optional[str] = Header(default=None)):
+    """Armed profiling runs (by session, "*" = any) and the most recent stored profiles."""
+    if settings.PROFILING and not authorized(x_profiling_token):
+        return Response(status_code=403, content="Missing or invalid X-Profiling-Token")
+    return {
+        "enabled": settings.PROFILING,
+        "armed": profiling_switch.armed(),
+        "profiles": get_policy_store().profiles(limit),
+    }
+
+
+@router.post("/arm")
+def arm_profiling(count: int = 1, session_id: Optional[str] = None, x_profiling_token: Optional[str] = Header(default=None)):
+    """Profile the next count translations (of session_id only, if given), without clients sending X-Profile."""
+    error = _forbidden(x_profiling_token)
+    if error is not None:
+        return error
+    if count < 1:
+        return Response(status_code=422, content="count must be at least 1")
+
+    profiling_switch.arm(count, session_id)
+    return {"armed": profiling_switch.armed()}
+
+
+@router.delete("/arm")
+def disarm_profiling(x_profiling_token: Optional[str] = Header(default=None)):
+    error = _forbidden(x_profiling_token)
+    if error is not None:
+        return error
+    profiling_switch.disarm()
+    return {"armed": profiling_switch.armed()}
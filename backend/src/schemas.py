@@ -1,14 +1,23 @@
-from typing import Optional, Dict,  List
-from pydantic import BaseModel
+from typing import Any, Optional, Dict,  List, Union
+from pydantic import BaseModel, ConfigDict, model_validator
 from .engine.schemas import IRBuilderOutput, ResolverOutput
 
 class RequestContext(BaseModel):
     description: Optional[str] = ""
-    details: Optional[Dict]
+    details: Optional[Dict] = None
+    context_id: Optional[str] = None  # reference to a context registered via /contexts
+
+    @model_validator(mode="after")
+    def _details_or_context_id(self):
+        if (self.details is None) == (self.context_id is None):
+            raise ValueError("Exactly one of details or context_id is required")
+        return self
 
 class PolicySummaryRequest(BaseModel):
     message: str
     context: RequestContext
+    batfish_profile: Optional[str] = None  # "fast" | "full"; defaults to settings.BATFISH_PROFILE
+    session_id: Optional[str] = None  # continue an earlier session: its last translation is updated, not redone
 
 class PolicySummaryResponse(BaseModel):
     session_id: str
@@ -17,6 +26,7 @@ class PolicySummaryResponse(BaseModel):
 class PolicyTranslateRequest(BaseModel):
     session_id: str
     confirm: bool
+    batfish_profile: Optional[str] = None  # overrides the profile chosen at confirm
 
 
 class PolicyTranslateResponse(BaseModel):
@@ -27,3 +37,99 @@ class PolicyTranslateResponse(BaseModel):
     safety_warnings: Optional[List[str]] = []
     configs: Optional[Dict[str, str]] = {}
     batfish_warnings: Optional[Dict[str, List[Dict[str, str]]]] = {}  # Dictionary of vendor to list of { "severity": "warning"|"error", "message": "..." }
+
+
+class PolicyVersionInfo(BaseModel):
+    policy_id: str
+    version: int
+    session_id: Optional[str] = None
+    context_id: Optional[str] = None
+    created_at: str
+    content_hash: str
+    rule_count: int
+
+
+class PolicyVersion(PolicyTranslateResponse):
+    version: int
+    session_id: Optional[str] = None
+    context_id: Optional[str] = None
+    created_at: str
+    content_hash: str
+    rule_hashes: List[str] = []
+    resolver_output: Optional[ResolverOutput] = None
+
+
+class PolicyPage(BaseModel):
+    policy_id: str
+    version: int
+    next_cursor: Optional[str] = None  # pass back as ?cursor= for the next page; None on the last one
+
+
+class PolicyRulesPage(PolicyPage):
+    total: int
+    items: List[Dict[str, Any]]
+
+
+class PolicyWarningsPage(PolicyPage):
+    kind: str  # "linting" | "safety" | "batfish"
+    total: int
+    items: List[Dict[str, Any]]  # linting/batfish items carry their "vendor"
+
+
+class PolicyConfigPage(PolicyPage):
+    vendor: str
+    chunk: int
+    chunks: int
+    content: str
+
+
+class RuleOrderingRequest(BaseModel):
+    hit_counts: Dict[str, int]  # rule id -> hits, from traffic logs or a rule hit-count export
+    version: Optional[int] = None  # latest if omitted
+
+
+class RuleOrderingResponse(BaseModel):
+    policy_id: str
+    version: int
+    order: List[str]  # rule ids in the proposed order
+    moves: List[str]  # PAN-OS commands turning the current order into it
+    expected_depth_before: float
+    expected_depth_after: float
+    constraints: int  # order-sensitive rule pairs that had to stay as they were
+    unknown_rules: List[str] = []  # ids in hit_counts that aren't rules of the version
+
+
+class PolicyCompareRequest(BaseModel):
+    base_policy_id: str
+    target_policy_id: str
+    base_version: Optional[int] = None  # latest if omitted
+    target_version: Optional[int] = None
+
+
+class NetworkDefinition(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    objects: Dict[str, Union[str, List[str]]] = {}
+    zones: Dict[str, List[str]] = {}
+    services: Dict[str, Dict[str, Any]] = {}
+    time_windows: Dict[str, str] = {}
+
+
+class ContextRegisterRequest(BaseModel):
+    name: str
+    description: Optional[str] = ""
+    details: NetworkDefinition
+
+
+class ContextInfo(BaseModel):
+    context_id: str
+    name: str
+    version: int
+    description: Optional[str] = ""
+    created_at: str
+    counts: Dict[str, int]
+    warnings: Optional[List[str]] = []
+
+
+class ContextDetail(ContextInfo):
+    details: Dict[str, Any]
@@ -0,0 +1,71 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def cancel_speculative(entry: Dict[str, Any]) -> None:
+    """Stop a session's speculative translation, if it has one that is still wanted."""
+    speculative = entry.get("speculative")
+    if speculative is not None:
+        entry["cancel_event"].set()
+        speculative.cancel()
+
+
+class SessionCache:
+    """
+    Confirmed sessions waiting to be translated (or edited), kept in memory:
+    at most max_sessions, each dropped ttl seconds after it was last used,
+    least recently used first. A dropped session's speculative translation
+    is cancelled.
+    """
+
+    def __init__(self, max_sessions: int = 10000, ttl: float = 3600.0):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expire(self, now: float) -> List[Dict[str, Any]]:
+        # Entries are in order of last use, so expired ones are at the front
+        dropped = []
+        while self._entries:
+            session_id, (used, entry) = next(iter(self._entries.items()))
+            if now - used < self.ttl and len(self._entries) <= self.max_sessions:
+                break
+            del self._entries[session_id]
+            dropped.append(entry)
+        return dropped
+
+    def get(self, session_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            dropped = self._expire(now)
+            item = self._entries.get(session_id)
+            if item is not None:
+                self._entries[session_id] = (now, item[1])
+                self._entries.move_to_end(session_id)
+        for entry in dropped:
+            cancel_speculative(entry)
+        return item[1] if item is not None else None
+
+    def __setitem__(self, session_id: str, entry: Dict[str, Any]) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._entries[session_id] = (now, entry)
+            self._entries.move_to_end(session_id)
+            dropped = self._expire(now)
+        for entry in dropped:
+            cancel_speculative(entry)
+
+    def pop(self, session_id: str, default: Any = None) -> Any:
+        with self._lock:
+            item = self._entries.pop(session_id, None)
+        return item[1] if item is not None else default
+
+    def __contains__(self, session_id: str) -> bool:
+        return self.get(session_id) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
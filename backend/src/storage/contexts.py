@@ -0,0 +1,173 @@
+import datetime
+import json
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional
+
+from ..engine.context.index import ContextIndex
+from ..engine.hashing import content_hash
+
+
+# Ids are content hashes; anything else never reaches the filesystem
+_CONTEXT_ID_RE = re.compile(r"[0-9a-f]{16}")
+
+
+def context_hash(details: Dict[str, Any]) -> str:
+    """Content hash of a network definition, independent of key order."""
+    return content_hash(details)[:16]
+
+
+def check_references(details: Dict[str, Any]) -> List[str]:
+    """Referential checks that a schema alone can't express."""
+    warnings: List[str] = []
+    objects = details.get("objects") or {}
+
+    for zone, members in (details.get("zones") or {}).items():
+        for m in members or []:
+            if m not in objects:
+                warnings.append(f"Zone '{zone}' references undefined object '{m}'.")
+
+    for name, svc in (details.get("services") or {}).items():
+        if not isinstance(svc, dict) or "protocol" not in svc:
+            warnings.append(f"Service '{name}' has no protocol.")
+        elif "port" not in svc and "ports" not in svc and str(svc["protocol"]).lower() in ("tcp", "udp"):
+            warnings.append(f"Service '{name}' has no port.")
+
+    return warnings
+
+
+class ContextStore:
+    """
+    Registered network contexts, stored once and referenced by id.
+
+    Each upload is identified by the content hash of its network definition,
+    so re-uploading an unchanged context is a no-op and every change yields a
+    new version under the same name. Definitions live as one JSON file per
+    hash next to an index of names -> versions; parsed definitions and their
+    ContextIndex are kept in memory after first use.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.Lock()
+        self._versions: Dict[str, List[Dict[str, Any]]] = {}
+        self._details: Dict[str, Dict[str, Any]] = {}
+        self._indexes: Dict[str, ContextIndex] = {}
+
+        os.makedirs(self.root, exist_ok=True)
+        if os.path.exists(self._index_path):
+            with open(self._index_path, "r") as f:
+                self._versions = json.load(f)
+
+    @property
+    def _index_path(self) -> str:
+        return os.path.join(self.root, "index.json")
+
+    def _details_path(self, context_id: str) -> str:
+        return os.path.join(self.root, f"{context_id}.json")
+
+    def _save_index(self) -> None:
+        tmp_path = self._index_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._versions, f, indent=2)
+        os.replace(tmp_path, self._index_path)
+
+    def register(self, name: str, details: Dict[str, Any], description: str = "") -> Dict[str, Any]:
+        """Store a context version; returns its metadata (existing metadata if unchanged)."""
+        context_id = context_hash(details)
+
+        with self._lock:
+            versions = self._versions.setdefault(name, [])
+            for v in versions:
+                if v["context_id"] == context_id:
+                    return v
+
+            if not os.path.exists(self._details_path(context_id)):
+                with open(self._details_path(context_id), "w") as f:
+                    json.dump(details, f)
+
+            meta = {
+                "context_id": context_id,
+                "name": name,
+                "version": len(versions) + 1,
+                "description": description,
+                "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+                "counts": {k: len(details.get(k) or {}) for k in ("objects", "zones", "services", "time_windows")},
+            }
+            versions.append(meta)
+            self._details[context_id] = details
+            self._save_index()
+            return meta
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Latest version of every registered context."""
+        return [versions[-1] for versions in self._versions.values() if versions]
+
+    def versions(self, name: str) -> List[Dict[str, Any]]:
+        return list(self._versions.get(name, []))
+
+    def metadata(self, context_id: str) -> Optional[Dict[str, Any]]:
+        for versions in self._versions.values():
+            for v in versions:
+                if v["context_id"] == context_id:
+                    return v
+        return None
+
+    def get(self, context_id: str) -> Optional[Dict[str, Any]]:
+        """Return the network definition for context_id, or None if unknown."""
+        details = self._details.get(context_id)
+        if details is not None:
+            return details
+        if not _CONTEXT_ID_RE.fullmatch(context_id) or self.metadata(context_id) is None:
+            return None
+
+        path = self._details_path(context_id)
+        if not os.path.exists(path):
+            return None
+
+        with open(path, "r") as f:
+            details = json.load(f)
+        self._details[context_id] = details
+        return details
+
+    def index(self, context_id: str) -> Optional[ContextIndex]:
+        """Return the (cached) ContextIndex for context_id."""
+        idx = self._indexes.get(context_id)
+        if idx is None:
+            details = self.get(context_id)
+            if details is None:
+                return None
+            idx = ContextIndex(details)
+            self._indexes[context_id] = idx
+        return idx
+
+    def request_context(self, context_id: str, description: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Build the context dict used throughout the pipeline for a stored context."""
+        details = self.get(context_id)
+        if details is None:
+            return None
+        meta = self.metadata(context_id) or {}
+        return {
+            "description": description if description is not None else meta.get("description", ""),
+            "details": details,
+            "context_id": context_id,
+        }
+
+
+_store: Optional[ContextStore] = None
+
+
+def get_context_store() -> ContextStore:
+    global _store
+    if _store is None:
+        from ..config import settings
+        _store = ContextStore(os.path.join(settings.STORAGE_DIR, "contexts"))
+    return _store
+
+
+def index_for(context: Optional[Dict[str, Any]]) -> Optional[ContextIndex]:
+    """Cached index for a context that references a registered context_id."""
+    if context and context.get("context_id"):
+        return get_context_store().index(context["context_id"])
+    return None
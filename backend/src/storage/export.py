@@ -0,0 +1,252 @@
+import io
+import json
+import tarfile
+import tempfile
+import time
+import zipfile
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .policies import WARNING_KINDS, PolicyStore
+
+# Archive formats and their media types
+FORMATS = {
+    "tar": "application/x-tar",
+    "tar.gz": "application/gzip",
+    "zip": "application/zip",
+}
+
+# Rules per database read when writing ir.json
+RULES_PAGE = 1000
+# Members are built in memory up to this size, then spill to a temporary file
+SPOOL_SIZE = 1 << 20
+READ_SIZE = 1 << 16
+
+# (name, size in bytes, chunks); the chunks must add up to size
+Member = Tuple[str, int, Iterable[bytes]]
+
+
+def export_refs(store: PolicyStore, policy_ids: Iterable[str] = (), context_id: Optional[str] = None) -> Tuple[List[Tuple[str, int]], List[str]]:
+    """
+    The (policy_id, version) pairs to export, latest version of each: the
+    given policy ids plus every policy translated on context_id. Returns
+    (refs, unknown policy ids).
+    """
+    latest: Dict[str, int] = {}
+    unknown = []
+    for policy_id in policy_ids:
+        versions = store.versions(policy_id)
+        if versions:
+            latest[policy_id] = versions[-1]["version"]
+        else:
+            unknown.append(policy_id)
+    if context_id is not None:
+        for meta in store.by_context(context_id):
+            latest[meta["policy_id"]] = max(latest.get(meta["policy_id"], 0), meta["version"])
+    return sorted(latest.items()), unknown
+
+
+def _spooled(write) -> Tuple[int, Iterator[bytes]]:
+    """Run write(file) into a spooled temporary file; returns (size, chunk iterator that closes it)."""
+    f = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+    write(f)
+    size = f.tell()
+    f.seek(0)
+
+    def chunks() -> Iterator[bytes]:
+        with f:
+            while True:
+                chunk = f.read(READ_SIZE)
+                if not chunk:
+                    return
+                yield chunk
+
+    return size, chunks()
+
+
+def _json_bytes(obj: Any) -> bytes:
+    return json.dumps(obj, indent=2).encode("utf-8")
+
+
+def _ir_json(store: PolicyStore, policy_id: str, version: int, metadata: Dict[str, Any]) -> Tuple[int, Iterator[bytes]]:
+    def write(f):
+        # Written page by page: {"rules": [...], "metadata": {...}}
+        f.write(b'{"rules": [')
+        offset = 0
+        while True:
+            page = store.rules_page(policy_id, version, offset, RULES_PAGE)
+            for i, rule in enumerate(page["items"]):
+                f.write(b",\n" if offset + i else b"\n")
+                f.write(json.dumps(rule).encode("utf-8"))
+            offset += len(page["items"])
+            if not page["items"] or offset >= page["total"]:
+                break
+        f.write(b'\n], "metadata": ' + json.dumps(metadata).encode("utf-8") + b"}\n")
+
+    return _spooled(write)
+
+
+def _report_json(store: PolicyStore, policy_id: str, version: int, head: Dict[str, Any]) -> Tuple[int, Iterator[bytes]]:
+    def write(f):
+        # One kind of warnings in memory at a time
+        f.write(json.dumps(head)[:-1].encode("utf-8"))
+        for kind in WARNING_KINDS:
+            warnings = store.warnings(policy_id, version, kind)["warnings"]
+            f.write(f', "{kind}_warnings": '.encode("utf-8") + json.dumps(warnings).encode("utf-8"))
+        f.write(b"}\n")
+
+    return _spooled(write)
+
+
+def _config_chunks(store: PolicyStore, policy_id: str, version: int, vendor: str) -> Iterator[bytes]:
+    for text in store.iter_config(policy_id, version, vendor) or ():
+        yield text.encode("utf-8")
+
+
+def export_members(store: PolicyStore, refs: Iterable[Tuple[str, int]]) -> Iterator[Member]:
+    """
+    Archive members for refs, one version at a time:
+    <policy_id>/v<version>/configs/<vendor>.cfg, ir.json and report.json,
+    then a top-level manifest.json listing every version and its files.
+    """
+    manifest = []
+    for policy_id, version in refs:
+        info = store.export_info(policy_id, version)
+        if info is None:
+            continue
+        prefix = f"{policy_id}/v{version}"
+        files = []
+
+        # Configs hold an "error" entry instead when safety checks blocked compilation
+        compile_error = None
+        for vendor, size in info["config_sizes"].items():
+            if vendor == "error":
+                compile_error = store.config_chunk(policy_id, version, vendor, 0)["content"]
+                continue
+            name = f"{prefix}/configs/{vendor}.cfg"
+            files.append(name)
+            yield name, size, _config_chunks(store, policy_id, version, vendor)
+
+        size, chunks = _ir_json(store, policy_id, version, info["ir_metadata"])
+        files.append(f"{prefix}/ir.json")
+        yield f"{prefix}/ir.json", size, chunks
+
+        head = {k: info[k] for k in (
+            "policy_id", "version", "session_id", "context_id", "created_at", "content_hash", "rule_count",
+            "resolver_output",
+        )}
+        head["compile_error"] = compile_error
+        size, chunks = _report_json(store, policy_id, version, head)
+        files.append(f"{prefix}/report.json")
+        yield f"{prefix}/report.json", size, chunks
+
+        manifest.append({
+            "policy_id": policy_id,
+            "version": version,
+            "content_hash": info["content_hash"],
+            "rule_count": info["rule_count"],
+            "compile_error": compile_error,
+            "files": files,
+        })
+
+    body = _json_bytes({"versions": manifest})
+    yield "manifest.json", len(body), [body]
+
+
+class _Sink(io.RawIOBase):
+    """Write-only stream whose contents are taken out with drain()."""
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._parts.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        out = b"".join(self._parts)
+        self._parts.clear()
+        return out
+
+
+def _iter_tar(members: Iterable[Member], mtime: float) -> Iterator[bytes]:
+    # Written block by block (header, data, padding) rather than through
+    # TarFile, which buffers a whole member to write it
+    total = 0
+    for name, size, chunks in members:
+        info = tarfile.TarInfo(name)
+        info.size = size
+        info.mtime = int(mtime)
+        info.mode = 0o644
+        header = info.tobuf(tarfile.PAX_FORMAT, "utf-8", "surrogateescape")
+        yield header
+        written = 0
+        for chunk in chunks:
+            written += len(chunk)
+            yield chunk
+        if written != size:
+            raise RuntimeError(f"{name}: wrote {written} bytes, expected {size}")
+        padding = -size % tarfile.BLOCKSIZE
+        yield tarfile.NUL * padding
+        total += len(header) + size + padding
+
+    # End-of-archive marker, padded to a full record like tarfile does
+    end = 2 * tarfile.BLOCKSIZE
+    end += -(total + end) % tarfile.RECORDSIZE
+    yield tarfile.NUL * end
+
+
+def _iter_zip(members: Iterable[Member], mtime: float) -> Iterator[bytes]:
+    sink = _Sink()
+    date_time = time.localtime(mtime)[:6]
+    # The sink can't seek, so ZipFile writes sizes in data descriptors after each member
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, size, chunks in members:
+            info = zipfile.ZipInfo(name, date_time=date_time)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            with zf.open(info, "w", force_zip64=size >= zipfile.ZIP64_LIMIT) as w:
+                for chunk in chunks:
+                    w.write(chunk)
+                    out = sink.drain()
+                    if out:
+                        yield out
+            out = sink.drain()
+            if out:
+                yield out
+    yield sink.drain()
+
+
+def iter_archive(members: Iterable[Member], fmt: str = "tar.gz", mtime: Optional[float] = None) -> Iterator[bytes]:
+    """Stream members as an archive of format fmt (see FORMATS), holding about one chunk in memory."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported archive format: {fmt}")
+    mtime = time.time() if mtime is None else mtime
+    if fmt == "zip":
+        yield from _iter_zip(members, mtime)
+        return
+
+    tar = _iter_tar(members, mtime)
+    if fmt == "tar":
+        yield from tar
+        return
+
+    gz = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in tar:
+        out = gz.compress(chunk)
+        if out:
+            yield out
+    yield gz.flush()
+
+
+def iter_export(
+    store: PolicyStore,
+    refs: Iterable[Tuple[str, int]],
+    fmt: str = "tar.gz",
+) -> Iterator[bytes]:
+    """Export refs (see export_refs) as an archive, generated while it is read."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported archive format: {fmt}")
+    return iter_archive(export_members(store, refs), fmt)
@@ -0,0 +1,430 @@
+import datetime
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterator, List, Optional
+
+from ..engine.hashing import canonical_json, content_hash
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    body TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS versions (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    policy_id TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    session_id TEXT,
+    context_id TEXT,
+    created_at TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    resolver_hash TEXT,
+    metadata_hash TEXT NOT NULL,
+    linting_hash TEXT NOT NULL,
+    safety_hash TEXT NOT NULL,
+    batfish_hash TEXT NOT NULL,
+    rule_count INTEGER NOT NULL,
+    UNIQUE (policy_id, version)
+);
+CREATE INDEX IF NOT EXISTS versions_session ON versions (session_id);
+CREATE INDEX IF NOT EXISTS versions_context ON versions (context_id);
+
+CREATE TABLE IF NOT EXISTS version_rules (
+    seq INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    rule_hash TEXT NOT NULL,
+    PRIMARY KEY (seq, position)
+);
+CREATE INDEX IF NOT EXISTS version_rules_hash ON version_rules (rule_hash);
+
+CREATE TABLE IF NOT EXISTS version_configs (
+    seq INTEGER NOT NULL,
+    vendor TEXT NOT NULL,
+    config_hash TEXT NOT NULL,
+    PRIMARY KEY (seq, vendor)
+);
+
+CREATE TABLE IF NOT EXISTS config_chunks (
+    config_hash TEXT NOT NULL,
+    chunk INTEGER NOT NULL,
+    chunks INTEGER NOT NULL,
+    body TEXT NOT NULL,
+    PRIMARY KEY (config_hash, chunk)
+);
+
+CREATE TABLE IF NOT EXISTS profiles (
+    policy_id TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    collapsed TEXT NOT NULL,
+    pstats BLOB NOT NULL,
+    PRIMARY KEY (policy_id, version)
+);
+"""
+
+# Configs are stored in chunks of this many lines, so they can be paged
+# and streamed without loading a whole (possibly 100k-rule) config
+CONFIG_CHUNK_LINES = 1000
+
+WARNING_KINDS = {"linting": "linting_hash", "safety": "safety_hash", "batfish": "batfish_hash"}
+
+_META_COLUMNS = "policy_id, version, session_id, context_id, created_at, content_hash, rule_count"
+
+
+def _meta(row: sqlite3.Row) -> Dict[str, Any]:
+    return {k: row[k] for k in _META_COLUMNS.split(", ")}
+
+
+class PolicyStore:
+    """
+    Append-only history of translated policies in SQLite.
+
+    Every translation (or rollback) appends a new version of a policy id;
+    nothing is ever updated or deleted. Rules, resolver outputs and warning
+    lists are stored once in a content-addressed blob table keyed by their
+    hash, so identical rules shared across thousands of policies cost one row
+    each; configs are stored the same way, split into CONFIG_CHUNK_LINES-line
+    chunks. Versions reference blobs and configs by hash and are indexed by
+    policy id, session, context id and rule hash.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    # --- blobs -------------------------------------------------------------
+
+    def _put_blob(self, kind: str, obj: Any) -> str:
+        body = canonical_json(obj)
+        blob_hash = content_hash(obj)
+        self._conn.execute("INSERT OR IGNORE INTO blobs (hash, kind, body) VALUES (?, ?, ?)", (blob_hash, kind, body))
+        return blob_hash
+
+    def _get_blobs(self, hashes: List[str]) -> Dict[str, Any]:
+        unique = list(set(h for h in hashes if h))
+        found: Dict[str, Any] = {}
+        # Stay under SQLite's bound-parameter limit for very large rulebases
+        for i in range(0, len(unique), 500):
+            batch = unique[i:i + 500]
+            rows = self._conn.execute(
+                f"SELECT hash, body FROM blobs WHERE hash IN ({','.join('?' * len(batch))})", batch
+            )
+            found.update((row["hash"], json.loads(row["body"])) for row in rows)
+        return found
+
+    def _put_config(self, config: str) -> str:
+        config_hash = content_hash(config)
+        lines = config.split("\n")
+        bodies = ["\n".join(lines[i:i + CONFIG_CHUNK_LINES]) for i in range(0, len(lines), CONFIG_CHUNK_LINES)]
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO config_chunks (config_hash, chunk, chunks, body) VALUES (?, ?, ?, ?)",
+            [(config_hash, i, len(bodies), body) for i, body in enumerate(bodies)],
+        )
+        return config_hash
+
+    def _get_configs(self, hashes: List[str]) -> Dict[str, str]:
+        found: Dict[str, List[str]] = {}
+        unique = list(set(hashes))
+        for i in range(0, len(unique), 500):
+            batch = unique[i:i + 500]
+            rows = self._conn.execute(
+                f"SELECT config_hash, body FROM config_chunks WHERE config_hash IN ({','.join('?' * len(batch))}) "
+                "ORDER BY config_hash, chunk", batch
+            )
+            for row in rows:
+                found.setdefault(row["config_hash"], []).append(row["body"])
+        return {h: "\n".join(bodies) for h, bodies in found.items()}
+
+    # --- writes ------------------------------------------------------------
+
+    def append(
+        self,
+        policy_id: str,
+        result: Dict[str, Any],
+        session_id: Optional[str] = None,
+        context_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Append a version of policy_id holding a translate result (resolver_output,
+        ir, linting_warnings, safety_warnings, configs, batfish_warnings).
+        Returns the new version's metadata.
+        """
+        ir = result["ir"]
+        ir = ir.model_dump() if hasattr(ir, "model_dump") else ir
+        configs = result.get("configs") or {}
+
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT COALESCE(MAX(version), 0) FROM versions WHERE policy_id = ?", (policy_id,)
+            ).fetchone()
+            version = row[0] + 1
+
+            rule_hashes = [self._put_blob("rule", rule) for rule in ir["rules"]]
+            resolver = result.get("resolver_output")
+            meta = {
+                "policy_id": policy_id,
+                "version": version,
+                "session_id": session_id,
+                "context_id": context_id,
+                "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+                "content_hash": content_hash({"ir": ir, "configs": configs}),
+                "rule_count": len(rule_hashes),
+            }
+
+            cursor = self._conn.execute(
+                "INSERT INTO versions (policy_id, version, session_id, context_id, created_at, content_hash, "
+                "resolver_hash, metadata_hash, linting_hash, safety_hash, batfish_hash, rule_count) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    policy_id, version, session_id, context_id, meta["created_at"], meta["content_hash"],
+                    self._put_blob("resolver_output", resolver) if resolver is not None else None,
+                    self._put_blob("ir_metadata", ir["metadata"]),
+                    self._put_blob("linting_warnings", result.get("linting_warnings") or {}),
+                    self._put_blob("safety_warnings", result.get("safety_warnings") or []),
+                    self._put_blob("batfish_warnings", result.get("batfish_warnings") or {}),
+                    len(rule_hashes),
+                ),
+            )
+            seq = cursor.lastrowid
+
+            self._conn.executemany(
+                "INSERT INTO version_rules (seq, position, rule_hash) VALUES (?, ?, ?)",
+                [(seq, i, h) for i, h in enumerate(rule_hashes)],
+            )
+            self._conn.executemany(
+                "INSERT INTO version_configs (seq, vendor, config_hash) VALUES (?, ?, ?)",
+                [(seq, vendor, self._put_config(config)) for vendor, config in configs.items()],
+            )
+
+        return meta
+
+    def rollback(self, policy_id: str, version: int) -> Optional[Dict[str, Any]]:
+        """Append a copy of an earlier version as the newest one; None if it doesn't exist."""
+        record = self.get(policy_id, version)
+        if record is None:
+            return None
+        return self.append(policy_id, record, session_id=record["session_id"], context_id=record["context_id"])
+
+    # --- reads -------------------------------------------------------------
+
+    def _version_row(self, policy_id: str, version: Optional[int]) -> Optional[sqlite3.Row]:
+        if version is None:
+            return self._conn.execute(
+                "SELECT * FROM versions WHERE policy_id = ? ORDER BY version DESC LIMIT 1", (policy_id,)
+            ).fetchone()
+        return self._conn.execute(
+            "SELECT * FROM versions WHERE policy_id = ? AND version = ?", (policy_id, version)
+        ).fetchone()
+
+    def get(self, policy_id: str, version: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Rebuild a stored version (latest if version is None) as a translate result plus metadata."""
+        with self._lock:
+            row = self._version_row(policy_id, version)
+            if row is None:
+                return None
+
+            rule_hashes = [r[0] for r in self._conn.execute(
+                "SELECT rule_hash FROM version_rules WHERE seq = ? ORDER BY position", (row["seq"],)
+            )]
+            config_hashes = {r["vendor"]: r["config_hash"] for r in self._conn.execute(
+                "SELECT vendor, config_hash FROM version_configs WHERE seq = ?", (row["seq"],)
+            )}
+            blobs = self._get_blobs(
+                rule_hashes + [
+                    row["resolver_hash"], row["metadata_hash"], row["linting_hash"],
+                    row["safety_hash"], row["batfish_hash"],
+                ]
+            )
+            config_bodies = self._get_configs(list(config_hashes.values()))
+
+        return {
+            **_meta(row),
+            "rule_hashes": rule_hashes,
+            "resolver_output": blobs.get(row["resolver_hash"]),
+            "ir": {"rules": [blobs[h] for h in rule_hashes], "metadata": blobs[row["metadata_hash"]]},
+            "linting_warnings": blobs[row["linting_hash"]],
+            "safety_warnings": blobs[row["safety_hash"]],
+            "configs": {vendor: config_bodies[h] for vendor, h in config_hashes.items()},
+            "batfish_warnings": blobs[row["batfish_hash"]],
+        }
+
+    def rules_page(
+        self, policy_id: str, version: Optional[int], offset: int, limit: int
+    ) -> Optional[Dict[str, Any]]:
+        """Rules offset..offset+limit of a version, with the version number and total rule count."""
+        with self._lock:
+            row = self._version_row(policy_id, version)
+            if row is None:
+                return None
+            hashes = [r[0] for r in self._conn.execute(
+                "SELECT rule_hash FROM version_rules WHERE seq = ? AND position >= ? ORDER BY position LIMIT ?",
+                (row["seq"], offset, limit),
+            )]
+            blobs = self._get_blobs(hashes)
+        return {"version": row["version"], "total": row["rule_count"], "items": [blobs[h] for h in hashes]}
+
+    def warnings(self, policy_id: str, version: Optional[int], kind: str) -> Optional[Dict[str, Any]]:
+        """One kind of warnings (see WARNING_KINDS) of a version, without loading the rest of it."""
+        with self._lock:
+            row = self._version_row(policy_id, version)
+            if row is None:
+                return None
+            blob_hash = row[WARNING_KINDS[kind]]
+            return {"version": row["version"], "warnings": self._get_blobs([blob_hash])[blob_hash]}
+
+    def config_chunk(
+        self, policy_id: str, version: Optional[int], vendor: str, chunk: int
+    ) -> Optional[Dict[str, Any]]:
+        """
+        One chunk of a version's config for vendor: {version, chunk, chunks, content}.
+        None if the version or vendor doesn't exist or chunk is out of range.
+        """
+        with self._lock:
+            row = self._version_row(policy_id, version)
+            if row is None:
+                return None
+            found = self._conn.execute(
+                "SELECT c.chunks, c.body FROM version_configs v JOIN config_chunks c ON c.config_hash = v.config_hash "
+                "WHERE v.seq = ? AND v.vendor = ? AND c.chunk = ?",
+                (row["seq"], vendor, chunk),
+            ).fetchone()
+            if found is None:
+                return None
+        return {"version": row["version"], "chunk": chunk, "chunks": found["chunks"], "content": found["body"]}
+
+    def export_info(self, policy_id: str, version: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        A version's metadata, resolver output and IR metadata, and the UTF-8
+        size in bytes of each vendor's config (for writers that need sizes up
+        front); rules, configs and warnings are read separately.
+        """
+        with self._lock:
+            row = self._version_row(policy_id, version)
+            if row is None:
+                return None
+            sizes = {
+                r["vendor"]: r["size"] for r in self._conn.execute(
+                    "SELECT v.vendor, SUM(LENGTH(CAST(c.body AS BLOB))) + MAX(c.chunks) - 1 AS size "
+                    "FROM version_configs v JOIN config_chunks c ON c.config_hash = v.config_hash "
+                    "WHERE v.seq = ? GROUP BY v.vendor", (row["seq"],)
+                )
+            }
+            blobs = self._get_blobs([h for h in (row["resolver_hash"], row["metadata_hash"]) if h is not None])
+        return {
+            **_meta(row),
+            "resolver_output": blobs.get(row["resolver_hash"]),
+            "ir_metadata": blobs[row["metadata_hash"]],
+            "config_sizes": dict(sorted(sizes.items())),
+        }
+
+    def iter_config(self, policy_id: str, version: Optional[int], vendor: str) -> Optional[Iterator[str]]:
+        """
+        The text of a version's config for vendor, yielded chunk by chunk and
+        read from the database one chunk at a time. None if it doesn't exist.
+        """
+        first = self.config_chunk(policy_id, version, vendor, 0)
+        if first is None:
+            return None
+
+        def chunks() -> Iterator[str]:
+            chunk = first
+            while True:
+                last = chunk["chunk"] + 1 >= chunk["chunks"]
+                yield chunk["content"] if last else chunk["content"] + "\n"
+                if last:
+                    return
+                # Pinned to the version of the first chunk
+                chunk = self.config_chunk(policy_id, first["version"], vendor, chunk["chunk"] + 1)
+
+        return chunks()
+
+    def _select(self, where: str, params: tuple) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {_META_COLUMNS} FROM versions WHERE {where} ORDER BY seq", params
+            ).fetchall()
+        return [_meta(row) for row in rows]
+
+    def versions(self, policy_id: str) -> List[Dict[str, Any]]:
+        return self._select("policy_id = ?", (policy_id,))
+
+    def by_session(self, session_id: str) -> List[Dict[str, Any]]:
+        return self._select("session_id = ?", (session_id,))
+
+    def by_context(self, context_id: str) -> List[Dict[str, Any]]:
+        return self._select("context_id = ?", (context_id,))
+
+    def by_rule(self, rule_hash_: str) -> List[Dict[str, Any]]:
+        """Every version containing the rule with this content hash."""
+        return self._select("seq IN (SELECT seq FROM version_rules WHERE rule_hash = ?)", (rule_hash_,))
+
+    # --- profiles ----------------------------------------------------------
+
+    def put_profile(self, policy_id: str, version: int, summary: Dict[str, Any], collapsed: str, pstats: bytes) -> None:
+        """Keep the profile of the translation that produced a version (see profiling.RequestProfiler)."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO profiles (policy_id, version, created_at, summary, collapsed, pstats) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (policy_id, version, datetime.datetime.now().isoformat(timespec="seconds"),
+                 json.dumps(summary), collapsed, pstats),
+            )
+
+    def profile(self, policy_id: str, version: Optional[int] = None, part: str = "summary") -> Optional[Any]:
+        """
+        One part of a version's profile (latest profiled version if version is
+        None): "summary" as a dict with policy_id, version and created_at,
+        "collapsed" stacks as text or "pstats" as bytes. None if not profiled.
+        """
+        if part not in ("summary", "collapsed", "pstats"):
+            raise ValueError(f"Unknown profile part: {part}")
+        query = f"SELECT version, created_at, {part} FROM profiles WHERE policy_id = ?"
+        params: tuple = (policy_id,)
+        if version is not None:
+            query += " AND version = ?"
+            params += (version,)
+        with self._lock:
+            row = self._conn.execute(query + " ORDER BY version DESC LIMIT 1", params).fetchone()
+        if row is None:
+            return None
+        if part != "summary":
+            return row[part]
+        return {"policy_id": policy_id, "version": row["version"], "created_at": row["created_at"], **json.loads(row["summary"])}
+
+    def profiles(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """The most recent profiles: policy_id, version, created_at and elapsed_ms."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT policy_id, version, created_at, json_extract(summary, '$.elapsed_ms') AS elapsed_ms "
+                "FROM profiles ORDER BY created_at DESC, rowid DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def exists(self, policy_id: str) -> bool:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM versions WHERE policy_id = ? LIMIT 1", (policy_id,)
+            ).fetchone() is not None
+
+
+_store: Optional[PolicyStore] = None
+
+
+def get_policy_store() -> PolicyStore:
+    global _store
+    if _store is None:
+        from ..config import settings
+        _store = PolicyStore(os.path.join(settings.STORAGE_DIR, "policies.sqlite3"))
+    return _store
@@ -0,0 +1,124 @@
+import datetime
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from .engine.batfish.validator import BatfishManager
+from .engine.timewindows import time_windows
+from .storage.contexts import ContextStore, check_references
+
+logger = logging.getLogger(__name__)
+
+
+class WarmupState:
+    """
+    Progress of the startup warm-up, for the readiness endpoint: status is
+    "pending", "running" or "ready", with the duration and any error of
+    every step. Failed steps are recorded but don't keep a worker unready;
+    they only mean the first requests pay for that step themselves.
+    """
+
+    def __init__(self):
+        self.status = "pending"
+        self.started_at: Optional[str] = None
+        self.elapsed_ms: Optional[float] = None
+        self.steps: List[Dict[str, Any]] = []
+        self.contexts: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+    def step(self, name: str, fn: Callable[[], Optional[str]]) -> None:
+        """Run one step; fn returns None or why the step didn't complete (exceptions count too)."""
+        started = time.perf_counter()
+        try:
+            error = fn()
+        except Exception as e:
+            error = str(e)
+        entry = {"step": name, "ms": round((time.perf_counter() - started) * 1000, 1), "error": error}
+        if error is not None:
+            logger.warning(f"Warm-up step {name} failed: {error}")
+        with self._lock:
+            self.steps.append(entry)
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "status": self.status,
+                "started_at": self.started_at,
+                "elapsed_ms": self.elapsed_ms,
+                "contexts": dict(self.contexts),
+                "steps": [dict(s) for s in self.steps],
+            }
+
+
+def _load_context(state: WarmupState, store: ContextStore, path: str, batfish: bool) -> Optional[str]:
+    with open(path, "r") as f:
+        details = json.load(f)
+    name = os.path.splitext(os.path.basename(path))[0]
+    # Registration is a no-op for an unchanged definition
+    meta = store.register(name, details)
+    context_id = meta["context_id"]
+    store.index(context_id)
+    context = store.request_context(context_id)
+    _, errors = time_windows(context)
+    if batfish:
+        BatfishManager().build_header(context, cache_key=context_id)
+    with state._lock:
+        state.contexts[name] = context_id
+
+    # Content problems are the context owner's to fix, not a warm-up failure
+    for problem in check_references(details) + [f"Time window '{n}': {e}" for n, e in errors.items()]:
+        logger.warning(f"Context {name}: {problem}")
+    return None
+
+
+def warm_up(
+    state: WarmupState,
+    store: ContextStore,
+    contexts_dir: Optional[str],
+    batfish: bool = True,
+    base_snapshot: bool = False,
+) -> WarmupState:
+    """
+    Warm a worker before it takes traffic: register every context file
+    (*.json network definitions, named after the file) in contexts_dir and
+    build its index, time windows and Batfish header; open the Batfish
+    session; and optionally initialize a base snapshot from the first
+    context's header.
+    """
+    state.status = "running"
+    state.started_at = datetime.datetime.now().isoformat(timespec="seconds")
+    started = time.perf_counter()
+
+    paths = []
+    if contexts_dir and os.path.isdir(contexts_dir):
+        paths = sorted(os.path.join(contexts_dir, f) for f in os.listdir(contexts_dir) if f.endswith(".json"))
+    elif contexts_dir:
+        state.step("contexts", lambda: f"directory not found: {contexts_dir}")
+
+    for path in paths:
+        state.step(f"context:{os.path.basename(path)}", lambda path=path: _load_context(state, store, path, batfish))
+
+    if batfish:
+        manager = BatfishManager()
+        state.step("batfish_session", manager.connect)
+        if base_snapshot:
+            first = next(iter(state.contexts.values()), None)
+            state.step(
+                "batfish_base_snapshot",
+                lambda: manager.prime_snapshot(store.request_context(first) if first else None, cache_key=first),
+            )
+
+    state.elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+    state.status = "ready"
+    logger.info(f"Warm-up finished in {state.elapsed_ms:.0f} ms ({len(state.contexts)} contexts)")
+    return state
+
+
+warmup_state = WarmupState()
@@ -0,0 +1,111 @@
+import unittest
+import asyncio
+import concurrent.futures
+import os
+import sys
+
+# Add backend root to path so we can import src as a package
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.admission import BATCH, INTERACTIVE, AdmissionController, AdmissionLease, Shed
+
+
+class TestAdmissionController(unittest.TestCase):
+
+    def test_weighted_fair_order(self):
+        async def scenario():
+            controller = AdmissionController(max_concurrency=1, tenant_concurrency=1)
+            await controller.acquire("blocker", INTERACTIVE)
+
+            order = []
+
+            async def request(tenant, klass):
+                await controller.acquire(tenant, klass)
+                order.append((tenant, klass))
+                controller.release(tenant)
+
+            # A bulk job queues first, then two interactive users arrive
+            tasks = [asyncio.create_task(request("bulk", BATCH)) for _ in range(4)]
+            await asyncio.sleep(0)
+            tasks += [asyncio.create_task(request(t, INTERACTIVE)) for t in ("alice", "bob")]
+            await asyncio.sleep(0)
+            controller.release("blocker")
+            await asyncio.gather(*tasks)
+            return order, controller.metrics()
+
+        order, metrics = asyncio.run(scenario())
+        self.assertEqual(order[:2], [("alice", INTERACTIVE), ("bob", INTERACTIVE)])
+        self.assertEqual(order[2:], [("bulk", BATCH)] * 4)
+        self.assertEqual(metrics["classes"][BATCH]["admitted"], 4)
+        self.assertEqual((metrics["running"], metrics["queued"]), (0, 0))
+
+    def test_tenant_limit_lets_other_tenants_through(self):
+        async def scenario():
+            controller = AdmissionController(max_concurrency=4, tenant_concurrency=2)
+            for _ in range(2):
+                await controller.acquire("bulk", BATCH)
+            waiting = asyncio.create_task(controller.acquire("bulk", BATCH))
+            await asyncio.sleep(0)
+            # Another tenant is admitted at once although bulk is queued
+            waited = await asyncio.wait_for(controller.acquire("alice", INTERACTIVE), 1)
+            self.assertFalse(waiting.done())
+            controller.release("bulk")
+            await asyncio.wait_for(waiting, 1)
+            return waited, controller.metrics()
+
+        waited, metrics = asyncio.run(scenario())
+        self.assertLess(waited, 0.5)
+        self.assertEqual(metrics["running_by_tenant"], {"bulk": 2, "alice": 1})
+
+    def test_background_work_keeps_the_slot(self):
+        async def scenario():
+            controller = AdmissionController(max_concurrency=4, tenant_concurrency=1)
+            await controller.acquire("alice", INTERACTIVE)
+            lease = AdmissionLease(controller, "alice", asyncio.get_running_loop())
+
+            # A speculative run started by the request outlives its response
+            speculative = concurrent.futures.Future()
+            lease.hold_until(speculative)
+            lease.release()
+            waiting = asyncio.create_task(controller.acquire("alice", INTERACTIVE))
+            await asyncio.sleep(0.05)
+            self.assertFalse(waiting.done())
+
+            # Finished on a worker thread: the slot goes back through the loop
+            await asyncio.to_thread(speculative.set_result, None)
+            await asyncio.wait_for(waiting, 1)
+            return controller.metrics()
+
+        metrics = asyncio.run(scenario())
+        self.assertEqual(metrics["running_by_tenant"], {"alice": 1})
+
+    def test_shedding(self):
+        async def scenario():
+            controller = AdmissionController(
+                max_concurrency=1, tenant_concurrency=1, tenant_queue=1, max_wait={INTERACTIVE: 0.05, BATCH: 1.0},
+                weights={INTERACTIVE: 4.0, BATCH: 1.0},
+            )
+            await controller.acquire("bulk", BATCH)
+            queued = asyncio.create_task(controller.acquire("bulk", BATCH))
+            await asyncio.sleep(0)
+
+            with self.assertRaises(Shed) as over_quota:
+                await controller.acquire("bulk", BATCH)
+            with self.assertRaises(Shed) as too_slow:
+                await controller.acquire("alice", INTERACTIVE)
+
+            queued.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await queued
+            return over_quota.exception, too_slow.exception, controller.metrics()
+
+        over_quota, too_slow, metrics = asyncio.run(scenario())
+        self.assertEqual(over_quota.status_code, 429)
+        self.assertEqual(too_slow.status_code, 503)
+        self.assertGreaterEqual(too_slow.retry_after, 1)
+        self.assertEqual(metrics["classes"][INTERACTIVE]["shed"], {"503": 1})
+        self.assertEqual((metrics["running"], metrics["queued"]), (1, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,192 @@
+import unittest
+import os
+import sys
+
+import pandas as pd
+from pybatfish.datamodel import FileLines
+
+# Add backend root to path so we can import src as a package
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.engine.batfish.answers import (
+    candidate_rule_names,
+    frames_for_file,
+    init_issue_warnings,
+    profile_warnings,
+    undefined_reference_warnings,
+    unreachable_line_warnings,
+    unused_structure_warnings,
+)
+
+
+def row_by_row(frames, first_candidate_line=1, rule_names=()):
+    """The iterrows() loop the answer builders replaced, kept as the reference."""
+    warnings = []
+    for _, row in frames.get("init_issues", pd.DataFrame()).iterrows():
+        issue_type = row.get('Type', 'Unknown')
+        details = row.get('Details', '')
+        msg = f"Batfish Issue: {issue_type} - {details}"
+        if 'Line_Text' in row and row['Line_Text']:
+            msg += f" (Line: {row['Line_Text']})"
+        severity = "error" if "Error" in issue_type else "warning"
+        warnings.append({"severity": severity, "message": msg})
+
+    for _, row in frames.get("undefined_references", pd.DataFrame()).iterrows():
+        msg = f"Batfish Undefined Ref: {row.get('Struct_Type')} '{row.get('Ref_Name')}'"
+        if 'Lines' in row and row['Lines']:
+            msg += f" at lines {row['Lines']}"
+        warnings.append({"severity": "error", "message": msg})
+
+    for _, row in frames.get("unused_structures", pd.DataFrame()).iterrows():
+        if not any(l >= first_candidate_line for l in row['Source_Lines'].lines):
+            continue
+        msg = f"Batfish Unused: {row.get('Structure_Type')} '{row.get('Structure_Name')}'"
+        warnings.append({"severity": "warning", "message": msg})
+
+    for _, row in frames.get("filter_line_reachability", pd.DataFrame()).iterrows():
+        words = row['Unreachable_Line'].replace('"', ' ').split()
+        if not any(name in words for name in rule_names):
+            continue
+        msg = f"Batfish Unreachable: '{row['Unreachable_Line']}' is shadowed by {row['Blocking_Lines']}"
+        if row.get('Reason'):
+            msg += f" ({row['Reason']})"
+        warnings.append({"severity": "warning", "message": msg})
+    return warnings
+
+
+def answer_frames():
+    """Small answer frames shaped like a two-device snapshot's."""
+    return {
+        "init_issues": pd.DataFrame([
+            {"Nodes": ["fw1"], "Source_Lines": [FileLines("configs/fw1.cfg", [12])], "Type": "Parse warning",
+             "Details": "This syntax is unrecognized", "Line_Text": "set foo bar"},
+            {"Nodes": ["fw1"], "Source_Lines": [FileLines("configs/fw1.cfg", [14])], "Type": "Convert Error (redflag)",
+             "Details": "Could not convert", "Line_Text": None},
+            {"Nodes": ["fw2"], "Source_Lines": [FileLines("configs/fw2.cfg", [3])], "Type": "Parse warning",
+             "Details": "Unrecognized", "Line_Text": ""},
+        ]),
+        "undefined_references": pd.DataFrame([
+            {"File_Name": "configs/fw1.cfg", "Struct_Type": "address", "Ref_Name": "Missing_Host",
+             "Context": "security rule destination", "Lines": FileLines("configs/fw1.cfg", [15, 16])},
+            {"File_Name": "configs/fw2.cfg", "Struct_Type": "service", "Ref_Name": "Syslog",
+             "Context": "security rule service", "Lines": FileLines("configs/fw2.cfg", [7])},
+        ]),
+        "unused_structures": pd.DataFrame([
+            # Defined by the generated context header
+            {"Structure_Type": "address", "Structure_Name": "Monitoring_System",
+             "Source_Lines": FileLines("configs/fw1.cfg", [4])},
+            {"Structure_Type": "address-group", "Structure_Name": "App_Tier",
+             "Source_Lines": FileLines("configs/fw1.cfg", [9, 10])},
+            {"Structure_Type": "service", "Structure_Name": "svc-8443",
+             "Source_Lines": FileLines("configs/fw1.cfg", [11])},
+            {"Structure_Type": "address", "Structure_Name": "Redis_Cache",
+             "Source_Lines": FileLines("configs/fw2.cfg", [2])},
+        ]),
+        "filter_line_reachability": pd.DataFrame([
+            {"Sources": ["fw1: trust~untrust"], "Unreachable_Line": "allow-web-10",
+             "Blocking_Lines": ["allow-web-1"], "Reason": "BLOCKING_LINES"},
+            {"Sources": ["fw1: trust~untrust"], "Unreachable_Line": "allow-web-1",
+             "Blocking_Lines": ["deny-all"], "Reason": ""},
+            {"Sources": ["FW2: untrust~trust"], "Unreachable_Line": "ssh-admin",
+             "Blocking_Lines": ["deny-all"], "Reason": "INDEPENDENT_UNMATCHABLE"},
+        ]),
+    }
+
+
+class TestAnswerWarnings(unittest.TestCase):
+
+    def test_same_messages_as_the_row_loop(self):
+        frames = answer_frames()
+        for first_line, rule_names in ((1, ["allow-web-1", "ssh-admin"]), (10, ["allow-web-1"]), (100, [])):
+            with self.subTest(first_line=first_line, rule_names=rule_names):
+                self.assertEqual(
+                    profile_warnings(frames, first_line, rule_names),
+                    row_by_row(frames, first_line, rule_names),
+                )
+
+    def test_messages(self):
+        frames = answer_frames()
+        self.assertEqual(init_issue_warnings(frames["init_issues"]), [
+            {"severity": "warning", "message": "Batfish Issue: Parse warning - This syntax is unrecognized (Line: set foo bar)"},
+            {"severity": "error", "message": "Batfish Issue: Convert Error (redflag) - Could not convert"},
+            {"severity": "warning", "message": "Batfish Issue: Parse warning - Unrecognized"},
+        ])
+        self.assertEqual(undefined_reference_warnings(frames["undefined_references"])[0], {
+            "severity": "error",
+            "message": "Batfish Undefined Ref: address 'Missing_Host' at lines configs/fw1.cfg:[15, 16]",
+        })
+        # Only structures on or after the first candidate line; a range that ends there counts
+        self.assertEqual(unused_structure_warnings(frames["unused_structures"], 10), [
+            {"severity": "warning", "message": "Batfish Unused: address-group 'App_Tier'"},
+            {"severity": "warning", "message": "Batfish Unused: service 'svc-8443'"},
+        ])
+        # Whole rule names only: "allow-web-1" doesn't match "allow-web-10"
+        self.assertEqual(unreachable_line_warnings(frames["filter_line_reachability"], ["allow-web-1"]), [
+            {"severity": "warning", "message": "Batfish Unreachable: 'allow-web-1' is shadowed by ['deny-all']"},
+        ])
+
+    def test_missing_columns_and_empty_frames(self):
+        bare = pd.DataFrame([{"Type": "Parse warning"}])
+        self.assertEqual(init_issue_warnings(bare), [{"severity": "warning", "message": "Batfish Issue: Parse warning - "}])
+        self.assertEqual(undefined_reference_warnings(pd.DataFrame([{"Struct_Type": "address", "Ref_Name": "X"}])), [
+            {"severity": "error", "message": "Batfish Undefined Ref: address 'X'"},
+        ])
+
+        empty = {question: pd.DataFrame() for question in answer_frames()}
+        self.assertEqual(profile_warnings(empty, 1, ["allow-web-1"]), [])
+        # Rows exist but none are candidate rules or candidate lines
+        frames = answer_frames()
+        self.assertEqual(unused_structure_warnings(frames["unused_structures"], 100), [])
+        self.assertEqual(unreachable_line_warnings(frames["filter_line_reachability"], []), [])
+        self.assertEqual(unreachable_line_warnings(frames["filter_line_reachability"], ["deny-all"]), [])
+
+    def test_candidate_rule_names(self):
+        config = "\n".join([
+            "set address Redis_Cache ip-netmask 10.0.3.5/32",
+            'set rulebase security rules "allow web" from trust',
+            'set rulebase security rules "allow web" action allow',
+            "set rulebase security rules ssh-admin action deny",
+        ])
+        self.assertEqual(candidate_rule_names(config), ["allow web", "ssh-admin"])
+
+
+class TestFramesForFile(unittest.TestCase):
+
+    def test_rows_are_split_per_device(self):
+        frames = answer_frames()
+        fw1 = frames_for_file(frames, "fw1.cfg", "fw1")
+        fw2 = frames_for_file(frames, "fw2.cfg", "FW2")
+
+        self.assertEqual(list(fw1["init_issues"]["Details"]), ["This syntax is unrecognized", "Could not convert"])
+        self.assertEqual(list(fw2["init_issues"]["Details"]), ["Unrecognized"])
+        self.assertEqual(list(fw1["undefined_references"]["Ref_Name"]), ["Missing_Host"])
+        self.assertEqual(list(fw2["undefined_references"]["Ref_Name"]), ["Syslog"])
+        self.assertEqual(list(fw2["unused_structures"]["Structure_Name"]), ["Redis_Cache"])
+        # Reachability rows are matched on the node, case-insensitively
+        self.assertEqual(list(fw1["filter_line_reachability"]["Unreachable_Line"]), ["allow-web-10", "allow-web-1"])
+        self.assertEqual(list(fw2["filter_line_reachability"]["Unreachable_Line"]), ["ssh-admin"])
+
+        # Every row lands on exactly one device
+        for question, df in frames.items():
+            self.assertEqual(len(fw1[question]) + len(fw2[question]), len(df))
+
+        self.assertEqual(
+            profile_warnings(fw2, 1, ["ssh-admin"]),
+            row_by_row(fw2, 1, ["ssh-admin"]),
+        )
+
+    def test_unknown_devices_and_empty_frames(self):
+        frames = answer_frames()
+        other = frames_for_file(frames, "fw3.cfg", "fw3")
+        self.assertTrue(all(df.empty for df in other.values()))
+        self.assertEqual(profile_warnings(other, 1, ["allow-web-1"]), [])
+
+        empty = pd.DataFrame()
+        self.assertIs(frames_for_file({"init_issues": empty}, "fw1.cfg", "fw1")["init_issues"], empty)
+        # Nodes-only answers are matched on the hostname
+        nodes_only = pd.DataFrame([{"Nodes": ["FW1"], "Type": "Parse warning"}, {"Nodes": ["fw2"], "Type": "Parse warning"}])
+        self.assertEqual(len(frames_for_file({"init_issues": nodes_only}, "fw1.cfg", "fw1")["init_issues"]), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,202 @@
+import unittest
+import os
+import sys
+import threading
+import time
+import concurrent.futures
+import glob
+import re
+from types import SimpleNamespace
+
+import pandas as pd
+
+# Add backend root to path so we can import src as a package
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.engine.batfish.pool import BatfishPool, NoBackendAvailable, parse_backend
+from src.engine.batfish.validator import BatfishManager
+
+
+class FakeSession:
+    """Stands in for a pybatfish Session; calls record which backend ran them."""
+
+    def __init__(self, name, delay=0.0, error=None):
+        self.name = name
+        self.delay = delay
+        self.error = error
+
+
+def call(bf):
+    if bf.delay:
+        time.sleep(bf.delay)
+    if bf.error:
+        raise RuntimeError(bf.error)
+    return bf.name
+
+
+class TestBatfishPool(unittest.TestCase):
+
+    def pool(self, n=3, **kwargs):
+        pool = BatfishPool([f"bf{i}:9996" for i in range(n)], **kwargs)
+        for backend in pool.backends:
+            backend._session = FakeSession(backend.name)
+        return pool
+
+    def test_parse_backend(self):
+        self.assertEqual(parse_backend("bf1"), ("bf1", 9996))
+        self.assertEqual(parse_backend(" bf1:9997 "), ("bf1", 9997))
+        with self.assertRaises(ValueError):
+            BatfishPool(["bf1"], routing="random")
+
+    def test_affinity_is_stable_and_spread(self):
+        pool = self.pool()
+        owners = {f"ctx-{i}": pool.run(call, key=f"ctx-{i}") for i in range(60)}
+
+        # The same context always goes to the same backend...
+        for key, owner in owners.items():
+            self.assertEqual(pool.run(call, key=key), owner)
+        # ...contexts are spread over all of them...
+        self.assertEqual(set(owners.values()), {b.name for b in pool.backends})
+
+        # ...and adding a backend only moves contexts onto the new one
+        bigger = self.pool(4)
+        for key, owner in owners.items():
+            self.assertIn(bigger.run(call, key=key), (owner, "bf3:9996"))
+
+    def test_least_loaded_avoids_busy_backend(self):
+        pool = self.pool(2, routing="least_loaded")
+        release = threading.Event()
+        busy = threading.Thread(target=pool.run, args=(lambda bf: release.wait(5),))
+        busy.start()
+        try:
+            for _ in range(50):
+                if any(b.in_flight for b in pool.backends):
+                    break
+                time.sleep(0.01)
+            loaded = next(b.name for b in pool.backends if b.in_flight)
+            # Keys are ignored: every call avoids the busy backend
+            for i in range(5):
+                self.assertNotEqual(pool.run(call, key=f"ctx-{i}"), loaded)
+        finally:
+            release.set()
+            busy.join()
+        self.assertTrue(all(b.in_flight == 0 for b in pool.backends))
+
+    def test_failover_on_timeout_and_error(self):
+        pool = self.pool(failure_threshold=1, cooldown=60)
+        owner = pool.candidates("ctx")[0]
+        owner._session.delay = 0.5
+
+        started = time.perf_counter()
+        result = pool.run(call, key="ctx", timeout=0.1)
+        self.assertNotEqual(result, owner.name)
+        # The timed-out call isn't waited for
+        self.assertLess(time.perf_counter() - started, 0.4)
+
+        # The owner is now skipped, so the context stays on its new backend
+        self.assertFalse(owner.healthy)
+        self.assertEqual(pool.candidates("ctx")[-1], owner)
+        self.assertEqual(pool.run(call, key="ctx"), result)
+
+        # Errors fail over too; once every attempt failed the last error is raised
+        for backend in pool.backends:
+            backend._session.error = "boom"
+        with self.assertRaises(RuntimeError):
+            pool.run(call, key="ctx")
+        metrics = {m["backend"]: m for m in pool.metrics()}
+        self.assertEqual(metrics[owner.name]["failures"], 1)
+        self.assertEqual(sum(m["failures"] for m in metrics.values()), 3)
+
+    def test_timeout_raised_when_all_attempts_time_out(self):
+        pool = self.pool(2)
+        for backend in pool.backends:
+            backend._session.delay = 0.3
+        with self.assertRaises(concurrent.futures.TimeoutError):
+            pool.run(call, key="ctx", timeout=0.05)
+
+    def test_recovery_after_cooldown(self):
+        pool = self.pool(2, failure_threshold=1, cooldown=0.05)
+        owner = pool.candidates("ctx")[0]
+        owner._session.error = "down"
+        self.assertNotEqual(pool.run(call, key="ctx"), owner.name)
+        self.assertFalse(owner.healthy)
+
+        # After the cooldown the owner gets the context back once it answers
+        owner._session.error = None
+        time.sleep(0.06)
+        self.assertEqual(pool.run(call, key="ctx"), owner.name)
+        self.assertTrue(owner.healthy)
+
+    def test_no_backend_available(self):
+        pool = BatfishPool(["bf0:9996"])
+        pool.backends[0].session = lambda: None
+        with self.assertRaises(NoBackendAvailable):
+            pool.run(call)
+
+    def test_health_check_probes_backends(self):
+        pool = self.pool(2)
+        pool.backends[0].probe = lambda timeout=2.0: None
+        pool.backends[1].probe = lambda timeout=2.0: "connection refused"
+        self.assertEqual(pool.check_health(), {"bf0:9996": None, "bf1:9996": "connection refused"})
+        self.assertEqual([b.healthy for b in pool.backends], [True, False])
+        self.assertEqual(pool.run(call, key="any"), "bf0:9996")
+
+
+class SharedBatfishSession:
+    """
+    Stands in for one pybatfish Session used by many threads: init_snapshot
+    switches its current snapshot, and questions answer for the current one
+    unless told which. Every undefined reference names the snapshot's rule.
+    """
+
+    def __init__(self, callers):
+        self.snapshot = None
+        self.rules = {}
+        # Every caller has switched the snapshot before any asks a question
+        self.all_initialized = threading.Barrier(callers)
+        self.q = SimpleNamespace(
+            initIssues=lambda: self._question(lambda rule: pd.DataFrame()),
+            undefinedReferences=lambda: self._question(
+                lambda rule: pd.DataFrame([{"Struct_Type": "address", "Ref_Name": rule}])
+            ),
+        )
+
+    def init_snapshot(self, path, name, overwrite=False):
+        (config,) = glob.glob(os.path.join(path, "configs", "*.cfg"))
+        with open(config) as f:
+            self.rules[name] = re.search(r"security rules (\S+)", f.read()).group(1)
+        self.snapshot = name
+        self.all_initialized.wait(timeout=5)
+
+    def _question(self, frame):
+        def answer(snapshot=None):
+            rule = self.rules[snapshot or self.snapshot]
+            return SimpleNamespace(frame=lambda: frame(rule))
+        return SimpleNamespace(answer=answer)
+
+
+class TestSharedSession(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = BatfishManager()
+        saved = (self.manager._pool, self.manager.enabled)
+        self.addCleanup(lambda: (setattr(self.manager, "_pool", saved[0]), setattr(self.manager, "enabled", saved[1])))
+
+    def test_concurrent_validations_get_their_own_answers(self):
+        callers = 6
+        pool = BatfishPool(["bf0:9996"])
+        pool.backends[0]._session = SharedBatfishSession(callers)
+        self.manager._pool, self.manager.enabled = pool, True
+
+        def validate(i):
+            return self.manager.validate(f"set rulebase security rules rule-{i} action allow\n")
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=callers) as executor:
+            results = list(executor.map(validate, range(callers)))
+
+        for i, warnings in enumerate(results):
+            self.assertEqual(warnings, [{"severity": "error", "message": f"Batfish Undefined Ref: address 'rule-{i}'"}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import unittest
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+
+# Add backend root to path so we can import src as a package
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.cli import main
+
+TESTS_DIR = os.path.join(os.path.dirname(__file__), '../../data/tests')
+
+
+class TestCheckCommand(unittest.TestCase):
+
+    def setUp(self):
+        self.cases = []
+        for filename in sorted(os.listdir(TESTS_DIR)):
+            with open(os.path.join(TESTS_DIR, filename), 'r') as f:
+                self.cases.extend(json.load(f))
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def _run(self, *argv):
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(io.StringIO()):
+            code = main(list(argv))
+        return code, json.loads(stdout.getvalue().strip().splitlines()[-1])
+
+    def _assert_configs_match_suites(self, out_dir):
+        for case in self.cases:
+            with open(os.path.join(out_dir, case['id'], 'palo_alto.cfg'), 'r') as f:
+                config = f.read().strip()
+            # Compiled with the case's context: schedules it uses are defined first
+            if config.startswith('set schedule '):
+                schedules, config = config.split('\n\n', 1)
+                self.assertTrue(all(line.startswith('set schedule ') for line in schedules.splitlines()), case['id'])
+            self.assertEqual(config, case['expected_cli'].strip(), case['id'])
+
+        with open(os.path.join(out_dir, 'report.jsonl'), 'r') as f:
+            ids = [json.loads(line)['id'] for line in f]
+        self.assertEqual(ids, [case['id'] for case in self.cases])
+
+    def test_suites_in_process(self):
+        out_dir = os.path.join(self.tmp.name, 'inline')
+        code, summary = self._run('check', TESTS_DIR, '--out', out_dir, '--workers', '0')
+
+        self.assertEqual(code, 0)
+        self.assertEqual(summary['items'], len(self.cases))
+        self.assertEqual(summary['ok'], len(self.cases))
+        self._assert_configs_match_suites(out_dir)
+
+    def test_suites_on_process_pool(self):
+        out_dir = os.path.join(self.tmp.name, 'pool')
+        code, summary = self._run('check', TESTS_DIR, '--out', out_dir, '--workers', '2', '--chunk-size', '3')
+
+        self.assertEqual(code, 0)
+        self.assertEqual(summary['ok'], len(self.cases))
+        self._assert_configs_match_suites(out_dir)
+
+    def test_jsonl_with_invalid_and_unsafe_irs(self):
+        any_any = {
+            "id": "r1", "action": "allow", "src": ["any"], "dst": ["any"], "protocol": "any",
+            "dst_ports": [], "src_zone": "any", "dst_zone": "any", "direction": "outbound",
+            "schedule": None, "log": False, "priority": 100
+        }
+        path = os.path.join(self.tmp.name, 'irs.jsonl')
+        with open(path, 'w') as f:
+            f.write(json.dumps(self.cases[0]['expected_ir']) + '\n')
+            f.write(json.dumps({"rules": "not a list"}) + '\n')
+            f.write(json.dumps({"rules": [any_any], "metadata": {"raw_policy": "", "warnings": [], "context_used": False}}) + '\n')
+
+        code, summary = self._run('check', path, '--workers', '0')
+
+        self.assertEqual(code, 1)
+        self.assertEqual((summary['ok'], summary['invalid'], summary['unsafe']), (1, 1, 1))
+
+    def test_context_reaches_the_checks(self):
+        context = {
+            "objects": {"Web": "10.0.0.10", "Backup": "10.0.1.20"},
+            "time_windows": {"Business_Hours": "Mon-Fri 08:00-18:00"},
+        }
+        context_path = os.path.join(self.tmp.name, 'context.json')
+        with open(context_path, 'w') as f:
+            json.dump(context, f)
+
+        rule = {
+            "id": "r1", "action": "allow", "src": ["Backup"], "dst": ["Web"], "protocol": "tcp",
+            "dst_ports": [443], "src_zone": "trust", "dst_zone": "dmz", "direction": "outbound",
+            "schedule": "Business_Hours", "log": False, "priority": 100
+        }
+        metadata = {"raw_policy": "", "warnings": [], "context_used": True}
+        path = os.path.join(self.tmp.name, 'scheduled.jsonl')
+        with open(path, 'w') as f:
+            f.write(json.dumps({"rules": [rule], "metadata": metadata}) + '\n')
+            f.write(json.dumps({"rules": [dict(rule, schedule="Night_Shift")], "metadata": metadata}) + '\n')
+
+        for workers in ('0', '2'):
+            with self.subTest(workers=workers):
+                out_dir = os.path.join(self.tmp.name, f'scheduled-{workers}')
+                self._run('check', path, '--context', context_path, '--out', out_dir, '--workers', workers)
+
+                # The schedule object is defined from the context's time window
+                with open(os.path.join(out_dir, 'scheduled-1', 'palo_alto.cfg'), 'r') as f:
+                    self.assertIn('set schedule Business_Hours schedule-type recurring weekly monday 08:00-18:00', f.read())
+                # and a schedule the context doesn't define is reported
+                with open(os.path.join(out_dir, 'scheduled-2', 'report.json'), 'r') as f:
+                    self.assertIn('Night_Shift', json.dumps(json.load(f)['linting_warnings']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,167 @@
+import unittest
+import json
+import os
+import random
+import sys
+import time
+
+# Add backend root to path so we can import src as a package
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.engine.comparator import MAX_REPORTED_FLOWS, compare_ir
+from src.engine.schemas import IRBuilderOutput
+
+
+def _rule(rule_id, **overrides):
+    rule = {
+        "id": rule_id,
+        "action": "allow",
+        "src": ["HR_laptops"],
+        "dst": ["PAYROLL_SAAS"],
+        "protocol": "tcp",
+        "dst_ports": [443],
+        "src_zone": "HR",
+        "dst_zone": "External",
+        "direction": "outbound",
+        "schedule": None,
+        "log": False,
+        "priority": 100,
+    }
+    rule.update(overrides)
+    return rule
+
+
+def _ir(*rules):
+    return IRBuilderOutput.model_validate({
+        "rules": list(rules),
+        "metadata": {"raw_policy": "", "warnings": [], "context_used": True},
+    })
+
+
+def reference_flows(ir):
+    """The src x dst x port expansion compare_ir used to build, kept as the reference."""
+    return {
+        (r.action, s, d, (r.protocol or "any").lower(), p)
+        for r in ir.rules for s in r.src for d in r.dst for p in (r.dst_ports or [None])
+    }
+
+
+def reference_difference(left, right):
+    return sorted(left - right, key=lambda t: tuple(str(x) for x in t))[:MAX_REPORTED_FLOWS]
+
+
+def random_ir(rng):
+    hosts = ["any", "web", "db", "cache", "10.0.0.0/24"]
+    return _ir(*(
+        _rule(
+            f"r{n}",
+            action=rng.choice(["allow", "deny"]),
+            src=rng.sample(hosts, rng.randint(1, 3)),
+            dst=rng.sample(hosts, rng.randint(0, 3)),
+            protocol=rng.choice(["tcp", "TCP", "udp", "any"]),
+            dst_ports=rng.sample([22, 80, 443, 8080], rng.randint(0, 3)),
+        )
+        for n in range(rng.randint(0, 5))
+    ))
+
+
+class TestIRComparator(unittest.TestCase):
+
+    def test_expected_ir_equivalent_to_itself(self):
+        tests_dir = os.path.join(os.path.dirname(__file__), '../../data/tests/')
+        for filename in os.listdir(tests_dir):
+            with open(os.path.join(tests_dir, filename), 'r') as f:
+                for case in json.load(f):
+                    with self.subTest(case_id=case['id']):
+                        ir = IRBuilderOutput.model_validate(case['expected_ir'])
+                        result = compare_ir(ir, ir)
+                        self.assertTrue(result.equivalent)
+                        self.assertTrue(result.flow_equivalent)
+
+    def test_rule_order_and_ids_are_ignored(self):
+        expected = _ir(_rule("r1"), _rule("r2", dst_ports=[80]))
+        actual = _ir(_rule("a", dst_ports=[80]), _rule("b"))
+
+        result = compare_ir(expected, actual)
+        self.assertTrue(result.equivalent)
+        self.assertEqual(result.matched_rules, 2)
+
+    def test_field_mismatch_is_reported(self):
+        expected = _ir(_rule("r1"))
+        actual = _ir(_rule("r1", dst_zone="Finance", log=True))
+
+        result = compare_ir(expected, actual)
+        self.assertFalse(result.equivalent)
+        self.assertTrue(result.flow_equivalent)
+        self.assertEqual(
+            sorted(fd.field for fd in result.rule_diffs[0].fields),
+            ["dst_zone", "log"],
+        )
+
+    def test_split_rules_are_flow_equivalent(self):
+        expected = _ir(_rule("r1", dst_ports=[80, 443]))
+        actual = _ir(_rule("r1", dst_ports=[80]), _rule("r2", dst_ports=[443]))
+
+        result = compare_ir(expected, actual)
+        self.assertFalse(result.equivalent)
+        self.assertTrue(result.flow_equivalent)
+        self.assertEqual(result.extra_rules, ["r2"])
+
+    def test_missing_flows(self):
+        expected = _ir(_rule("r1", src=["HR_laptops", "Finance_servers"]))
+        actual = _ir(_rule("r1"))
+
+        result = compare_ir(expected, actual)
+        self.assertFalse(result.flow_equivalent)
+        self.assertEqual([f.src for f in result.missing_flows], ["Finance_servers"])
+        self.assertEqual(result.extra_flows, [])
+
+    def test_flows_match_the_expansion(self):
+        rng = random.Random(7)
+        for n in range(300):
+            expected = random_ir(rng)
+            # Often a reshuffle of the same flows, otherwise an unrelated IR
+            if n % 2:
+                actual = random_ir(rng)
+            else:
+                actual = _ir(*(
+                    _rule(f"a{i}", action=r.action, src=[s], dst=r.dst, protocol=r.protocol, dst_ports=r.dst_ports)
+                    for i, r in enumerate(expected.rules) for s in r.src
+                ))
+            with self.subTest(n=n):
+                result = compare_ir(expected, actual)
+                flows_e, flows_a = reference_flows(expected), reference_flows(actual)
+                self.assertEqual(result.flow_equivalent, flows_e == flows_a)
+                self.assertEqual(
+                    [(f.action, f.src, f.dst, f.protocol, f.port) for f in result.missing_flows],
+                    reference_difference(flows_e, flows_a),
+                )
+                self.assertEqual(
+                    [(f.action, f.src, f.dst, f.protocol, f.port) for f in result.extra_flows],
+                    reference_difference(flows_a, flows_e),
+                )
+
+    def test_wide_rules_are_not_expanded(self):
+        hosts = [f"10.0.{i // 250}.{i % 250}" for i in range(2000)]
+        ports = list(range(1, 2001))
+        expected = _ir(_rule("r1", src=hosts, dst=hosts, dst_ports=ports))
+        # 8e9 flows, split differently and with one port missing
+        actual = _ir(
+            _rule("a1", src=hosts[:1000], dst=hosts, dst_ports=ports),
+            _rule("a2", src=hosts[1000:], dst=hosts, dst_ports=ports[:-1]),
+        )
+
+        started = time.perf_counter()
+        result = compare_ir(expected, actual)
+        self.assertLess(time.perf_counter() - started, 5.0)
+        self.assertFalse(result.flow_equivalent)
+        self.assertEqual(len(result.missing_flows), MAX_REPORTED_FLOWS)
+        self.assertTrue(all(f.port == 2000 and f.src in hosts[1000:] for f in result.missing_flows))
+        self.assertEqual(result.extra_flows, [])
+
+        actual = _ir(_rule("a1", src=hosts[:1000], dst=hosts, dst_ports=ports), _rule("a2", src=hosts[1000:], dst=hosts, dst_ports=ports))
+        self.assertTrue(compare_ir(expected, actual).flow_equivalent)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import unittest
+import json
+import os
+import sys
+
+# Add backend root to path so we can import src as a package
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.engine.context.index import ContextIndex
+from src.engine.context.pruner import extend_for_resolver, full_context, needs_full_context, prune_context
+from src.engine.schemas import ResolverOutput
+
+PROD_DIR = os.path.join(os.path.dirname(__file__), '../../data/prod')
+
+
+def load(name):
+    with open(os.path.join(PROD_DIR, name), 'r') as f:
+        return json.load(f)
+
+
+def resolved(**fields):
+    return ResolverOutput(raw_policy="", **fields)
+
+
+class TestContextPruning(unittest.TestCase):
+
+    def setUp(self):
+        self.ecommerce = load('ecommerce-platform.json')
+        self.factory = load('smart-factory-ot.json')
+
+    def test_zone_closure(self):
+        # Objects pull in their zones, but not the other members of those zones
+        pruned = prune_context("Block the office vpn pool from the admin jumpbox", self.ecommerce)
+        self.assertEqual(pruned.selected["objects"], {"Admin_Jumpbox", "Office_VPN_Pool"})
+        self.assertEqual(pruned.selected["zones"], {"Mgmt_Tier", "VPN_Zone"})
+        self.assertEqual(set(pruned.context["objects"]), {"Admin_Jumpbox", "Office_VPN_Pool"})
+        self.assertEqual(pruned.context["zones"]["Mgmt_Tier"], ["Admin_Jumpbox", "Monitoring_System"])
+        self.assertEqual(pruned.context["services"], {})
+
+        # A zone named in the policy pulls in all of its members
+        pruned = prune_context("Allow Data_Tier to reach Monitoring_System", self.ecommerce)
+        self.assertLessEqual({"DB_Cluster_Primary", "DB_Cluster_Replica", "Monitoring_System"}, pruned.selected["objects"])
+        self.assertLessEqual({"Data_Tier", "Mgmt_Tier"}, pruned.selected["zones"])
+
+    def test_services_by_port_and_objects_by_address(self):
+        pruned = prune_context("Allow monitoring to reach 10.0.3.5 on 6379", self.ecommerce)
+        self.assertEqual(pruned.selected["services"], {"Redis"})
+        self.assertIn("Redis_Cache", pruned.selected["objects"])
+        self.assertIn("App_Tier", pruned.selected["zones"])
+
+        pruned = prune_context("Allow OT_Field_Level to reach Scada_Server on port 502", self.factory)
+        self.assertEqual(pruned.selected["services"], {"Modbus_TCP"})
+
+    def test_fuzzy_matches(self):
+        pruned = prune_context("Allow the scada servr to reach historian db via opc ua during Shift_1", self.factory)
+        self.assertEqual(pruned.selected["objects"], {"Scada_Server", "Historian_DB"})
+        self.assertEqual(pruned.selected["services"], {"OPC_UA"})
+        self.assertIn("Shift_1", pruned.selected["time_windows"])
+        self.assertTrue(pruned.contains("zones", "OT_Supervisory"))
+        self.assertFalse(pruned.contains("objects", "PLC_Controller_Line1"))
+
+        # Entities of another context don't match
+        pruned = prune_context("Allow App_Server_Private to reach DB_Cluster_Primary", self.factory)
+        self.assertNotIn("App_Server_Private", pruned.selected["objects"])
+
+    def test_request_context_shape_is_kept(self):
+        context = {"description": "shop", "details": self.ecommerce}
+        pruned = prune_context("Allow SSH from Admin_Jumpbox", context, ContextIndex(context))
+        self.assertEqual(pruned.context["description"], "shop")
+        self.assertEqual(pruned.context["details"]["services"], {"SSH": {"protocol": "tcp", "port": 22}})
+
+    def test_extend_for_resolver(self):
+        pruned = prune_context("Allow App_Server_Private to reach DB_Cluster_Primary", self.ecommerce)
+        self.assertEqual(pruned.selected["services"], set())
+
+        extended = extend_for_resolver(pruned, resolved(
+            sources=["App_Server_Private"], destinations=["Monitoring_System"], service_names=["HTTPS"],
+            ports=[6379], schedule="Maintenance_Window",
+        ))
+        self.assertLessEqual(pruned.selected["objects"] | {"Monitoring_System"}, extended.selected["objects"])
+        self.assertIn("Mgmt_Tier", extended.selected["zones"])
+        self.assertEqual(extended.selected["services"], {"HTTPS", "Redis"})
+        self.assertEqual(extended.context["time_windows"], {"Maintenance_Window": "Sun 02:00-06:00"})
+        self.assertIs(extended.source, pruned.source)
+
+    def test_needs_full_context(self):
+        pruned = prune_context("Allow App_Server_Private to reach DB_Cluster_Primary over Postgres", self.ecommerce)
+        cases = [
+            (resolved(sources=["App_Server_Private"], destinations=["DB_Cluster_Primary"]), False),
+            # Referenced but pruned away
+            (resolved(sources=["App_Server_Private"], destinations=["Admin_Jumpbox"]), True),
+            (resolved(sources=["App_Server_Private"], schedule="Maintenance_Window"), True),
+            # Entity-level ambiguities, as opposed to routine notes
+            (resolved(sources=["App_Server_Private"], ambiguities=["Destination 'billing api' not found in context"]), True),
+            (resolved(sources=["App_Server_Private"], ambiguities=["Unclear which database replica is meant"]), True),
+            (resolved(sources=["App_Server_Private"], ambiguities=["No schedule given"]), False),
+            # A note naming an entity outside the slice
+            (resolved(sources=["App_Server_Private"], ambiguities=["Might mean the Office_VPN_Pool"]), True),
+        ]
+        for output, expected in cases:
+            with self.subTest(output=output):
+                self.assertEqual(needs_full_context(pruned, output), expected)
+
+    def test_full_context_fallback(self):
+        pruned = prune_context("Allow App_Server_Private to reach DB_Cluster_Primary", self.ecommerce)
+        full = full_context(pruned)
+
+        self.assertTrue(full.full)
+        self.assertIs(full.context, self.ecommerce)
+        self.assertTrue(full.contains("objects", "Office_VPN_Pool"))
+        self.assertEqual(full.selected, pruned.selected)
+        # Nothing left to widen or retry
+        self.assertIs(extend_for_resolver(full, resolved(destinations=["Admin_Jumpbox"])), full)
+        self.assertFalse(needs_full_context(full, resolved(ambiguities=["Destination not found in context"])))
+
+
+if __name__ == '__main__':
+    unittest.main()
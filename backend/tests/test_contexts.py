@@ -0,0 +1,174 @@
+import unittest
+import json
+import os
+import sys
+import tempfile
+from unittest import mock
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+# Add backend root to path so we can import src as a package
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+from src.schemas import PolicySummaryRequest, RequestContext
+from src.storage.contexts import ContextStore
+
+CONTEXT_FILE = os.path.join(os.path.dirname(__file__), '../../data/prod/ecommerce-platform.json')
+
+
+class TestRequestContext(unittest.TestCase):
+
+    def test_exactly_one_of_details_or_context_id(self):
+        self.assertEqual(RequestContext(details={}).details, {})
+        self.assertEqual(RequestContext(context_id="abc", description="shop").context_id, "abc")
+        for fields in ({}, {"description": "shop"}, {"details": {"objects": {}}, "context_id": "abc"}):
+            with self.subTest(fields=fields):
+                with self.assertRaises(ValidationError):
+                    RequestContext(**fields)
+        with self.assertRaises(ValidationError):
+            PolicySummaryRequest(message="Allow web", context={"description": "shop"})
+
+
+class TestContextStore(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = tmp.name
+        with open(CONTEXT_FILE, 'r') as f:
+            self.details = json.load(f)
+
+    def test_unchanged_definitions_are_deduplicated(self):
+        store = ContextStore(self.root)
+        first = store.register("shop", self.details, description="e-commerce")
+        # Same content in another key order: same id, no new version
+        reordered = dict(reversed(list(self.details.items())))
+        again = store.register("shop", reordered, description="ignored")
+
+        self.assertEqual(again, first)
+        self.assertEqual(first["version"], 1)
+        self.assertEqual(first["counts"], {"objects": 9, "zones": 6, "services": 6, "time_windows": 1})
+        self.assertEqual(len(store.versions("shop")), 1)
+        self.assertEqual(len([f for f in os.listdir(self.root) if f != "index.json"]), 1)
+
+    def test_changes_bump_the_version(self):
+        store = ContextStore(self.root)
+        first = store.register("shop", self.details)
+        changed = json.loads(json.dumps(self.details))
+        changed["objects"]["Payments_API"] = "10.0.4.10"
+        second = store.register("shop", changed)
+
+        self.assertNotEqual(second["context_id"], first["context_id"])
+        self.assertEqual(second["version"], 2)
+        self.assertEqual(store.list(), [second])
+        self.assertEqual([v["version"] for v in store.versions("shop")], [1, 2])
+        # Older versions stay readable
+        self.assertNotIn("Payments_API", store.get(first["context_id"])["objects"])
+        self.assertIn("Payments_API", store.get(second["context_id"])["objects"])
+
+        # A new name starts at version 1 even for known content
+        self.assertEqual(store.register("shop-copy", changed)["version"], 1)
+
+    def test_persisted_through_the_index(self):
+        store = ContextStore(self.root)
+        meta = store.register("shop", self.details, description="e-commerce")
+
+        reopened = ContextStore(self.root)
+        self.assertEqual(reopened.versions("shop"), [meta])
+        self.assertEqual(reopened.metadata(meta["context_id"]), meta)
+        self.assertEqual(reopened.get(meta["context_id"]), self.details)
+        self.assertIn("Redis_Cache", reopened.index(meta["context_id"]).names["objects"])
+        self.assertEqual(reopened.request_context(meta["context_id"]), {
+            "description": "e-commerce", "details": self.details, "context_id": meta["context_id"],
+        })
+        self.assertIsNone(reopened.get("0" * 16))
+        self.assertIsNone(reopened.request_context("0" * 16))
+
+    def test_ids_outside_the_store_are_rejected(self):
+        store = ContextStore(os.path.join(self.root, "contexts"))
+        meta = store.register("shop", self.details)
+        with open(os.path.join(self.root, "secret.json"), "w") as f:
+            json.dump({"objects": {"Secret": "10.9.9.9"}}, f)
+        # A hash-named file the index doesn't know
+        with open(os.path.join(store.root, "0123456789abcdef.json"), "w") as f:
+            json.dump({"objects": {}}, f)
+
+        for context_id in ("../secret", "index", "0123456789abcdef", meta["context_id"].upper(), meta["context_id"] + "/"):
+            with self.subTest(context_id=context_id):
+                self.assertIsNone(store.get(context_id))
+                self.assertIsNone(store.request_context(context_id))
+                self.assertIsNone(ContextStore(store.root).get(context_id))
+        self.assertEqual(ContextStore(store.root).get(meta["context_id"]), self.details)
+
+
+class TestContextsRouter(unittest.TestCase):
+
+    def setUp(self):
+        from src.routers import contexts
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = tmp.name
+        patcher = mock.patch.object(contexts, "get_context_store", return_value=ContextStore(os.path.join(tmp.name, "contexts")))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        app = FastAPI()
+        app.include_router(contexts.router)
+        self.client = TestClient(app)
+        with open(CONTEXT_FILE, 'r') as f:
+            self.details = json.load(f)
+
+    def test_register_list_and_get(self):
+        response = self.client.post("/contexts", json={"name": "shop", "description": "e-commerce", "details": self.details})
+        self.assertEqual(response.status_code, 200)
+        info = response.json()
+        self.assertEqual((info["name"], info["version"], info["warnings"]), ("shop", 1, []))
+
+        # Referential problems are reported, not rejected
+        broken = json.loads(json.dumps(self.details))
+        broken["zones"]["Data_Tier"].append("Missing_Host")
+        broken["services"]["Syslog"] = {"protocol": "udp"}
+        info2 = self.client.post("/contexts", json={"name": "shop", "details": broken}).json()
+        self.assertEqual(info2["version"], 2)
+        self.assertEqual(info2["warnings"], [
+            "Zone 'Data_Tier' references undefined object 'Missing_Host'.",
+            "Service 'Syslog' has no port.",
+        ])
+
+        self.assertEqual([c["version"] for c in self.client.get("/contexts").json()], [2])
+        self.assertEqual([c["version"] for c in self.client.get("/contexts", params={"name": "shop"}).json()], [1, 2])
+        self.assertEqual(self.client.get("/contexts", params={"name": "other"}).json(), [])
+
+        detail = self.client.get(f"/contexts/{info['context_id']}").json()
+        self.assertEqual(detail["details"]["objects"], self.details["objects"])
+        self.assertEqual(self.client.get("/contexts/unknown").status_code, 404)
+
+    def test_confirm_with_an_unknown_context_id(self):
+        from src.routers import policies
+
+        app = FastAPI()
+        app.include_router(policies.router)
+        with open(os.path.join(self.root, "secret.json"), "w") as f:
+            json.dump({"objects": {"Secret": "10.9.9.9"}}, f)
+
+        with mock.patch.object(policies, "get_context_store", return_value=ContextStore(os.path.join(self.root, "contexts"))), \
+                mock.patch.object(policies, "summarize_intent") as summarize:
+            for context_id in ("../secret", "index"):
+                with self.subTest(context_id=context_id):
+                    response = TestClient(app).post("/policies/confirm", json={
+                        "message": "Allow web to reach db", "context": {"context_id": context_id},
+                    })
+                    self.assertEqual(response.status_code, 404)
+            summarize.assert_not_called()
+
+    def test_invalid_definitions_are_rejected(self):
+        response = self.client.post("/contexts", json={"name": "shop", "details": {"zones": {"Data_Tier": "not a list"}}})
+        self.assertEqual(response.status_code, 422)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,197 @@
+import unittest
+import copy
+import json
+import os
+import sys
+import tempfile
+from types import SimpleNamespace
+from unittest import mock
+
+import httpx
+from openai import RateLimitError
+
+# Add backend root to path so we can import src as a package
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.engine.evaluation.report import build_report, format_report, score_record
+from src.engine.evaluation.results import ResultStore, prompt_hash, result_key
+from src.engine.evaluation.runner import run_live_evaluation
+from src.engine.schemas import IRBuilderOutput, ResolverOutput
+
+TESTS_FILE = os.path.join(os.path.dirname(__file__), '../../data/tests/simple_tests.json')
+
+
+def record(case, model, ir=None, cli=None, total_ms=100.0, status="ok"):
+    p_hash = prompt_hash(case["nl_query"], {})
+    out = {"key": result_key(case["id"], model, p_hash), "case_id": case["id"], "model": model, "prompt_hash": p_hash}
+    if status != "ok":
+        out.update(status="error", error="RateLimitError: slow down")
+        return out
+    out.update(
+        status="ok",
+        ir=ir if ir is not None else case["expected_ir"],
+        cli=cli if cli is not None else case["expected_cli"],
+        latency_ms={"total": total_ms},
+    )
+    return out
+
+
+def with_port(case, port):
+    ir = copy.deepcopy(case["expected_ir"])
+    ir["rules"][0]["dst_ports"] = [port]
+    return ir
+
+
+class TestResultStore(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "runs", "results.jsonl")
+        with open(TESTS_FILE, 'r') as f:
+            self.cases = json.load(f)
+
+    def test_resume_skips_a_truncated_last_line(self):
+        store = ResultStore(self.path)
+        first, second = record(self.cases[0], "gpt-4o"), record(self.cases[1], "gpt-4o")
+        store.put(first)
+        store.put(second)
+        # A run killed mid-write
+        with open(self.path, "a") as f:
+            f.write(json.dumps(record(self.cases[2], "gpt-4o"))[:40])
+
+        resumed = ResultStore(self.path)
+        self.assertEqual(resumed.get(first["key"]), first)
+        self.assertEqual(resumed.get(second["key"]), second)
+        self.assertEqual(len(list(resumed.records())), 2)
+
+        # Appending after the truncated line doesn't glue onto it
+        third = record(self.cases[2], "gpt-4o")
+        resumed.put(third)
+        reopened = ResultStore(self.path)
+        self.assertEqual(reopened.get(third["key"]), third)
+        self.assertEqual(len(list(reopened.records())), 3)
+
+    def test_last_write_wins_per_key(self):
+        store = ResultStore(self.path)
+        failed = record(self.cases[0], "gpt-4o", status="error")
+        store.put(failed)
+        store.put(record(self.cases[0], "gpt-4o-mini"))
+        retried = record(self.cases[0], "gpt-4o", total_ms=250.0)
+        store.put(retried)
+
+        resumed = ResultStore(self.path)
+        self.assertEqual(resumed.get(failed["key"]), retried)
+        self.assertEqual(sorted(r["model"] for r in resumed.records()), ["gpt-4o", "gpt-4o-mini"])
+        with open(self.path, 'r') as f:
+            self.assertEqual(len(f.readlines()), 3)
+
+    def test_key_changes_with_the_prompt(self):
+        case = self.cases[0]
+        base = prompt_hash(case["nl_query"], {"objects": {"a": "10.0.0.1"}}, "pruned")
+        self.assertEqual(base, prompt_hash(case["nl_query"], {"objects": {"a": "10.0.0.1"}}, "pruned"))
+        for other in (
+            prompt_hash(case["nl_query"] + ".", {"objects": {"a": "10.0.0.1"}}, "pruned"),
+            prompt_hash(case["nl_query"], {"objects": {"a": "10.0.0.2"}}, "pruned"),
+            prompt_hash(case["nl_query"], {"objects": {"a": "10.0.0.1"}}, "full"),
+        ):
+            self.assertNotEqual(other, base)
+        self.assertNotEqual(result_key(case["id"], "gpt-4o", base), result_key(case["id"], "gpt-4o", other))
+
+
+class TestReport(unittest.TestCase):
+
+    def setUp(self):
+        with open(TESTS_FILE, 'r') as f:
+            self.cases = json.load(f)
+        self.case = self.cases[0]
+
+    def test_score_record(self):
+        exact = score_record(record(self.case, "gpt-4o"), self.case)
+        self.assertEqual(
+            (exact["status"], exact["ir_equivalent"], exact["flow_equivalent"], exact["rule_count_match"], exact["cli_match"]),
+            ("ok", True, True, True, True),
+        )
+        self.assertTrue(all(correct == total for correct, total in exact["fields"].values()))
+
+        wrong_port = score_record(record(self.case, "gpt-4o", ir=with_port(self.case, 8443), cli="wrong"), self.case)
+        self.assertFalse(wrong_port["ir_equivalent"])
+        self.assertFalse(wrong_port["cli_match"])
+        self.assertTrue(wrong_port["rule_count_match"])
+        self.assertEqual(wrong_port["fields"]["dst_ports"], (0, 1))
+        self.assertEqual(wrong_port["fields"]["action"], (1, 1))
+
+        self.assertEqual(
+            score_record(record(self.case, "gpt-4o", status="error"), self.case),
+            {"status": "error", "error": "RateLimitError: slow down"},
+        )
+
+    def test_build_report(self):
+        a, b = self.cases[0], self.cases[1]
+        records = [
+            record(a, "gpt-4o", total_ms=100.0),
+            record(b, "gpt-4o", ir=with_port(b, 8443), cli="wrong", total_ms=300.0),
+            record(a, "gpt-4o-mini", status="error"),
+            record(b, "gpt-4o-mini", total_ms=50.0),
+            # Cases no longer in the suite are ignored
+            dict(record(a, "gpt-4o"), case_id="removed_case"),
+        ]
+        report = build_report(records, {c["id"]: c for c in self.cases})
+
+        full = report["gpt-4o"]
+        self.assertEqual(
+            (full["total"], full["errors"], full["cli_pass"], full["ir_equivalent"], full["rule_count_match"]),
+            (2, 0, 1, 1, 2),
+        )
+        self.assertEqual(full["failed"], [b["id"]])
+        self.assertEqual(full["field_accuracy"]["dst_ports"], 50.0)
+        self.assertEqual(full["field_accuracy"]["action"], 100.0)
+        self.assertEqual(full["latency_ms"], {"mean": 200.0, "p50": 100.0, "p95": 300.0, "max": 300.0})
+
+        mini = report["gpt-4o-mini"]
+        self.assertEqual((mini["total"], mini["errors"], mini["cli_pass"]), (2, 1, 1))
+        self.assertEqual(mini["failed"], [a["id"]])
+        self.assertEqual(mini["latency_ms"]["mean"], 50.0)
+
+        text = format_report(report)
+        self.assertIn("MODEL: gpt-4o-mini", text)
+        self.assertIn("CLI exact match:  1 (50.0%)", text)
+        self.assertIn(f"- {b['id']}", text)
+
+
+class TestLiveEvaluation(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "results.jsonl")
+        with open(TESTS_FILE, 'r') as f:
+            self.case = json.load(f)[0]
+
+    def run_case(self, outcome):
+        with mock.patch("src.engine.evaluation.runner.resolve_and_build", side_effect=outcome) as call:
+            records = run_live_evaluation([self.case], lambda name: {}, self.path, ["gpt-4o-mini"])
+        return records[0], call.call_count
+
+    def test_failures_are_not_retried_on_top_of_the_scheduler(self):
+        # The scheduler has already retried by the time an error gets here
+        upstream = httpx.Response(429, request=httpx.Request("POST", "https://api.openai.com/v1/responses"))
+        record, calls = self.run_case(RateLimitError("Rate limit reached", response=upstream, body=None))
+        self.assertEqual(calls, 1)
+        self.assertEqual(record["status"], "error")
+        self.assertEqual(record["error"], "RateLimitError: Rate limit reached")
+
+        # The next run retries the case, and keeps its result
+        built = (
+            ResolverOutput(raw_policy=self.case["nl_query"]),
+            IRBuilderOutput.model_validate(self.case["expected_ir"]),
+            SimpleNamespace(full=False),
+        )
+        record, calls = self.run_case([built])
+        self.assertEqual((calls, record["status"], record["cli"]), (1, "ok", self.case["expected_cli"]))
+        self.assertEqual(self.run_case(AssertionError("not called"))[1], 0)
+        self.assertEqual(ResultStore(self.path).get(record["key"])["status"], "ok")
+
+
+if __name__ == '__main__':
+    unittest.main()
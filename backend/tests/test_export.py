@@ -0,0 +1,85 @@
+import unittest
+import contextlib
+import io
+import json
+import os
+import sys
+import tarfile
+import tempfile
+import zipfile
+
+# Add backend root to path so we can import src as a package
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.cli import main
+from src.engine.pipeline import check_and_compile
+from src.engine.schemas import IRBuilderOutput
+from src.storage.export import export_refs, iter_export
+from src.storage.policies import CONFIG_CHUNK_LINES, PolicyStore
+
+TESTS_FILE = os.path.join(os.path.dirname(__file__), '../../data/tests/simple_tests.json')
+
+
+class TestExport(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+        self.db = os.path.join(tmp.name, 'policies.sqlite3')
+        self.store = PolicyStore(self.db)
+        self.addCleanup(self.store._conn.close)
+
+        with open(TESTS_FILE, 'r') as f:
+            cases = json.load(f)
+        self.results = {}
+        for n, case in enumerate(cases[:3]):
+            ir = IRBuilderOutput.model_validate(case['expected_ir'])
+            _, checked = check_and_compile(ir)
+            result = {"ir": ir, "batfish_warnings": {"palo_alto": []}, **checked}
+            if n == 0:
+                # Large enough to span several stored chunks
+                result["configs"] = {"palo_alto": "\n".join(f"línea {i}" for i in range(3 * CONFIG_CHUNK_LINES))}
+            self.store.append(f"p{n}", result, context_id="c1" if n else None)
+            self.results[f"p{n}"] = result
+
+    def _check_members(self, names, read):
+        self.assertIn("manifest.json", names)
+        manifest = json.loads(read("manifest.json"))
+        self.assertEqual([v["policy_id"] for v in manifest["versions"]], ["p0", "p1", "p2"])
+        for policy_id, result in self.results.items():
+            prefix = f"{policy_id}/v1"
+            self.assertEqual(read(f"{prefix}/configs/palo_alto.cfg").decode("utf-8"), result["configs"]["palo_alto"])
+            self.assertEqual(json.loads(read(f"{prefix}/ir.json")), result["ir"].model_dump())
+            self.assertEqual(json.loads(read(f"{prefix}/report.json"))["linting_warnings"], result["linting_warnings"])
+
+    def test_refs(self):
+        refs, unknown = export_refs(self.store, ["p0", "nope"], context_id="c1")
+        self.assertEqual(refs, [("p0", 1), ("p1", 1), ("p2", 1)])
+        self.assertEqual(unknown, ["nope"])
+
+    def test_tar_and_zip(self):
+        refs, _ = export_refs(self.store, ["p0"], context_id="c1")
+        for fmt in ("tar", "tar.gz"):
+            with self.subTest(fmt=fmt):
+                data = b"".join(iter_export(self.store, refs, fmt))
+                with tarfile.open(fileobj=io.BytesIO(data), mode="r:*") as tar:
+                    self._check_members(tar.getnames(), lambda name: tar.extractfile(name).read())
+
+        data = b"".join(iter_export(self.store, refs, "zip"))
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            self.assertIsNone(zf.testzip())
+            self._check_members(zf.namelist(), zf.read)
+
+    def test_cli(self):
+        out = os.path.join(self.tmp, 'export.zip')
+        with contextlib.redirect_stderr(io.StringIO()):
+            code = main(["export", "--db", self.db, "--policy", "p0", "--context-id", "c1", "-o", out])
+            missing = main(["export", "--db", self.db, "--policy", "nope", "-o", out])
+        self.assertEqual((code, missing), (0, 1))
+        with zipfile.ZipFile(out) as zf:
+            self._check_members(zf.namelist(), zf.read)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+import json
+import os
+import random
+import sys
+
+# Add backend root to path so we can import src as a package
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.engine.linter.runner import lint_ir_all
+from src.engine.rulecache import RuleCheckCache
+from src.engine.safety.runner import verify_safety
+from src.engine.schemas import IRBuilderOutput, IRRule
+
+TESTS_DIR = os.path.join(os.path.dirname(__file__), '../../data/tests')
+
+METADATA = {"raw_policy": "", "warnings": [], "context_used": True}
+ZONES = [("Trust", "Untrust"), ("Trust", "DMZ"), ("DMZ", "Untrust")]
+
+
+def make_rule(rng, n, **overrides):
+    src_zone, dst_zone = rng.choice(ZONES)
+    fields = {
+        "id": f"r{n}",
+        "action": rng.choice(["allow", "deny"]),
+        "src": rng.choice([["any"], [f"o{n % 7}"], [f"o{n % 7}", f"o{(n + 1) % 7}"]]),
+        "dst": rng.choice([["any"], [f"d{n % 5}"]]),
+        "protocol": rng.choice(["tcp", "udp", "any"]),
+        "dst_ports": rng.choice([[], [80], [80, 443], [1000 + n % 4]]),
+        "src_zone": src_zone,
+        "dst_zone": dst_zone,
+        "direction": "outbound",
+        "schedule": None,
+        "log": False,
+        "priority": 100,
+    }
+    fields.update(overrides)
+    return IRRule(**fields)
+
+
+def make_ir(rules):
+    return IRBuilderOutput(rules=rules, metadata=METADATA)
+
+
+class TestIncrementalChecks(unittest.TestCase):
+
+    def test_shadowed_rule_is_reported(self):
+        rng = random.Random(0)
+        broad = make_rule(rng, 1, src=["any"], dst=["any"], protocol="any", dst_ports=[], action="deny",
+                          src_zone="Trust", dst_zone="Untrust")
+        narrow = make_rule(rng, 2, src=["o1"], dst=["d1"], protocol="tcp", dst_ports=[443], action="allow",
+                           src_zone="Trust", dst_zone="Untrust")
+
+        _, warnings = lint_ir_all(make_ir([broad, narrow]))
+        self.assertIn("Rule r2: shadowed by earlier rule r1 with a different action; it will never match.",
+                      warnings["palo_alto"])
+
+        _, warnings = lint_ir_all(make_ir([narrow, broad]))
+        self.assertFalse(any("shadowed" in w for w in warnings["palo_alto"]))
+
+    def test_cached_results_match_full_check_across_edits(self):
+        rng = random.Random(42)
+        rules = [make_rule(rng, n) for n in range(300)]
+        cache = RuleCheckCache()
+
+        for step in range(60):
+            ir = make_ir(rules)
+            with self.subTest(step=step):
+                self.assertEqual(lint_ir_all(ir, cache=cache), lint_ir_all(ir))
+                self.assertEqual(verify_safety(ir, cache=cache), verify_safety(ir))
+
+            rules = list(rules)
+            op = rng.choice(["replace", "insert", "delete", "append", "duplicate_id"])
+            k = rng.randrange(len(rules))
+            if op == "replace":
+                rules[k] = make_rule(rng, 1000 + step)
+            elif op == "insert":
+                rules.insert(k, make_rule(rng, 1000 + step))
+            elif op == "delete":
+                del rules[k]
+            elif op == "append":
+                rules.append(make_rule(rng, 1000 + step))
+            else:
+                rules[k] = make_rule(rng, 1000 + step, id=rules[0].id)
+
+    def test_suites_unchanged_by_cache(self):
+        cache = RuleCheckCache()
+        for filename in sorted(os.listdir(TESTS_DIR)):
+            with open(os.path.join(TESTS_DIR, filename), 'r') as f:
+                cases = json.load(f)
+            for case in cases:
+                ir = IRBuilderOutput.model_validate(case['expected_ir'])
+                with self.subTest(case_id=case['id']):
+                    self.assertEqual(lint_ir_all(ir, cache=cache), lint_ir_all(ir))
+                    self.assertEqual(verify_safety(ir, cache=cache), verify_safety(ir))
+
+
+if __name__ == '__main__':
+    unittest.main()
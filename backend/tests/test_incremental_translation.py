@@ -0,0 +1,101 @@
+import unittest
+import copy
+import json
+import os
+import sys
+from unittest import mock
+
+# Add backend root to path so we can import src as a package
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.engine import incremental
+from src.engine.incremental import changed_entities, retranslate, text_edits
+from src.engine.pipeline import check_and_compile
+from src.engine.schemas import CombinedOutput, IRBuilderOutput, ResolverOutput
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '../../data')
+
+
+class TestIncrementalTranslation(unittest.TestCase):
+
+    def setUp(self):
+        with open(os.path.join(DATA_DIR, 'tests/simple_tests.json'), 'r') as f:
+            self.case = json.load(f)[0]
+        with open(os.path.join(DATA_DIR, 'samples', self.case['context_file']), 'r') as f:
+            self.context = json.load(f)
+
+        ir = IRBuilderOutput.model_validate(self.case['expected_ir'])
+        resolved = ResolverOutput(action="allow", sources=["Internal_Net"], destinations=["Internet"],
+                                  protocols=["tcp"], ports=[80], service_names=["HTTP"],
+                                  raw_policy=self.case['nl_query'])
+        _, checked = check_and_compile(ir, context=self.context)
+        self.previous = {
+            "nl_policy": self.case['nl_query'],
+            "context": self.context,
+            "profile": "fast",
+            "result": {"resolver_output": resolved, "ir": ir, **checked,
+                       "batfish_warnings": {"palo_alto": [{"severity": "warning", "message": "earlier"}]}},
+        }
+
+        patcher = mock.patch.object(incremental, 'validate_configs',
+                                    side_effect=lambda configs, *a, **k: {v: [] for v in configs})
+        self.validate = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _patched_output(self, port):
+        result = self.previous["result"]
+        ir = copy.deepcopy(self.case['expected_ir'])
+        ir['rules'][0]['dst_ports'] = [port]
+        return CombinedOutput(resolver=result["resolver_output"].model_copy(update={"ports": [port]}),
+                              ir=IRBuilderOutput.model_validate(ir))
+
+    def test_diffs(self):
+        self.assertEqual(text_edits("Allow A to B on HTTP", "Allow  A to B on HTTPS"),
+                         [{"removed": "HTTP", "added": "HTTPS"}])
+        changed = dict(self.context, objects=dict(self.context["objects"], Gateway="192.168.1.254/32"))
+        self.assertEqual(changed_entities(self.context, changed), {("objects", "Gateway")})
+
+    def test_unchanged_inputs_reuse_everything(self):
+        with mock.patch.object(incremental.agents, 'patch_translation') as patch:
+            result, stats = retranslate(self.previous, self.case['nl_query'] + " ", self.context, batfish_profile="fast")
+
+        patch.assert_not_called()
+        self.validate.assert_not_called()
+        self.assertIs(result, self.previous["result"])
+        self.assertEqual(stats["mode"], "reused")
+
+    def test_unrelated_context_change_skips_the_llm(self):
+        context = dict(self.context, objects=dict(self.context["objects"], Printer="10.9.9.9/32"))
+        with mock.patch.object(incremental.agents, 'patch_translation') as patch:
+            result, stats = retranslate(self.previous, self.case['nl_query'], context, batfish_profile="fast")
+
+        patch.assert_not_called()
+        self.assertEqual((stats["mode"], stats["changed_rules"]), ("recompiled", 0))
+        self.assertIs(result["ir"], self.previous["result"]["ir"])
+        # The device header lists every object, so Batfish runs again
+        self.assertEqual(stats["revalidated"], ["palo_alto"])
+
+    def test_text_edit_is_patched(self):
+        edited = self.case['nl_query'].replace("HTTP", "HTTPS")
+        with mock.patch.object(incremental.agents, 'patch_translation', return_value=self._patched_output(443)) as patch:
+            result, stats = retranslate(self.previous, edited, self.context, batfish_profile="fast")
+
+        patch.assert_called_once()
+        self.assertEqual(patch.call_args.args[2], [{"removed": "HTTP", "added": "HTTPS"}])
+        self.assertEqual((stats["mode"], stats["changed_rules"]), ("patched", 1))
+        self.assertEqual(result["ir"].rules[0].dst_ports, [443])
+        self.assertNotEqual(result["configs"], self.previous["result"]["configs"])
+        self.assertEqual(result["batfish_warnings"], {"palo_alto": []})
+
+    def test_unchanged_config_keeps_batfish_warnings(self):
+        # An edit that the model decides changes nothing keeps the earlier Batfish answers
+        with mock.patch.object(incremental.agents, 'patch_translation', return_value=self._patched_output(80)):
+            result, stats = retranslate(self.previous, "Permit Internal_Net to access Internet on HTTP",
+                                        self.context, batfish_profile="fast")
+
+        self.assertEqual((stats["mode"], stats["changed_rules"], stats["revalidated"]), ("patched", 0, []))
+        self.assertEqual(result["batfish_warnings"], self.previous["result"]["batfish_warnings"])
+
+
+if __name__ == '__main__':
+    unittest.main()
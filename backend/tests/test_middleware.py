@@ -0,0 +1,265 @@
+import unittest
+import asyncio
+import base64
+import copy
+import gzip
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+import zlib
+from unittest import mock
+
+from fastapi import FastAPI, Response
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+# Add backend root to path so we can import src as a package
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+from src.engine.pipeline import check_and_compile
+from src.engine.ruletable import RuleTable
+from src.engine.schemas import IRBuilderOutput
+from src.middleware import CompressionMiddleware, negotiate_encoding
+from src.responses import ORJSONResponse
+from src.storage.policies import CONFIG_CHUNK_LINES, PolicyStore
+
+TESTS_FILE = os.path.join(os.path.dirname(__file__), '../../data/tests/simple_tests.json')
+
+BODY = b"permit tcp any any eq 443\n" * 200
+CHUNKS = [b"set rulebase security rules r%d action allow\n" % n * 50 for n in range(4)]
+
+
+def compression_app():
+    app = FastAPI()
+
+    @app.get("/config")
+    def config():
+        return Response(BODY, media_type="text/plain")
+
+    @app.get("/small")
+    def small():
+        return Response(b"ok", media_type="text/plain")
+
+    @app.get("/archive")
+    def archive():
+        return Response(gzip.compress(BODY), media_type="application/gzip")
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(iter(CHUNKS), media_type="text/plain")
+
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+    return app
+
+
+def http_scope(path, accept_encoding):
+    return {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"test"), (b"accept-encoding", accept_encoding.encode())],
+        "client": ("127.0.0.1", 1234), "server": ("test", 80),
+    }
+
+
+class TestEncodingNegotiation(unittest.TestCase):
+
+    def test_encoding_negotiation(self):
+        self.assertEqual(negotiate_encoding("gzip, deflate, br", ("zstd", "gzip")), "gzip")
+        self.assertEqual(negotiate_encoding("gzip, zstd", ("zstd", "gzip")), "zstd")
+        self.assertEqual(negotiate_encoding("zstd;q=0.5, gzip", ("zstd", "gzip")), "gzip")
+        self.assertEqual(negotiate_encoding("*;q=0.1", ("gzip",)), "gzip")
+        self.assertIsNone(negotiate_encoding("gzip;q=0, identity", ("gzip",)))
+        self.assertIsNone(negotiate_encoding("", ("zstd", "gzip")))
+
+
+class TestCompressionMiddleware(unittest.TestCase):
+
+    def setUp(self):
+        self.client = TestClient(compression_app())
+
+    def get(self, path, accept_encoding):
+        return self.client.get(path, headers={"Accept-Encoding": accept_encoding})
+
+    def test_gzip_or_identity(self):
+        response = self.get("/config", "gzip, deflate")
+        self.assertEqual(response.headers["content-encoding"], "gzip")
+        self.assertEqual(response.headers["vary"], "Accept-Encoding")
+        self.assertEqual(response.content, BODY)
+        self.assertLess(int(response.headers["content-length"]), len(BODY))
+
+        for accept_encoding in ("identity", "gzip;q=0", "br", ""):
+            with self.subTest(accept_encoding=accept_encoding):
+                response = self.get("/config", accept_encoding)
+                self.assertNotIn("content-encoding", response.headers)
+                self.assertEqual(response.content, BODY)
+
+        # Below minimum_size
+        self.assertNotIn("content-encoding", self.get("/small", "gzip").headers)
+
+    @unittest.skipIf(importlib.util.find_spec("zstandard") is not None, "zstandard is installed")
+    def test_zstd_needs_zstandard(self):
+        self.assertEqual(self.get("/config", "zstd, gzip").headers["content-encoding"], "gzip")
+        self.assertNotIn("content-encoding", self.get("/config", "zstd").headers)
+
+    @unittest.skipUnless(importlib.util.find_spec("zstandard") is not None, "zstandard is not installed")
+    def test_zstd(self):
+        import zstandard
+
+        response = self.get("/config", "zstd, gzip")
+        self.assertEqual(response.headers["content-encoding"], "zstd")
+        self.assertEqual(zstandard.ZstdDecompressor().decompressobj().decompress(response.content), BODY)
+        self.assertEqual(self.get("/config", "zstd;q=0.5, gzip").headers["content-encoding"], "gzip")
+
+    def test_archives_are_sent_as_is(self):
+        response = self.get("/archive", "gzip")
+        self.assertNotIn("content-encoding", response.headers)
+        self.assertEqual(gzip.decompress(response.content), BODY)
+
+    def test_streamed_chunks(self):
+        messages, requested = [], []
+
+        async def receive():
+            # The request body once, then no disconnect until the response is done
+            if requested:
+                await asyncio.Event().wait()
+            requested.append(True)
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            messages.append(message)
+
+        asyncio.run(compression_app()(http_scope("/stream", "gzip"), receive, send))
+
+        start, *bodies = messages
+        headers = dict(start["headers"])
+        self.assertEqual(headers[b"content-encoding"], b"gzip")
+        self.assertNotIn(b"content-length", headers)
+
+        # Each chunk decodes as soon as it arrives
+        decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        streamed = [m for m in bodies if m.get("more_body")]
+        self.assertEqual(len(streamed), len(CHUNKS))
+        for message, chunk in zip(streamed, CHUNKS):
+            self.assertEqual(decoder.decompress(message["body"]), chunk)
+        self.assertEqual(decoder.decompress(bodies[-1]["body"]), b"")
+        self.assertTrue(decoder.eof)
+
+        response = self.get("/stream", "gzip")
+        self.assertEqual(response.content, b"".join(CHUNKS))
+
+
+class TestORJSONResponse(unittest.TestCase):
+
+    def setUp(self):
+        with open(TESTS_FILE, 'r') as f:
+            self.ir = json.load(f)[0]['expected_ir']
+
+    def test_models_and_rule_tables(self):
+        model = IRBuilderOutput.model_validate(self.ir)
+        app = FastAPI()
+
+        @app.get("/model")
+        def model_route():
+            return ORJSONResponse({"ir": model, "counts": {1: "one"}})
+
+        @app.get("/table")
+        def table_route():
+            return ORJSONResponse(RuleTable.from_dict(self.ir))
+
+        client = TestClient(app)
+        response = client.get("/model")
+        self.assertEqual(response.headers["content-type"], "application/json")
+        self.assertEqual(response.json(), {"ir": model.model_dump(), "counts": {"1": "one"}})
+        self.assertEqual(client.get("/table").json(), model.model_dump())
+
+        with self.assertRaises(TypeError):
+            ORJSONResponse({"rules": {object()}})
+
+
+class TestCursorEndpoints(unittest.TestCase):
+
+    def setUp(self):
+        from src.routers import policies
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.store = PolicyStore(os.path.join(tmp.name, 'policies.sqlite3'))
+        self.addCleanup(self.store._conn.close)
+        patcher = mock.patch.object(policies, "get_policy_store", return_value=self.store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        app = FastAPI()
+        app.include_router(policies.router)
+        self.client = TestClient(app)
+
+        with open(TESTS_FILE, 'r') as f:
+            ir = json.load(f)[0]['expected_ir']
+        rule = ir['rules'][0]
+        ir['rules'] = [{**rule, "id": f"r{n}", "dst_ports": [1000 + n]} for n in range(7)]
+        self.ir = ir
+        self.config = "\n".join(f"line {n}" for n in range(CONFIG_CHUNK_LINES + 5))
+        self.store.append("p1", self._result(ir))
+
+    def _result(self, ir_dict):
+        _, checked = check_and_compile(IRBuilderOutput.model_validate(ir_dict))
+        return {
+            "ir": IRBuilderOutput.model_validate(ir_dict), **checked,
+            "configs": {"palo_alto": self.config},
+            "batfish_warnings": {"palo_alto": [{"severity": "warning", "message": f"w{n}"} for n in range(3)]},
+        }
+
+    def test_next_cursor_pins_the_version(self):
+        first = self.client.get("/policies/p1/rules", params={"limit": 3}).json()
+        self.assertEqual([r["id"] for r in first["items"]], ["r0", "r1", "r2"])
+
+        # A new version lands between two page reads
+        changed = copy.deepcopy(self.ir)
+        changed['rules'] = changed['rules'][:2]
+        self.store.append("p1", self._result(changed))
+
+        ids, page = [], first
+        while page["next_cursor"] is not None:
+            page = self.client.get("/policies/p1/rules", params={"limit": 3, "cursor": page["next_cursor"]}).json()
+            self.assertEqual(page["version"], 1)
+            ids.extend(r["id"] for r in page["items"])
+        self.assertEqual(ids, ["r3", "r4", "r5", "r6"])
+        self.assertEqual(self.client.get("/policies/p1/rules").json()["total"], 2)
+
+        warnings = self.client.get("/policies/p1/warnings/batfish", params={"version": 1, "limit": 2}).json()
+        rest = self.client.get("/policies/p1/warnings/batfish", params={"cursor": warnings["next_cursor"]}).json()
+        self.assertEqual((rest["version"], [w["message"] for w in rest["items"]]), (1, ["w2"]))
+        self.assertIsNone(rest["next_cursor"])
+
+        chunk = self.client.get("/policies/p1/configs/palo_alto", params={"version": 1}).json()
+        last = self.client.get("/policies/p1/configs/palo_alto", params={"cursor": chunk["next_cursor"]}).json()
+        self.assertEqual((last["version"], last["chunk"], last["next_cursor"]), (1, 1, None))
+
+    def test_bad_cursors_are_rejected(self):
+        def encode(data):
+            return base64.urlsafe_b64encode(json.dumps(data).encode()).decode().rstrip("=")
+
+        for cursor in ("not a cursor!", encode([1, 0]), encode({"v": 1}), encode({"v": "1", "o": 0}), encode({"v": 1, "o": -3})):
+            for path in ("/policies/p1/rules", "/policies/p1/warnings/linting", "/policies/p1/configs/palo_alto"):
+                with self.subTest(cursor=cursor, path=path):
+                    response = self.client.get(path, params={"cursor": cursor})
+                    self.assertEqual(response.status_code, 400)
+                    self.assertEqual(response.text, "Invalid cursor")
+
+    def test_limit_bounds(self):
+        from src.routers.policies import MAX_PAGE_SIZE
+
+        for path in ("/policies/p1/rules", "/policies/p1/warnings/batfish"):
+            for limit in (0, -1, MAX_PAGE_SIZE + 1):
+                with self.subTest(path=path, limit=limit):
+                    self.assertEqual(self.client.get(path, params={"limit": limit}).status_code, 422)
+            for limit in (1, MAX_PAGE_SIZE):
+                with self.subTest(path=path, limit=limit):
+                    self.assertEqual(self.client.get(path, params={"limit": limit}).status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
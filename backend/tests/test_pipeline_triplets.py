@@ -3,7 +3,6 @@ import json
 import os
 import sys
 import argparse
-import difflib
 import datetime
 from dotenv import load_dotenv
 
@@ -18,17 +17,26 @@ if '--live' in sys.argv:
     ENABLE_LIVE_TESTS = True
     sys.argv.remove('--live')  # Remove it so unittest.main doesn't complain
 
-# If running in mocked mode (not live), provide a dummy key ONLY if real one is missing
-# This prevents crashes during import if .env is missing or empty
-if not ENABLE_LIVE_TESTS and "OPENAI_API_KEY" not in os.environ:
-    os.environ["OPENAI_API_KEY"] = "sk-dummy-key-for-testing"
+# Optional live-run tuning: --models=gpt-4o-mini,gpt-4o --concurrency=8 --mode=combined
+LIVE_MODELS = ["gpt-4o-mini"]
+LIVE_CONCURRENCY = 8
+LIVE_MODE = "pipeline"
+for arg in list(sys.argv):
+    if arg.startswith('--models='):
+        LIVE_MODELS = [m for m in arg.split('=', 1)[1].split(',') if m]
+        sys.argv.remove(arg)
+    elif arg.startswith('--concurrency='):
+        LIVE_CONCURRENCY = int(arg.split('=', 1)[1])
+        sys.argv.remove(arg)
+    elif arg.startswith('--mode='):
+        LIVE_MODE = arg.split('=', 1)[1]
+        sys.argv.remove(arg)
 
 # Add backend root to path so we can import src as a package
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from src.engine.compiler.palo_alto import PaloAltoCompiler
 from src.engine.schemas import IRBuilderOutput
-from src.engine import agents
 
 class TestPipelineTriplets(unittest.TestCase):
     # ANSI Color Codes
@@ -81,105 +89,69 @@ class TestPipelineTriplets(unittest.TestCase):
                 print(f"  {self.GREEN}[PASS]{self.RESET} {case['id']}")
 
     def _run_live_tests(self):
-        # Setup log file
+        # Imported here so mocked runs never construct the LLM client
+        from src.engine.evaluation.runner import run_live_evaluation
+        from src.engine.evaluation.report import build_report, format_report, score_record
+
+        output_dir = os.path.join(os.path.dirname(__file__), 'output')
+        os.makedirs(output_dir, exist_ok=True)
+
+        # Results are keyed by case id / model / prompt hash, so reruns only
+        # call the agents for new or changed cases.
+        results_path = os.path.join(output_dir, 'live_results.jsonl')
+
         timestamp = datetime.datetime.now().strftime("%d-%m-%y_%H-%M")
-        log_filename = f"{timestamp}_test_log.txt"
-        log_path = os.path.join(os.path.dirname(__file__), 'output', log_filename)
-        
-        # Ensure output dir exists (safety check, though mkdir was run)
-        os.makedirs(os.path.dirname(log_path), exist_ok=True)
+        log_path = os.path.join(output_dir, f"{timestamp}_test_log.txt")
+
+        print(f"\nRunning {len(self.all_triplets)} LIVE triplet tests "
+              f"on {', '.join(LIVE_MODELS)} ({LIVE_MODE} mode, concurrency {LIVE_CONCURRENCY})...")
+        print(f"Results store: {results_path}")
+
+        def load_context(context_file):
+            with open(os.path.join(self.samples_path, context_file), 'r') as f:
+                return json.load(f)
+
+        records = run_live_evaluation(
+            cases=self.all_triplets,
+            load_context=load_context,
+            store_path=results_path,
+            models=LIVE_MODELS,
+            concurrency=LIVE_CONCURRENCY,
+            mode=LIVE_MODE,
+        )
+
+        cases_by_id = {case['id']: case for case in self.all_triplets}
+
+        for record in records:
+            case = cases_by_id[record['case_id']]
+            with self.subTest(case_id=case['id'], model=record['model']):
+                score = score_record(record, case)
+                if score['status'] != 'ok':
+                    print(f"  {self.RED}[ERROR]{self.RESET} {case['id']} ({record['model']}): {score['error']}")
+                elif not score['cli_match']:
+                    print(f"  {self.RED}[FAIL]{self.RESET} {case['id']} ({record['model']})")
+                    comparison = score['comparison']
+                    for rule_diff in comparison.rule_diffs:
+                        for fd in rule_diff.fields:
+                            print(f"    {rule_diff.expected_id}.{fd.field}: expected {fd.expected!r}, got {fd.actual!r}")
+                    if comparison.missing_rules:
+                        print(f"    missing rules: {', '.join(comparison.missing_rules)}")
+                    if comparison.extra_rules:
+                        print(f"    extra rules: {', '.join(comparison.extra_rules)}")
+                    if not comparison.flow_equivalent:
+                        print(f"    flows differ: {len(comparison.missing_flows)} missing, "
+                              f"{len(comparison.extra_flows)} extra")
+                else:
+                    print(f"  {self.GREEN}[PASS]{self.RESET} {case['id']} ({record['model']})")
+
+        report = format_report(build_report(records, cases_by_id))
+        print("\n" + report)
 
-        print(f"\nRunning {len(self.all_triplets)} LIVE triplet tests...")
-        print(f"Logging output to: {log_path}")
-        
-        # CLI Similarity Threshold (strict 100% for firewall rules)
-        SIMILARITY_THRESHOLD = 100.0
-        
-        passed_tests = []
-        failed_tests = []
-        
         with open(log_path, 'w') as log_file:
             log_file.write(f"Test Run: {timestamp}\n")
-            log_file.write("="*50 + "\n\n")
-
-            for case in self.all_triplets:
-                with self.subTest(case_id=case['id']):
-                    print("\n+", "-"*50, "+", sep="")
-                    print(f"LIVE Testing case: {case['id']}")
-                    
-                    log_file.write(f"TEST CASE: {case['id']}\n")
-                    log_file.write("-" * 30 + "\n")
-                    
-                    ctx_path = os.path.join(self.samples_path, case['context_file'])
-                    with open(ctx_path, 'r') as f:
-                        context = json.load(f)
-
-                    # Call real agents
-                    try:
-                        resolver_out = agents.resolve_policy(case['nl_query'], context)
-                        ir_out = agents.build_ir(resolver_out, context)
-                    except Exception as e:
-                        print(f"  {self.RED}[ERROR]{self.RESET} Agent execution failed: {e}")
-                        log_file.write(f"STATUS: ERROR\nReason: {str(e)}\n\n")
-                        failed_tests.append(case['id'])
-                        continue
-                    
-                    # Compare IR
-                    generated_ir_dict = ir_out.model_dump()
-                    if generated_ir_dict != case['expected_ir']:
-                        print(f"  {self.YELLOW}[WARN]{self.RESET} Generated IR differs from Expected for {case['id']}")
-                        log_file.write("WARNING: IR Mismatch\n")
-                        print(f"Expected:\n{case['expected_ir']}\nGot:\n{generated_ir_dict}")
-
-                    # Compile
-                    cli_output = self.compiler.compile_policy(ir_out)
-                    
-                    # Verify CLI with Similarity
-                    expected = case['expected_cli'].strip()
-                    actual = cli_output.strip()
-                    
-                    similarity = difflib.SequenceMatcher(None, expected, actual).ratio() * 100
-                    
-                    print()
-                    if similarity < SIMILARITY_THRESHOLD:
-                        print(f"  {self.RED}[FAIL]{self.RESET} CLI Similarity: {similarity:.2f}% (Threshold: {SIMILARITY_THRESHOLD}%)")
-                        print(f"Expected:\n{expected}\nGot:\n{actual}")
-                        
-                        log_file.write(f"STATUS: FAIL (Similarity: {similarity:.2f}%)\n")
-                        log_file.write("EXPECTED CLI:\n")
-                        log_file.write(expected + "\n")
-                        log_file.write("ACTUAL CLI:\n")
-                        log_file.write(actual + "\n\n")
-                        
-                        failed_tests.append(case['id'])
-                    else:
-                        print(f"  {self.GREEN}[PASS]{self.RESET} {case['id']} - Exact CLI match (100.00%)")
-                        log_file.write("STATUS: PASS\n\n")
-                        passed_tests.append(case['id'])
-            
-            # Summary Report
-            print("\n" + "="*50)
-            print("LIVE TEST SUMMARY")
-            print("="*50)
-            print(f"Total Tests: {len(self.all_triplets)}")
-            print(f"Passed:      {len(passed_tests)}")
-            print(f"Failed:      {len(failed_tests)}")
-            
-            log_file.write("="*50 + "\n")
-            log_file.write("SUMMARY\n")
-            log_file.write("="*50 + "\n")
-            log_file.write(f"Total: {len(self.all_triplets)}\n")
-            log_file.write(f"Passed: {len(passed_tests)}\n")
-            log_file.write(f"Failed: {len(failed_tests)}\n")
-
-            if failed_tests:
-                print("\nFailed Cases:")
-                log_file.write("\nFAILED CASES:\n")
-                for case_id in failed_tests:
-                    print(f"- {self.RED}{case_id}{self.RESET}")
-                    log_file.write(f"- {case_id}\n")
-            print("="*50 + "\n")
-        
+            log_file.write(report)
+        print(f"Report written to: {log_path}")
+
 if __name__ == '__main__':
     unittest.main()
 
@@ -0,0 +1,101 @@
+import unittest
+import copy
+import json
+import os
+import sys
+import tempfile
+
+# Add backend root to path so we can import src as a package
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.engine.hashing import rule_hash
+from src.engine.pipeline import check_and_compile
+from src.engine.schemas import IRBuilderOutput
+from src.storage.policies import CONFIG_CHUNK_LINES, PolicyStore
+
+TESTS_FILE = os.path.join(os.path.dirname(__file__), '../../data/tests/simple_tests.json')
+
+
+class TestPolicyStore(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.store = PolicyStore(os.path.join(tmp.name, 'policies.sqlite3'))
+        self.addCleanup(self.store._conn.close)
+
+        with open(TESTS_FILE, 'r') as f:
+            self.case = json.load(f)[0]
+
+    def _result(self, ir_dict):
+        ir = IRBuilderOutput.model_validate(ir_dict)
+        _, checked = check_and_compile(ir)
+        return {"ir": ir, "batfish_warnings": {"palo_alto": []}, **checked}
+
+    def test_round_trip(self):
+        result = self._result(self.case['expected_ir'])
+        meta = self.store.append("p1", result, session_id="s1", context_id="c1")
+
+        self.assertEqual(meta["version"], 1)
+        record = self.store.get("p1")
+        self.assertEqual(record["ir"], result["ir"].model_dump())
+        self.assertEqual(record["configs"], result["configs"])
+        self.assertEqual(record["session_id"], "s1")
+        self.assertIsNone(record["resolver_output"])
+        self.assertIsNone(self.store.get("p1", 2))
+
+    def test_rules_are_stored_once_and_indexed(self):
+        shared = self.case['expected_ir']['rules'][0]
+        other = copy.deepcopy(self.case['expected_ir'])
+        other['rules'].append({**shared, "id": "r2", "dst_ports": [8080]})
+
+        self.store.append("p1", self._result(self.case['expected_ir']), context_id="c1")
+        self.store.append("p2", self._result(other), context_id="c1")
+
+        rule_blobs = self.store._conn.execute("SELECT COUNT(*) FROM blobs WHERE kind = 'rule'").fetchone()[0]
+        self.assertEqual(rule_blobs, 2)
+
+        h = rule_hash(IRBuilderOutput.model_validate(self.case['expected_ir']).rules[0])
+        self.assertEqual([m["policy_id"] for m in self.store.by_rule(h)], ["p1", "p2"])
+        self.assertEqual(len(self.store.by_context("c1")), 2)
+
+    def test_rollback_appends_old_version(self):
+        first = self._result(self.case['expected_ir'])
+        changed = copy.deepcopy(self.case['expected_ir'])
+        changed['rules'][0]['dst_ports'] = [8080]
+
+        self.store.append("p1", first)
+        self.store.append("p1", self._result(changed))
+        meta = self.store.rollback("p1", 1)
+
+        self.assertEqual(meta["version"], 3)
+        self.assertEqual([v["version"] for v in self.store.versions("p1")], [1, 2, 3])
+        self.assertEqual(self.store.get("p1")["content_hash"], self.store.get("p1", 1)["content_hash"])
+        self.assertIsNone(self.store.rollback("p1", 9))
+
+    def test_paged_reads(self):
+        ir = copy.deepcopy(self.case['expected_ir'])
+        rule = ir['rules'][0]
+        ir['rules'] = [{**rule, "id": f"r{n}", "dst_ports": [1000 + n]} for n in range(7)]
+        result = self._result(ir)
+        config = "\n".join(f"line {n}" for n in range(2 * CONFIG_CHUNK_LINES + 5))
+        result["configs"] = {"palo_alto": config}
+        self.store.append("p1", result)
+
+        page = self.store.rules_page("p1", None, 5, 10)
+        self.assertEqual((page["version"], page["total"]), (1, 7))
+        self.assertEqual([r["id"] for r in page["items"]], ["r5", "r6"])
+
+        chunks = [self.store.config_chunk("p1", 1, "palo_alto", i) for i in range(3)]
+        self.assertEqual([c["chunks"] for c in chunks], [3, 3, 3])
+        self.assertEqual("\n".join(c["content"] for c in chunks), config)
+        self.assertIsNone(self.store.config_chunk("p1", 1, "palo_alto", 3))
+        self.assertEqual("".join(self.store.iter_config("p1", None, "palo_alto")), config)
+        self.assertEqual(self.store.get("p1")["configs"]["palo_alto"], config)
+        self.assertIsNone(self.store.iter_config("p1", None, "cisco"))
+
+        self.assertEqual(self.store.warnings("p1", 1, "batfish")["warnings"], {"palo_alto": []})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+import unittest
+import os
+import pstats
+import sys
+import tempfile
+import time
+from unittest import mock
+
+# Add backend root to path so we can import src as a package
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+from src.engine.compiler.runner import compile_ir
+from src.engine.schemas import IRBuilderOutput
+from src.config import settings
+from src.profiling import ProfilingSwitch, RequestProfiler, authorized
+from src.storage.policies import PolicyStore
+
+
+def workload():
+    # Some pydantic validation and compilation, then a busy wait
+    ir = IRBuilderOutput.model_validate({
+        "rules": [{
+            "id": f"r{i}", "action": "allow", "src": ["10.0.0.1"], "dst": ["10.0.1.1"], "protocol": "tcp",
+            "dst_ports": [443], "src_zone": "trust", "dst_zone": "untrust", "log": True, "priority": 100,
+        } for i in range(2000)],
+        "metadata": {"raw_policy": "", "warnings": [], "context_used": False},
+    })
+    kept = [compile_ir(ir, "palo_alto") for _ in range(3)]
+    deadline = time.perf_counter() + 0.05
+    while time.perf_counter() < deadline:
+        pass
+    return kept
+
+
+class TestProfiling(unittest.TestCase):
+
+    def test_profile_of_a_run(self):
+        profiler = RequestProfiler(interval=0.001)
+        self.assertTrue(profiler.start())
+        # Only one profile at a time
+        self.assertFalse(RequestProfiler().start())
+        try:
+            kept = workload()
+        finally:
+            profiler.stop()
+        self.assertTrue(kept)
+
+        summary = profiler.summary()
+        self.assertGreater(summary["elapsed_ms"], 50)
+        self.assertGreater(summary["samples"], 0)
+        self.assertAlmostEqual(sum(summary["categories"].values()), 1.0, places=2)
+        self.assertIn("compile", summary["categories"])
+        self.assertTrue(any("workload" in f["function"] for f in summary["functions"]))
+        self.assertGreater(summary["peak_memory"], 0)
+        self.assertTrue(summary["allocations"])
+
+        # Collapsed stacks: "frame;frame;... count", rooted at the caller
+        lines = profiler.collapsed().splitlines()
+        self.assertTrue(lines)
+        for line in lines:
+            stack, count = line.rsplit(" ", 1)
+            self.assertGreater(int(count), 0)
+        self.assertTrue(any("test_profiling:workload" in line for line in lines))
+
+        # The pstats dump loads like a file written by cProfile
+        with tempfile.NamedTemporaryFile(suffix=".pstats", delete=False) as f:
+            f.write(profiler.pstats_dump())
+        self.addCleanup(os.unlink, f.name)
+        self.assertGreater(pstats.Stats(f.name).total_calls, 0)
+
+        # The lock is released for the next profile
+        again = RequestProfiler()
+        self.assertTrue(again.start())
+        again.stop()
+
+    def test_switch(self):
+        switch = ProfilingSwitch()
+        self.assertFalse(switch.take("s1"))
+
+        switch.arm(1, session_id="s1")
+        switch.arm(2)
+        self.assertEqual(switch.armed(), {"s1": 1, "*": 2})
+        self.assertTrue(switch.take("s1"))
+        self.assertEqual(switch.armed(), {"*": 2})
+        self.assertTrue(switch.take("s2"))
+        self.assertTrue(switch.take("s1"))
+        self.assertFalse(switch.take("s1"))
+        self.assertEqual(switch.armed(), {})
+
+    def test_access(self):
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+        from src.routers import profiling
+
+        app = FastAPI()
+        app.include_router(profiling.router)
+        client = TestClient(app)
+
+        # Off unless enabled
+        self.assertFalse(settings.PROFILING)
+        self.assertFalse(authorized(None))
+        self.assertEqual(client.post("/profiling/arm").status_code, 409)
+
+        with mock.patch.object(settings, "PROFILING", True), mock.patch.object(settings, "PROFILING_TOKEN", "s3cret"), \
+                mock.patch.object(profiling, "profiling_switch", ProfilingSwitch()):
+            self.assertFalse(authorized(None))
+            self.assertFalse(authorized("wrong"))
+            self.assertTrue(authorized("s3cret"))
+
+            self.assertEqual(client.post("/profiling/arm").status_code, 403)
+            self.assertEqual(client.delete("/profiling/arm", headers={"X-Profiling-Token": "wrong"}).status_code, 403)
+            self.assertEqual(client.get("/profiling").status_code, 403)
+            response = client.post("/profiling/arm?count=2", headers={"X-Profiling-Token": "s3cret"})
+            self.assertEqual(response.json(), {"armed": {"*": 2}})
+
+            # Without a token configured, enabling profiling is enough
+            with mock.patch.object(settings, "PROFILING_TOKEN", ""):
+                self.assertTrue(authorized(None))
+
+    def test_profiles_are_stored_with_the_policy(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        store = PolicyStore(os.path.join(tmp.name, "policies.sqlite3"))
+
+        self.assertIsNone(store.profile("p1"))
+        store.put_profile("p1", 1, {"elapsed_ms": 12.5}, "a;b 3\n", b"stats")
+        store.put_profile("p1", 2, {"elapsed_ms": 7.0}, "a;c 1\n", b"stats2")
+
+        self.assertEqual(store.profile("p1")["version"], 2)
+        self.assertEqual(store.profile("p1", 1)["elapsed_ms"], 12.5)
+        self.assertEqual(store.profile("p1", 1, part="collapsed"), "a;b 3\n")
+        self.assertEqual(store.profile("p1", part="pstats"), b"stats2")
+        self.assertIsNone(store.profile("p1", 3))
+        self.assertEqual(sorted((p["version"], p["elapsed_ms"]) for p in store.profiles()), [(1, 12.5), (2, 7.0)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+import json
+import os
+import sys
+
+# Add backend root to path so we can import src as a package
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.engine.resolver_cache import ResolverCache
+from src.engine.schemas import ResolverOutput
+
+CONTEXT_FILE = os.path.join(os.path.dirname(__file__), '../../data/prod/ecommerce-platform.json')
+
+ORIGINAL = "Allow App_Server_Private to reach DB_Cluster_Primary over Postgres"
+
+
+class TestResolverCache(unittest.TestCase):
+
+    def setUp(self):
+        with open(CONTEXT_FILE, 'r') as f:
+            self.context = json.load(f)
+        self.resolved = ResolverOutput(
+            action="allow",
+            sources=["App_Server_Private"],
+            destinations=["DB_Cluster_Primary"],
+            service_names=["Postgres"],
+            raw_policy=ORIGINAL,
+        )
+        self.cache = ResolverCache()
+        self.cache.add(ORIGINAL, self.context, self.resolved)
+
+    def test_rephrased_request_reuses_output(self):
+        for text in [
+            "Permit Postgres from App_Server_Private to DB_Cluster_Primary",
+            "allow traffic from app_server_private to db_cluster_primary using Postgres",
+        ]:
+            with self.subTest(text=text):
+                hit = self.cache.lookup(text, self.context)
+                self.assertIsNotNone(hit)
+                self.assertEqual(hit.raw_policy, text)
+                self.assertEqual(hit.sources, self.resolved.sources)
+
+    def test_different_meaning_is_not_reused(self):
+        for text in [
+            "Allow DB_Cluster_Primary to reach App_Server_Private over Postgres",
+            "Deny App_Server_Private to reach DB_Cluster_Primary over Postgres",
+            "Do not allow App_Server_Private to reach DB_Cluster_Primary over Postgres",
+            "Allow App_Server_Private to reach DB_Cluster_Replica over Postgres",
+            "Allow App_Server_Private to reach DB_Cluster_Primary over Postgres on port 5433",
+            "Allow App_Server_Private to reach DB_Cluster_Primary over Postgres during Maintenance_Window",
+            "Allow App_Server_Private and DB_Cluster_Primary to connect over Postgres",
+        ]:
+            with self.subTest(text=text):
+                self.assertIsNone(self.cache.lookup(text, self.context))
+
+        # A marker holds for every entity up to the next one
+        cached = "Allow traffic from App_Server_Private to DB_Cluster_Primary and DB_Cluster_Replica"
+        self.cache.add(cached, self.context, self.resolved)
+        self.assertIsNotNone(self.cache.lookup(
+            "Allow App_Server_Private to reach DB_Cluster_Primary and DB_Cluster_Replica", self.context
+        ))
+        self.assertIsNone(self.cache.lookup(
+            "Allow traffic from App_Server_Private and DB_Cluster_Primary to DB_Cluster_Replica", self.context
+        ))
+
+        # Requests whose roles can't be told apart are neither reused nor stored
+        ambiguous = "Allow App_Server_Private and DB_Cluster_Replica to connect"
+        self.cache.add(ambiguous, self.context, self.resolved)
+        self.assertIsNone(self.cache.lookup(ambiguous, self.context))
+
+    def test_outputs_are_scoped_to_context_and_model(self):
+        changed = json.loads(json.dumps(self.context))
+        changed['objects']['App_Server_Private'] = "10.99.0.0/24"
+
+        self.assertIsNotNone(self.cache.lookup(ORIGINAL, self.context))
+        self.assertIsNone(self.cache.lookup(ORIGINAL, changed))
+        self.assertIsNone(self.cache.lookup(ORIGINAL, self.context, model="gpt-4o"))
+
+
+if __name__ == '__main__':
+    unittest.main()
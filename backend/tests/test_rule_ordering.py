@@ -0,0 +1,199 @@
+import unittest
+import ipaddress
+import os
+import random
+import sys
+import time
+
+# Add backend root to path so we can import src as a package
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.engine.ordering import (
+    MAX_RULES, dependencies, greedy_order, move_commands, optimize_rule_order, parse_hit_counts,
+)
+from src.engine.schemas import IRRule
+
+NETS = ["10.0.0.0/24", "10.0.0.5", "10.0.1.0/24", "10.0.0.0/16", "192.168.1.10", "any"]
+ZONES = ["trust", "untrust", "dmz"]
+
+
+def rule(rule_id, action="allow", src=("10.0.0.5",), dst=("10.0.1.1",), protocol="tcp", ports=(80,),
+         src_zone="trust", dst_zone="untrust", log=False):
+    return IRRule(
+        id=rule_id, action=action, src=list(src), dst=list(dst), protocol=protocol, dst_ports=list(ports),
+        src_zone=src_zone, dst_zone=dst_zone, log=log, priority=10 if action == "deny" else 100,
+    )
+
+
+def _in(address, members):
+    return any(m == "any" or ipaddress.ip_address(address) in ipaddress.ip_network(m, strict=False) for m in members)
+
+
+def first_effect(rules, flow):
+    """What the firewall does with a flow: the action and logging of the first rule matching it."""
+    src_zone, dst_zone, src, dst, protocol, port = flow
+    for r in rules:
+        if r.src_zone not in ("any", src_zone) or r.dst_zone not in ("any", dst_zone):
+            continue
+        if not _in(src, r.src) or not _in(dst, r.dst):
+            continue
+        # As compiled: tcp/443 and empty port lists become application-default
+        if not (r.dst_ports == [] or (r.protocol == "tcp" and r.dst_ports == [443])):
+            if (r.protocol, r.dst_ports[0]) != (protocol, port):
+                continue
+        return r.action, r.log
+    return None
+
+
+def reference_order(hits, preds):
+    """greedy_order's greedy rule, recomputing every unplaced ancestor set on each pick."""
+    n = len(hits)
+    ancestors = [set() for _ in range(n)]
+    for j in range(n):
+        for i in preds[j]:
+            ancestors[j] |= ancestors[i] | {i}
+    placed, order = set(), []
+    pending = [j for j in range(n) if hits[j] > 0]
+    while pending:
+        best, best_key = None, None
+        for j in pending:
+            members = sorted((ancestors[j] | {j}) - placed)
+            total = sum(hits[k] for k in members)
+            key = (total / len(members), total, -j)
+            if best_key is None or key > best_key:
+                best, best_key = members, key
+        order.extend(best)
+        placed.update(best)
+        pending = [j for j in pending if j not in placed]
+    return order + [j for j in range(n) if j not in placed]
+
+
+def random_dag(rng, n, max_preds=3):
+    preds = [sorted(rng.sample(range(j), min(j, rng.randint(0, max_preds)))) for j in range(n)]
+    hits = [rng.choice([0, 0, 1, 5, 10, 1000]) for _ in range(n)]
+    return hits, preds
+
+
+def apply_moves(ids, commands):
+    ids = list(ids)
+    for command in commands:
+        words = command.split()
+        name = words[4]
+        ids.remove(name)
+        if words[5] == "top":
+            ids.insert(0, name)
+        else:
+            ids.insert(ids.index(words[6]) + 1, name)
+    return ids
+
+
+class TestRuleOrdering(unittest.TestCase):
+
+    def test_reordering_keeps_every_flow_outcome(self):
+        addresses = ["10.0.0.1", "10.0.0.5", "10.0.1.1", "10.0.200.1", "192.168.1.10", "172.16.0.1"]
+        for seed in range(12):
+            rng = random.Random(seed)
+            rules = [
+                rule(
+                    f"r{i}", action=rng.choice(["allow", "deny"]),
+                    src=rng.sample(NETS, rng.randint(1, 2)), dst=rng.sample(NETS, rng.randint(1, 2)),
+                    protocol=rng.choice(["tcp", "udp"]), ports=rng.choice([(80,), (22,), (443,), ()]),
+                    src_zone=rng.choice(ZONES + ["any"]), dst_zone=rng.choice(ZONES), log=rng.random() < 0.2,
+                )
+                for i in range(25)
+            ]
+            hits = {r.id: rng.choice([0, 1, 10, 1000]) for r in rules}
+            plan = optimize_rule_order(rules, hits)
+
+            by_id = {r.id: r for r in rules}
+            reordered = [by_id[i] for i in plan["order"]]
+            self.assertEqual(sorted(plan["order"]), sorted(by_id))
+            self.assertLessEqual(plan["expected_depth_after"], plan["expected_depth_before"])
+            self.assertEqual(apply_moves([r.id for r in rules], plan["moves"]), plan["order"], seed)
+
+            for src_zone in ZONES:
+                for dst_zone in ZONES:
+                    for src in addresses:
+                        for dst in addresses:
+                            for service in (("tcp", 80), ("tcp", 22), ("udp", 80), ("tcp", 443)):
+                                flow = (src_zone, dst_zone, src, dst) + service
+                                self.assertEqual(first_effect(reordered, flow), first_effect(rules, flow), (seed, flow))
+
+    def test_only_order_sensitive_pairs_are_constrained(self):
+        context = {"objects": {"web": "10.0.1.0/24", "db": "10.0.2.10", "partner": ["api.partner.example"]}}
+        rules = [
+            rule("deny-web", action="deny", dst=["web"]),
+            rule("allow-db", dst=["db"]),             # disjoint from web
+            rule("allow-web", dst=["web"]),           # overlaps deny-web with another action
+            rule("allow-web-log", dst=["web"], log=True, ports=(22,)),  # other service
+            rule("allow-partner", dst=["partner"]),   # FQDN: may overlap anything
+            rule("deny-dmz", action="deny", dst_zone="dmz"),  # other zone pair
+        ]
+        preds = dependencies(rules, context)
+        self.assertEqual(preds, [[], [], [0], [], [0], []])
+
+        # Unresolved names overlap everything
+        self.assertEqual(dependencies(rules)[1], [0])
+
+    def test_heavy_rule_pulls_its_blockers_up(self):
+        rules = [rule(f"cold{i}", dst=[f"10.9.{i}.1"]) for i in range(5)]
+        rules += [rule("guard", action="deny", src=["10.0.0.5"], dst=["10.0.1.0/24"], ports=(80,)),
+                  rule("hot", src=["10.0.0.0/24"], dst=["10.0.1.0/24"], ports=(80,))]
+        plan = optimize_rule_order(rules, {"hot": 1000, "cold0": 1, "missing": 5})
+
+        self.assertEqual(plan["order"][:3], ["guard", "hot", "cold0"])
+        self.assertLess(plan["expected_depth_after"], plan["expected_depth_before"])
+        self.assertEqual(plan["unknown_rules"], ["missing"])
+        self.assertEqual(plan["constraints"], 1)
+        self.assertEqual(plan["moves"][:2], [
+            "move rulebase security rules guard top",
+            "move rulebase security rules hot after guard",
+        ])
+
+    def test_no_gain_keeps_order(self):
+        rules = [rule("a"), rule("b", action="deny")]
+        plan = optimize_rule_order(rules, {"b": 100})
+        self.assertEqual((plan["order"], plan["moves"]), (["a", "b"], []))
+        self.assertEqual(greedy_order([0, 5, 0], [[], [0], []]), [0, 1, 2])
+
+        with self.assertRaises(ValueError):
+            optimize_rule_order([rule("a"), rule("a")], {})
+
+    def test_greedy_order_matches_reference(self):
+        for seed in range(30):
+            rng = random.Random(seed)
+            hits, preds = random_dag(rng, rng.randint(1, 60))
+            self.assertEqual(greedy_order(hits, preds), reference_order(hits, preds), seed)
+
+    def test_large_rulebases(self):
+        # Recomputing every candidate's ancestor set per pick took ~30s here
+        hits, preds = random_dag(random.Random(1), 5000)
+        started = time.perf_counter()
+        order = greedy_order(hits, preds)
+        self.assertLess(time.perf_counter() - started, 5.0)
+        self.assertEqual(sorted(order), list(range(5000)))
+
+        with self.assertRaisesRegex(ValueError, "Too many rules"):
+            optimize_rule_order([rule(f"r{i}") for i in range(MAX_RULES + 1)], {})
+
+    def test_move_commands_quote_names(self):
+        self.assertEqual(move_commands(["a", "web-in", "c"], [1, 0, 2]), ["move rulebase security rules \"web-in\" top"])
+
+    def test_parse_hit_counts(self):
+        self.assertEqual(parse_hit_counts('{"r1": 5, "r2": "7"}'), {"r1": 5, "r2": 7})
+        # Rule hit-count export
+        self.assertEqual(
+            parse_hit_counts('Name,Hit Count,Last Hit\nr1,"1,200",2024-01-01\nr2,3,\n'),
+            {"r1": 1200, "r2": 3},
+        )
+        # Traffic log: one row per session
+        self.assertEqual(
+            parse_hit_counts("Receive Time,Source address,Rule\nt,10.0.0.1,r1\nt,10.0.0.2,r1\nt,10.0.0.3,r2\n"),
+            {"r1": 2, "r2": 1},
+        )
+        with self.assertRaises(ValueError):
+            parse_hit_counts("a,b\n1,2\n")
+
+
+if __name__ == '__main__':
+    unittest.main()
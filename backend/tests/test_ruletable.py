@@ -0,0 +1,61 @@
+import unittest
+import json
+import os
+import sys
+
+# Add backend root to path so we can import src as a package
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.engine.pipeline import check_and_compile
+from src.engine.rulecache import RuleCheckCache, rule_fingerprints
+from src.engine.ruletable import RuleTable
+from src.engine.schemas import IRBuilderOutput
+
+TESTS_DIR = os.path.join(os.path.dirname(__file__), '../../data/tests')
+
+
+def load_cases():
+    cases = []
+    for filename in sorted(os.listdir(TESTS_DIR)):
+        with open(os.path.join(TESTS_DIR, filename), 'r') as f:
+            cases.extend(json.load(f))
+    return cases
+
+
+class TestRuleTable(unittest.TestCase):
+
+    def test_round_trip_and_checks_match_models(self):
+        cache = RuleCheckCache()
+        for case in load_cases():
+            ir = IRBuilderOutput.model_validate(case['expected_ir'])
+            table = RuleTable.from_dict(case['expected_ir'])
+            with self.subTest(case_id=case['id']):
+                self.assertEqual(table.to_ir(), ir)
+                self.assertEqual(RuleTable.from_ir(ir).model_dump(), ir.model_dump())
+                self.assertEqual(rule_fingerprints(table.rules), rule_fingerprints(ir.rules))
+                self.assertEqual(check_and_compile(table), check_and_compile(ir))
+                self.assertEqual(check_and_compile(table, cache=cache), check_and_compile(ir))
+
+    def test_names_are_interned(self):
+        ir = load_cases()[0]['expected_ir']
+        rule = ir['rules'][0]
+        table = RuleTable.from_dict({**ir, "rules": [{**rule, "id": f"r{n}"} for n in range(100)]})
+
+        self.assertEqual(len(table), 100)
+        self.assertEqual(len(table.strings), len(set(table.strings)))
+        self.assertLess(len(table.strings), 120)
+        self.assertEqual(table.rules[-1].id, "r99")
+        self.assertEqual(table.rules[5].src, rule['src'])
+
+    def test_invalid_rules_are_rejected(self):
+        ir = load_cases()[0]['expected_ir']
+        rule = ir['rules'][0]
+        for bad in [{**rule, "dst_ports": ["https"]}, {**rule, "log": "yes"}, {**rule, "extra": 1},
+                    {k: v for k, v in rule.items() if k != "src_zone"}]:
+            with self.subTest(rule=bad):
+                with self.assertRaises(ValueError):
+                    RuleTable.from_dict({**ir, "rules": [rule, bad]})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,162 @@
+import unittest
+import asyncio
+import os
+import sys
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+import httpx
+from openai import RateLimitError
+
+# Add backend root to path so we can import src as a package
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.engine.scheduler import LLMScheduler, TokenBucket
+
+
+def response(model, input_tokens=30, output_tokens=20):
+    usage = SimpleNamespace(input_tokens=input_tokens, output_tokens=output_tokens, total_tokens=input_tokens + output_tokens)
+    return SimpleNamespace(model=model, usage=usage)
+
+
+def rate_limited(retry_after):
+    request = httpx.Request("POST", "https://api.openai.com/v1/responses")
+    upstream = httpx.Response(429, headers={"retry-after": retry_after}, request=request)
+    return RateLimitError("Rate limit reached", response=upstream, body=None)
+
+
+class FakeClient:
+    """Stands in for a client method: counts calls, can fail or block first."""
+
+    def __init__(self, failures=(), delay=0.0):
+        self.calls = []
+        self.failures = list(failures)
+        self.delay = delay
+
+    async def __call__(self, **kwargs):
+        self.calls.append(kwargs)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.failures:
+            raise self.failures.pop(0)
+        return response(kwargs["model"])
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_refill_and_debit(self):
+        clock = [100.0]
+
+        async def sleep(seconds):
+            clock[0] += seconds
+
+        async def scenario():
+            bucket = TokenBucket(rate_per_minute=60)  # 1 token per second
+            await bucket.acquire(50)
+            self.assertEqual(bucket.tokens, 10)
+
+            clock[0] += 5
+            await bucket.acquire(5)
+            self.assertEqual(bucket.tokens, 10)
+
+            # Not enough: waits for the refill, then debits
+            await bucket.acquire(30)
+            self.assertAlmostEqual(clock[0], 125.0)
+            self.assertAlmostEqual(bucket.tokens, 0)
+
+            # Never above capacity, and larger requests are capped to it
+            clock[0] += 1000
+            bucket.refund(10)
+            self.assertEqual(bucket.tokens, 60)
+            await bucket.acquire(500)
+            self.assertEqual(bucket.tokens, 0)
+
+            # A negative refund charges the difference
+            clock[0] += 20
+            bucket.refund(-15)
+            self.assertAlmostEqual(bucket.tokens, 5)
+
+        with mock.patch("src.engine.scheduler.time.monotonic", side_effect=lambda: clock[0]), \
+                mock.patch("src.engine.scheduler.asyncio.sleep", side_effect=sleep):
+            asyncio.run(scenario())
+
+
+class TestLLMScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.scheduler = LLMScheduler(api_key="test", tokens_per_minute=6000, max_output_tokens=100, base_delay=0.01)
+        self.kwargs = {"model": "gpt-4o-mini", "input": [{"role": "user", "content": "x" * 400}]}
+
+    def run_on_loop(self, coro):
+        return self.scheduler._run(coro)
+
+    def test_identical_calls_are_coalesced(self):
+        client = FakeClient(delay=0.05)
+
+        async def scenario():
+            return await asyncio.gather(*(self.scheduler._single_flight("fake", client, dict(self.kwargs)) for _ in range(5)))
+
+        results = self.run_on_loop(scenario())
+        self.assertEqual(len(client.calls), 1)
+        self.assertTrue(all(r is results[0] for r in results))
+        self.assertEqual((self.scheduler.stats["calls"], self.scheduler.stats["coalesced"]), (5, 4))
+
+        # Done calls aren't reused
+        self.run_on_loop(self.scheduler._single_flight("fake", client, dict(self.kwargs)))
+        self.assertEqual(len(client.calls), 2)
+
+    def test_waiters_retry_when_the_leader_is_cancelled(self):
+        client = FakeClient(delay=0.05)
+
+        async def scenario():
+            leader = asyncio.create_task(self.scheduler._single_flight("fake", client, dict(self.kwargs)))
+            await asyncio.sleep(0.01)
+            waiter = asyncio.create_task(self.scheduler._single_flight("fake", client, dict(self.kwargs)))
+            await asyncio.sleep(0.01)
+            leader.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await leader
+            return await waiter
+
+        self.assertEqual(self.run_on_loop(scenario()).model, "gpt-4o-mini")
+        self.assertEqual(len(client.calls), 2)
+
+    def test_retry_honours_retry_after(self):
+        client = FakeClient(failures=[rate_limited("0.2")])
+
+        started = time.monotonic()
+        result = self.run_on_loop(self.scheduler._single_flight("fake", client, dict(self.kwargs)))
+        self.assertGreaterEqual(time.monotonic() - started, 0.2)
+        self.assertEqual(result.model, "gpt-4o-mini")
+        self.assertEqual((self.scheduler.stats["retries"], self.scheduler.stats["upstream"]), (1, 2))
+
+        # The failed attempt's estimate (100 + 100 tokens) was refunded:
+        # only the 50 tokens actually used are charged
+        self.assertGreaterEqual(self.scheduler._tokens.tokens, 6000 - 50)
+
+        # Retry-After is capped at max_delay; without it, jittered exponential backoff
+        self.assertLessEqual(self.scheduler._backoff(1, rate_limited("3600")), self.scheduler.max_delay + 0.01)
+        self.assertLessEqual(self.scheduler._backoff(3, RuntimeError()), 0.08)
+
+    def test_retries_give_up(self):
+        self.scheduler.max_retries = 1
+        client = FakeClient(failures=[rate_limited("0"), rate_limited("0")])
+        with self.assertRaises(RateLimitError):
+            self.run_on_loop(self.scheduler._single_flight("fake", client, dict(self.kwargs)))
+        self.assertEqual(len(client.calls), 2)
+        self.assertEqual(self.scheduler.usage, {})
+
+    def test_usage_per_model(self):
+        client = FakeClient()
+        for model, content in (("gpt-4o-mini", "a"), ("gpt-4o-mini", "b"), ("gpt-4o", "a")):
+            self.run_on_loop(self.scheduler._single_flight("fake", client, {"model": model, "input": [{"content": content}]}))
+
+        self.assertEqual(self.scheduler.usage, {
+            "gpt-4o-mini": {"calls": 2, "input_tokens": 60, "output_tokens": 40},
+            "gpt-4o": {"calls": 1, "input_tokens": 30, "output_tokens": 20},
+        })
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,169 @@
+import unittest
+import os
+import sys
+import threading
+from concurrent.futures import Future
+from types import SimpleNamespace
+from unittest import mock
+
+# Add backend root to path so we can import src as a package
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+from src.sessions import SessionCache
+
+
+def session(speculative=None):
+    return {
+        "message": "Allow web to reach db", "context": {}, "profile": "fast", "summary": "",
+        "speculative": speculative, "cancel_event": threading.Event(),
+    }
+
+
+class TestSessionCache(unittest.TestCase):
+
+    def test_size_bound_drops_least_recently_used(self):
+        cache = SessionCache(max_sessions=2)
+        pending = Future()
+        cache["a"] = session(pending)
+        cache["b"] = session()
+        self.assertIsNotNone(cache.get("a"))
+        cache["c"] = session()
+
+        self.assertEqual(len(cache), 2)
+        self.assertNotIn("b", cache)
+        self.assertIn("a", cache)
+
+        # Dropping a session cancels its speculative run
+        first = cache.get("a")
+        cache["d"] = session()
+        cache["e"] = session()
+        self.assertIsNone(cache.get("a"))
+        self.assertTrue(first["cancel_event"].is_set())
+        self.assertTrue(pending.cancelled())
+
+        # Popped sessions are the caller's to cancel
+        kept = cache.pop("d")
+        self.assertFalse(kept["cancel_event"].is_set())
+
+    def test_sessions_expire(self):
+        cache = SessionCache(ttl=60)
+        with mock.patch("src.sessions.time.monotonic", return_value=1000.0):
+            cache["a"] = session()
+        with mock.patch("src.sessions.time.monotonic", return_value=1050.0):
+            self.assertIsNotNone(cache.get("a"))
+        # Age counts from the last use
+        with mock.patch("src.sessions.time.monotonic", return_value=1100.0):
+            self.assertIsNotNone(cache.get("a"))
+        with mock.patch("src.sessions.time.monotonic", return_value=1161.0):
+            self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+
+class TestSpeculativeFallback(unittest.TestCase):
+
+    def test_failed_speculative_run_is_redone_inline(self):
+        from src.routers import policies
+
+        failed = Future()
+        failed.set_exception(RuntimeError("LLM unavailable"))
+        cached = session(failed)
+        result = {"ir": {}, "configs": {"palo_alto": ""}, "batfish_warnings": []}
+        store = mock.Mock()
+        store.append.return_value = {"policy_id": "p", "version": 1}
+
+        with mock.patch.object(policies, "_translate", return_value=result) as inline, \
+                mock.patch.object(policies, "get_policy_store", return_value=store):
+            with self.assertLogs(policies.logger, "WARNING"):
+                self.assertEqual(policies._run_translation(cached, "s1", failed, "fast")[0], result)
+            inline.assert_called_once_with(cached["message"], cached["context"], "fast")
+            self.assertIsNone(cached["speculative"])
+
+            # Cancelled runs (the session was dropped) aren't redone on stale input,
+            # whether they stopped mid-pipeline or never started
+            stopped, never_started = Future(), Future()
+            stopped.set_exception(policies.TranslationCancelled())
+            never_started.cancel()
+            for cancelled in (stopped, never_started):
+                with self.assertRaises(policies.TranslationCancelled):
+                    policies._run_translation(session(cancelled), "s2", cancelled, "fast")
+            self.assertEqual(inline.call_count, 1)
+
+    def test_superseded_session_gets_a_conflict(self):
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+        from src.routers import policies
+
+        cancelled = Future()
+        cancelled.set_exception(policies.TranslationCancelled())
+        cache = SessionCache()
+        cache["s1"] = session(cancelled)
+
+        app = FastAPI()
+        app.include_router(policies.router)
+        with mock.patch.object(policies, "CONFIRM_CACHE", cache), \
+                mock.patch.object(policies, "_translate") as inline:
+            response = TestClient(app).post("/policies/translate", json={"session_id": "s1", "confirm": True})
+        self.assertEqual(response.status_code, 409)
+        inline.assert_not_called()
+
+
+class TestReconfirm(unittest.TestCase):
+
+    def setUp(self):
+        from src import schemas
+        from src.routers import policies
+        self.schemas, self.policies = schemas, policies
+        self.submitted = []
+
+        def submit(fn, *args):
+            future = Future()
+            self.submitted.append((future, args))
+            return future
+
+        for patcher in (
+            mock.patch.object(policies, "summarize_intent", return_value="summary"),
+            mock.patch.object(policies.SPECULATION_EXECUTOR, "submit", side_effect=submit),
+            mock.patch.object(policies.settings, "SPECULATIVE_TRANSLATION", True),
+            mock.patch.object(policies, "CONFIRM_CACHE", SessionCache()),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def confirm(self, message, session_id=None):
+        request = self.schemas.PolicySummaryRequest(
+            message=message, context={"details": {"objects": {}}}, batfish_profile="fast", session_id=session_id
+        )
+        return self.policies.confirm_policy(request, SimpleNamespace(state=SimpleNamespace())).session_id
+
+    def test_superseded_run_is_cancelled(self):
+        session_id = self.confirm("Allow web to reach db")
+        first = self.policies.CONFIRM_CACHE.get(session_id)
+
+        # Same inputs: the running translation is kept
+        self.confirm("Allow web to reach db", session_id)
+        self.assertIs(self.policies.CONFIRM_CACHE.get(session_id)["speculative"], first["speculative"])
+        self.assertEqual(len(self.submitted), 1)
+
+        # Edited before it finished: stopped, and the edit is translated from scratch
+        self.confirm("Allow web to reach db over HTTPS", session_id)
+        self.assertTrue(first["cancel_event"].is_set())
+        self.assertTrue(first["speculative"].cancelled())
+        self.assertIsNone(self.submitted[-1][1][0])
+
+    def test_edits_build_on_a_flat_snapshot(self):
+        session_id = self.confirm("Allow web to reach db")
+        result = {"ir": {}, "configs": {}}
+        self.submitted[-1][0].set_result(result)
+
+        for message in ("Allow web to reach db over HTTPS", "Allow web to reach db over SSH"):
+            self.confirm(message, session_id)
+            previous = self.policies.CONFIRM_CACHE.get(session_id)["previous"]
+            self.assertEqual(sorted(previous), ["context", "nl_policy", "profile", "result"])
+            self.assertIs(self.submitted[-1][1][0], previous)
+            self.submitted[-1][0].set_result(result)
+        self.assertEqual(previous["nl_policy"], "Allow web to reach db over HTTPS")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), '..')
+
+# Deterministic engine modules that CLI/batch jobs and workers import
+ENGINE_MODULES = [
+    "src.engine.schemas",
+    "src.engine.compiler.runner",
+    "src.engine.linter.runner",
+    "src.engine.safety.runner",
+    "src.engine.comparator",
+    "src.engine.pipeline",
+    "src.engine.batch",
+]
+
+# Modules that must only be loaded on first LLM call / Batfish session
+HEAVY_MODULES = ["openai", "httpx", "pandas", "pybatfish", "numpy"]
+
+# Import-time budget (seconds) for the engine in a fresh interpreter
+IMPORT_BUDGET = 1.0
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+elapsed = time.perf_counter() - start
+print(json.dumps({{"elapsed": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+class TestStartup(unittest.TestCase):
+
+    def _probe(self):
+        env = {k: v for k, v in os.environ.items() if k != "OPENAI_API_KEY"}
+        out = subprocess.run(
+            [sys.executable, "-c", PROBE.format(modules=ENGINE_MODULES, heavy=HEAVY_MODULES)],
+            cwd=BACKEND_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return json.loads(out.stdout.strip().splitlines()[-1])
+
+    def test_engine_imports_without_secrets_or_heavy_deps(self):
+        result = self._probe()
+        self.assertEqual(result["loaded"], [])
+
+    def test_engine_import_time_budget(self):
+        # Best of three to keep the check stable on a noisy machine
+        elapsed = min(self._probe()["elapsed"] for _ in range(3))
+        print(f"\nEngine import time: {elapsed * 1000:.0f} ms (budget {IMPORT_BUDGET * 1000:.0f} ms)")
+        self.assertLess(elapsed, IMPORT_BUDGET)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+import json
+import os
+import sys
+
+# Add backend root to path so we can import src as a package
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.engine.context.pruner import prune_context
+from src.engine.schemas import ResolverOutput
+from src.engine.tiering import ModelRouter, complexity, resolver_failure
+
+CONTEXT_FILE = os.path.join(os.path.dirname(__file__), '../../data/prod/ecommerce-platform.json')
+
+SIMPLE = "Allow App_Server_Private to reach DB_Cluster_Primary over Postgres"
+COMPLEX = (
+    "Allow Web_Cluster_Public and Admin_Jumpbox to reach App_Server_Private over HTTP, HTTPS and SSH, "
+    "but not from Untrust, and block Redis_Cache except during Maintenance_Window unless it is port 6380"
+)
+
+
+class TestTiering(unittest.TestCase):
+
+    def setUp(self):
+        with open(CONTEXT_FILE, 'r') as f:
+            self.context = json.load(f)
+        self.router = ModelRouter.from_models(["fast", "strong"], thresholds=[8.0])
+
+    def _score(self, text):
+        return complexity(text, prune_context(text, self.context))
+
+    def test_simple_policies_start_on_the_fastest_tier(self):
+        self.assertEqual(self.router.initial_tier(self._score(SIMPLE)), 0)
+        self.assertEqual(self.router.initial_tier(self._score(COMPLEX)), 1)
+
+    def test_failures_escalate_once_per_tier(self):
+        calls = []
+
+        def call(model):
+            calls.append(model)
+            return ResolverOutput(action="allow" if model == "strong" else None,
+                                  sources=["a"], destinations=["b"], raw_policy="")
+
+        result, tier = self.router.run(0, "resolver", call, resolver_failure)
+        self.assertEqual(calls, ["fast", "strong"])
+        self.assertEqual((result.action, tier), ("allow", 1))
+
+        calls.clear()
+        _, tier = self.router.run(1, "resolver", lambda m: call("fast"), resolver_failure)
+        self.assertEqual(tier, 1)
+
+        stages = {t["model"]: t["stages"]["resolver"] for t in self.router.metrics()}
+        self.assertEqual(stages["fast"]["escalations"], 1)
+        self.assertEqual(stages["strong"]["calls"], 2)
+
+    def test_routine_ambiguities_do_not_escalate(self):
+        routine = ResolverOutput(action="allow", sources=["a"], destinations=["b"],
+                                 ambiguities=["No schedule specified.", "Logging not mentioned."], raw_policy="")
+        failed = routine.model_copy(update={"ambiguities": ["Object 'HR_Laptops' not found in context."]})
+        self.assertIsNone(resolver_failure(routine))
+        self.assertIsNotNone(resolver_failure(failed))
+
+
+if __name__ == '__main__':
+    unittest.main()
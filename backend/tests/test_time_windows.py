@@ -0,0 +1,130 @@
+import unittest
+import datetime
+import os
+import random
+import sys
+
+import numpy as np
+
+# Add backend root to path so we can import src as a package
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.engine.compiler.palo_alto import PaloAltoCompiler
+from src.engine.linter.runner import lint_ir_all
+from src.engine.schemas import IRBuilderOutput, IRRule
+from src.engine.timewindows import TimeWindowError, parse_time_window
+
+CONTEXT = {
+    "objects": {"Web": "10.0.0.10", "Backup": "10.0.1.20"},
+    "zones": {"Trust": ["Backup"], "DMZ": ["Web"]},
+    "services": {"HTTPS": {"protocol": "tcp", "port": 443}},
+    "time_windows": {
+        "Business_Hours": "Mon-Fri 08:00-18:00",
+        "night": "Daily 22:00-06:00",
+        "Weekend_Maintenance": "Sat-Sun 22:00-06:00",
+        "Holiday_Freeze": "2023-12-20-2024-01-05",
+        "Broken": "Someday 08:00-10:00",
+    },
+}
+
+
+def make_ir(schedule):
+    rule = IRRule(
+        id="r1", action="allow", src=["Backup"], dst=["Web"], protocol="tcp", dst_ports=[443],
+        src_zone="Trust", dst_zone="DMZ", direction="outbound", schedule=schedule, log=False, priority=100,
+    )
+    return IRBuilderOutput(rules=[rule], metadata={"raw_policy": "", "warnings": [], "context_used": True})
+
+
+class TestTimeWindows(unittest.TestCase):
+
+    def test_is_active(self):
+        # 2024-01-08 is a Monday
+        monday = datetime.datetime(2024, 1, 8)
+        cases = [
+            ("Mon-Fri 08:00-18:00", monday.replace(hour=8), True),
+            ("Mon-Fri 08:00-18:00", monday.replace(hour=18), False),
+            ("Mon-Fri 08:00-18:00", monday - datetime.timedelta(days=1, hours=-9), False),
+            ("Daily 22:00-06:00", monday.replace(hour=5, minute=59), True),
+            ("Sat-Sun 22:00-06:00", monday.replace(hour=3), True),
+            ("Sat-Sun 22:00-06:00", monday.replace(hour=23), False),
+            ("Daily 00:00-23:59", monday.replace(hour=23, minute=59), True),
+            ("2023-12-20-2024-01-05", datetime.datetime(2024, 1, 5, 23, 59), True),
+            ("2023-12-20-2024-01-05", datetime.datetime(2024, 1, 6), False),
+        ]
+        for spec, t, expected in cases:
+            with self.subTest(spec=spec, t=t):
+                self.assertEqual(parse_time_window(spec).is_active(t), expected)
+
+    def test_active_mask_matches_is_active(self):
+        rng = random.Random(7)
+        start = datetime.datetime(2023, 12, 1)
+        times = [start + datetime.timedelta(minutes=rng.randrange(60 * 24 * 60)) for _ in range(2000)]
+        for spec in CONTEXT["time_windows"].values():
+            if spec.startswith("Someday"):
+                continue
+            window = parse_time_window(spec)
+            with self.subTest(spec=spec):
+                mask = window.active_mask(np.array(times, dtype="datetime64[m]"))
+                self.assertEqual(mask.tolist(), [window.is_active(t) for t in times])
+
+    def test_active_mask_keeps_local_time(self):
+        import pandas as pd
+
+        window = parse_time_window("Mon-Fri 08:00-18:00")
+        tokyo = datetime.timezone(datetime.timedelta(hours=9))
+        # 08:30 Monday in Tokyo is 23:30 Sunday in UTC
+        times = [datetime.datetime(2024, 1, 8, 8, 30, tzinfo=tokyo), datetime.datetime(2024, 1, 8, 7, 59, tzinfo=tokyo)]
+        expected = [window.is_active(t) for t in times]
+        self.assertEqual(expected, [True, False])
+
+        column = pd.Series(pd.to_datetime(["2024-01-08 08:30", "2024-01-08 07:59"])).dt.tz_localize("Asia/Tokyo")
+        self.assertEqual(window.active_mask(column).tolist(), expected)
+        self.assertEqual(window.active_mask(pd.DatetimeIndex(column)).tolist(), expected)
+        self.assertEqual(window.active_mask(times).tolist(), expected)
+
+        freeze = parse_time_window("2023-12-20-2024-01-05")
+        new_year = pd.Series(pd.to_datetime(["2024-01-06 00:30"])).dt.tz_localize("Asia/Tokyo")
+        self.assertEqual(freeze.active_mask(new_year).tolist(), [False])
+
+    def test_invalid_windows(self):
+        for spec in ["Someday 08:00-10:00", "Mon 25:00-26:00", "Mon 08:00-08:00", "2024-01-05-2023-12-20", ""]:
+            with self.subTest(spec=spec):
+                with self.assertRaises(TimeWindowError):
+                    parse_time_window(spec)
+
+    def test_schedule_references_are_linted(self):
+        cases = [
+            ("Business_Hours", None),
+            ("Lunch", "Rule r1: schedule 'Lunch' is not a time window of the context."),
+            ("Broken", "Rule r1: time window 'Broken' is invalid: unknown day 'someday'."),
+        ]
+        for schedule, expected in cases:
+            with self.subTest(schedule=schedule):
+                warnings = lint_ir_all(make_ir(schedule), context=CONTEXT)[1]["palo_alto"]
+                schedule_warnings = [w for w in warnings if "time window" in w]
+                self.assertEqual(schedule_warnings, [expected] if expected else [])
+
+    def test_schedule_objects_are_compiled(self):
+        compiler = PaloAltoCompiler()
+        cases = [
+            ("night", ["set schedule night schedule-type recurring daily [ 00:00-06:00 22:00-23:59 ]"]),
+            ("Weekend_Maintenance", [
+                "set schedule Weekend_Maintenance schedule-type recurring weekly monday 00:00-06:00",
+                "set schedule Weekend_Maintenance schedule-type recurring weekly saturday 22:00-23:59",
+                "set schedule Weekend_Maintenance schedule-type recurring weekly sunday [ 00:00-06:00 22:00-23:59 ]",
+            ]),
+            ("Holiday_Freeze", [
+                "set schedule Holiday_Freeze schedule-type non-recurring 2023/12/20@00:00-2024/01/05@23:59",
+            ]),
+            ("Broken", []),
+        ]
+        for schedule, expected in cases:
+            with self.subTest(schedule=schedule):
+                config = compiler.compile_policy(make_ir(schedule), context=CONTEXT)
+                self.assertEqual([l for l in config.splitlines() if l.startswith("set schedule")], expected)
+                self.assertIn(f"set rulebase security rules r1 schedule {schedule}", config)
+
+
+if __name__ == '__main__':
+    unittest.main()
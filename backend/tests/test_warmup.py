@@ -0,0 +1,46 @@
+import unittest
+import os
+import sys
+import tempfile
+
+# Add backend root to path so we can import src as a package
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.storage.contexts import ContextStore
+from src.warmup import WarmupState, warm_up
+
+PROD_DIR = os.path.join(os.path.dirname(__file__), '../../data/prod')
+
+
+class TestWarmup(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = tmp.name
+        self.store = ContextStore(self.root)
+
+    def test_contexts_are_registered_and_indexed(self):
+        state = warm_up(WarmupState(), self.store, PROD_DIR, batfish=False)
+
+        names = sorted(f[:-5] for f in os.listdir(PROD_DIR) if f.endswith('.json'))
+        self.assertTrue(state.ready)
+        self.assertEqual(sorted(state.contexts), names)
+        self.assertTrue(all(s["error"] is None for s in state.summary()["steps"]))
+        self.assertEqual(set(self.store._indexes), set(state.contexts.values()))
+
+        # A restarted worker finds the same versions instead of new ones
+        again = warm_up(WarmupState(), ContextStore(self.root), PROD_DIR, batfish=False)
+        self.assertEqual(again.contexts, state.contexts)
+        self.assertTrue(all(v["version"] == 1 for v in self.store.list()))
+
+    def test_missing_directory_is_reported_but_ready(self):
+        state = warm_up(WarmupState(), self.store, os.path.join(self.root, "missing"), batfish=False)
+
+        self.assertTrue(state.ready)
+        self.assertEqual(state.contexts, {})
+        self.assertIn("directory not found", state.summary()["steps"][0]["error"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,7 +5,14 @@ import type {
 } from "./types";
 
 export async function summarizePolicy(payload: PolicySummaryRequestPayload) {
-  const res = await axiosClient.post("/policies/confirm", payload);
+  // The API takes exactly one of details or context_id: a context given
+  // only by its description is sent with empty details
+  const { context } = payload;
+  const body =
+    context.details || context.context_id
+      ? payload
+      : { ...payload, context: { ...context, details: {} } };
+  const res = await axiosClient.post("/policies/confirm", body);
 
   return res.data;
 }
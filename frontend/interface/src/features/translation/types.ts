@@ -2,6 +2,7 @@ export type Context = {
   description?: string;
   details?: Record<string, any>;
   filename?: string;
+  context_id?: string;
 };
 
 export type PolicySummaryRequestPayload = {